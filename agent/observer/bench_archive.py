@@ -0,0 +1,153 @@
+"""
+レポートアーカイブ（report_archive.py）のベンチマーク
+
+合成の ObserverReport を --runs 件（既定 365 = 1 年分の日次。--every-hours 1 なら毎時）追記し、
+問い合わせ（cooling / churn 30 日 / durations 30 日・365 日）の時間を測る。
+レポートは毎回 --nodes 件の Node から冷却アラートと status_proposals を選び、前回の run の 8 割を引き継ぐ。
+
+記録する値:
+  append_ms  1 件の追記（gzip と node_events の引き継ぎを含む）の中央値
+  *_ms       各問い合わせの中央値（--repeat 回）
+  size_mb    アーカイブのファイルサイズ
+
+問い合わせの最大が --max-query-ms（既定 50）を超えたら exit 1。
+
+実行:
+  python3 agent/observer/bench_archive.py
+  python3 agent/observer/bench_archive.py --runs 8760 --every-hours 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from report_archive import ReportArchive  # noqa: E402
+
+SUGGESTED_STATUSES = ("READY", "WAITING_EXTERNAL", "NEEDS_DECISION", "COOLING")
+
+
+def synthetic_report(
+    rng: random.Random,
+    observed_at: datetime,
+    node_ids: list[str],
+    previous: dict[str, Any] | None,
+    cooling_count: int,
+    proposal_count: int,
+) -> dict[str, Any]:
+    """前回の冷却アラート・提案の 8 割を引き継ぎ、残りをランダムに選んだ ObserverReport。"""
+
+    def pick(prev_items: list[str], count: int) -> list[str]:
+        kept = [node_id for node_id in prev_items if rng.random() < 0.8]
+        chosen = set(kept)
+        while len(kept) < count:
+            node_id = rng.choice(node_ids)
+            if node_id not in chosen:
+                chosen.add(node_id)
+                kept.append(node_id)
+        return kept[:count]
+
+    prev_cooling = [a["node_id"] for a in previous["cooling_alerts"]] if previous else []
+    prev_proposals = {p["node_id"]: p["suggested_status"] for p in previous["status_proposals"]} if previous else {}
+    cooling = pick(prev_cooling, cooling_count)
+    proposals = pick(list(prev_proposals), proposal_count)
+    return {
+        "node_count": len(node_ids),
+        "summary": f"合成レポート {observed_at:%Y-%m-%d %H:%M}",
+        "suggested_next": {"node_id": rng.choice(node_ids), "title": "合成ノード", "reason": "", "next_action": ""},
+        "status_proposals": [
+            {
+                "node_id": node_id,
+                "title": "合成ノード",
+                "current_status": "IN_PROGRESS",
+                "suggested_status": prev_proposals.get(node_id) or rng.choice(SUGGESTED_STATUSES),
+                "reason": "",
+            }
+            for node_id in proposals
+        ],
+        "cooling_alerts": [
+            {"node_id": node_id, "title": "合成ノード", "temperature": rng.randint(0, 39), "last_updated": None,
+             "message": "温度 30 / 8 日間更新なし"}
+            for node_id in cooling
+        ],
+        "warnings": [],
+        "meta": {"observed_at": observed_at.isoformat(), "freshness_minutes": 0},
+    }
+
+
+def _median_ms(fn: Any, repeat: int) -> tuple[float, Any]:
+    samples: list[float] = []
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Observer レポートアーカイブのベンチマーク")
+    parser.add_argument("--runs", type=int, default=365, help="追記するレポート数（既定: 365）")
+    parser.add_argument("--every-hours", type=float, default=24, help="レポートの間隔（時間。既定: 24）")
+    parser.add_argument("--nodes", type=int, default=2000, help="Node の数（既定: 2000）")
+    parser.add_argument("--cooling", type=int, default=80, help="1 レポートの冷却アラート数（既定: 80）")
+    parser.add_argument("--proposals", type=int, default=40, help="1 レポートの status_proposals 数（既定: 40）")
+    parser.add_argument("--repeat", type=int, default=20, help="各問い合わせの試行回数（中央値を採用）")
+    parser.add_argument("--max-query-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    node_ids = [f"{i:08d}-0000-4000-8000-{rng.getrandbits(48):012x}" for i in range(args.nodes)]
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = ReportArchive(tmp)
+        previous = None
+        append_samples: list[float] = []
+        for i in range(args.runs):
+            report = synthetic_report(
+                rng, start + timedelta(hours=args.every_hours * i), node_ids, previous, args.cooling, args.proposals
+            )
+            t0 = time.perf_counter()
+            archive.append(report, report_id=f"r{i}", duration_ms=rng.lognormvariate(7, 0.4))
+            append_samples.append((time.perf_counter() - t0) * 1000)
+            previous = report
+        target = previous["cooling_alerts"][0]["node_id"] if previous else node_ids[0]
+
+        results: dict[str, Any] = {
+            "runs": args.runs,
+            "every_hours": args.every_hours,
+            "append_ms": round(statistics.median(append_samples), 3),
+        }
+        queries = {
+            "cooling_ms": lambda: archive.cooling(target),
+            "churn_30d_ms": lambda: archive.churn(30),
+            "durations_30d_ms": lambda: archive.durations(30),
+            "durations_365d_ms": lambda: archive.durations(365),
+        }
+        worst = 0.0
+        for name, fn in queries.items():
+            ms, _ = _median_ms(fn, args.repeat)
+            results[name] = round(ms, 3)
+            worst = max(worst, ms)
+        archive.close()
+        results["size_mb"] = round(archive.path.stat().st_size / 1e6, 2)
+
+    for key, value in results.items():
+        print(f"{key:>18}: {value}")
+    if worst > args.max_query_ms:
+        print(f"REGRESSION: slowest query {worst:.1f}ms > {args.max_query_ms:g}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Observer のエンドツーエンド・ベンチマーク（スタブ API 相手に observe() + --save）
+
+stub_api.py をサブプロセスで立て、main.run_once()（observe → stdout → 保存 → latest の healthcheck）を
+Node 数ごとに別プロセスで 1 回ずつ実行する。本番デプロイや Supabase は要らない。
+
+記録する値（Node 数ごと）:
+  wall_ms       run_once 1 回の所要時間（stdout への出力を含む）
+  peak_rss_mb   測定プロセスの最大 RSS（スタブは別プロセスなので含まない）
+  alloc_peak_mb tracemalloc で測った Python のメモリ確保のピーク（wall_ms とは別の回で測る）
+  requests      スタブが受けたリクエスト数（エンドポイント別の内訳も出す）
+
+ベースライン（bench_e2e_baseline.json）と比べ、悪化していれば exit 1:
+  wall_ms       ベースラインの --time-tolerance 倍（既定 1.5）かつ +50ms を超えたら
+  メモリ        ベースラインの --memory-tolerance 倍（既定 1.2）かつ +5MB を超えたら
+  requests      --error-rate 0 のときは 1 件でも違えば（リトライが入らないので決定的）
+ベースラインはマシンに依存する。測る環境を変えたら --update-baseline で取り直す。
+
+実行:
+  python3 agent/observer/bench_e2e.py                       # 50 1000 10000 100000
+  python3 agent/observer/bench_e2e.py 1000 10000 --latency-ms 20 --error-rate 0.01
+  python3 agent/observer/bench_e2e.py 10000 100000 --compact   # 保存を main.py --compact で（gzip・差分）
+  python3 agent/observer/bench_e2e.py --update-baseline
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from stub_api import DEFAULT_TRAY_WEIGHTS
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_SIZES = [50, 1_000, 10_000, 100_000]
+BASELINE_PATH = HERE / "bench_e2e_baseline.json"
+TIME_SLACK_MS = 50.0
+MEMORY_SLACK_MB = 5.0
+STUB_START_TIMEOUT_SECONDS = 30
+BASELINE_FIELDS = ("wall_ms", "peak_rss_mb", "alloc_peak_mb", "requests")
+
+
+# ─── 測定プロセス（--measure）──────────────────────────────────
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS は bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _measure(estimator: str, compact: bool) -> dict[str, Any]:
+    # NEXT_BASE_URL などはモジュール読み込み時に読まれるので、環境変数を整えてから import する
+    import main
+
+    args = main.parse_args(["--save", "--estimator", estimator, "--compact" if compact else "--no-compact"])
+    args.cache_dir = None
+    args.metrics_out = None
+    base = main.BASE_URL.rstrip("/")
+
+    async with main.make_client() as raw:
+        await raw.post(f"{base}/__stub/reset")
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            t0 = time.perf_counter()
+            await main.run_once(main.make_request_layer(raw), args)
+            wall_ms = (time.perf_counter() - t0) * 1000
+        peak_rss_mb = _peak_rss_mb()
+        stats = (await raw.get(f"{base}/__stub/stats")).json()
+
+        # tracemalloc は遅くなるので wall_ms とは別の回で測る
+        tracemalloc.start()
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            await main.run_once(main.make_request_layer(raw), args)
+        _, alloc_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "alloc_peak_mb": round(alloc_peak / (1024 * 1024), 1),
+        "requests": stats["total"],
+        "requests_by_endpoint": stats["requests"],
+        "bytes_in": stats["bytes_in"],
+        "bytes_out": stats["bytes_out"],
+        "injected_errors": stats["errors"],
+    }
+
+
+# ─── 親プロセス ────────────────────────────────────────────
+
+def _profile_key(args: argparse.Namespace) -> str:
+    """ベースラインを分けるキー（Node 数以外の条件）。"""
+    key = (
+        f"estimator={args.estimator} latency_ms={args.latency_ms:g} "
+        f"error_rate={args.error_rate:g} trays={args.trays}"
+    )
+    return key + " compact=1" if args.compact else key
+
+
+def _run_size(n: int, args: argparse.Namespace) -> dict[str, Any]:
+    stub = subprocess.Popen(
+        [
+            sys.executable, str(HERE / "stub_api.py"),
+            "--nodes", str(n),
+            "--trays", args.trays,
+            "--latency-ms", str(args.latency_ms),
+            "--error-rate", str(args.error_rate),
+            "--seed", str(args.seed),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert stub.stdout is not None
+        url = stub.stdout.readline().strip()
+        if not url.startswith("http"):
+            raise RuntimeError(f"stub_api.py did not start (exit {stub.poll()})")
+        env = {
+            **os.environ,
+            "NEXT_BASE_URL": url,
+            "OBSERVER_TOKEN": "bench",
+            "OBSERVER_CACHE_DIR": "",
+            "OBSERVER_METRICS_OUT": "",
+        }
+        proc = subprocess.run(
+            [
+                sys.executable, str(Path(__file__).resolve()), "--measure", "--estimator", args.estimator,
+                *(["--compact"] if args.compact else []),
+            ],
+            env=env,
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"measure failed at {n} nodes (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        stub.terminate()
+        stub.wait(timeout=STUB_START_TIMEOUT_SECONDS)
+
+
+def _regressions(
+    n: int,
+    result: dict[str, Any],
+    base: dict[str, Any] | None,
+    args: argparse.Namespace,
+) -> list[str]:
+    if base is None:
+        return []
+    out: list[str] = []
+    limit = max(base["wall_ms"] * args.time_tolerance, base["wall_ms"] + TIME_SLACK_MS)
+    if result["wall_ms"] > limit:
+        out.append(f"{n}: wall_ms {result['wall_ms']} > {limit:.1f} (baseline {base['wall_ms']})")
+    for key in ("peak_rss_mb", "alloc_peak_mb"):
+        limit = max(base[key] * args.memory_tolerance, base[key] + MEMORY_SLACK_MB)
+        if result[key] > limit:
+            out.append(f"{n}: {key} {result[key]} > {limit:.1f} (baseline {base[key]})")
+    # エラー注入なしならリトライが起きず、リクエスト数は Node 数だけで決まる
+    if args.error_rate == 0 and result["requests"] != base["requests"]:
+        out.append(f"{n}: requests {result['requests']} != baseline {base['requests']}")
+    return out
+
+
+def run(args: argparse.Namespace) -> bool:
+    baseline_all: dict[str, Any] = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    key = _profile_key(args)
+    baseline = baseline_all.get(key, {})
+
+    print(f"profile: {key}")
+    print(f"{'nodes':>8} {'wall_ms':>10} {'rss_mb':>8} {'alloc_mb':>9} {'requests':>9}  vs baseline (wall / rss / alloc)")
+    results: dict[str, dict[str, Any]] = {}
+    problems: list[str] = []
+    for n in args.sizes:
+        result = _run_size(n, args)
+        results[str(n)] = result
+        base = baseline.get(str(n))
+        if base:
+            ratio = " / ".join(
+                f"{result[k] / base[k]:.2f}x" if base[k] else "-"
+                for k in BASELINE_FIELDS[:3]
+            )
+        else:
+            ratio = "(no baseline)"
+        print(
+            f"{n:>8} {result['wall_ms']:>10.1f} {result['peak_rss_mb']:>8.1f} "
+            f"{result['alloc_peak_mb']:>9.1f} {result['requests']:>9}  {ratio}",
+            flush=True,
+        )
+        problems += _regressions(n, result, base, args)
+
+    if args.update_baseline:
+        for n, r in results.items():
+            baseline[n] = {k: r[k] for k in BASELINE_FIELDS}
+        baseline_all[key] = dict(sorted(baseline.items(), key=lambda kv: int(kv[0])))
+        args.baseline.write_text(json.dumps(baseline_all, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline updated: {args.baseline}")
+        return True
+    for p in problems:
+        print(f"REGRESSION {p}", file=sys.stderr)
+    return not problems
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Observer のエンドツーエンド・ベンチマーク（スタブ API）")
+    parser.add_argument("sizes", nargs="*", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--estimator", choices=("remote", "local", "verify"), default="remote")
+    parser.add_argument("--trays", default=DEFAULT_TRAY_WEIGHTS, help="tray ごとの重み（stub_api.py --trays）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="スタブの応答レイテンシ（ms）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="スタブが 503 を返す割合")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compact", action="store_true", help="main.py --compact で保存する（ベースラインは別に持つ）")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="今回の結果でベースラインを書き換える")
+    parser.add_argument("--time-tolerance", type=float, default=1.5)
+    parser.add_argument("--memory-tolerance", type=float, default=1.2)
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)  # 内部用（測定プロセス）
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.measure:
+        print(json.dumps(asyncio.run(_measure(args.estimator, args.compact))))
+        sys.exit(0)
+    sys.exit(0 if run(args) else 1)
@@ -0,0 +1,399 @@
+"""
+Observer 解析パイプラインのベンチマーク（Step 2〜5 の CPU 部分）
+
+analyze_nodes() + build_report() の 1 パス実装と、従来の「Node 全体を 5 回走査する」
+実装（_legacy_sections。1 パス化する前の observe() 本体をそのまま写したもの）を、
+合成 dashboard（10k〜100k Node）で比較する。
+
+- Preview は本番では HTTP（I/O 待ち）なので計測から外す。state_machine.preview_local で
+  事前に求めた応答を両方の実装に同じように渡す。
+- 出力（meta を除く ObserverReport）が 1 バイトでも違えば exit 1。
+- 1 パス実装は Step 1 の解析方法（--engine）ごとにも測る: row（analyze_node）/ columnar
+  （scoring_columns.py。NumPy があれば使う）/ columnar-array（NumPy を使わない columnar）。
+  Step 1 の解析だけの時間（analyze_ms）も出す。
+- --memory: Node を持ち続けたときのメモリ（tracemalloc）。API の応答と同じく JSON から読んだ Node を、
+  生の dict / 使うキーだけの dict（以前の --per-tenant）/ ObservedNode で持った場合と、解析結果（NodeAnalysis）。
+- --tree: 親子の反映（apply_tree）だけの時間。Node 数と同じ本数の親子リンク（ランダムな森 + 机の上にない子
+  + 循環）と、1 本の鎖（深さ = Node 数）で測り、(Node 数 + リンク数) あたりの時間が一定であることを見る。
+- --shadow N: build_report の時間を、shadow の版（scoring_rules.py）なしと N 版ありで比べる（親子を反映した解析結果で）。
+
+実行:
+  python3 agent/observer/bench_pipeline.py                 # 10000 50000 100000
+  python3 agent/observer/bench_pipeline.py 20000 --repeat 5
+  python3 agent/observer/bench_pipeline.py --engine row --engine columnar
+  python3 agent/observer/bench_pipeline.py 100000 --memory
+  python3 agent/observer/bench_pipeline.py 10000 100000 --tree
+  python3 agent/observer/bench_pipeline.py 100000 --shadow 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import main
+from state_machine import preview_local
+
+ENGINES = ("row", "columnar", "columnar-array")
+# 以前の --per-tenant が Node ごとに残していたキー（--memory の比較用）
+SLIM_FIELDS = ("id", "title", "name", "status", "temperature", "updated_at", "created_at")
+
+TRAY_BY_STATUS = {
+    "IN_PROGRESS": "in_progress",
+    "NEEDS_DECISION": "needs_decision",
+    "WAITING_EXTERNAL": "waiting_external",
+    "COOLING": "cooling",
+}
+SYNTHETIC_STATUSES = (
+    "CAPTURED", "CLARIFYING", "READY", "IN_PROGRESS", "DELEGATED", "WAITING_EXTERNAL",
+    "SCHEDULED", "BLOCKED", "NEEDS_DECISION", "NEEDS_REVIEW", "COOLING", "REACTIVATED",
+)
+
+
+def synthetic_trays(n: int, now: datetime, seed: int = 42) -> dict[str, list[dict[str, Any]]]:
+    """dashboard API と同じ形の trays を n 件生成する。日時は now から「日数 + 12 時間」ずらす（日境界を避ける）。"""
+    rng = random.Random(seed)
+    trays: dict[str, list[dict[str, Any]]] = {
+        "in_progress": [], "needs_decision": [], "waiting_external": [], "cooling": [], "other_active": [],
+    }
+    for i in range(n):
+        status = rng.choice(SYNTHETIC_STATUSES)
+        created = now - timedelta(days=rng.randint(5, 120), hours=12)
+        updated = now - timedelta(days=rng.randint(0, 30), hours=12)
+        r = rng.random()
+        node = {
+            "id": f"{i:08d}-0000-4000-8000-{rng.getrandbits(48):012x}",
+            "title": f"合成ノード {i}",
+            "status": status,
+            "temperature": None if r < 0.1 else rng.randint(0, 100),
+            "updated_at": None if r > 0.95 else updated.isoformat().replace("+00:00", "Z"),
+            "created_at": None if r > 0.98 else created.isoformat().replace("+00:00", "Z"),
+            "context": "…" * rng.randint(0, 40),
+            "last_memo": None,
+            "last_memo_at": None,
+        }
+        trays[TRAY_BY_STATUS.get(status, "other_active")].append(node)
+    return trays
+
+
+def precompute_previews(trays: dict[str, list[dict[str, Any]]], now: datetime) -> dict[str, dict[str, Any] | None]:
+    """node_id → Preview 応答（preview_local）。計測対象外。"""
+    out: dict[str, dict[str, Any] | None] = {}
+    for tray_nodes in trays.values():
+        for node in tray_nodes:
+            a = main.analyze_node(node, now)
+            try:
+                out[a.node_id] = preview_local(a.status, a.intent)
+            except ValueError:
+                out[a.node_id] = None
+    return out
+
+
+def _legacy_sections(
+    trays: dict[str, list[dict[str, Any]]],
+    preview_by_id: dict[str, dict[str, Any] | None],
+) -> dict[str, Any]:
+    """1 パス化する前の observe() の Step 2〜5（Preview は preview_by_id から引く）。"""
+    all_nodes: list[dict[str, Any]] = []
+    for tray_nodes in trays.values():
+        all_nodes.extend(tray_nodes)
+
+    status_proposals: list[dict[str, Any]] = []
+    for node in all_nodes:
+        node_id = node["id"]
+        title = main.get_title(node)
+        current_status = node.get("status", "")
+        days = main.days_since_update(node)
+        intent_parts: list[str] = []
+        if days is not None:
+            intent_parts.append(f"最終更新から{days}日経過")
+        temp = node.get("temperature")
+        if temp is not None:
+            intent_parts.append(f"温度{temp}")
+        intent_parts.append(f"現在{current_status}")
+        intent = "、".join(intent_parts)
+        preview = preview_by_id[node_id]
+        if preview is None:
+            continue
+        suggested = preview.get("suggested")
+        if suggested and suggested.get("status") != current_status:
+            status_proposals.append({
+                "node_id": node_id,
+                "title": title,
+                "current_status": current_status,
+                "suggested_status": suggested["status"],
+                "reason": suggested.get("reason", ""),
+            })
+
+    cooling_alerts: list[dict[str, Any]] = []
+    for node in all_nodes:
+        node_id = node["id"]
+        title = main.get_title(node)
+        temp = node.get("temperature")
+        days = main.days_since_update(node)
+        effective_dt, _ = main.get_effective_updated(node)
+        last_updated = effective_dt.isoformat() if effective_dt else node.get("updated_at", "")
+        is_cooling = False
+        reason_parts: list[str] = []
+        if temp is not None and temp < main.COOLING_THRESHOLD:
+            is_cooling = True
+            reason_parts.append(f"温度が{temp}に低下")
+        if days is not None and days >= main.COOLING_DAYS:
+            is_cooling = True
+            reason_parts.append(f"{days}日間更新がありません")
+        if is_cooling:
+            cooling_alerts.append({
+                "node_id": node_id,
+                "title": title,
+                "temperature": temp,
+                "last_updated": last_updated,
+                "message": f"「{title}」は{' / '.join(reason_parts)}。止めてよいですか？",
+            })
+
+    candidates = [
+        n for n in all_nodes
+        if (n.get("status") or "") not in main.SUGGESTED_NEXT_EXCLUDED_STATUSES
+    ]
+    suggested_next = None
+    if candidates:
+        scored: list[tuple[dict[str, Any], int, dict[str, Any], str]] = []
+        for node in candidates:
+            total, breakdown, sort_ts = main.compute_suggested_next_score(node)
+            scored.append((node, total, breakdown, sort_ts))
+        scored.sort(key=lambda x: (-x[1], x[3], x[0].get("id", "")))
+        best, total_score, breakdown, _ = scored[0]
+        title = main.get_title(best)
+        status = best.get("status", "")
+        suggested_next = {
+            "node_id": best["id"],
+            "title": title,
+            "reason": main.SUGGESTED_NEXT_REASONS.get(status, f"{status} のノードです"),
+            "next_action": main.get_next_action_for_status(status, title),
+            "debug": {"total": total_score, "breakdown": breakdown, "rule_version": "3-4.0"},
+        }
+
+    node_count = len(all_nodes)
+    tray_counts = {k: len(v) for k, v in trays.items()}
+    summary_parts = [f"机の上に {node_count} 件のノードがあります"]
+    if tray_counts.get("in_progress"):
+        summary_parts.append(f"実施中 {tray_counts['in_progress']} 件")
+    if tray_counts.get("needs_decision"):
+        summary_parts.append(f"判断待ち {tray_counts['needs_decision']} 件")
+    if tray_counts.get("waiting_external"):
+        summary_parts.append(f"外部待ち {tray_counts['waiting_external']} 件")
+    if cooling_alerts:
+        summary_parts.append(f"冷却確認 {len(cooling_alerts)} 件")
+    if status_proposals:
+        summary_parts.append(f"状態変更の提案 {len(status_proposals)} 件")
+    summary = "。".join(summary_parts) + "。"
+
+    warnings: list[dict[str, Any]] = []
+    by_status: dict[str, int] = {}
+    for node in all_nodes:
+        s = (node.get("status") or "UNKNOWN").strip() or "UNKNOWN"
+        by_status[s] = by_status.get(s, 0) + 1
+    status_sum = sum(by_status.values())
+    if status_sum != node_count:
+        warnings.append({"code": "COUNT_MISMATCH"})
+
+    return {
+        "suggested_next": suggested_next,
+        "status_proposals": status_proposals,
+        "cooling_alerts": cooling_alerts,
+        "summary": summary,
+        "node_count": node_count,
+        "warnings": warnings,
+    }
+
+
+def _analyze(nodes: list[dict[str, Any]], now: datetime, engine: str) -> list[main.NodeAnalysis]:
+    if engine == "columnar-array":
+        size = main.COLUMNAR_CHUNK_SIZE
+        return [
+            a
+            for i in range(0, len(nodes), size)
+            for a in main.analyze_nodes_columnar(nodes[i:i + size], now, use_numpy=False)
+        ]
+    return main.analyze_nodes(nodes, now, engine)
+
+
+def _single_pass_sections(
+    trays: dict[str, list[dict[str, Any]]],
+    preview_by_id: dict[str, dict[str, Any] | None],
+    now: datetime,
+    engine: str = "row",
+) -> dict[str, Any]:
+    all_nodes: list[dict[str, Any]] = []
+    for tray_nodes in trays.values():
+        all_nodes.extend(tray_nodes)
+    analyses = _analyze(all_nodes, now, engine)
+    previews = [preview_by_id[a.node_id] for a in analyses]
+    return main.build_report(analyses, previews, {k: len(v) for k, v in trays.items()})
+
+
+def _best_of(fn, repeat: int) -> tuple[float, Any]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def run(sizes: list[int], repeat: int, engines: list[str]) -> bool:
+    now = datetime.now(timezone.utc)
+    ok = True
+    if any(e.startswith("columnar") for e in engines):
+        main.analyze_nodes_columnar([], now)  # NumPy の import を計測に入れない
+    header = f"{'nodes':>8} {'legacy_ms':>10}" + "".join(f" {e + '_ms':>19} {'analyze_ms':>10}" for e in engines)
+    print(header + "  identical")
+    for n in sizes:
+        trays = synthetic_trays(n, now)
+        previews = precompute_previews(trays, now)
+        all_nodes = [node for tray_nodes in trays.values() for node in tray_nodes]
+        legacy_s, legacy = _best_of(lambda: _legacy_sections(trays, previews), repeat)
+        expected = json.dumps(legacy, ensure_ascii=False, indent=2).encode("utf-8")
+        line = f"{n:>8} {legacy_s * 1000:>10.1f}"
+        marks = []
+        for engine in engines:
+            single_s, single = _best_of(lambda: _single_pass_sections(trays, previews, now, engine), repeat)
+            analyze_s, _ = _best_of(lambda: _analyze(all_nodes, now, engine), repeat)
+            identical = json.dumps(single, ensure_ascii=False, indent=2).encode("utf-8") == expected
+            ok = ok and identical
+            line += f" {single_s * 1000:>19.1f} {analyze_s * 1000:>10.1f}"
+            marks.append(f"{engine}={'yes' if identical else 'NO'}")
+        print(f"{line}  {' '.join(marks)} ({len(expected)} bytes)")
+    return ok
+
+
+def _retained(build) -> int:
+    """build() の戻り値が持ち続けるメモリ（バイト。tracemalloc）。"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    out = build()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del out
+    return retained
+
+
+def run_memory(sizes: list[int]) -> None:
+    now = datetime.now(timezone.utc)
+    print(f"{'nodes':>8} {'raw_dict_MB':>12} {'slim_dict_MB':>13} {'observed_MB':>12} {'analyses_MB':>12}")
+    for n in sizes:
+        trays = synthetic_trays(n, now)
+        payload = json.dumps([node for tray_nodes in trays.values() for node in tray_nodes], ensure_ascii=False)
+        raw = _retained(lambda: json.loads(payload))
+        slim = _retained(
+            lambda: [{k: node[k] for k in SLIM_FIELDS if k in node} for node in json.loads(payload)]
+        )
+        observed = _retained(lambda: [main.ObservedNode.parse(node) for node in json.loads(payload)])
+        analyses = _retained(lambda: main.analyze_nodes(json.loads(payload), now))
+        print(f"{n:>8} {raw / 1e6:>12.1f} {slim / 1e6:>13.1f} {observed / 1e6:>12.1f} {analyses / 1e6:>12.1f}")
+
+
+def synthetic_links(node_ids: list[str], seed: int = 42) -> list[tuple[str, str]]:
+    """node_ids と同じ本数の親子リンク: 9 割はランダムな森（親は前の Node）、残りは机の上にない子、最後に 3 件の循環。"""
+    rng = random.Random(seed)
+    n = len(node_ids)
+    links: list[tuple[str, str]] = []
+    for i in range(1, n - 3):
+        if rng.random() < 0.9:
+            links.append((node_ids[rng.randrange(i)], node_ids[i]))
+        else:
+            links.append((node_ids[rng.randrange(n)], f"done-{i}"))
+    a, b, c = node_ids[-3:]
+    links += [(a, b), (b, c), (c, a)]
+    return links
+
+
+def run_tree(sizes: list[int], repeat: int) -> None:
+    now = datetime.now(timezone.utc)
+    print(f"{'nodes':>8} {'links':>8} {'forest_ms':>10} {'chain_ms':>9} {'ns/(nodes+links)':>17}  cycle")
+    for n in sizes:
+        trays = synthetic_trays(n, now)
+        analyses = main.analyze_nodes([node for tray_nodes in trays.values() for node in tray_nodes], now)
+        ids = [a.node_id for a in analyses]
+        links = synthetic_links(ids)
+        chain = [(ids[i - 1], ids[i]) for i in range(1, n)]
+        forest_s, out = _best_of(lambda: main.apply_tree(analyses, links), repeat)
+        chain_s, _ = _best_of(lambda: main.apply_tree(analyses, chain), repeat)
+        cycle = sum(1 for a in out if a.subtree is not None and a.subtree.in_cycle)
+        per = forest_s * 1e9 / (n + len(links))
+        print(f"{n:>8} {len(links):>8} {forest_s * 1000:>10.1f} {chain_s * 1000:>9.1f} {per:>17.0f}  {cycle}")
+
+
+def shadow_table(count: int) -> Any:
+    """組み込みルール（3-4.0）から閾値と加点を少しずつ変えた count 版の表。"""
+    from scoring_rules import compile_rules, parse_rules
+
+    versions: dict[str, Any] = {
+        "base": {
+            "status_bonus": dict(main.SUGGESTED_NEXT_STATUS_BONUS),
+            "excluded_statuses": list(main.SUGGESTED_NEXT_EXCLUDED_STATUSES),
+            "points": {"temp": main.TEMP_POINTS, "stale": main.STALE_POINTS, "stuck": main.STUCK_POINTS},
+            "temperature_low_threshold": main.TEMPERATURE_LOW_THRESHOLD,
+            "stale_days": main.STALE_DAYS_FOR_SUGGESTED,
+            "in_progress_stale_days": main.IN_PROGRESS_STALE_DAYS,
+        },
+    }
+    for i in range(count):
+        versions[f"shadow-{i}"] = {"extends": "base", "stale_days": 3 + i, "status_bonus": {"READY": 10 + 5 * i}}
+    config = parse_rules({"active": "base", "shadow": [f"shadow-{i}" for i in range(count)], "versions": versions})
+    return compile_rules(config.shadows)
+
+
+def run_shadow(sizes: list[int], repeat: int, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    table = shadow_table(count)
+    print(f"{'nodes':>8} {'report_ms':>10} {'shadow_ms':>10} {'ns/node/version':>16}")
+    for n in sizes:
+        trays = synthetic_trays(n, now)
+        analyses = main.analyze_nodes([node for tray_nodes in trays.values() for node in tray_nodes], now)
+        analyses = main.apply_tree(analyses, synthetic_links([a.node_id for a in analyses]))
+        previews = precompute_previews(trays, now)
+        ordered = [previews[a.node_id] for a in analyses]
+        counts = {k: len(v) for k, v in trays.items()}
+        main.SHADOW_RULES = None
+        base_s, _ = _best_of(lambda: main.build_report(analyses, ordered, counts), repeat)
+        main.SHADOW_RULES = table
+        shadow_s, _ = _best_of(lambda: main.build_report(analyses, ordered, counts), repeat)
+        main.SHADOW_RULES = None
+        per = (shadow_s - base_s) * 1e9 / (n * max(1, count))
+        print(f"{n:>8} {base_s * 1000:>10.1f} {shadow_s * 1000:>10.1f} {per:>16.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Observer 1 パス解析のベンチマーク")
+    parser.add_argument("sizes", nargs="*", type=int, default=[10_000, 50_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3, help="各サイズの試行回数（最良値を採用）")
+    parser.add_argument(
+        "--engine",
+        action="append",
+        choices=ENGINES,
+        help="測る Step 1 の解析方法（複数指定可。既定: すべて）",
+    )
+    parser.add_argument("--memory", action="store_true", help="時間ではなく Node・解析結果を持ち続けたときのメモリを測る")
+    parser.add_argument("--tree", action="store_true", help="親子の反映（apply_tree）だけを測る")
+    parser.add_argument("--shadow", type=int, metavar="N", help="build_report を shadow の版 N 個つきで測る")
+    args = parser.parse_args()
+    if args.shadow is not None:
+        run_shadow(args.sizes, args.repeat, args.shadow)
+        sys.exit(0)
+    if args.memory:
+        run_memory(args.sizes)
+        sys.exit(0)
+    if args.tree:
+        run_tree(args.sizes, args.repeat)
+        sys.exit(0)
+    sys.exit(0 if run(args.sizes, args.repeat, args.engine or list(ENGINES)) else 1)
@@ -0,0 +1,110 @@
+"""
+Observer の起動時間のベンチマーク（python -X importtime）
+
+main.py は import だけなら軽いモジュールしか読まない（httpx・asyncio・dotenv などは使う関数の中で読む）。
+それが崩れていないかを測る。
+
+記録する値:
+  import_ms   python -X importtime で測った import main の累積時間（--runs 回の中央値）
+  lazy        import main で読み込まれてしまった「遅延のはずの」モジュール（空であること）
+  help_ms     python3 main.py --help の所要時間（インタプリタの起動を含む。中央値）
+  pyz_help_ms dist/observer.pyz --help の所要時間（build_zipapp.py でビルド済みのときだけ）
+
+import_ms が --max-import-ms（既定 30）を超えるか、lazy が空でなければ exit 1。
+help_ms はインタプリタと site-packages の起動に左右されるので表示だけにする。
+
+実行:
+  python3 agent/observer/bench_startup.py
+  python3 agent/observer/bench_startup.py --runs 20 --max-import-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import compileall
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+HERE = Path(__file__).resolve().parent
+PYZ_PATH = HERE / "dist" / "observer.pyz"
+# import main の時点では読まれていてはいけないモジュール（使う関数の中で import する）
+LAZY_MODULES = (
+    "httpx", "asyncio", "dotenv", "argparse", "concurrent.futures",
+    "cProfile", "pstats", "node_cache", "state_machine", "report_codec", "scoring_columns", "node_tree", "numpy",
+    "report_archive", "sqlite3", "email.utils", "change_feed",
+    "scoring_rules", "snapshot",
+)
+_NEW_MODULES_SNIPPET = (
+    "import json, sys\n"
+    "before = set(sys.modules)\n"
+    "import main\n"
+    "print(json.dumps(sorted(set(sys.modules) - before)))\n"
+)
+
+
+def _import_ms() -> float:
+    """python -X importtime -c 'import main' の main の累積時間（ms）。"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    # 行の形式: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "main":
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"import main not found in -X importtime output:\n{proc.stderr[-2000:]}")
+
+
+def _loaded_lazy_modules() -> list[str]:
+    proc = subprocess.run(
+        [sys.executable, "-c", _NEW_MODULES_SNIPPET],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    loaded = json.loads(proc.stdout)
+    return [m for m in LAZY_MODULES if m in loaded]
+
+
+def _help_ms(target: Path) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, str(target), "--help"], cwd=HERE, stdout=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - t0) * 1000
+
+
+def measure(runs: int) -> dict[str, Any]:
+    # .pyc が無い・古いとコンパイル時間を測ってしまう（PYTHONDONTWRITEBYTECODE だと書かれない）ので先に作る
+    compileall.compile_dir(HERE, maxlevels=0, quiet=1)
+    result: dict[str, Any] = {
+        "import_ms": round(statistics.median(_import_ms() for _ in range(runs)), 1),
+        "lazy": _loaded_lazy_modules(),
+        "help_ms": round(statistics.median(_help_ms(HERE / "main.py") for _ in range(runs)), 1),
+    }
+    if PYZ_PATH.exists():
+        result["pyz_help_ms"] = round(statistics.median(_help_ms(PYZ_PATH) for _ in range(runs)), 1)
+    return result
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Observer の起動時間のベンチマーク（python -X importtime）")
+    parser.add_argument("--runs", type=int, default=9, help="測定回数（中央値を使う）")
+    parser.add_argument("--max-import-ms", type=float, default=30.0, help="import main の累積時間の上限（ms）")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    result = measure(max(1, args.runs))
+    print(json.dumps(result, ensure_ascii=False))
+    ok = True
+    if result["import_ms"] > args.max_import_ms:
+        print(f"REGRESSION import main {result['import_ms']}ms > {args.max_import_ms:g}ms", file=sys.stderr)
+        ok = False
+    if result["lazy"]:
+        print(f"REGRESSION import main loads {', '.join(result['lazy'])}", file=sys.stderr)
+        ok = False
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,92 @@
+"""
+Observer を 1 ファイルの zipapp（observer.pyz）にまとめる
+
+requirements.txt の依存（httpx・python-dotenv とその依存）を pip install --target でビルド用の
+ディレクトリに入れ、Observer のモジュールと __main__.py（main.cli() を呼ぶだけ）を加えて zip にする。
+実行先では pip install が要らない（python3 があればよい）。
+
+- .pyc は zip の中に入れておく（zipimport は __pycache__ を読まず、書き込みもできないので、
+  入れておかないと毎回ソースからコンパイルする）。ビルドと同じマイナーバージョンの python で実行すること。
+- 依存の C 拡張（h2 などの任意依存を含む）はビルドしたプラットフォーム用になる。
+  requirements.txt の必須依存はすべて pure Python。
+
+実行:
+  python3 agent/observer/build_zipapp.py                     # → agent/observer/dist/observer.pyz
+  python3 agent/observer/build_zipapp.py -o /tmp/observer.pyz
+  python3 agent/observer/dist/observer.pyz --save --strict   # main.py と同じ引数
+"""
+
+from __future__ import annotations
+
+import argparse
+import compileall
+import shutil
+import subprocess
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = HERE / "dist" / "observer.pyz"
+# zip に入れる Observer のモジュール（ベンチマーク・スタブ・このスクリプトは入れない）
+MODULES = (
+    "main.py", "change_feed.py", "instrumentation.py", "node_cache.py", "node_tree.py", "report_archive.py",
+    "report_codec.py", "resilience.py", "scoring_columns.py", "scoring_rules.py",
+    "snapshot.py", "state_machine.py",
+)
+MAIN_PY = "from main import cli\n\ncli()\n"
+# 依存のうち実行に要らないもの（pip が入れる dist-info の RECORD 以外・テスト・型スタブ）
+PRUNE_GLOBS = ("bin", "*.dist-info/RECORD", "*.dist-info/INSTALLER", "*.dist-info/REQUESTED", "**/__pycache__")
+
+
+def _install_dependencies(target: Path, requirements: Path) -> None:
+    subprocess.run(
+        [
+            sys.executable, "-m", "pip", "install",
+            "--quiet", "--disable-pip-version-check", "--no-compile",
+            "--target", str(target),
+            "-r", str(requirements),
+        ],
+        check=True,
+    )
+
+
+def _prune(root: Path) -> None:
+    for pattern in PRUNE_GLOBS:
+        for path in root.glob(pattern):
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+
+
+def build(output: Path, requirements: Path) -> Path:
+    """observer.pyz を作って output のパスを返す。"""
+    with tempfile.TemporaryDirectory(prefix="observer-zipapp-") as tmp:
+        root = Path(tmp) / "app"
+        root.mkdir()
+        _install_dependencies(root, requirements)
+        _prune(root)
+        for name in MODULES:
+            shutil.copy2(HERE / name, root / name)
+        (root / "__main__.py").write_text(MAIN_PY, encoding="utf-8")
+        # legacy=True: foo.py の隣に foo.pyc を置く（zipimport が読む配置）
+        if not compileall.compile_dir(root, quiet=1, legacy=True):
+            raise RuntimeError("compileall failed")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        zipapp.create_archive(root, output, interpreter="/usr/bin/env python3", compressed=True)
+    return output
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Observer を 1 ファイルの zipapp にまとめる")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT, help="出力先（既定: dist/observer.pyz）")
+    parser.add_argument("-r", "--requirements", type=Path, default=HERE / "requirements.txt")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    path = build(args.output, args.requirements)
+    print(f"built {path} ({path.stat().st_size / 1024:.0f} KiB, python {sys.version_info.major}.{sys.version_info.minor})")
@@ -0,0 +1,154 @@
+"""
+変更通知の受け取りとまとめ（--daemon --watch）
+
+「Node が変わった」という通知（node_ids）を受け取り、続けて届いた通知を 1 回分にまとめる（debounce）。
+まとめた node_ids で main.observe_changes が変わった Node だけを観測し直す。
+
+通知の入口:
+  API      POST /api/observer/run に積まれた依頼を main.poll_run_requests が読んで add する
+  ローカル  --watch-listen HOST:PORT（serve）。1 行 1 JSON（{"node_ids": [...]}。node_ids なしは全件観測の依頼）を送る。
+           応答は 1 行の JSON（{"ok": true, "pending": N} / {"ok": false, "error": ...}）。API を通さない開発用・同じホストのジョブ用
+           認証がないので既定ではループバック（127.0.0.1 / ::1 / localhost）にしか bind しない（allow_remote で解除）
+
+まとめ方: 最初の通知から quiet 秒のあいだ次の通知が来なければ確定する。通知が続いても max_delay 秒で確定する。
+node_ids なしの通知が 1 つでもあるか、まとめた Node が max_nodes を超えたら full（全件観測の方が速い）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import json
+import time
+from typing import Iterable, NamedTuple
+
+
+class ChangeBatch(NamedTuple):
+    node_ids: frozenset[str]  # 変わった Node（full なら使わない）
+    full: bool                # 全件観測する
+    notifications: int        # まとめた通知の数
+    waited_ms: float          # 最初の通知から確定までの時間
+
+
+class ChangeFeed:
+    """通知をためて next_batch で 1 回分ずつ取り出す。1 つのイベントループの中だけで使う。"""
+
+    def __init__(self, quiet: float, max_delay: float, max_nodes: int) -> None:
+        self.quiet = quiet
+        self.max_delay = max(quiet, max_delay)
+        self.max_nodes = max_nodes
+        self._ids: set[str] = set()
+        self._full = False
+        self._count = 0
+        self._first = 0.0  # 最初の通知の時刻（time.monotonic）
+        self._last = 0.0   # 最後の通知の時刻
+        self._closed = False
+        self._event = asyncio.Event()
+
+    def add(self, node_ids: Iterable[str] = ()) -> None:
+        """通知を 1 つ足す。node_ids が空なら全件観測の依頼。"""
+        ids = [node_id for node_id in node_ids if isinstance(node_id, str) and node_id]
+        now = time.monotonic()
+        if self._count == 0:
+            self._first = now
+        self._last = now
+        self._count += 1
+        if ids:
+            self._ids.update(ids)
+        else:
+            self._full = True
+        self._event.set()
+
+    def pending(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        """待っている next_batch を None で返させる（--daemon の停止）。"""
+        self._closed = True
+        self._event.set()
+
+    async def _wait(self, timeout: float | None) -> None:
+        self._event.clear()
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def next_batch(self, timeout: float | None = None) -> ChangeBatch | None:
+        """次の 1 回分。timeout 秒のあいだ通知が来ない・close されたら None。"""
+        if self._count == 0 and not self._closed:
+            await self._wait(timeout)
+        while self._count and not self._closed:
+            due = min(self._last + self.quiet, self._first + self.max_delay)
+            now = time.monotonic()
+            if now >= due:
+                break
+            await self._wait(due - now)
+        if self._closed or not self._count:
+            return None
+        batch = ChangeBatch(
+            frozenset(self._ids),
+            self._full or len(self._ids) > self.max_nodes,
+            self._count,
+            round((time.monotonic() - self._first) * 1000, 1),
+        )
+        self._ids = set()
+        self._full = False
+        self._count = 0
+        return batch
+
+
+def parse_listen(value: str) -> tuple[str, int]:
+    """--watch-listen の HOST:PORT（PORT だけなら 127.0.0.1）。読めなければ ValueError。"""
+    host, _, port = value.rpartition(":")
+    number = int(port)
+    if not 0 < number < 65536:
+        raise ValueError(f"port out of range: {number}")
+    return host.strip("[]") or "127.0.0.1", number
+
+
+def is_loopback(host: str) -> bool:
+    """host がループバック（localhost / 127.0.0.0/8 / ::1）か。ホスト名は localhost だけを認める。"""
+    if host.lower() == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+async def serve(
+    feed: ChangeFeed, host: str, port: int, allow_remote: bool = False
+) -> asyncio.AbstractServer:
+    """
+    --watch-listen: 1 行 1 JSON の通知を受けて feed に足す TCP サーバを立てる。
+    通知に認証はないので、allow_remote（--watch-listen-public）なしでループバック以外を指定したら ValueError。
+    """
+    if not allow_remote and not is_loopback(host):
+        raise ValueError(f"refusing to listen on non-loopback host without --watch-listen-public: {host!r}")
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("message must be a JSON object")
+                    node_ids = message.get("node_ids") or []
+                    if not isinstance(node_ids, list) or not all(isinstance(i, str) for i in node_ids):
+                        raise ValueError("node_ids must be a list of strings")
+                except ValueError as e:
+                    reply = {"ok": False, "error": str(e)}
+                else:
+                    feed.add(node_ids)
+                    reply = {"ok": True, "pending": feed.pending()}
+                writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,132 @@
+"""
+Observer の計測（フェーズごとの所要時間・Preview レイテンシのヒストグラム・メトリクス出力）
+
+- Timings.span(name): with で囲んだ区間の所要時間（ms）を name ごとに積算する。
+  observe() の各 Step と保存・latest を囲む。HTTP 呼び出し 1 件ごとの時間は resilience.py が
+  エンドポイント単位で集計する（payload.meta.http）。
+- latency_histogram(): Preview の Node ごとのレイテンシをバケットに数える。
+- write_metrics(): --metrics-out に 1 回分の計測を書く。
+    *.jsonl  → 1 行 1 観測の JSON で追記（--daemon ならサイクルごとに 1 行）
+    それ以外 → OpenMetrics テキストで上書き（node_exporter の textfile collector などで読む想定）
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+
+# Preview レイテンシのバケット上限（ms）。最後に +Inf が付く
+LATENCY_BUCKETS_MS: tuple[float, ...] = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Timings:
+    """span 名ごとの所要時間（ms）と回数。1 回の観測（+ 保存）で 1 つ使う。"""
+
+    def __init__(self) -> None:
+        self._t0 = time.perf_counter()
+        self.total_ms: dict[str, float] = {}
+        self.count: dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - t0) * 1000)
+
+    def add(self, name: str, ms: float) -> None:
+        self.total_ms[name] = self.total_ms.get(name, 0.0) + ms
+        self.count[name] = self.count.get(name, 0) + 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def summary(self) -> dict[str, Any]:
+        """meta.timing 用。span は最初に記録した順。"""
+        return {
+            "total_ms": round(self.elapsed_ms(), 1),
+            "spans_ms": {name: round(ms, 1) for name, ms in self.total_ms.items()},
+        }
+
+
+def latency_histogram(values_ms: Iterable[float]) -> dict[str, int]:
+    """バケットごとの件数（累積ではない）。キーはバケット上限の ms と "+Inf"。"""
+    labels = [f"{b:g}" for b in LATENCY_BUCKETS_MS] + ["+Inf"]
+    counts = dict.fromkeys(labels, 0)
+    for v in values_ms:
+        for bound, label in zip(LATENCY_BUCKETS_MS, labels):
+            if v <= bound:
+                counts[label] += 1
+                break
+        else:
+            counts["+Inf"] += 1
+    return counts
+
+
+def _openmetrics(record: dict[str, Any]) -> str:
+    lines: list[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]) -> None:
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"# HELP {name} {help_text}")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {value:g}")
+
+    timing = record.get("timing") or {}
+    metric(
+        "observer_run_duration_seconds", "gauge", "Wall time of the last observation.",
+        [("", timing.get("total_ms", 0.0) / 1000)],
+    )
+    metric(
+        "observer_span_duration_seconds", "gauge", "Time spent in each phase of the last observation.",
+        [(f'{{span="{name}"}}', ms / 1000) for name, ms in (timing.get("spans_ms") or {}).items()],
+    )
+    metric("observer_nodes", "gauge", "Nodes observed.", [("", record.get("node_count") or 0)])
+    metric("observer_warnings", "gauge", "Warnings in the report.", [("", record.get("warnings") or 0)])
+
+    # Preview レイテンシは累積バケット（OpenMetrics の histogram）
+    hist = record.get("preview_latency_histogram_ms") or {}
+    cumulative = 0
+    buckets: list[tuple[str, float]] = []
+    for label, count in hist.items():
+        cumulative += count
+        le = label if label == "+Inf" else f"{float(label) / 1000:g}"
+        buckets.append((f'_bucket{{le="{le}"}}', cumulative))
+    if buckets:
+        lines.append("# TYPE observer_preview_latency_seconds histogram")
+        lines.append("# HELP observer_preview_latency_seconds Per-node estimate-status preview latency.")
+        for suffix, value in buckets:
+            lines.append(f"observer_preview_latency_seconds{suffix} {value:g}")
+        lines.append(f"observer_preview_latency_seconds_count {cumulative:g}")
+        lines.append(f"observer_preview_latency_seconds_sum {record.get('preview_latency_sum_ms', 0.0) / 1000:g}")
+
+    http = record.get("http") or {}
+    for field, help_text in (
+        ("requests", "Calls per endpoint."),
+        ("retries", "Retries per endpoint."),
+        ("failures", "Calls that failed after retries."),
+        ("short_circuited", "Calls skipped by an open circuit breaker."),
+    ):
+        metric(
+            f"observer_http_{field}", "gauge", help_text,
+            [(f'{{endpoint="{key}"}}', stats.get(field, 0)) for key, stats in http.items()],
+        )
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str | os.PathLike[str], record: dict[str, Any]) -> None:
+    """1 回分の計測を書く。拡張子 .jsonl なら追記、それ以外は OpenMetrics で上書き（一時ファイル経由）。"""
+    target = os.fspath(path)
+    if target.endswith(".jsonl"):
+        with open(target, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        return
+    tmp = target + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(_openmetrics(record))
+    os.replace(tmp, target)
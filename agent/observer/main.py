@@ -12,6 +12,7 @@ Based on:
 Skill 利用:
   許可: GET /api/dashboard (読み取り)
         POST /api/nodes/{id}/estimate-status (Preview のみ — confirm_status なし)
+        POST /api/nodes/estimate-status/batch (Preview のみ — まとめて送る)
   禁止: Apply (confirm_status 送信)
         POST /api/confirmations
         DB 直接操作
@@ -21,49 +22,330 @@ Skill 利用:
 
 from __future__ import annotations
 
+# import は軽いものだけにする（import main・--help・単体テストで httpx / asyncio / dotenv を読まない）。
+# 重いモジュールは使う関数の中で import する（2 回目以降は sys.modules を引くだけ）。
+# 起動時間は bench_startup.py で測る（python -X importtime）。
+import heapq
 import json
 import os
 import re
+import signal
 import sys
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any, AsyncIterator, Iterable, NamedTuple
 from urllib.parse import urlparse
 
-import httpx
-from dotenv import load_dotenv
+from instrumentation import Timings, latency_histogram, write_metrics
+from resilience import PREVIEW_ENDPOINTS, ResilientClient
 
-load_dotenv()
+if TYPE_CHECKING:
+    import argparse
+    from concurrent.futures import ProcessPoolExecutor
+
+    import httpx
+
+    from change_feed import ChangeFeed
+    from node_cache import NodeCache
+    from node_tree import SubtreeStats
+    from scoring_rules import RuleConfig, RuleSet, RuleTable
+    from snapshot import Snapshot, SnapshotRecorder
 
 # ─── 設定 ──────────────────────────────────────────────────
-# ベース URL の SSOT: 環境変数 NEXT_BASE_URL（Phase 3-2.1）
-# ローカル / Actions / 本番いずれもこの名前で渡す（docs/26, 27 参照）。
-# スキーム省略時は https:// を付与（GitHub Secrets で URL だけ設定した場合の救済）。
-
-_raw = os.getenv("NEXT_BASE_URL", "http://localhost:3000")
-BASE_URL = (_raw or "").strip() or "http://localhost:3000"
-if not (BASE_URL.startswith("http://") or BASE_URL.startswith("https://")):
-    BASE_URL = "https://" + BASE_URL
-# GitHub Actions で localhost のままなら Secrets 未設定
-if os.getenv("GITHUB_ACTIONS") and ("localhost" in BASE_URL or "127.0.0.1" in BASE_URL):
-    print("Error: NEXT_BASE_URL is not set for GitHub Actions. Add Secret NEXT_BASE_URL (e.g. https://your-app.vercel.app)", file=sys.stderr)
-    sys.exit(1)
-OBSERVER_TOKEN = os.getenv("OBSERVER_TOKEN", "")
-COOLING_THRESHOLD = int(os.getenv("COOLING_THRESHOLD", "40"))
-COOLING_DAYS = int(os.getenv("COOLING_DAYS", "7"))
+# 環境変数から読む値は _load_settings() が下の module 変数に入れる。import 時は os.environ を読むだけで、
+# .env の読み込みと GitHub Actions の設定チェックは CLI の入口（configure()）で行う。
+
 # Phase 3-4: suggested_next 候補から除外する status（28_Observer_SuggestedNext_Scoring.md）
+# 28 §4 のルール（以下の閾値・点数と SUGGESTED_NEXT_STATUS_BONUS / RULE_VERSION）は --rules の active の版で置き換わる（use_rules）
 SUGGESTED_NEXT_EXCLUDED_STATUSES = ("DONE", "COOLING", "CANCELLED")
 STALE_DAYS_FOR_SUGGESTED = 7   # この日数以上更新なしで加点
 IN_PROGRESS_STALE_DAYS = 3     # IN_PROGRESS でこの日数以上更新なしで加点
 TEMPERATURE_LOW_THRESHOLD = 40  # この値以下で加点
+TEMP_POINTS, STALE_POINTS, STUCK_POINTS = 30, 25, 15  # breakdown の temp / stale / stuck の加点
+# Step 1 の解析方法: row = Node ごとに analyze_node / columnar = チャンクごとに列で計算（scoring_columns.py）
+ANALYZE_ENGINES = ("row", "columnar")
+COLUMNAR_CHUNK_SIZE = 4096  # columnar で 1 回にまとめて計算する Node 数（dashboard の数ページ分）
+# Step 2 の推定方法: remote = estimate-status API / local = state_machine.py / verify = 両方を突き合わせ
+ESTIMATOR_MODES = ("remote", "local", "verify")
+ESTIMATOR_MISMATCH_DETAILS_LIMIT = 20  # warnings.details に載せる不一致の最大件数
+PROFILE_TOP_N = 30  # --profile で stderr に出す関数の件数
+WATCH_IDS_PER_REQUEST = 100  # --watch: GET /api/dashboard?ids= の 1 回あたりの Node 数（API 側の上限 MAX_IDS）
+WATCH_MAX_NODES = 500  # --watch: 1 回にまとめた変更がこれを超えたら差分ではなく全件観測する
+REPORT_GZIP_LEVEL = 6  # --compact の保存本文の gzip 圧縮レベル（速さ優先。9 にしても数 % しか縮まない）
+
+
+def _load_settings() -> None:
+    """環境変数から設定を読む（import 時と、configure() で .env を読み込んだ後）。"""
+    global BASE_URL, OBSERVER_TOKEN, COOLING_THRESHOLD, COOLING_DAYS
+    global PREVIEW_CONCURRENCY, PREVIEW_TIMEOUT_SECONDS, PREVIEW_BATCH_SIZE, DEFAULT_ESTIMATOR
+    global DASHBOARD_PAGE_SIZE, OBSERVER_CACHE_DIR, OBSERVER_METRICS_OUT
+    global HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE_SECONDS, HTTP_BACKOFF_MAX_SECONDS
+    global CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_COOLDOWN_SECONDS, PREVIEW_HEDGE_AFTER_SECONDS
+    global TENANT_CONCURRENCY, TENANT_TIMEOUT_SECONDS, TENANT_WORKERS
+    global DAEMON_INTERVAL_SECONDS, DAEMON_JITTER, OBSERVER_COMPACT, DEFAULT_ENGINE, OBSERVER_TREE
+    global OBSERVER_ARCHIVE_DIR, OBSERVER_TARGETS, TARGET_TIMEOUT_SECONDS
+    global OBSERVER_WATCH_LISTEN, OBSERVER_WATCH_LISTEN_PUBLIC, WATCH_DEBOUNCE_SECONDS, WATCH_MAX_DELAY_SECONDS, WATCH_POLL_SECONDS
+    global OBSERVER_DEADLINE_SECONDS, OBSERVER_RULES, OBSERVER_RECORD_DIR
+
+    # ベース URL の SSOT: 環境変数 NEXT_BASE_URL（Phase 3-2.1）
+    # ローカル / Actions / 本番いずれもこの名前で渡す（docs/26, 27 参照）。
+    # スキーム省略時は https:// を付与（GitHub Secrets で URL だけ設定した場合の救済）。
+    BASE_URL = _normalize_base_url(os.getenv("NEXT_BASE_URL", "http://localhost:3000"))
+    OBSERVER_TOKEN = os.getenv("OBSERVER_TOKEN", "")
+    COOLING_THRESHOLD = int(os.getenv("COOLING_THRESHOLD", "40"))
+    COOLING_DAYS = int(os.getenv("COOLING_DAYS", "7"))
+    # Step 2 の Preview 並列度と 1 リクエストあたりのタイムアウト（秒）
+    PREVIEW_CONCURRENCY = max(1, int(os.getenv("PREVIEW_CONCURRENCY", "8")))
+    PREVIEW_TIMEOUT_SECONDS = float(os.getenv("PREVIEW_TIMEOUT_SECONDS", "30"))
+    # --deadline の既定値（1 回の実行にかけてよい秒数。0 なら制限なし）
+    OBSERVER_DEADLINE_SECONDS = max(0.0, float(os.getenv("OBSERVER_DEADLINE_SECONDS", "0")))
+    # Step 2 を batch API（POST /api/nodes/estimate-status/batch）で送るときの 1 リクエストあたりの件数。
+    # 0 なら batch を使わず Node ごとに呼ぶ。API 側の上限は 200。
+    PREVIEW_BATCH_SIZE = min(200, max(0, int(os.getenv("PREVIEW_BATCH_SIZE", "100"))))
+    DEFAULT_ESTIMATOR = os.getenv("OBSERVER_ESTIMATOR", "remote")
+    DEFAULT_ENGINE = os.getenv("OBSERVER_ENGINE", "row")
+    # Step 1 のページ読み: 1 ページあたりの Node 数（API 側の上限は 500）
+    DASHBOARD_PAGE_SIZE = max(1, int(os.getenv("DASHBOARD_PAGE_SIZE", "200")))
+    # ノード状態キャッシュ（node_cache.py）の置き場所。空なら使わない（毎回全 Node を Preview）
+    OBSERVER_CACHE_DIR = os.getenv("OBSERVER_CACHE_DIR", "")
+    # レポートアーカイブ（report_archive.py）の置き場所。空なら残さない
+    OBSERVER_ARCHIVE_DIR = os.getenv("OBSERVER_ARCHIVE_DIR", "")
+    # --record の既定値（観測ごとのスナップショット（snapshot.py）の置き場所）。空なら残さない
+    OBSERVER_RECORD_DIR = os.getenv("OBSERVER_RECORD_DIR", "")
+    # HTTP リクエスト層（resilience.py）: リトライ回数・バックオフ（秒）・サーキットブレーカー・ヘッジ
+    HTTP_MAX_RETRIES = max(0, int(os.getenv("OBSERVER_HTTP_RETRIES", "3")))
+    HTTP_BACKOFF_BASE_SECONDS = float(os.getenv("OBSERVER_HTTP_BACKOFF_SECONDS", "0.5"))
+    HTTP_BACKOFF_MAX_SECONDS = float(os.getenv("OBSERVER_HTTP_BACKOFF_MAX_SECONDS", "8"))
+    CIRCUIT_BREAKER_THRESHOLD = max(1, int(os.getenv("OBSERVER_CIRCUIT_THRESHOLD", "5")))  # 連続失敗で開く
+    CIRCUIT_BREAKER_COOLDOWN_SECONDS = float(os.getenv("OBSERVER_CIRCUIT_COOLDOWN_SECONDS", "30"))
+    PREVIEW_HEDGE_AFTER_SECONDS = float(os.getenv("PREVIEW_HEDGE_AFTER_SECONDS", "0"))  # 0 ならヘッジしない
+    # --metrics-out の既定値（空なら書かない）
+    OBSERVER_METRICS_OUT = os.getenv("OBSERVER_METRICS_OUT", "")
+    # --per-tenant: 同時に処理するテナント数・1 テナントの制限時間・スコア計算のプロセス数（0 = CPU 数）
+    TENANT_CONCURRENCY = max(1, int(os.getenv("OBSERVER_TENANT_CONCURRENCY", "4")))
+    TENANT_TIMEOUT_SECONDS = float(os.getenv("OBSERVER_TENANT_TIMEOUT_SECONDS", "300"))
+    TENANT_WORKERS = max(0, int(os.getenv("OBSERVER_TENANT_WORKERS", "0")))
+    # --daemon: 観測の間隔（秒）と揺らぎ（間隔に対する割合。0.1 なら ±10%）
+    DAEMON_INTERVAL_SECONDS = float(os.getenv("OBSERVER_INTERVAL_SECONDS", "300"))
+    DAEMON_JITTER = float(os.getenv("OBSERVER_INTERVAL_JITTER", "0.1"))
+    # --watch: 変更通知のまとめ方（最後の通知から quiet 秒 / 最初の通知から最大何秒）・依頼 API を読む間隔・--watch-listen の既定値
+    WATCH_DEBOUNCE_SECONDS = float(os.getenv("OBSERVER_WATCH_DEBOUNCE_SECONDS", "2"))
+    WATCH_MAX_DELAY_SECONDS = float(os.getenv("OBSERVER_WATCH_MAX_DELAY_SECONDS", "10"))
+    WATCH_POLL_SECONDS = max(0.1, float(os.getenv("OBSERVER_WATCH_POLL_SECONDS", "2")))
+    OBSERVER_WATCH_LISTEN = os.getenv("OBSERVER_WATCH_LISTEN", "")
+    # --watch-listen-public の既定値（1 / true でループバック以外にも bind する。通知に認証はない）
+    OBSERVER_WATCH_LISTEN_PUBLIC = os.getenv("OBSERVER_WATCH_LISTEN_PUBLIC", "").strip().lower() in ("1", "true", "yes")
+    # --compact の既定値（1 / true で有効）
+    OBSERVER_COMPACT = os.getenv("OBSERVER_COMPACT", "").strip().lower() in ("1", "true", "yes")
+    # 親子（node_children）を見たスコアの既定値（0 / false で --no-tree と同じ）
+    OBSERVER_TREE = os.getenv("OBSERVER_TREE", "1").strip().lower() not in ("0", "false", "no")
+    # --rules の既定値（スコアリングルールの JSON。空なら下の 28 §4 の定数のまま）
+    OBSERVER_RULES = os.getenv("OBSERVER_RULES", "")
+    # --targets の既定値（観測先の一覧ファイル。空なら NEXT_BASE_URL の 1 か所だけ）と、1 観測先の制限時間（秒）
+    OBSERVER_TARGETS = os.getenv("OBSERVER_TARGETS", "")
+    TARGET_TIMEOUT_SECONDS = float(os.getenv("OBSERVER_TARGET_TIMEOUT_SECONDS", "300"))
+
+
+def _normalize_base_url(raw: str | None) -> str:
+    """空なら localhost:3000。スキーム省略時は https:// を付与（GitHub Secrets で URL だけ設定した場合の救済）。"""
+    base_url = (raw or "").strip() or "http://localhost:3000"
+    if not (base_url.startswith("http://") or base_url.startswith("https://")):
+        base_url = "https://" + base_url
+    return base_url
+
+
+_load_settings()
+
+
+class ConfigError(RuntimeError):
+    """CLI の起動時の設定ミス。exit 1。"""
+
+
+def _find_env_file() -> str | None:
+    """
+    main.py のあるディレクトリから上へ .env を探す（python-dotenv の find_dotenv と同じ順）。
+    zipapp では __file__ が observer.pyz/main.py になるので、.pyz のあるディレクトリから探す。
+    find_dotenv は呼び出し元のフレームから起点を決めるが、zip 内の .pyc ではそれが辿れない。
+    """
+    path = os.path.dirname(os.path.abspath(__file__))
+    if not os.path.isdir(path):
+        path = os.path.dirname(path)
+    while True:
+        candidate = os.path.join(path, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def configure(load_env_file: bool = True, check_base_url: bool = True) -> None:
+    """
+    CLI の入口で 1 回呼ぶ。.env を読み込み（既に設定済みの環境変数は上書きしない）、設定を読み直す。
+    GitHub Actions で NEXT_BASE_URL が localhost のままなら Secrets 未設定なので ConfigError。
+    check_base_url=False なら NEXT_BASE_URL は確かめない（--targets では観測先ごとに load_targets が確かめる）。
+    """
+    env_file = _find_env_file() if load_env_file else None
+    if env_file:
+        from dotenv import load_dotenv
+
+        load_dotenv(env_file)
+    _load_settings()
+    if check_base_url:
+        _check_actions_base_url(BASE_URL, "NEXT_BASE_URL")
+
+
+def _check_actions_base_url(base_url: str, source: str) -> None:
+    if os.getenv("GITHUB_ACTIONS") and ("localhost" in base_url or "127.0.0.1" in base_url):
+        raise ConfigError(
+            f"Error: {source} is not set for GitHub Actions. Add Secret NEXT_BASE_URL (e.g. https://your-app.vercel.app)"
+        )
+
+
+# ─── 観測先（--targets）──────────────────────────────────────
+# 既定の観測先は NEXT_BASE_URL + OBSERVER_TOKEN の 1 か所。--targets では複数のデプロイ（staging / 本番 /
+# 顧客ごと）を同時に観測する。API 呼び出しは呼び出し時点の観測先（current_target()）の URL と token を使う。
+# 観測先はタスクごとの contextvars に置くので、同時に走る観測先どうしで混ざらない。
+
+TARGET_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_.-]+$")  # name はキャッシュ・アーカイブのサブディレクトリ名にも使う
+
+
+class Target(NamedTuple):
+    """観測先の 1 デプロイ。"""
+
+    name: str
+    base_url: str
+    token: str
+    timeout: float | None = None  # 観測 1 回（保存・healthcheck を含む）の制限時間（秒）。None なら TARGET_TIMEOUT_SECONDS
+
+
+_target: ContextVar[Target | None] = ContextVar("observer_target", default=None)
+
+
+def current_target() -> Target:
+    """今の観測先。--targets の外では NEXT_BASE_URL + OBSERVER_TOKEN（name は "default"）。"""
+    return _target.get() or Target("default", BASE_URL, OBSERVER_TOKEN)
+
+
+def load_targets(path: str) -> list[Target]:
+    """
+    観測先の一覧（JSON）を読む。形式:
+      {"targets": [{"name": "prod", "base_url": "https://...", "token_env": "PROD_OBSERVER_TOKEN", "timeout_seconds": 120}, ...]}
+    token は token_env（環境変数名。Secrets から渡す）か token（直書き。ローカル用）。どちらもなければ token なし。
+    name の重複・token_env の未設定・GitHub Actions で localhost の観測先は ConfigError。
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Error: cannot read targets file {path}: {e}") from e
+    entries = data.get("targets") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ConfigError(f"Error: targets file {path} has no targets")
+    targets: list[Target] = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ConfigError(f"Error: targets[{i}] must be an object")
+        name = entry.get("name")
+        if not isinstance(name, str) or not TARGET_NAME_PATTERN.match(name):
+            raise ConfigError(f"Error: targets[{i}].name must match {TARGET_NAME_PATTERN.pattern}")
+        if any(t.name == name for t in targets):
+            raise ConfigError(f"Error: duplicate target name {name!r}")
+        if not isinstance(entry.get("base_url"), str) or not entry["base_url"].strip():
+            raise ConfigError(f"Error: target {name!r} has no base_url")
+        base_url = _normalize_base_url(entry["base_url"])
+        _check_actions_base_url(base_url, f"target {name!r} base_url")
+        token = entry.get("token") or ""
+        token_env = entry.get("token_env")
+        if token_env:
+            token = os.getenv(token_env, "")
+            if not token:
+                raise ConfigError(f"Error: {token_env} (token_env of target {name!r}) is not set")
+        timeout = entry.get("timeout_seconds")
+        if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise ConfigError(f"Error: target {name!r} timeout_seconds must be > 0")
+        targets.append(Target(name, base_url, token, float(timeout) if timeout is not None else None))
+    return targets
+
+
+def _api_url(path: str) -> str:
+    return f"{current_target().base_url.rstrip('/')}{path}"
+
+
+# dashboard API の trays の並びと、status → tray の振り分け（src/app/api/dashboard/route.ts と同じ）
+TRAY_ORDER = ("in_progress", "needs_decision", "waiting_external", "cooling", "other_active")
+TRAY_BY_STATUS = {
+    "IN_PROGRESS": "in_progress",
+    "NEEDS_DECISION": "needs_decision",
+    "WAITING_EXTERNAL": "waiting_external",
+    "COOLING": "cooling",
+}
 
 
 # ─── API クライアント・エラー表示（Phase 3-4.3）────────────────
 # 25_Boundary §5.1: Python は Next.js Skill API を HTTP で呼ぶ。DB には触れない。
 # 秘密情報は出さない。BASE_URL と呼び出し先 URL を必ず stderr で案内する。
 
+def make_client(keepalive_expiry: float = 5.0) -> httpx.AsyncClient:
+    """
+    dashboard / Preview / 保存 / latest で共有する AsyncClient（keep-alive の接続プール）。
+    h2 が入っていれば HTTP/2 で 1 本の接続に多重化する（pip install "httpx[http2]"）。
+    keepalive_expiry: 空き接続を保持する秒数（--daemon では観測の間隔より長くする）。
+    """
+    import importlib.util
+
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=max(PREVIEW_CONCURRENCY, 10),
+        keepalive_expiry=keepalive_expiry,
+    )
+    http2 = importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(timeout=30.0, limits=limits, http2=http2)
+
+
+def make_request_layer(client: httpx.AsyncClient) -> ResilientClient:
+    """client にリトライ・サーキットブレーカー・ヘッジを付ける（resilience.py）。"""
+    return ResilientClient(
+        client,
+        max_retries=HTTP_MAX_RETRIES,
+        backoff_base=HTTP_BACKOFF_BASE_SECONDS,
+        backoff_max=HTTP_BACKOFF_MAX_SECONDS,
+        breaker_threshold=CIRCUIT_BREAKER_THRESHOLD,
+        breaker_cooldown=CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+        hedge_after=PREVIEW_HEDGE_AFTER_SECONDS,
+    )
+
+
+# API 呼び出し関数が受け取る client（素の AsyncClient でも ResilientClient でも同じ get / post で呼べる）
+if TYPE_CHECKING:
+    HttpClient = httpx.AsyncClient | ResilientClient
+
+
+@asynccontextmanager
+async def _client_scope(client: HttpClient | None) -> AsyncIterator[ResilientClient]:
+    """
+    client が渡されればそのまま使い（閉じない）、なければこの中だけのクライアントを作る。
+    素の AsyncClient ならリクエスト層でくるむ。
+    """
+    if isinstance(client, ResilientClient):
+        yield client
+        return
+    if client is not None:
+        yield make_request_layer(client)
+        return
+    async with make_client() as own:
+        yield make_request_layer(own)
+
+
 def _call_desc(method: str, path: str) -> str:
-    """呼び出し先の1行説明（秘密情報なし）。"""
-    return f"BASE_URL={BASE_URL}, 呼び出し先: {method} {BASE_URL.rstrip('/')}{path}"
+    """呼び出し先の1行説明（秘密情報なし）。--targets では観測先の name も付ける。"""
+    target = current_target()
+    prefix = f"target={target.name}, " if _target.get() is not None else ""
+    return f"{prefix}BASE_URL={target.base_url}, 呼び出し先: {method} {_api_url(path)}"
 
 
 def _parse_body_error(resp: httpx.Response) -> str:
@@ -84,16 +366,31 @@ def _check_http_error(resp: httpx.Response, method: str, path: str) -> None:
         raise RuntimeError(msg)
 
 
-async def fetch_dashboard(client: httpx.AsyncClient) -> dict[str, Any]:
-    """GET /api/dashboard — アクティブ Node 一覧を取得。OBSERVER_TOKEN を Bearer で付与。"""
+async def _get_dashboard(
+    client: HttpClient,
+    params: dict[str, Any] | None = None,
+    cache: NodeCache | None = None,
+    page_index: int = 0,
+) -> dict[str, Any]:
+    """
+    GET /api/dashboard を 1 回呼び、ok を確認した JSON を返す。OBSERVER_TOKEN を Bearer で付与。
+    cache 指定時は前回同じ位置で読んだページの ETag を If-None-Match に付け、304 なら前回の本文を返す。
+    """
     path = "/api/dashboard"
-    url = f"{BASE_URL.rstrip('/')}{path}"
+    url = _api_url(path)
+    cursor = (params or {}).get("cursor")
+    cached = cache.cached_page(page_index, cursor) if cache is not None else None
+    headers = _save_report_headers()
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+    import httpx
+
     try:
-        resp = await client.get(url, headers=_save_report_headers())
+        resp = await client.get(url, params=params, headers=headers)
     except httpx.ConnectError as e:
         port_hint = ""
         try:
-            p = urlparse(BASE_URL)
+            p = urlparse(current_target().base_url)
             if p.port:
                 port_hint = f" ポートは {p.port}。"
             else:
@@ -105,15 +402,139 @@ async def fetch_dashboard(client: httpx.AsyncClient) -> dict[str, Any]:
             f"Next.js は起動していますか？{port_hint} NEXT_BASE_URL を確認してください。"
         )
         raise RuntimeError(msg) from e
+    if resp.status_code == 304 and cached is not None:
+        data = json.loads(cached[1])
+        cache.record_page(cursor, cached[0], data, not_modified=True)
+        return data
     _check_http_error(resp, "GET", path)
     data = resp.json()
     if not data.get("ok"):
         raise RuntimeError(f"dashboard API error: {data.get('error')}")
+    if cache is not None:
+        cache.record_page(cursor, resp.headers.get("etag"), data, not_modified=False)
+    return data
+
+
+async def fetch_dashboard(client: HttpClient) -> dict[str, Any]:
+    """GET /api/dashboard — アクティブ Node 一覧を trays 形式で取得（API 側で 50 件まで）。"""
+    data = await _get_dashboard(client)
     return data["trays"]
 
 
+class IncrementalUnsupported(RuntimeError):
+    """差分観測（observe_changes）ができない。全件観測に切り替える。"""
+
+
+async def fetch_dashboard_nodes(client: HttpClient, node_ids: list[str]) -> dict[str, Any]:
+    """
+    GET /api/dashboard?ids=... — node_ids の Node だけを読む（--watch の差分観測）。
+    戻り値: {"nodes": 机の上にある Node, "node_children": child_id が node_ids にある行}。返らない id は机から消えた Node。
+    ?ids= に対応していない API（trays を返す旧デプロイ）なら IncrementalUnsupported。
+    """
+    import asyncio
+
+    chunks = [node_ids[i:i + WATCH_IDS_PER_REQUEST] for i in range(0, len(node_ids), WATCH_IDS_PER_REQUEST)]
+    pages = await asyncio.gather(*(_get_dashboard(client, {"ids": ",".join(chunk)}) for chunk in chunks))
+    out: dict[str, Any] = {"nodes": [], "node_children": []}
+    for data in pages:
+        if "nodes" not in data:
+            raise IncrementalUnsupported("dashboard API does not support ?ids= (deploy the current src/app/api/dashboard)")
+        out["nodes"].extend(data["nodes"])
+        out["node_children"].extend(data.get("node_children") or ())
+    return out
+
+
+class RunTriggerUnsupported(RuntimeError):
+    """GET /api/observer/run が無い（旧デプロイで 404 / 405 / 501）。依頼 API は読まない。"""
+
+
+async def fetch_run_requests(client: HttpClient, after: int | None) -> dict[str, Any]:
+    """
+    GET /api/observer/run?after=<id> — 積まれた差分観測の依頼を id 順に読む（--watch）。
+    after が None なら依頼は返らず、cursor（今の最新 id）だけが返る。
+    """
+    path = "/api/observer/run"
+    resp = await client.get(
+        _api_url(path),
+        params={"after": str(after)} if after is not None else None,
+        headers=_save_report_headers(),
+    )
+    if resp.status_code in (404, 405, 501):
+        raise RunTriggerUnsupported(f"{_call_desc('GET', path)} HTTP {resp.status_code}")
+    _check_http_error(resp, "GET", path)
+    data = resp.json()
+    if not data.get("ok"):
+        raise RuntimeError(f"observer run API error: {data.get('error')}")
+    return data
+
+
+def _collect_links(data: dict[str, Any], nodes: list[dict[str, Any]], links: list[tuple[str, str]]) -> None:
+    """1 ページ分の親子リンク (parent_id, child_id): node_children（1 ページ目だけにある）→ 各 Node の parent_id。"""
+    for row in data.get("node_children") or ():
+        if isinstance(row, dict):
+            parent_id, child_id = row.get("parent_id"), row.get("child_id")
+            if isinstance(parent_id, str) and isinstance(child_id, str):
+                links.append((parent_id, child_id))
+    for node in nodes:
+        parent_id = node.get("parent_id")
+        if isinstance(parent_id, str) and parent_id.strip():
+            links.append((parent_id.strip(), node["id"]))
+
+
+async def iter_dashboard_nodes(
+    client: HttpClient,
+    page_size: int | None = None,
+    cache: NodeCache | None = None,
+    links: list[tuple[str, str]] | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    GET /api/dashboard?limit=N&cursor=... をページごとに辿り、Node を 1 件ずつ yield する。
+
+    - 件数の上限はない（next_cursor が null になるまで読む）。
+    - 保持するのは 1〜2 ページ分だけ。次のページは今のページを消費している間に先読みする。
+    - ページモード非対応の API（trays のみ返す旧デプロイ）なら trays を展開して yield する。
+    - cache 指定時は各ページを ETag で条件付きに読む（_get_dashboard）。
+    - links 指定時は親子リンク（node_children と parent_id）をページを yield する前に足していく（apply_tree 用）。
+    page_size 省略時は DASHBOARD_PAGE_SIZE。
+    """
+    import asyncio
+
+    page_size = page_size or DASHBOARD_PAGE_SIZE
+    page_index = 0
+    data = await _get_dashboard(client, {"limit": page_size}, cache, page_index)
+    if "nodes" not in data:
+        nodes = [node for tray_nodes in data["trays"].values() for node in tray_nodes]
+        if links is not None:
+            _collect_links(data, nodes, links)
+        for node in nodes:
+            yield node
+        return
+
+    while True:
+        next_cursor = data.get("next_cursor")
+        pending: asyncio.Future[dict[str, Any]] | None = None
+        if next_cursor:
+            page_index += 1
+            pending = asyncio.ensure_future(
+                _get_dashboard(client, {"limit": page_size, "cursor": next_cursor}, cache, page_index)
+            )
+        if links is not None:
+            _collect_links(data, data["nodes"], links)
+        try:
+            for node in data["nodes"]:
+                yield node
+        except BaseException:
+            # 消費側が途中でやめた（aclose / 例外）なら先読みを捨てる
+            if pending is not None:
+                pending.cancel()
+            raise
+        if pending is None:
+            return
+        data = await pending
+
+
 async def preview_status(
-    client: httpx.AsyncClient,
+    client: HttpClient,
     node_id: str,
     intent: str,
 ) -> dict[str, Any]:
@@ -124,7 +545,7 @@ async def preview_status(
     これにより DB への副作用ゼロが保証される (17 §5, 19 §3.2)。
     """
     path = f"/api/nodes/{node_id}/estimate-status"
-    url = f"{BASE_URL.rstrip('/')}{path}"
+    url = _api_url(path)
     resp = await client.post(url, json={"intent": intent})
     _check_http_error(resp, "POST", path)
     data = resp.json()
@@ -133,6 +554,322 @@ async def preview_status(
     return data
 
 
+class BatchUnsupported(RuntimeError):
+    """batch API が無い（旧デプロイで 404 / 405）。Node ごとの Preview に切り替える。"""
+
+
+async def preview_batch(
+    client: HttpClient,
+    items: list[tuple[str, str]],
+) -> list[dict[str, Any] | None]:
+    """
+    POST /api/nodes/estimate-status/batch — Preview のみ（confirm_status は送らない）。
+    戻り値は items と同じ順序。要素ごとのエラー（node not found など）は None。
+    応答の node_id は取り除き、単体 Preview と同じ形にそろえる。
+    """
+    path = "/api/nodes/estimate-status/batch"
+    url = _api_url(path)
+    resp = await client.post(
+        url,
+        json={"items": [{"node_id": node_id, "intent": intent} for node_id, intent in items]},
+        headers=_save_report_headers(),
+    )
+    if resp.status_code in (404, 405):
+        raise BatchUnsupported(f"{_call_desc('POST', path)} HTTP {resp.status_code}")
+    _check_http_error(resp, "POST", path)
+    data = resp.json()
+    results = data.get("results")
+    if not data.get("ok") or not isinstance(results, list) or len(results) != len(items):
+        raise RuntimeError(f"estimate-status batch error: {data.get('error', 'malformed response')}")
+    out: list[dict[str, Any] | None] = []
+    for (node_id, _), item in zip(items, results):
+        if not isinstance(item, dict) or item.get("node_id") != node_id or not item.get("ok"):
+            out.append(None)
+        else:
+            out.append({k: v for k, v in item.items() if k != "node_id"})
+    return out
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """昇順リストの nearest-rank パーセンタイル。空なら 0。"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+async def preview_many(
+    client: HttpClient,
+    requests: list[tuple[str, str]],
+    concurrency: int | None = None,
+    timeout: float | None = None,
+    batch_size: int | None = None,
+    deadline: float | None = None,
+) -> tuple[list[dict[str, Any] | None], dict[str, Any]]:
+    """
+    (node_id, intent) のリストを並列度 concurrency で Preview する。
+
+    batch_size > 0 なら batch API に batch_size 件ずつまとめて送る（チャンク単位で並列）。
+    最初のチャンクで batch API が無いと分かれば（BatchUnsupported）、Node ごとの呼び出しに切り替える。
+
+    戻り値: (results, stats)
+      results: requests と同じ順序。失敗・タイムアウトした要素は None。
+      stats:   meta.preview 用の件数とレイテンシ（ms）。batch ではチャンクの所要時間を各 Node に付ける。
+    完了順に関わらず results の順序は入力順のまま（status_proposals の決定性を保つ）。
+    concurrency / timeout / batch_size の省略時は PREVIEW_CONCURRENCY / PREVIEW_TIMEOUT_SECONDS / PREVIEW_BATCH_SIZE。
+    deadline: time.monotonic() の値。その時刻で実行中・未着手の Preview を打ち切り、stats.skipped に数える。
+    呼び出しは requests の順に始まるので、先に済ませたい Node を前に置く（preview_priority）。
+    """
+    import asyncio
+
+    concurrency = PREVIEW_CONCURRENCY if concurrency is None else concurrency
+    timeout = PREVIEW_TIMEOUT_SECONDS if timeout is None else timeout
+    batch_size = PREVIEW_BATCH_SIZE if batch_size is None else batch_size
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results: list[dict[str, Any] | None] = [None] * len(requests)
+    latencies: list[float] = [0.0] * len(requests)
+    outcome: list[str] = ["skipped"] * len(requests)  # 終わらなかった（deadline で打ち切った）ものは skipped のまま
+
+    async def _one(i: int, node_id: str, intent: str) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                results[i] = await asyncio.wait_for(preview_status(client, node_id, intent), timeout)
+                outcome[i] = "ok"
+            except asyncio.TimeoutError:
+                outcome[i] = "timed_out"
+            except Exception:
+                # Preview 失敗は無視（観測の一部が欠けるだけ）。件数は stats に残す。
+                outcome[i] = "failed"
+            finally:
+                latencies[i] = round((time.perf_counter() - t0) * 1000, 1)
+
+    async def _chunk(start: int, chunk: list[tuple[str, str]], probe: bool) -> None:
+        async with sem:
+            t0 = time.perf_counter()
+            span = range(start, start + len(chunk))
+            try:
+                items = await asyncio.wait_for(preview_batch(client, chunk), timeout)
+            except BatchUnsupported:
+                if probe:
+                    raise
+                for i in span:
+                    outcome[i] = "failed"
+            except asyncio.TimeoutError:
+                for i in span:
+                    outcome[i] = "timed_out"
+            except Exception:
+                for i in span:
+                    outcome[i] = "failed"
+            else:
+                for i, item in zip(span, items):
+                    results[i] = item
+                    outcome[i] = "failed" if item is None else "ok"
+            finally:
+                elapsed = round((time.perf_counter() - t0) * 1000, 1)
+                for i in span:
+                    latencies[i] = elapsed
+
+    mode = "single"
+    http_requests = len(requests)
+
+    async def _all() -> None:
+        nonlocal mode, http_requests
+        if batch_size > 0 and requests:
+            chunks = [(s, requests[s:s + batch_size]) for s in range(0, len(requests), batch_size)]
+            try:
+                await _chunk(*chunks[0], probe=True)
+                mode = "batch"
+                http_requests = len(chunks)
+            except BatchUnsupported:
+                http_requests += 1  # 判定に使った 1 回
+            if mode == "batch":
+                await asyncio.gather(*(_chunk(s, c, probe=False) for s, c in chunks[1:]))
+        if mode == "single":
+            await asyncio.gather(*(_one(i, node_id, intent) for i, (node_id, intent) in enumerate(requests)))
+
+    if deadline is None:
+        await _all()
+    else:
+        try:
+            await asyncio.wait_for(_all(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass  # 残りは outcome が skipped のまま
+
+    ordered = sorted(latencies)
+    stats = {
+        "mode": mode,  # batch = batch API / single = Node ごと
+        "batch_size": batch_size if mode == "batch" else None,
+        "http_requests": http_requests,
+        "concurrency": max(1, concurrency),
+        "timeout_seconds": timeout,
+        "requested": len(requests),
+        "succeeded": outcome.count("ok"),
+        "failed": outcome.count("failed"),
+        "timed_out": outcome.count("timed_out"),
+        "latency_ms": {
+            "p50": _percentile(ordered, 50),
+            "p95": _percentile(ordered, 95),
+            "max": ordered[-1] if ordered else 0.0,
+        },
+        "latency_ms_by_node": {node_id: latencies[i] for i, (node_id, _) in enumerate(requests)},
+    }
+    if deadline is not None:
+        stats["skipped"] = outcome.count("skipped")
+        stats["skipped_node_ids"] = [node_id for (node_id, _), o in zip(requests, outcome) if o == "skipped"]
+    return results, stats
+
+
+def preview_many_local(
+    requests: list[tuple[str, str]],
+    statuses: list[str],
+) -> tuple[list[dict[str, Any] | None], dict[str, Any]]:
+    """
+    preview_many と同じ形で、state_machine.preview_local により HTTP なしで Preview する。
+    statuses は requests と同じ順序の現在 status（dashboard の値）。
+    """
+    from state_machine import preview_local
+
+    results: list[dict[str, Any] | None] = []
+    failed = 0
+    for (_, intent), status in zip(requests, statuses):
+        try:
+            results.append(preview_local(status, intent))
+        except ValueError:
+            # API では 500（State Machine にない status）。remote と同じく欠けるだけにする。
+            results.append(None)
+            failed += 1
+    stats = {
+        "requested": len(requests),
+        "succeeded": len(requests) - failed,
+        "failed": failed,
+        "timed_out": 0,
+    }
+    return results, stats
+
+
+def _suggested_of(preview: dict[str, Any] | None) -> tuple[str | None, str | None]:
+    """Preview 応答から (suggested.status, suggested.reason) を取り出す。"""
+    suggested = (preview or {}).get("suggested") or {}
+    return suggested.get("status"), suggested.get("reason")
+
+
+def compare_estimators(
+    requests: list[tuple[str, str]],
+    statuses: list[str],
+    remote: list[dict[str, Any] | None],
+    local: list[dict[str, Any] | None],
+) -> dict[str, Any] | None:
+    """
+    verify モード: remote と local の suggested を突き合わせ、不一致があれば ESTIMATOR_MISMATCH を返す。
+    remote が失敗した Node は比較しない（API 側の事情で欠けただけのため）。
+    """
+    mismatches: list[dict[str, Any]] = []
+    compared = 0
+    for (node_id, intent), status, r, l in zip(requests, statuses, remote, local):
+        if r is None:
+            continue
+        compared += 1
+        r_status, r_reason = _suggested_of(r)
+        l_status, l_reason = _suggested_of(l)
+        if (r_status, r_reason) != (l_status, l_reason):
+            mismatches.append({
+                "node_id": node_id,
+                "current_status": status,
+                "intent": intent,
+                "remote": r_status,
+                "local": l_status,
+            })
+    if not mismatches:
+        return None
+    return {
+        "code": "ESTIMATOR_MISMATCH",
+        "message": "estimate-status API とローカル推定（state_machine.py）の結果が一致しません",
+        "details": {
+            "compared": compared,
+            "mismatch_count": len(mismatches),
+            "mismatches": mismatches[:ESTIMATOR_MISMATCH_DETAILS_LIMIT],
+        },
+    }
+
+
+async def estimate_previews(
+    client: HttpClient,
+    estimator: str,
+    preview_requests: list[tuple[str, str]],
+    current_statuses: list[Any],
+    deadline: float | None = None,
+) -> tuple[list[dict[str, Any] | None], dict[str, Any], dict[str, Any] | None]:
+    """
+    Step 2 を estimator に従って行う。戻り値: (previews, preview_stats, ESTIMATOR_MISMATCH の warning or None)。
+    previews は preview_requests と同じ順序。deadline は preview_many へ（local は HTTP がないので打ち切らない）。
+    """
+    estimator_warning: dict[str, Any] | None = None
+    if estimator == "local":
+        previews, preview_stats = preview_many_local(preview_requests, current_statuses)
+    else:
+        previews, preview_stats = await preview_many(client, preview_requests, deadline=deadline)
+        if estimator == "verify":
+            local_previews, _ = preview_many_local(preview_requests, current_statuses)
+            estimator_warning = compare_estimators(
+                preview_requests, current_statuses, previews, local_previews
+            )
+    preview_stats = {"estimator": estimator, **preview_stats}
+    if "latency_ms_by_node" in preview_stats:
+        preview_stats["latency_histogram_ms"] = latency_histogram(preview_stats["latency_ms_by_node"].values())
+    return previews, preview_stats, estimator_warning
+
+
+def preview_degraded_warning(
+    preview_stats: dict[str, Any],
+    http_stats: dict[str, dict[str, Any]],
+) -> dict[str, Any] | None:
+    """Preview の失敗・タイムアウトが 1 件でもあれば PREVIEW_DEGRADED（29 §4.2）。"""
+    failed = preview_stats.get("failed", 0)
+    timed_out = preview_stats.get("timed_out", 0)
+    if not failed and not timed_out:
+        return None
+    return {
+        "code": "PREVIEW_DEGRADED",
+        "message": "estimate-status Preview の一部が取得できませんでした（status_proposals が欠けている可能性があります）",
+        "details": {
+            "requested": preview_stats.get("requested", 0),
+            "failed": failed,
+            "timed_out": timed_out,
+            "endpoints": {
+                key: {k: stats[k] for k in ("retries", "failures", "short_circuited", "circuit_opened")}
+                for key, stats in http_stats.items()
+                if key in PREVIEW_ENDPOINTS
+            },
+        },
+    }
+
+
+def preview_priority(a: NodeAnalysis) -> tuple[int, tuple[int, str, str] | tuple[()]]:
+    """
+    --deadline で Preview する順（小さいほど先）: suggested_next 候補を 28 §6 の順位で → 冷却対象 → その他。
+    候補・冷却対象でない Node はキーが同じなので、安定ソートで dashboard の順のまま並ぶ。
+    """
+    if a.score is not None:
+        return (0, _rank_key(a))
+    return (1 if a.cooling_reason is not None else 2, ())
+
+
+def deadline_partial_warning(deadline: float, skipped_node_ids: list[str]) -> dict[str, Any] | None:
+    """--deadline までに Preview が終わらなかった Node があれば DEADLINE_PARTIAL（29 §4.4）。"""
+    if not skipped_node_ids:
+        return None
+    return {
+        "code": "DEADLINE_PARTIAL",
+        "message": "--deadline までに estimate-status Preview が終わらなかった Node があります（status_proposals が欠けています）",
+        "details": {
+            "deadline_seconds": deadline,
+            "skipped": len(skipped_node_ids),
+            "node_ids": skipped_node_ids[:DEADLINE_SKIPPED_DETAILS_LIMIT],
+        },
+    }
+
+
 # ─── Node ヘルパー ─────────────────────────────────────────
 # 28 §2: updated_at の SSOT。dashboard API の node.updated_at / node.created_at のみ使用。
 
@@ -149,22 +886,42 @@ def _parse_iso(s: str) -> datetime | None:
         return None
 
 
-def get_effective_updated(node: dict[str, Any]) -> tuple[datetime | None, int | None]:
+def get_effective_updated(
+    node: dict[str, Any],
+    now: datetime | None = None,
+) -> tuple[datetime | None, int | None]:
     """
     SSOT: updated_at があればそれ、なければ created_at。
     戻り値: (effective_dt, days_since)。どちらも無い場合は (None, None)。
+    now: 経過日数の基準時刻（省略時は現在時刻）。1 回の観測では同じ now を使う。
     """
     raw = node.get("updated_at") or node.get("created_at")
     dt = _parse_iso(raw) if raw else None
     if dt is None:
         return None, None
-    days = (datetime.now(timezone.utc) - dt).days
+    days = ((now or datetime.now(timezone.utc)) - dt).days
     return dt, days
 
 
-def days_since_update(node: dict[str, Any]) -> int | None:
+def _is_isoformat(ts: str) -> bool:
+    """
+    fromisoformat() が読めた ts が、isoformat() の出力（YYYY-MM-DDTHH:MM:SS.ffffff±HH:MM）と同じ文字列か。
+    マイクロ秒が 0（isoformat は省く）と -00:00（isoformat は +00:00）は違う。
+    """
+    return (
+        len(ts) == 32
+        and ts[7] == "-"
+        and ts[10] == "T"
+        and ts[19] == "."
+        and ts[29] == ":"
+        and (ts[26] == "+" or (ts[26] == "-" and ts[27:] != "00:00"))
+        and ts[20:26] != "000000"
+    )
+
+
+def days_since_update(node: dict[str, Any], now: datetime | None = None) -> int | None:
     """get_effective_updated の days のみ返す（冷却検知・intent 用）。"""
-    _, days = get_effective_updated(node)
+    _, days = get_effective_updated(node, now)
     return days
 
 
@@ -185,45 +942,95 @@ def normalize_temperature(val: Any) -> int:
 
 # ─── suggested_next スコアリング（Phase 3-4, docs/28）────────────────
 
-def compute_suggested_next_score(node: dict[str, Any]) -> tuple[int, dict[str, Any], str]:
+# 28 §4: status ごとの加点（ここにない status は 0）
+SUGGESTED_NEXT_STATUS_BONUS: dict[str, int] = {
+    "WAITING_EXTERNAL": 20,
+    "CLARIFYING": 15,
+    "READY": 10,
+    "NEEDS_DECISION": 12,
+    "BLOCKED": 8,
+}
+RULE_VERSION = "3-4.0"
+# --rules の shadow の版（scoring_rules.compile_rules の表）。None なら並べて採点しない
+SHADOW_RULES: RuleTable | None = None
+SHADOW_RANK_DEPTH = 10  # debug.shadow の rank_diffs で比べる上位の件数（--top-k が大きければそちら）
+# Phase 3-5: 親子（node_children）を見た項（apply_tree。--no-tree では付けない）
+TREE_RULE_VERSION = "3-5.0"
+TREE_STALLED_STATUSES = ("BLOCKED", *SUGGESTED_NEXT_EXCLUDED_STATUSES)  # 進められない子
+TREE_STALLED_CHILDREN_PENALTY = -30  # children: 子がすべて進められない（stalled か机の上にない）親
+TREE_NEGLECTED_SUBTREE_BONUS = 10    # subtree: 子孫に stale または低温の Node がある親
+# 子孫の「最も遅れている status」の順（先頭ほど遅れ。ここにない status は数えない）
+TREE_STATUS_SEVERITY = (
+    "BLOCKED", "WAITING_EXTERNAL", "NEEDS_DECISION", "CLARIFYING", "COOLING", "IN_PROGRESS", "READY",
+)
+TREE_CYCLE_DETAILS_LIMIT = 20  # TREE_CYCLE の details に載せる node_id の最大件数
+DEADLINE_SKIPPED_DETAILS_LIMIT = 20  # DEADLINE_PARTIAL の details に載せる node_id の最大件数
+DEADLINE_SAVE_RESERVE_SECONDS = 10.0  # --deadline --save: 保存と healthcheck に残す秒数（--deadline の 1/4 まで）
+# --strict の失敗に数えない warnings。API の一時的な不調で出るもので、仕様のズレやバグではない（docs/25 §12.5）
+STRICT_EXEMPT_WARNINGS = frozenset({"PREVIEW_DEGRADED"})
+# 内訳 dict は組み合わせが少ない（高々数十通り）ので、同じ内訳の Node で 1 つを共有する（読み取り専用）。
+# レポートに載せるときは build_report がコピーする。
+_BREAKDOWNS: dict[tuple[int, ...], dict[str, int]] = {}
+
+
+def _shared_breakdown(temp: int, stale: int, status_bonus: int, stuck: int) -> dict[str, int]:
+    key = (temp, stale, status_bonus, stuck)
+    breakdown = _BREAKDOWNS.get(key)
+    if breakdown is None:
+        breakdown = _BREAKDOWNS[key] = {"temp": temp, "stale": stale, "status_bonus": status_bonus, "stuck": stuck}
+    return breakdown
+
+
+def _tree_breakdown(base: dict[str, int], children: int, subtree: int) -> dict[str, int]:
+    """base（_shared_breakdown）に children / subtree を足した内訳（共有。書き換えない）。"""
+    key = (base["temp"], base["stale"], base["status_bonus"], base["stuck"], children, subtree)
+    breakdown = _BREAKDOWNS.get(key)
+    if breakdown is None:
+        breakdown = _BREAKDOWNS[key] = {**base, "children": children, "subtree": subtree}
+    return breakdown
+
+
+def compute_suggested_next_score(
+    node: dict[str, Any],
+    now: datetime | None = None,
+) -> tuple[int, dict[str, Any], str]:
     """
     候補ノードのスコア・内訳・tie-break 用 effective_ts を返す。
     戻り値: (total, breakdown_dict, effective_ts_for_sort)
     breakdown_dict = { temp, stale, status_bonus, stuck }（28 §4, §5）
     """
-    status = node.get("status") or ""
-    temp_val = normalize_temperature(node.get("temperature"))
-    effective_dt, days = get_effective_updated(node)
+    effective_dt, days = get_effective_updated(node, now)
     effective_ts = effective_dt.isoformat() if effective_dt else ""
+    total, breakdown, sort_ts = _score_components(node.get("status") or "", node.get("temperature"), effective_ts, days)
+    return total, dict(breakdown), sort_ts
+
+
+def _score_components(
+    status: str,
+    temperature: Any,
+    effective_ts: str,
+    days: int | None,
+) -> tuple[int, dict[str, Any], str]:
+    """
+    compute_suggested_next_score の本体。解析済みの値を受け取る（再パースしない）。
+    effective_ts: effective_dt.isoformat()（日付なしは ""）
+    breakdown は _shared_breakdown（共有。書き換えない）。
+    """
+    temp_val = normalize_temperature(temperature)
 
-    temp = 30 if temp_val <= TEMPERATURE_LOW_THRESHOLD else 0
+    temp = TEMP_POINTS if temp_val <= TEMPERATURE_LOW_THRESHOLD else 0
     # どちらも無い場合は stale 扱い（28 §2）。7 日以上前も stale。
-    no_date = effective_dt is None
-    stale = 25 if (no_date or (days is not None and days >= STALE_DAYS_FOR_SUGGESTED)) else 0
-
-    status_bonus = 0
-    if status == "WAITING_EXTERNAL":
-        status_bonus = 20
-    elif status == "CLARIFYING":
-        status_bonus = 15
-    elif status == "READY":
-        status_bonus = 10
-    elif status == "NEEDS_DECISION":
-        status_bonus = 12
-    elif status == "BLOCKED":
-        status_bonus = 8
+    no_date = not effective_ts
+    stale = STALE_POINTS if (no_date or (days is not None and days >= STALE_DAYS_FOR_SUGGESTED)) else 0
+
+    status_bonus = SUGGESTED_NEXT_STATUS_BONUS.get(status, 0) if isinstance(status, str) else 0
 
     stuck = 0
     if status == "IN_PROGRESS" and (no_date or (days is not None and days >= IN_PROGRESS_STALE_DAYS)):
-        stuck = 15
+        stuck = STUCK_POINTS
 
     total = temp + stale + status_bonus + stuck
-    breakdown = {
-        "temp": temp,
-        "stale": stale,
-        "status_bonus": status_bonus,
-        "stuck": stuck,
-    }
+    breakdown = _shared_breakdown(temp, stale, status_bonus, stuck)
     # tie-break: 日付なしは最後にしたいので、空でない値を使う（asc で古い順のとき '' は先頭になるため）
     sort_ts = effective_ts if effective_ts else "\uffff"  # 辞書順で最後
     return total, breakdown, sort_ts
@@ -246,214 +1053,1122 @@ def get_next_action_for_status(status: str, title: str) -> str:
     return tpl.replace("{title}", title)
 
 
+def use_rules(path: str) -> RuleConfig:
+    """
+    --rules: スコアリングルールの JSON（scoring_rules.py）を読み、active の版を 28 §4 の定数
+    （SUGGESTED_NEXT_STATUS_BONUS・閾値・点数・RULE_VERSION）に入れ、shadow の版を SHADOW_RULES にまとめる。
+    観測の前に 1 回だけ呼ぶ。--per-tenant のプロセスプールには worker_settings / init_worker で同じ値を渡す。
+    """
+    global SHADOW_RULES
+    from scoring_rules import compile_rules, load_rules
+
+    config = load_rules(path)
+    apply_rule_set(config.active)
+    SHADOW_RULES = compile_rules(config.shadows) if config.shadows else None
+    return config
+
+
+def apply_rule_set(rules: RuleSet) -> None:
+    """1 つの版（scoring_rules.RuleSet）を 28 §4 の定数に入れる（use_rules・snapshot.py sweep の点ごと）。"""
+    global SUGGESTED_NEXT_STATUS_BONUS, SUGGESTED_NEXT_EXCLUDED_STATUSES, RULE_VERSION, TREE_RULE_VERSION
+    global TEMPERATURE_LOW_THRESHOLD, STALE_DAYS_FOR_SUGGESTED, IN_PROGRESS_STALE_DAYS
+    global TEMP_POINTS, STALE_POINTS, STUCK_POINTS
+    SUGGESTED_NEXT_STATUS_BONUS = dict(rules.status_bonus)
+    SUGGESTED_NEXT_EXCLUDED_STATUSES = rules.excluded_statuses
+    RULE_VERSION, TREE_RULE_VERSION = rules.version, rules.tree_version
+    TEMPERATURE_LOW_THRESHOLD = rules.temperature_low_threshold
+    STALE_DAYS_FOR_SUGGESTED = rules.stale_days
+    IN_PROGRESS_STALE_DAYS = rules.in_progress_stale_days
+    TEMP_POINTS, STALE_POINTS, STUCK_POINTS = (rules.points[key] for key in ("temp", "stale", "stuck"))
+
+
+def current_rules() -> RuleSet:
+    """今の 28 §4 の定数を 1 つの版にしたもの（--rules なしなら組み込みのルール。snapshot.py sweep の基準）。"""
+    from scoring_rules import RuleSet
+
+    return RuleSet(
+        RULE_VERSION,
+        TREE_RULE_VERSION,
+        dict(SUGGESTED_NEXT_STATUS_BONUS),
+        tuple(SUGGESTED_NEXT_EXCLUDED_STATUSES),
+        {"temp": TEMP_POINTS, "stale": STALE_POINTS, "stuck": STUCK_POINTS},
+        TEMPERATURE_LOW_THRESHOLD,
+        STALE_DAYS_FOR_SUGGESTED,
+        IN_PROGRESS_STALE_DAYS,
+    )
+
+
+def use_cooling(threshold: int, days: int) -> None:
+    """冷却検知のしきい値（COOLING_THRESHOLD / COOLING_DAYS）を置き換える（snapshot.py sweep の点ごと）。"""
+    global COOLING_THRESHOLD, COOLING_DAYS
+    COOLING_THRESHOLD, COOLING_DAYS = threshold, days
+
+
+def worker_settings() -> tuple[RuleSet, RuleTable | None, int, int]:
+    """
+    プロセスプールのワーカーに渡す採点の設定（init_worker の引数）。
+    spawn / forkserver で起動したワーカーは main を import し直すので、use_rules で書き換えた module 変数を引き継がない。
+    """
+    return current_rules(), SHADOW_RULES, COOLING_THRESHOLD, COOLING_DAYS
+
+
+def init_worker(rules: RuleSet, shadow: RuleTable | None, cooling_threshold: int, cooling_days: int) -> None:
+    """ProcessPoolExecutor の initializer: 親プロセスと同じ採点の設定（worker_settings）を入れる。"""
+    global SHADOW_RULES
+    apply_rule_set(rules)
+    SHADOW_RULES = shadow
+    use_cooling(cooling_threshold, cooling_days)
+
+
+# ─── Node 解析（1 パス）────────────────────────────────────
+# 各 Node を 1 回だけ走査し、Preview 用 intent・冷却判定・スコア・status 集計キーを
+# 同じ now で一度に求める。以降の Step はこの結果だけを使う（dashboard の順序を保つ）。
+
+class ObservedNode:
+    """
+    dashboard の Node のうち Observer が読む値だけ（ObservedNode.parse で 1 回だけ作る）。
+    context・memo など使わないキーは持たない。status は sys.intern し（同じ status の Node で 1 つの str）、
+    実効更新日時（28 §2: updated_at else created_at）はパース済みで持つ。
+    """
+
+    __slots__ = ("node_id", "title", "status", "temperature", "effective", "last_updated")
+
+    def __init__(
+        self,
+        node_id: str,
+        title: str,
+        status: Any,
+        temperature: Any,
+        effective: datetime | None,
+        last_updated: str,
+    ) -> None:
+        self.node_id = node_id
+        self.title = title
+        self.status = status              # node.get("status", "")（加工しない）
+        self.temperature = temperature    # node.get("temperature")（生の値）
+        self.effective = effective        # 実効更新日時。なければ None
+        self.last_updated = last_updated  # effective.isoformat()。effective がなければ node.get("updated_at", "")
+
+    @classmethod
+    def parse(cls, node: dict[str, Any]) -> ObservedNode:
+        status = node.get("status", "")
+        raw = node.get("updated_at") or node.get("created_at")
+        effective = _parse_iso(raw) if raw else None
+        if effective is None:
+            last_updated = node.get("updated_at", "")
+        else:
+            # API の日時がすでに isoformat() の書き方ならそのまま使う（タイムゾーン付きの isoformat は 1 件 2µs ほど）
+            last_updated = raw.replace("Z", "+00:00")
+            if not _is_isoformat(last_updated):
+                last_updated = effective.isoformat()
+        return cls(
+            node["id"],
+            get_title(node),
+            sys.intern(status) if type(status) is str else status,
+            node.get("temperature"),
+            effective,
+            last_updated,
+        )
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # --per-tenant でプロセスプールに渡すとき、slot 名を Node ごとに書かない
+        return (ObservedNode, (self.node_id, self.title, self.status, self.temperature, self.effective, self.last_updated))
+
+
+class NodeAnalysis(NamedTuple):
+    node_id: str
+    title: str
+    status: Any                  # node.get("status", "")（status_proposals / intent 用。加工しない）
+    temperature: Any             # node.get("temperature")（生の値）
+    days: int | None             # 最終更新からの経過日数（日付なしは None）
+    intent: str                  # Step 2 の Preview に渡す intent
+    cooling_reason: str | None   # 冷却対象なら理由（" / " 連結済み）、対象外なら None
+    last_updated: str            # cooling_alerts.last_updated
+    score: tuple[int, dict[str, Any], str] | None  # suggested_next 候補なら (total, breakdown, sort_ts)
+    status_key: str              # COUNT_MISMATCH 用の status 集計キー
+    subtree: SubtreeStats | None = None  # 子孫の集計（apply_tree の後。子のない Node は None）
+
+
+def build_intent(status: Any, temperature: Any, days: int | None) -> str:
+    """Preview 用 intent（観測事実のみ。判断は含めない）。"""
+    intent_parts: list[str] = []
+    if days is not None:
+        intent_parts.append(f"最終更新から{days}日経過")
+    if temperature is not None:
+        intent_parts.append(f"温度{temperature}")
+    intent_parts.append(f"現在{status}")
+    return "、".join(intent_parts)
+
+
+def analyze_node(node: dict[str, Any] | ObservedNode, now: datetime) -> NodeAnalysis:
+    """1 Node 分の解析。dict なら ObservedNode.parse する（updated_at / created_at のパースは 1 回だけ）。"""
+    if not isinstance(node, ObservedNode):
+        node = ObservedNode.parse(node)
+    status = node.status
+    temp = node.temperature
+    effective_dt = node.effective  # 28 §2: updated_at else created_at
+    days = (now - effective_dt).days if effective_dt is not None else None
+    effective_ts = node.last_updated if effective_dt is not None else ""
+
+    # Step 3: 冷却検知（06_Temperature_Spec §4.1: 最終更新日時 + temperature）
+    reason_parts: list[str] = []
+    if temp is not None and temp < COOLING_THRESHOLD:
+        reason_parts.append(f"温度が{temp}に低下")
+    if days is not None and days >= COOLING_DAYS:
+        reason_parts.append(f"{days}日間更新がありません")
+
+    # Step 4: 候補除外（28 §1）→ スコア（28 §4）
+    score_status = status or ""
+    score = None
+    if score_status not in SUGGESTED_NEXT_EXCLUDED_STATUSES:
+        score = _score_components(score_status, temp, effective_ts, days)
+
+    return NodeAnalysis(
+        node.node_id,
+        node.title,
+        status,
+        temp,
+        days,
+        build_intent(status, temp, days),
+        " / ".join(reason_parts) if reason_parts else None,
+        node.last_updated,
+        score,
+        (status or "UNKNOWN").strip() or "UNKNOWN",
+    )
+
+
+def analyze_nodes(
+    nodes: Iterable[dict[str, Any] | ObservedNode],
+    now: datetime,
+    engine: str = "row",
+) -> list[NodeAnalysis]:
+    if engine == "columnar":
+        nodes = list(nodes)
+        return [
+            a
+            for i in range(0, len(nodes), COLUMNAR_CHUNK_SIZE)
+            for a in analyze_nodes_columnar(nodes[i:i + COLUMNAR_CHUNK_SIZE], now)
+        ]
+    return [analyze_node(node, now) for node in nodes]
+
+
+def analyze_nodes_columnar(
+    nodes: list[dict[str, Any] | ObservedNode],
+    now: datetime,
+    use_numpy: bool | None = None,
+) -> list[NodeAnalysis]:
+    """
+    analyze_node を nodes 全体に当てたのと同じ結果を、スコアと冷却判定を列でまとめて計算して返す
+    （scoring_columns.py）。列に載らない Node は analyze_node で解析する。
+    use_numpy: None なら NumPy があれば使う / False なら array だけで計算する。
+    """
+    nodes = [n if isinstance(n, ObservedNode) else ObservedNode.parse(n) for n in nodes]
+    from scoring_columns import FALLBACK, class_table, load_columns, make_rules, score_columns
+
+    rules = make_rules(
+        SUGGESTED_NEXT_STATUS_BONUS,
+        SUGGESTED_NEXT_EXCLUDED_STATUSES,
+        temperature_low_threshold=TEMPERATURE_LOW_THRESHOLD,
+        stale_days=STALE_DAYS_FOR_SUGGESTED,
+        in_progress_stale_days=IN_PROGRESS_STALE_DAYS,
+        points=(TEMP_POINTS, STALE_POINTS, STUCK_POINTS),
+        cooling_threshold=COOLING_THRESHOLD,
+        cooling_days=COOLING_DAYS,
+    )
+    cols = load_columns(nodes, now, rules)
+    scores = score_columns(cols, rules, use_numpy)
+    table = class_table(rules)
+    analyses: list[NodeAnalysis] = []
+    for node, effective_ts, days, cls in zip(nodes, cols.effective_ts, scores.days, scores.classes):
+        if cls == FALLBACK:
+            analyses.append(analyze_node(node, now))
+            continue
+        c = table[cls]
+        status = node.status
+        temp = node.temperature
+        if not effective_ts:
+            days = None
+
+        reason_parts: list[str] = []
+        if c.cool_temp:
+            reason_parts.append(f"温度が{temp}に低下")
+        if c.cool_days:
+            reason_parts.append(f"{days}日間更新がありません")
+
+        analyses.append(NodeAnalysis(
+            node.node_id,
+            node.title,
+            status,
+            temp,
+            days,
+            build_intent(status, temp, days),
+            " / ".join(reason_parts) if reason_parts else None,
+            node.last_updated,
+            (c.total, c.breakdown, effective_ts or "\uffff") if c.candidate else None,
+            (status or "UNKNOWN").strip() or "UNKNOWN",
+        ))
+    return analyses
+
+
+def tray_for(status: Any) -> str:
+    """status → dashboard の tray 名（route.ts の switch と同じ）。"""
+    return TRAY_BY_STATUS.get(status, "other_active")
+
+
+async def analyze_stream(
+    nodes: AsyncIterator[dict[str, Any]],
+    now: datetime,
+    timings: Timings | None = None,
+    engine: str = "row",
+) -> tuple[list[NodeAnalysis], dict[str, int]]:
+    """
+    Node のストリームを 1 件ずつ解析する（生の Node dict は保持しない）。
+    戻り値: (analyses, tray_counts)。analyses は trays 形式と同じ「tray 順 → tray 内は受信順」に並べる。
+    timings 指定時は、ページ待ち（dashboard）と解析（analyze）の時間を分けて積算する。
+    engine="columnar" のときは COLUMNAR_CHUNK_SIZE 件ずつためてまとめて解析する（保持するのはその分だけ）。
+    """
+    buckets: dict[str, list[NodeAnalysis]] = {tray: [] for tray in TRAY_ORDER}
+    chunk: list[ObservedNode] = []
+    wait_s = 0.0
+    analyze_s = 0.0
+
+    def flush() -> None:
+        for a in analyze_nodes_columnar(chunk, now):
+            buckets[tray_for(a.status)].append(a)
+        chunk.clear()
+
+    t_wait = time.perf_counter()
+    async for node in nodes:
+        t = time.perf_counter()
+        wait_s += t - t_wait
+        if engine == "columnar":
+            chunk.append(ObservedNode.parse(node))
+            if len(chunk) >= COLUMNAR_CHUNK_SIZE:
+                flush()
+        else:
+            a = analyze_node(node, now)
+            buckets[tray_for(a.status)].append(a)
+        t_wait = time.perf_counter()
+        analyze_s += t_wait - t
+    wait_s += time.perf_counter() - t_wait
+    if chunk:
+        t = time.perf_counter()
+        flush()
+        analyze_s += time.perf_counter() - t
+    if timings is not None:
+        timings.add("dashboard", wait_s * 1000)
+        timings.add("analyze", analyze_s * 1000)
+    analyses = [a for tray in TRAY_ORDER for a in buckets[tray]]
+    return analyses, {tray: len(buckets[tray]) for tray in TRAY_ORDER}
+
+
+def apply_tree(analyses: list[NodeAnalysis], links: Iterable[tuple[str, str]]) -> list[NodeAnalysis]:
+    """
+    親子（node_tree.py）を解析結果に反映する。row / columnar どちらの後でも同じで、I/O なし。
+    links: iter_dashboard_nodes が集めた (parent_id, child_id)。analyses にない親のリンクは使わない。
+
+    - score: breakdown に children（子がすべて TREE_STALLED_STATUSES か机の上にない → TREE_STALLED_CHILDREN_PENALTY）と
+      subtree（子孫に stale か TEMPERATURE_LOW_THRESHOLD 以下の Node がある → TREE_NEGLECTED_SUBTREE_BONUS）を足す。
+      候補の Node はすべてこの 2 キーを持つ（子がなければ 0）。循環の上の Node には children を付けない
+      （循環の中の子が進められるか分からないため）。
+    - cooling_reason: 冷却対象の親には配下の冷却対象の件数を足す。親が対象外でも、机の上の子孫がすべて対象なら対象にする。
+    - subtree: 子孫の集計（suggested_next.debug と TREE_CYCLE に使う）。
+    """
+    from node_tree import build_index, subtree_stats
+
+    index = build_index([a.node_id for a in analyses], links)
+    stats, _ = subtree_stats(
+        index,
+        [a.status for a in analyses],
+        [normalize_temperature(a.temperature) for a in analyses],
+        [a.days is None or a.days >= STALE_DAYS_FOR_SUGGESTED for a in analyses],
+        [a.cooling_reason is not None for a in analyses],
+        TREE_STALLED_STATUSES,
+        TREE_STATUS_SEVERITY,
+    )
+    new = tuple.__new__  # _replace（1 件 1.4µs）より速い。全 Node を作り直すので
+    out: list[NodeAnalysis] = []
+    for a, s in zip(analyses, stats):
+        children = subtree = 0
+        reason = a.cooling_reason
+        if s is not None:
+            children, subtree = _tree_terms(s)
+            if s.cooling_descendants:
+                if reason is not None:
+                    reason = f"{reason} / 配下の {s.cooling_descendants} 件も冷却対象"
+                elif s.cooling_descendants == s.descendants:
+                    reason = f"配下の {s.descendants} 件がすべて冷却対象"
+        score = a.score
+        if score is not None:
+            total, breakdown, sort_ts = score
+            score = (total + children + subtree, _tree_breakdown(breakdown, children, subtree), sort_ts)
+        # NodeAnalysis の並び: node_id .. intent（6 項目）, cooling_reason, last_updated, score, status_key, subtree
+        out.append(new(NodeAnalysis, (*a[:6], reason, a.last_updated, score, a.status_key, s)))
+    return out
+
+
+def _tree_terms(s: SubtreeStats | None) -> tuple[int, int]:
+    """子孫の集計 → (children, subtree) の加点（28 §4.1）。子のない Node は (0, 0)。"""
+    if s is None:
+        return 0, 0
+    children = TREE_STALLED_CHILDREN_PENALTY if s.open_children == 0 and not s.in_cycle else 0
+    neglected = s.stale_descendants or (s.coldest is not None and s.coldest <= TEMPERATURE_LOW_THRESHOLD)
+    return children, TREE_NEGLECTED_SUBTREE_BONUS if neglected else 0
+
+
+SUGGESTED_NEXT_REASONS: dict[str, str] = {
+    "IN_PROGRESS": "実施中で最もスコアが高いノードです",
+    "NEEDS_DECISION": "判断待ちのノードがあります",
+    "READY": "着手可能な状態です",
+    "BLOCKED": "障害がありますが、解消すれば進められます",
+    "WAITING_EXTERNAL": "外部からの返答を確認してみてください",
+    "CLARIFYING": "言語化・整理が必要なノードです",
+}
+
+
+def _rank_key(a: NodeAnalysis) -> tuple[int, str, str]:
+    """28 §6: total 降順 → updated_at 古い順（日付なしは最後）→ node_id 辞書順。小さいほど上位。"""
+    return (-a.score[0], a.score[2], a.node_id)
+
+
+def select_top_k(analyses: Iterable[NodeAnalysis], k: int) -> list[NodeAnalysis]:
+    """
+    suggested_next 候補（score あり）の上位 k 件を 28 §6 の順で返す。
+    ヒープで選ぶので O(n log k)。analyses はイテレータでよい（全件をリストにしない）。
+    """
+    if k < 1:
+        return []
+    return heapq.nsmallest(k, (a for a in analyses if a.score is not None), key=_rank_key)
+
+
+def shadow_debug(
+    analyses: list[NodeAnalysis],
+    table: RuleTable,
+    active_top: list[NodeAnalysis],
+) -> list[dict[str, Any]]:
+    """
+    suggested_next.debug.shadow: shadow の版ごとの 1 位と、上位 len(active_top) 件の順位の違い。
+    Node を 1 回だけ走査し、全版の合計は同じ合計になる Node のまとまりごとに 1 回（score_versions）で求める。
+    親子の項（28 §4.1）は active のルールで求めた値を足す。
+    rank_diffs の rank / shadow_rank が null なら、その版では上位 len(active_top) 件の外。
+    """
+    from scoring_rules import class_key, score_versions
+
+    # 合計は (status, 丸めた温度・経過日数, 親子の項) で決まる。Node をこのキーで分け、全版の合計はキーごとに 1 回だけ求める
+    classes: dict[tuple[str, int, int | None, int], list[NodeAnalysis]] = {}
+    for a in analyses:
+        status = a.status if isinstance(a.status, str) else ""
+        temperature, days = class_key(table, normalize_temperature(a.temperature), a.days)
+        key = (status, temperature, days, sum(_tree_terms(a.subtree)) if a.subtree is not None else 0)
+        members = classes.get(key)
+        if members is None:
+            classes[key] = [a]
+        else:
+            members.append(a)
+    scored = [
+        (key[3], score_versions(table, key[0], key[1], key[2]), members) for key, members in classes.items()
+    ]
+
+    depth = len(active_top)
+    active_ranks = {a.node_id: rank for rank, a in enumerate(active_top, start=1)}
+    out: list[dict[str, Any]] = []
+    for i, version in enumerate(table.versions):
+        # 合計の高いキーから、上位 depth 件が決まるところ（同点は全部）までの Node だけを並べる
+        by_total = sorted(
+            ((totals[i] + tree, members) for tree, totals, members in scored if totals[i] is not None),
+            key=lambda item: -item[0],
+        )
+        picked: list[tuple[int, str, str]] = []
+        for total, members in by_total:
+            if len(picked) >= depth and -picked[-1][0] > total:
+                break
+            picked.extend((-total, a.last_updated if a.days is not None else "\uffff", a.node_id) for a in members)
+        top = heapq.nsmallest(depth, picked)
+        shadow_ranks = {key[2]: rank for rank, key in enumerate(top, start=1)}
+        node_ids = [*active_ranks, *(node_id for node_id in shadow_ranks if node_id not in active_ranks)]
+        out.append({
+            "rule_version": version,
+            "node_id": top[0][2] if top else None,
+            "total": -top[0][0] if top else None,
+            "same_pick": bool(top and active_top) and top[0][2] == active_top[0].node_id,
+            "rank_diffs": [
+                {"node_id": node_id, "rank": active_ranks.get(node_id), "shadow_rank": shadow_ranks.get(node_id)}
+                for node_id in node_ids
+                if active_ranks.get(node_id) != shadow_ranks.get(node_id)
+            ],
+        })
+    return out
+
+
+def build_report(
+    analyses: list[NodeAnalysis],
+    previews: list[dict[str, Any] | None],
+    tray_counts: dict[str, int],
+    top_k: int | None = None,
+) -> dict[str, Any]:
+    """
+    解析結果と Preview 結果から ObserverReport（meta を除く）を組み立てる。
+    previews は analyses と同じ順序（失敗した Node は None）。I/O なし。
+    top_k: 指定時は上位 top_k 件を suggested_next_ranking として付与する。
+    """
+    # ── Step 2 の結果: status_proposals ──
+    status_proposals: list[dict[str, Any]] = []
+    for a, preview in zip(analyses, previews):
+        if preview is None:
+            continue
+        suggested = preview.get("suggested")
+        if suggested and suggested.get("status") != a.status:
+            status_proposals.append({
+                "node_id": a.node_id,
+                "title": a.title,
+                "current_status": a.status,
+                "suggested_status": suggested["status"],
+                "reason": suggested.get("reason", ""),
+            })
+
+    # ── Step 3: 冷却検知 ──
+    cooling_alerts: list[dict[str, Any]] = [
+        {
+            "node_id": a.node_id,
+            "title": a.title,
+            "temperature": a.temperature,
+            "last_updated": a.last_updated,
+            "message": f"「{a.title}」は{a.cooling_reason}。止めてよいですか？",
+        }
+        for a in analyses
+        if a.cooling_reason is not None
+    ]
+
+    # ── Step 4: suggested_next を構成（Phase 3-4, 28 SSOT）──
+    # 候補除外 → スコア計算 → tie-break（28 §6）→ 1 件。安全性は 28 §8 のまま。
+    # 全件ソートはせず、ヒープで上位だけ選ぶ（--top-k なしなら 1 件）。
+    suggested_next = None
+    k = max(1, top_k or 1)
+    # --rules の shadow があれば、比べる分（SHADOW_RANK_DEPTH 件）まで 1 回で選ぶ
+    active_top = select_top_k(analyses, max(k, SHADOW_RANK_DEPTH) if SHADOW_RULES is not None else k)
+    ranked = active_top[:k]
+    if ranked:
+        best = ranked[0]
+        total_score, breakdown, _ = best.score
+        status = best.status
+        suggested_next = {
+            "node_id": best.node_id,
+            "title": best.title,
+            "reason": SUGGESTED_NEXT_REASONS.get(status, f"{status} のノードです"),
+            "next_action": get_next_action_for_status(status, best.title),
+            "debug": {
+                "total": total_score,
+                "breakdown": dict(breakdown),
+                # apply_tree 済みなら breakdown に children / subtree がある
+                "rule_version": TREE_RULE_VERSION if "children" in breakdown else RULE_VERSION,
+            },
+        }
+        if best.subtree is not None:
+            suggested_next["debug"]["subtree"] = best.subtree._asdict()
+        if SHADOW_RULES is not None:
+            suggested_next["debug"]["shadow"] = shadow_debug(analyses, SHADOW_RULES, active_top)
+
+    # ── Step 5: node_count（SSOT）と summary 構成 ──
+    # 28 品質ルール: node_count は dashboard の Node 数のみ。summary は node_count から生成（数え直さない）。
+    node_count = len(analyses)
+    summary_parts = [f"机の上に {node_count} 件のノードがあります"]
+    if tray_counts.get("in_progress"):
+        summary_parts.append(f"実施中 {tray_counts['in_progress']} 件")
+    if tray_counts.get("needs_decision"):
+        summary_parts.append(f"判断待ち {tray_counts['needs_decision']} 件")
+    if tray_counts.get("waiting_external"):
+        summary_parts.append(f"外部待ち {tray_counts['waiting_external']} 件")
+    if cooling_alerts:
+        summary_parts.append(f"冷却確認 {len(cooling_alerts)} 件")
+    if status_proposals:
+        summary_parts.append(f"状態変更の提案 {len(status_proposals)} 件")
+
+    summary = "。".join(summary_parts) + "。"
+
+    # ── 整合性チェック（29_Observer_Warnings.md）────────────────
+    # warnings は { code, message, details? } のリスト。COUNT_MISMATCH / SUMMARY_MISMATCH
+    warnings: list[dict[str, Any]] = []
+
+    # (1) summary 先頭の件数と node_count の一致
+    m = re.search(r"机の上に\s*(\d+)\s*件", summary)
+    if m:
+        summary_total = int(m.group(1))
+        if summary_total != node_count:
+            warnings.append({
+                "code": "SUMMARY_MISMATCH",
+                "message": "node_count と summary の件数が一致しません",
+                "details": {"node_count": node_count, "summary_total": summary_total},
+            })
+
+    # (2) status 別集計の合計と node_count の一致（COUNT_MISMATCH）
+    by_status: dict[str, int] = {}
+    for a in analyses:
+        by_status[a.status_key] = by_status.get(a.status_key, 0) + 1
+    status_sum = sum(by_status.values())
+    if status_sum != node_count:
+        warnings.append({
+            "code": "COUNT_MISMATCH",
+            "message": "node_count と status 集計の合計が一致しません",
+            "details": {
+                "node_count": node_count,
+                "status_sum": status_sum,
+                "by_status": by_status,
+            },
+        })
+
+    # (3) node_children に循環がある（TREE_CYCLE。apply_tree 済みのときだけ）
+    cycle_ids = [a.node_id for a in analyses if a.subtree is not None and a.subtree.in_cycle]
+    if cycle_ids:
+        warnings.append({
+            "code": "TREE_CYCLE",
+            "message": "node_children に循環があります（循環の中の Node どうしは親子の集計に含めていません）",
+            "details": {"count": len(cycle_ids), "node_ids": cycle_ids[:TREE_CYCLE_DETAILS_LIMIT]},
+        })
+
+    report: dict[str, Any] = {"suggested_next": suggested_next}
+    if top_k:
+        # --top-k: suggested_next に続く候補を順位付きで返す（1 位は suggested_next と同じ Node）
+        report["suggested_next_ranking"] = [
+            {
+                "rank": i + 1,
+                "node_id": a.node_id,
+                "title": a.title,
+                "status": a.status,
+                "total": a.score[0],
+                "breakdown": dict(a.score[1]),
+            }
+            for i, a in enumerate(ranked)
+        ]
+    report.update({
+        "status_proposals": status_proposals,
+        "cooling_alerts": cooling_alerts,
+        "summary": summary,
+        "node_count": node_count,
+        "warnings": warnings,
+    })
+    return report
+
+
 # ─── Observer ロジック ─────────────────────────────────────
 # 19 §5: 処理フロー
-#   1. dashboard で Node 取得
+#   1. dashboard で Node 取得（ページ読みのストリーム）
 #   2. 各 Node に estimate-status Preview
 #   3. temperature / updated_at から冷却検知
 #   4. 全体を分析し ObserverReport 構成
 #   5. 出力
+# 2〜4 の判定は analyze_nodes() の 1 パスで済ませ、build_report() が各セクションを組み立てる。
+
+def analysis_digest(
+    analyses: list[NodeAnalysis],
+    tray_counts: dict[str, int],
+    estimator: str,
+    top_k: int | None,
+) -> str:
+    """
+    レポートを決める入力（解析結果・トレー件数・推定方法・top_k・採点ルール）のダイジェスト。
+    経過日数は intent / cooling_reason / score に入るので、日数が 1 日でも変われば別の値になる。
+    採点ルールは有効版・影の版（debug.shadow）・冷却の閾値を含める。--rules を差し替えただけの実行で
+    前回のレポートを使い回さないため。
+    """
+    import hashlib
+
+    rules = [current_rules(), SHADOW_RULES, COOLING_THRESHOLD, COOLING_DAYS]
+    raw = json.dumps([estimator, top_k, tray_counts, analyses, rules], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _empty_report() -> dict[str, Any]:
+    """机の上に Node がないときの ObserverReport。"""
+    return {
+        "suggested_next": None,
+        "status_proposals": [],
+        "cooling_alerts": [],
+        "summary": "机の上にノードがありません。",
+        "node_count": 0,
+        "warnings": [],  # 29: list of { code, message, details? }
+        "meta": {  # 31: 鮮度表示用
+            "observed_at": datetime.now(timezone.utc).isoformat(),
+            "freshness_minutes": 0,
+        },
+    }
 
-async def observe() -> dict[str, Any]:
-    """Observer のメイン処理。ObserverReport を返す。"""
-
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # ── Step 1: アクティブ Node を取得 ──
-        trays = await fetch_dashboard(client)
 
-        all_nodes: list[dict[str, Any]] = []
-        for tray_nodes in trays.values():
-            all_nodes.extend(tray_nodes)
+async def observe(
+    estimator: str | None = None,
+    top_k: int | None = None,
+    cache_dir: str | None = None,
+    client: HttpClient | None = None,
+    timings: Timings | None = None,
+    engine: str | None = None,
+    tree: bool | None = None,
+    state: DeskState | None = None,
+    deadline: float | None = None,
+    record_dir: str | None = None,
+) -> dict[str, Any]:
+    """
+    Observer のメイン処理。ObserverReport を返す。
+    estimator: Step 2 の推定方法（remote / local / verify）。省略時は DEFAULT_ESTIMATOR。
+    top_k: 指定時は suggested_next_ranking（上位 top_k 件）を付与する。
+    cache_dir: 指定時は前回から変わっていない Node の Preview を再利用する（node_cache.py）。
+               dashboard も ETag で条件付きに読み、変化がなければ前回のレポートを返す。
+    client: 共有する AsyncClient（make_client）。省略時はこの呼び出しの中だけで作って閉じる。
+    timings: 各フェーズの所要時間を積算する先（省略時はこの呼び出しの中だけ）。要約は meta.timing に入る。
+    engine: Step 1 の解析方法（row / columnar）。省略時は DEFAULT_ENGINE。どちらでもレポートは同じ。
+    tree: 親子（node_children）をスコアと冷却アラートに使うか（apply_tree）。省略時は OBSERVER_TREE。
+    state: 指定時は机全体の解析結果と Preview を残す（--watch の observe_changes が使う）。
+    deadline: 呼び出しから何秒で Preview を打ち切るか。Preview は preview_priority の順に始め、時間切れで終わらなかった
+              Node は Preview なしでレポートを組み立てる（DEADLINE_PARTIAL と meta.coverage）。
+              dashboard の読み込み（リトライ・Retry-After の待ちを含む）もこの時刻までに収め、間に合わなければ
+              DeadlineExceeded（レポートは組み立てられない）。
+    record_dir: 指定時は dashboard の Node・親子リンク・Preview の結果を now と一緒にスナップショットとして残す
+                （snapshot.py。--replay で組み立て直せる）。パスは meta.snapshot に入る。
+    """
+    deadline_at = time.monotonic() + deadline if deadline is not None else None
+    estimator = estimator or DEFAULT_ESTIMATOR
+    if estimator not in ESTIMATOR_MODES:
+        raise ValueError(f"unknown estimator: {estimator!r} (expected one of {', '.join(ESTIMATOR_MODES)})")
+    engine = engine or DEFAULT_ENGINE
+    if engine not in ANALYZE_ENGINES:
+        raise ValueError(f"unknown engine: {engine!r} (expected one of {', '.join(ANALYZE_ENGINES)})")
+
+    cache = None
+    if cache_dir:
+        from node_cache import NodeCache
+
+        cache = NodeCache(cache_dir)
+    recorder = None
+    if record_dir:
+        from snapshot import SnapshotRecorder
+
+        recorder = SnapshotRecorder()
+    tree = OBSERVER_TREE if tree is None else tree
+    try:
+        report = await _observe(
+            estimator,
+            top_k,
+            cache,
+            client,
+            timings or Timings(),
+            engine,
+            tree,
+            state,
+            (deadline, deadline_at) if deadline is not None else None,
+            recorder,
+        )
+    finally:
+        if cache is not None:
+            cache.close()
+    if recorder is not None:
+        from snapshot import write_snapshot
+
+        meta = {"target": current_target().name, "estimator": estimator, "tree": tree}
+        report["meta"]["snapshot"] = write_snapshot(record_dir, recorder.snapshot(meta))
+    return report
+
+
+async def _observe(
+    estimator: str,
+    top_k: int | None,
+    cache: NodeCache | None,
+    client: HttpClient | None,
+    timings: Timings,
+    engine: str = "row",
+    tree: bool = False,
+    state: DeskState | None = None,
+    deadline: tuple[float, float] | None = None,
+    recorder: SnapshotRecorder | None = None,
+) -> dict[str, Any]:
+    """
+    observe の本体。deadline は (--deadline の秒数, 打ち切る time.monotonic())。
+    recorder（--record）には Node・親子リンク（tree でなくても集める）・Preview の結果と now をためる。
+    """
+    async with _client_scope(client) as client:
+        client.reset_stats()  # meta.http はこの観測の分だけ
+        # ── Step 1: アクティブ Node を取得し、受け取った順に解析（1 パス）──
+        # 経過日数はすべてこの now を基準にする。親子リンクは読みながら集め、解析の後に 1 回だけ反映する。
+        now = datetime.now(timezone.utc)
+        links: list[tuple[str, str]] | None = [] if tree else None
+        nodes = iter_dashboard_nodes(client, cache=cache, links=links if recorder is None else recorder.links)
+        if recorder is not None:
+            recorder.now = now
+            nodes = _recording(nodes, recorder.nodes)
+        # --deadline: dashboard のリトライ・バックオフも Preview と同じ時刻までに収める（resilience.bounded）
+        with client.bounded(deadline[1] if deadline is not None else None):
+            analyses, tray_counts = await analyze_stream(nodes, now, timings, engine)
+        if recorder is not None and links is not None:
+            links = recorder.links
+        base = analyses  # apply_tree の前（DeskState に残すのはこちら）
+        if links is not None and analyses:
+            with timings.span("tree"):
+                analyses = apply_tree(analyses, links)
+
+        if not analyses:
+            if state is not None:
+                state.reset([], [], links, now.isoformat())
+            return _empty_report()
+
+        # ── 短絡: dashboard が全ページ 304 で、解析結果（経過日数を含む）も前回と同じ ──
+        # このときレポートは前回と同じになるので Step 2〜5 を行わず、前回の本文に新しい meta を付けて返す。
+        # COOLING_DAYS / STALE_DAYS_FOR_SUGGESTED / IN_PROGRESS_STALE_DAYS の境界をまたいだ Node があれば
+        # 日数が変わっているのでダイジェストが一致せず、通常どおり組み立てる。
+        # state がまだ空なら Preview を取り直して埋める（短絡しない）。
+        digest = ""
+        if cache is not None:
+            digest = analysis_digest(analyses, tray_counts, estimator, top_k)
+            # --record は Preview の結果も残すので短絡しない
+            reusable = (
+                cache.dashboard_unchanged() and (state is None or state.observed_at is not None) and recorder is None
+            )
+            previous = cache.last_report(digest) if reusable else None
+            if previous is not None:
+                report, previous_observed_at = previous
+                report["meta"] = {
+                    "observed_at": datetime.now(timezone.utc).isoformat(),
+                    "freshness_minutes": 0,
+                    "unchanged_since": previous_observed_at,  # 前回のレポートをそのまま使った
+                    "preview": {"estimator": estimator, "requested": 0},
+                    "dashboard": cache.page_stats(),
+                    "cache": cache.stats(),
+                    "http": client.snapshot(),
+                    "timing": timings.summary(),
+                }
+                return report
 
-        if not all_nodes:
-            now_utc = datetime.now(timezone.utc)
-            meta = {
-                "observed_at": now_utc.isoformat(),
-                "freshness_minutes": 0,
-            }
-            return {
-                "suggested_next": None,
-                "status_proposals": [],
-                "cooling_alerts": [],
-                "summary": "机の上にノードがありません。",
-                "node_count": 0,
-                "warnings": [],  # 29: list of { code, message, details? }
-                "meta": meta,  # 31: 鮮度表示用
+        # ── Step 2: 各 Node に estimate-status Preview ──
+        # remote: 並列度 PREVIEW_CONCURRENCY で投げ、結果は dashboard 順に並べ直す（完了順に依存しない）。
+        # local:  state_machine.py で同じ推定を HTTP なしで行う。
+        # verify: remote の結果を採用しつつ local と突き合わせ、不一致を warnings に残す。
+        # cache 指定時は fingerprint が前回と同じ Node を Preview せず、キャッシュの結果を使う
+        # （verify は突き合わせが目的なので常に全件 Preview し、結果だけ保存する）。
+        previews: list[dict[str, Any] | None] = [None] * len(analyses)
+        fingerprints: list[str] = []
+        if cache is not None:
+            from node_cache import node_fingerprint
+
+            with timings.span("cache"):
+                fingerprints = [node_fingerprint(a.last_updated, a.status, a.temperature) for a in analyses]
+                if estimator != "verify":
+                    previews = [
+                        cache.lookup(a.node_id, fp, a.intent) for a, fp in zip(analyses, fingerprints)
+                    ]
+        todo = [i for i, p in enumerate(previews) if p is None]
+        if deadline is not None:
+            # --deadline: 時間切れで落としてよい Node を後ろに回す（結果は previews[i] に戻すので並びは dashboard のまま）
+            todo.sort(key=lambda i: preview_priority(analyses[i]))
+        preview_requests = [(analyses[i].node_id, analyses[i].intent) for i in todo]
+        current_statuses = [analyses[i].status for i in todo]
+        with timings.span("preview"):
+            fresh, preview_stats, estimator_warning = await estimate_previews(
+                client, estimator, preview_requests, current_statuses, deadline[1] if deadline is not None else None
+            )
+        skipped_node_ids = preview_stats.pop("skipped_node_ids", [])
+        for i, preview in zip(todo, fresh):
+            previews[i] = preview
+        if recorder is not None:
+            recorder.previews = {
+                a.node_id: (a.intent, preview.get("suggested"))
+                for a, preview in zip(analyses, previews)
+                if preview is not None
             }
+        if state is not None:
+            state.reset(base, previews, links, now.isoformat())
+
+    # ── Step 3〜5: 各セクションを組み立て ──
+    with timings.span("report"):
+        report = build_report(analyses, previews, tray_counts, top_k=top_k)
+
+    # (4) verify モードで remote / local の推定が食い違った（ESTIMATOR_MISMATCH）
+    if estimator_warning:
+        report["warnings"].append(estimator_warning)
+
+    # (5) リトライしても Preview が取れなかった Node がある（PREVIEW_DEGRADED）
+    http_stats = client.snapshot()
+    degraded_warning = preview_degraded_warning(preview_stats, http_stats)
+    if degraded_warning:
+        report["warnings"].append(degraded_warning)
+
+    # (6) --deadline までに Preview が終わらなかった Node がある（DEADLINE_PARTIAL）
+    partial_warning = deadline_partial_warning(deadline[0], skipped_node_ids) if deadline is not None else None
+    if partial_warning:
+        report["warnings"].append(partial_warning)
+
+    # ── 鮮度（31_Observer_Freshness.md）: payload.meta ──
+    now_utc = datetime.now(timezone.utc)
+    report["meta"] = {
+        "observed_at": now_utc.isoformat(),
+        "freshness_minutes": 0,  # 保存時点では 0。表示時に observed_at から再計算する想定。
+        "preview": preview_stats,  # Step 2 の並列 Preview の件数・レイテンシ
+        "http": http_stats,  # エンドポイントごとのリトライ・失敗・レイテンシ（resilience.py）
+    }
+    if deadline is not None:
+        # Preview の結果（キャッシュを含む）がある Node の割合。1 未満なら status_proposals が欠けている
+        previewed = sum(1 for p in previews if p is not None)
+        report["meta"]["coverage"] = {
+            "deadline_seconds": deadline[0],
+            "previewed": previewed,
+            "node_count": len(previews),
+            "ratio": round(previewed / len(previews), 4),
+        }
 
-        # ── Step 2: 各 Node に estimate-status Preview ──
-        status_proposals: list[dict[str, Any]] = []
+    if cache is not None:
+        with timings.span("cache"):
+            cache.store(
+                [
+                    (a.node_id, fp, a.intent, preview, a.score)
+                    for a, fp, preview in zip(analyses, fingerprints, previews)
+                ],
+                observed_at=now.isoformat(),
+            )
+            cache.store_pages()
+            # Preview に失敗した Node があるレポートは短絡に使わない（次回もう一度組み立てる）
+            if all(p is not None for p in previews):
+                cache.store_report(digest, now_utc.isoformat(), report)
+        report["meta"]["dashboard"] = cache.page_stats()  # ページ数と 304 の件数
+        report["meta"]["cache"] = cache.stats()  # node_cache.py の hits / misses / bytes
+
+    # フェーズごとの所要時間（ms）。保存・latest はレポートを出した後なので含まない（--metrics-out には入る）
+    report["meta"]["timing"] = timings.summary()
+
+    # ── ObserverReport を返す (19 §4.2) ──
+    return report
+
+
+# ─── スナップショット（--record / --replay）────────────────────────
+# --record は観測 1 回分の入力（Node の列・親子リンク・Preview の suggested）と now を snapshot.py の形式で残す。
+# --replay はそれを Step 1 から組み立て直す。I/O は読むだけで、dashboard も Preview も呼ばない。
+# now は記録したときの値なので、同じ設定なら記録したときと同じレポートになる（meta を除く）。
+
+def snapshot_row(node: dict[str, Any]) -> list[Any]:
+    """dashboard の Node → snapshot.SNAPSHOT_COLUMNS の値（ObservedNode.parse が読むものだけ）。"""
+    return [
+        node["id"],
+        get_title(node),
+        node.get("status", ""),
+        node.get("temperature"),
+        node.get("updated_at"),
+        node.get("created_at"),
+    ]
+
+
+async def _recording(
+    nodes: AsyncIterator[dict[str, Any]],
+    rows: list[list[Any]],
+) -> AsyncIterator[dict[str, Any]]:
+    """Node のストリームをそのまま流しながら、snapshot_row を rows に足す。"""
+    async for node in nodes:
+        rows.append(snapshot_row(node))
+        yield node
+
+
+def snapshot_nodes(snapshot: Snapshot) -> list[ObservedNode]:
+    """スナップショットの Node（受信順）。"""
+    from snapshot import SNAPSHOT_COLUMNS
+
+    return [ObservedNode.parse(dict(zip(SNAPSHOT_COLUMNS, row))) for row in snapshot.nodes]
+
+
+def replay_snapshot(
+    snapshot: Snapshot,
+    estimator: str = "remote",
+    top_k: int | None = None,
+    engine: str = "row",
+    tree: bool = True,
+    nodes: list[ObservedNode] | None = None,
+) -> dict[str, Any]:
+    """
+    --replay: スナップショットから ObserverReport を組み立て直す（ネットワークなし）。
+    estimator: remote = 記録した Preview / local = state_machine.py で推定し直す / verify = 記録と local を突き合わせる。
+    記録した intent と違う Node（解析の仕方が変わった）の Preview は使わない（Preview なしと同じ）。
+    スコア・冷却検知は今の設定（--rules・COOLING_*）で行う。
+    nodes: snapshot_nodes の結果（snapshot.py sweep のように何度も組み立てるときに 1 回だけ作って渡す）。
+    """
+    analyses, tray_counts = analyze_tenant(
+        nodes if nodes is not None else snapshot_nodes(snapshot),
+        snapshot.now,
+        engine,
+        snapshot.links if tree else None,
+    )
+    if not analyses:
+        report = _empty_report()
+        report["meta"].update(observed_at=snapshot.now.isoformat(), replay={"recorded": snapshot.meta})
+        return report
+
+    previews: list[dict[str, Any] | None] = []
+    for a in analyses:
+        recorded = snapshot.previews.get(a.node_id)
+        previews.append({"suggested": recorded[1]} if recorded is not None and recorded[0] == a.intent else None)
+    requests = [(a.node_id, a.intent) for a in analyses]
+    statuses = [a.status for a in analyses]
+    estimator_warning = None
+    if estimator == "local":
+        previews, _ = preview_many_local(requests, statuses)
+    elif estimator == "verify":
+        local_previews, _ = preview_many_local(requests, statuses)
+        estimator_warning = compare_estimators(requests, statuses, previews, local_previews)
+
+    report = build_report(analyses, previews, tray_counts, top_k=top_k)
+    if estimator_warning:
+        report["warnings"].append(estimator_warning)
+    report["meta"] = {
+        "observed_at": snapshot.now.isoformat(),  # 記録したときの now
+        "freshness_minutes": 0,
+        "preview": {
+            "estimator": estimator,
+            "requested": len(requests),
+            "succeeded": sum(1 for p in previews if p is not None),
+        },
+        "replay": {"recorded": snapshot.meta},
+    }
+    return report
 
-        for node in all_nodes:
-            node_id = node["id"]
-            title = get_title(node)
-            current_status = node.get("status", "")
-            days = days_since_update(node)
 
-            # intent を構成（観測事実のみ。判断は含めない）
-            intent_parts: list[str] = []
-            if days is not None:
-                intent_parts.append(f"最終更新から{days}日経過")
-            temp = node.get("temperature")
-            if temp is not None:
-                intent_parts.append(f"温度{temp}")
-            intent_parts.append(f"現在{current_status}")
+# ─── 差分観測（--watch）──────────────────────────────────────
+# 「Node が変わった」という通知（change_feed.py）を受けたら、その Node だけを読み直して Preview し、
+# 前回の観測（DeskState）の残りと合わせてレポートを組み立て直す。
+# - 読むのは GET /api/dashboard?ids=...（変わった Node と、それを子に持つ node_children の行）だけ。
+# - 親のスコア・冷却集計は apply_tree を机全体にかけ直して反映する（I/O なし。node_tree.py）。
+# - 変わっていない Node の解析結果（経過日数を含む）と Preview は前回の観測のまま。
+#   経過日数の境界をまたいだ Node は次の全件観測（--interval ごと）で直る。meta.incremental.based_on がその基準時刻。
 
-            intent = "、".join(intent_parts)
+class DeskState:
+    """
+    --watch: 直近の観測で見た机全体。observe（全件）が reset し、observe_changes（差分）が update する。
+    analyses は apply_tree の前の解析結果で、並びは dashboard と同じ（tray 順 → tray 内は受信順）。
+    """
 
-            try:
-                preview = await preview_status(client, node_id, intent)
-            except Exception:
-                # Preview 失敗は無視（観測の一部が欠けるだけ）
-                continue
-
-            suggested = preview.get("suggested")
-            if suggested and suggested.get("status") != current_status:
-                status_proposals.append({
-                    "node_id": node_id,
-                    "title": title,
-                    "current_status": current_status,
-                    "suggested_status": suggested["status"],
-                    "reason": suggested.get("reason", ""),
-                })
-
-        # ── Step 3: 冷却検知 ──
-        # 06_Temperature_Spec §4.1: 最終更新日時 + temperature
-        cooling_alerts: list[dict[str, Any]] = []
-
-        for node in all_nodes:
-            node_id = node["id"]
-            title = get_title(node)
-            temp = node.get("temperature")
-            days = days_since_update(node)  # 28 §2: updated_at else created_at
-            effective_dt, _ = get_effective_updated(node)
-            last_updated = effective_dt.isoformat() if effective_dt else node.get("updated_at", "")
-
-            is_cooling = False
-            reason_parts: list[str] = []
-
-            if temp is not None and temp < COOLING_THRESHOLD:
-                is_cooling = True
-                reason_parts.append(f"温度が{temp}に低下")
-
-            if days is not None and days >= COOLING_DAYS:
-                is_cooling = True
-                reason_parts.append(f"{days}日間更新がありません")
-
-            if is_cooling:
-                cooling_alerts.append({
-                    "node_id": node_id,
-                    "title": title,
-                    "temperature": temp,
-                    "last_updated": last_updated,
-                    "message": f"「{title}」は{' / '.join(reason_parts)}。止めてよいですか？",
-                })
-
-        # ── Step 4: suggested_next を構成（Phase 3-4, 28 SSOT）──
-        # 候補除外 → スコア計算 → tie-break（28 §6）→ 1 件。安全性は 28 §8 のまま。
-
-        candidates = [
-            n for n in all_nodes
-            if (n.get("status") or "") not in SUGGESTED_NEXT_EXCLUDED_STATUSES
-        ]
-        suggested_next = None
-        if candidates:
-            scored: list[tuple[dict[str, Any], int, dict[str, Any], str]] = []
-            for node in candidates:
-                total, breakdown, sort_ts = compute_suggested_next_score(node)
-                scored.append((node, total, breakdown, sort_ts))
-            # 28 §6: total 降順 → updated_at 古い順 → node_id 辞書順
-            scored.sort(key=lambda x: (-x[1], x[3], x[0].get("id", "")))
-            best, total_score, breakdown, _ = scored[0]
-            title = get_title(best)
-            status = best.get("status", "")
-            reason_map = {
-                "IN_PROGRESS": "実施中で最もスコアが高いノードです",
-                "NEEDS_DECISION": "判断待ちのノードがあります",
-                "READY": "着手可能な状態です",
-                "BLOCKED": "障害がありますが、解消すれば進められます",
-                "WAITING_EXTERNAL": "外部からの返答を確認してみてください",
-                "CLARIFYING": "言語化・整理が必要なノードです",
-            }
-            suggested_next = {
-                "node_id": best["id"],
-                "title": title,
-                "reason": reason_map.get(status, f"{status} のノードです"),
-                "next_action": get_next_action_for_status(status, title),
-                "debug": {
-                    "total": total_score,
-                    "breakdown": breakdown,
-                    "rule_version": "3-4.0",
-                },
-            }
+    def __init__(self) -> None:
+        self.analyses: dict[str, NodeAnalysis] = {}
+        self.previews: dict[str, dict[str, Any] | None] = {}
+        self.links: list[tuple[str, str]] | None = None  # --no-tree なら None
+        self.observed_at: str | None = None  # 全件観測の時刻（まだなら None）
+
+    def reset(
+        self,
+        analyses: list[NodeAnalysis],
+        previews: list[dict[str, Any] | None],
+        links: list[tuple[str, str]] | None,
+        observed_at: str,
+    ) -> None:
+        self.analyses = {a.node_id: a for a in analyses}
+        self.previews = {a.node_id: p for a, p in zip(analyses, previews)}
+        self.links = list(links) if links is not None else None
+        self.observed_at = observed_at
+
+    def update(
+        self,
+        node_ids: Iterable[str],
+        changed: list[NodeAnalysis],
+        previews: list[dict[str, Any] | None],
+        data: dict[str, Any],
+    ) -> list[str]:
+        """
+        node_ids を読み直した結果（fetch_dashboard_nodes の data と解析結果）で置き換える。戻り値: 机から消えた node_id。
+        変わった Node は tray の先頭に置く（dashboard は tray 内を更新の新しい順に返す）。
+        """
+        ids = set(node_ids)
+        fetched = {a.node_id for a in changed}
+        removed = [node_id for node_id in ids if node_id not in fetched and node_id in self.analyses]
+        rest = {node_id: a for node_id, a in self.analyses.items() if node_id not in ids}
+        self.analyses = {**{a.node_id: a for a in changed}, **rest}
+        for node_id in ids:
+            self.previews.pop(node_id, None)
+        self.previews.update((a.node_id, p) for a, p in zip(changed, previews))
+        if self.links is not None:
+            self.links = [link for link in self.links if link[1] not in ids]
+            _collect_links(data, data["nodes"], self.links)
+        return removed
+
+    def ordered(self) -> tuple[list[NodeAnalysis], list[dict[str, Any] | None], dict[str, int]]:
+        """(analyses, previews, tray_counts)。analyze_stream と同じ並び。"""
+        buckets: dict[str, list[NodeAnalysis]] = {tray: [] for tray in TRAY_ORDER}
+        for a in self.analyses.values():
+            buckets[tray_for(a.status)].append(a)
+        analyses = [a for tray in TRAY_ORDER for a in buckets[tray]]
+        return analyses, [self.previews.get(a.node_id) for a in analyses], {t: len(buckets[t]) for t in TRAY_ORDER}
+
+
+async def observe_changes(
+    client: ResilientClient,
+    state: DeskState,
+    node_ids: Iterable[str],
+    estimator: str | None = None,
+    top_k: int | None = None,
+    timings: Timings | None = None,
+) -> dict[str, Any]:
+    """
+    --watch: node_ids の Node だけを読み直して Preview し、机全体の ObserverReport を返す。
+    meta.incremental: {based_on: 元にした全件観測の時刻, requested, updated, removed}。
+    全件観測がまだ・?ids= 非対応の API なら IncrementalUnsupported（呼び出し側で全件観測する）。
+    """
+    if state.observed_at is None:
+        raise IncrementalUnsupported("no full observation yet")
+    estimator = estimator or DEFAULT_ESTIMATOR
+    timings = timings or Timings()
+    ids = sorted(set(node_ids))
+    client.reset_stats()
+    now = datetime.now(timezone.utc)
+    with timings.span("dashboard"):
+        data = await fetch_dashboard_nodes(client, ids)
+    with timings.span("analyze"):
+        changed = analyze_nodes(data["nodes"], now)
+    with timings.span("preview"):
+        previews, preview_stats, estimator_warning = await estimate_previews(
+            client, estimator, [(a.node_id, a.intent) for a in changed], [a.status for a in changed]
+        )
+    removed = state.update(ids, changed, previews, data)
+    analyses, all_previews, tray_counts = state.ordered()
+    if not analyses:
+        report = _empty_report()
+    else:
+        if state.links is not None:
+            with timings.span("tree"):
+                analyses = apply_tree(analyses, state.links)
+        with timings.span("report"):
+            report = build_report(analyses, all_previews, tray_counts, top_k=top_k)
+        if estimator_warning:
+            report["warnings"].append(estimator_warning)
+    http_stats = client.snapshot()
+    degraded_warning = preview_degraded_warning(preview_stats, http_stats)
+    if degraded_warning:
+        report["warnings"].append(degraded_warning)
+    report["meta"] = {
+        "observed_at": datetime.now(timezone.utc).isoformat(),
+        "freshness_minutes": 0,
+        "preview": preview_stats,
+        "http": http_stats,
+        "incremental": {
+            "based_on": state.observed_at,
+            "requested": len(ids),
+            "updated": len(changed),
+            "removed": len(removed),
+        },
+        "timing": timings.summary(),
+    }
+    return report
 
-        # ── Step 5: node_count（SSOT）と summary 構成 ──
-        # 28 品質ルール: node_count は dashboard の Node 数のみ。summary は node_count から生成（数え直さない）。
-        node_count = len(all_nodes)
-        tray_counts = {k: len(v) for k, v in trays.items()}
-        summary_parts = [f"机の上に {node_count} 件のノードがあります"]
-        if tray_counts.get("in_progress"):
-            summary_parts.append(f"実施中 {tray_counts['in_progress']} 件")
-        if tray_counts.get("needs_decision"):
-            summary_parts.append(f"判断待ち {tray_counts['needs_decision']} 件")
-        if tray_counts.get("waiting_external"):
-            summary_parts.append(f"外部待ち {tray_counts['waiting_external']} 件")
-        if cooling_alerts:
-            summary_parts.append(f"冷却確認 {len(cooling_alerts)} 件")
-        if status_proposals:
-            summary_parts.append(f"状態変更の提案 {len(status_proposals)} 件")
-
-        summary = "。".join(summary_parts) + "。"
-
-        # ── 整合性チェック（29_Observer_Warnings.md）────────────────
-        # warnings は { code, message, details? } のリスト。COUNT_MISMATCH / SUMMARY_MISMATCH
-        warnings: list[dict[str, Any]] = []
-
-        # (1) summary 先頭の件数と node_count の一致
-        m = re.search(r"机の上に\s*(\d+)\s*件", summary)
-        if m:
-            summary_total = int(m.group(1))
-            if summary_total != node_count:
-                warnings.append({
-                    "code": "SUMMARY_MISMATCH",
-                    "message": "node_count と summary の件数が一致しません",
-                    "details": {"node_count": node_count, "summary_total": summary_total},
-                })
-
-        # (2) status 別集計の合計と node_count の一致（COUNT_MISMATCH）
-        by_status: dict[str, int] = {}
-        for node in all_nodes:
-            s = (node.get("status") or "UNKNOWN").strip() or "UNKNOWN"
-            by_status[s] = by_status.get(s, 0) + 1
-        status_sum = sum(by_status.values())
-        if status_sum != node_count:
-            warnings.append({
-                "code": "COUNT_MISMATCH",
-                "message": "node_count と status 集計の合計が一致しません",
-                "details": {
-                    "node_count": node_count,
-                    "status_sum": status_sum,
-                    "by_status": by_status,
-                },
-            })
 
-        # ── 鮮度（31_Observer_Freshness.md）: payload.meta ──
-        now_utc = datetime.now(timezone.utc)
-        meta = {
-            "observed_at": now_utc.isoformat(),
-            "freshness_minutes": 0,  # 保存時点では 0。表示時に observed_at から再計算する想定。
-        }
+async def poll_run_requests(client: ResilientClient, feed: ChangeFeed, interval: float) -> None:
+    """
+    --watch: GET /api/observer/run を interval 秒ごとに読み、積まれた依頼を feed に足す（キャンセルされるまで続ける）。
+    起動前に積まれた依頼は読まない（起動直後は全件観測するため）。API が古ければ 1 回だけ知らせて終わる。
+    """
+    import asyncio
 
-        # ── ObserverReport を返す (19 §4.2) ──
-        return {
-            "suggested_next": suggested_next,
-            "status_proposals": status_proposals,
-            "cooling_alerts": cooling_alerts,
-            "summary": summary,
-            "node_count": node_count,
-            "warnings": warnings,
-            "meta": meta,
-        }
+    after: int | None = None
+    while True:
+        try:
+            data = await fetch_run_requests(client, after)
+        except RunTriggerUnsupported as e:
+            print(f"watch: {e}（/api/observer/run の依頼は読みません）", file=sys.stderr)
+            return
+        except Exception as e:
+            print(f"watch: {e}", file=sys.stderr)
+        else:
+            for request in data.get("requests") or ():
+                feed.add(request.get("node_ids") or ())
+            if isinstance(data.get("cursor"), int):
+                after = data["cursor"]
+        await asyncio.sleep(interval)
 
 
 # ─── レポート保存 ──────────────────────────────────────────
@@ -461,33 +2176,72 @@ async def observe() -> dict[str, Any]:
 # --save フラグを付けると保存する。なしなら stdout のみ。
 
 def _save_report_headers() -> dict[str, str]:
-    """Phase 3-1: Bearer token を付与。未設定時は空で送り 401 で失敗する。"""
-    if not OBSERVER_TOKEN:
+    """Phase 3-1: Bearer token（今の観測先の token）を付与。未設定時は空で送り 401 で失敗する。"""
+    token = current_target().token
+    if not token:
         return {}
-    return {"Authorization": f"Bearer {OBSERVER_TOKEN}"}
+    return {"Authorization": f"Bearer {token}"}
+
+
+class SavedReport(NamedTuple):
+    """--compact: 保存済みのレポート（次の保存で差分の base にする）。"""
+    report_id: str
+    content_hash: str
+    report: dict[str, Any]
 
 
 async def save_report(
-    client: httpx.AsyncClient,
+    client: HttpClient,
     report: dict[str, Any],
     node_count: int,
+    user_id: str | None = None,
+    compact: bool = False,
+    base: SavedReport | None = None,
+    digest: str | None = None,
 ) -> dict[str, Any]:
-    """ObserverReport を POST /api/observer/reports に保存する。"""
+    """
+    ObserverReport を POST /api/observer/reports に保存する。user_id 指定時はテナント別レポート。
+    compact: 本文を compact JSON + gzip で送り、content_hash（digest。省略時は計算する）を付ける
+             （API が保存する payload と違えば 409）。
+    base: compact 時、payload の代わりに base との差分（report_codec.make_delta）を送る。
+          API が base を持っていない・内容が違う（409）なら payload 全体で送り直す。
+    """
+    import httpx
+
     path = "/api/observer/reports"
-    url = f"{BASE_URL.rstrip('/')}{path}"
+    url = _api_url(path)
+    body: dict[str, Any] = {
+        "payload": report,
+        "generated_by": "observer_cli",
+        "node_count": node_count,
+    }
+    if user_id is not None:
+        body["user_id"] = user_id
+    headers = _save_report_headers()
+    request: dict[str, Any] = {"json": body}
+    if compact:
+        import gzip
+
+        import report_codec
+
+        body["content_hash"] = digest or report_codec.content_hash(report)
+        if base is not None:
+            del body["payload"]
+            body["delta"] = report_codec.make_delta(base.report, report)
+            body["base"] = {"report_id": base.report_id, "content_hash": base.content_hash}
+        headers.update({"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        request = {"content": gzip.compress(report_codec.dumps(body), REPORT_GZIP_LEVEL)}
     try:
-        resp = await client.post(
-            url,
-            json={
-                "payload": report,
-                "generated_by": "observer_cli",
-                "node_count": node_count,
-            },
-            headers=_save_report_headers(),
-        )
+        resp = await client.post(url, headers=headers, **request)
     except httpx.ConnectError as e:
         msg = f"{_call_desc('POST', path)} 接続できません。NEXT_BASE_URL を確認してください。"
         raise RuntimeError(msg) from e
+    if resp.status_code == 409 and base is not None:
+        print(
+            f"note: delta upload rejected ({_parse_body_error(resp)}); sending the full report",
+            file=sys.stderr,
+        )
+        return await save_report(client, report, node_count, user_id, compact=True, digest=digest)
     _check_http_error(resp, "POST", path)
     data = resp.json()
     if not data.get("ok"):
@@ -496,12 +2250,27 @@ async def save_report(
     return data
 
 
-async def fetch_latest_report(client: httpx.AsyncClient) -> dict[str, Any]:
-    """GET /api/observer/reports/latest — Phase 3-2.1 本番スモーク用。Bearer で認証。"""
+async def fetch_latest_report(
+    client: HttpClient,
+    user_id: str | None = None,
+    hash_only: bool = False,
+) -> dict[str, Any]:
+    """
+    GET /api/observer/reports/latest — Phase 3-2.1 本番スモーク用。Bearer で認証。
+    user_id 指定時はそのテナントの最新、省略時は全体レポート（user_id なし）の最新。
+    hash_only: payload を読まず report_id / content_hash などだけを返してもらう（?view=hash。--compact）。
+    """
+    import httpx
+
     path = "/api/observer/reports/latest"
-    url = f"{BASE_URL.rstrip('/')}{path}"
+    url = _api_url(path)
+    params: dict[str, str] = {}
+    if user_id is not None:
+        params["user_id"] = user_id
+    if hash_only:
+        params["view"] = "hash"
     try:
-        resp = await client.get(url, headers=_save_report_headers())
+        resp = await client.get(url, params=params or None, headers=_save_report_headers())
     except httpx.ConnectError as e:
         msg = f"{_call_desc('GET', path)} 接続できません。NEXT_BASE_URL を確認してください。"
         raise RuntimeError(msg) from e
@@ -514,105 +2283,982 @@ async def fetch_latest_report(client: httpx.AsyncClient) -> dict[str, Any]:
 
 # ─── エントリポイント ──────────────────────────────────────
 
-async def main() -> None:
-    should_save = "--save" in sys.argv
-    strict_warnings = "--strict" in sys.argv
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Observer — 観測し、提案する。決して Apply しない。")
+    parser.add_argument("--save", action="store_true", help="POST /api/observer/reports に保存し、latest で healthcheck する")
+    parser.add_argument("--strict", action="store_true", help="保存後の latest に warnings が 1 件以上あれば exit 1")
+    parser.add_argument(
+        "--estimator",
+        choices=ESTIMATOR_MODES,
+        default=DEFAULT_ESTIMATOR if DEFAULT_ESTIMATOR in ESTIMATOR_MODES else "remote",
+        help="Step 2 の推定方法: remote=estimate-status API / local=HTTP なし / verify=両方を突き合わせ（既定: remote）",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=ANALYZE_ENGINES,
+        default=DEFAULT_ENGINE if DEFAULT_ENGINE in ANALYZE_ENGINES else "row",
+        help="Step 1 の解析方法: row=Node ごと / columnar=列でまとめて計算（NumPy があれば使う。結果は同じ。既定: row）",
+    )
+    parser.add_argument(
+        "--tree",
+        action=argparse.BooleanOptionalAction,
+        default=OBSERVER_TREE,
+        help="node_children の親子をスコアと冷却アラートに使う（--no-tree で 3-4.0 のスコア。既定: OBSERVER_TREE または有効）",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=None,
+        metavar="N",
+        help="suggested_next 候補の上位 N 件を suggested_next_ranking として出力する",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=OBSERVER_CACHE_DIR or None,
+        metavar="DIR",
+        help="ノード状態キャッシュの置き場所。前回から変わっていない Node は Preview しない（既定: OBSERVER_CACHE_DIR）",
+    )
+    parser.add_argument(
+        "--archive-dir",
+        default=OBSERVER_ARCHIVE_DIR or None,
+        metavar="DIR",
+        help="観測ごとのレポートを追記するアーカイブの置き場所。問い合わせは report_archive.py（既定: OBSERVER_ARCHIVE_DIR）",
+    )
+    parser.add_argument(
+        "--record",
+        default=OBSERVER_RECORD_DIR or None,
+        metavar="DIR",
+        help="観測ごとに dashboard と Preview の結果をスナップショット（snapshot.py）として残す置き場所（既定: OBSERVER_RECORD_DIR）",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        metavar="SNAPSHOT",
+        help="--record のスナップショットからネットワークなしでレポートを組み立て直す（今の --rules・COOLING_* で採点する）",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="常駐して --interval 秒ごとに観測する（HTTP 接続を使い回す。SIGTERM で止まる）",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DAEMON_INTERVAL_SECONDS,
+        metavar="SECONDS",
+        help="--daemon の観測間隔（既定: OBSERVER_INTERVAL_SECONDS または 300）",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=DAEMON_JITTER,
+        metavar="RATIO",
+        help="--daemon の間隔の揺らぎ（0.1 なら ±10%%。既定: OBSERVER_INTERVAL_JITTER または 0.1）",
+    )
+    parser.add_argument(
+        "--rules",
+        default=OBSERVER_RULES or None,
+        metavar="PATH",
+        help="スコアリングルールの JSON（active の版で suggested_next を決め、shadow の版は debug.shadow に並べる。"
+        "既定: OBSERVER_RULES。なければ 28 §4 の組み込みルール）",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=OBSERVER_DEADLINE_SECONDS or None,
+        metavar="SECONDS",
+        help="1 回の観測にかけてよい秒数。Preview は大事な Node から行い、時間切れなら残りを飛ばした"
+        "レポートを保存する（DEADLINE_PARTIAL。既定: OBSERVER_DEADLINE_SECONDS）",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="--daemon の間、POST /api/observer/run の変更通知を受けて変わった Node だけを観測し直して保存する"
+        "（全件観測は --interval ごと）",
+    )
+    parser.add_argument(
+        "--watch-listen",
+        default=OBSERVER_WATCH_LISTEN or None,
+        metavar="HOST:PORT",
+        help="--watch の通知をこのアドレスの TCP でも受ける（1 行 1 JSON: {\"node_ids\": [...]}。既定: OBSERVER_WATCH_LISTEN）",
+    )
+    parser.add_argument(
+        "--watch-listen-public",
+        action="store_true",
+        default=OBSERVER_WATCH_LISTEN_PUBLIC,
+        help="--watch-listen にループバック以外のアドレスを許す（通知に認証はないので信頼できるネットワークに限る。"
+        "既定: OBSERVER_WATCH_LISTEN_PUBLIC）",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=WATCH_DEBOUNCE_SECONDS,
+        metavar="SECONDS",
+        help="--watch で続けて届いた通知をまとめる時間（既定: OBSERVER_WATCH_DEBOUNCE_SECONDS または 2）",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="observer.prof",
+        default=None,
+        metavar="PATH",
+        help="cProfile で測り、pstats を PATH（既定: observer.prof）に保存して上位を stderr に出す",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        default=OBSERVER_METRICS_OUT or None,
+        metavar="PATH",
+        help="フェーズ別の時間・Preview レイテンシ・HTTP 集計を書く（*.jsonl なら追記、それ以外は OpenMetrics。既定: OBSERVER_METRICS_OUT）",
+    )
+    parser.add_argument(
+        "--compact",
+        action=argparse.BooleanOptionalAction,
+        default=OBSERVER_COMPACT,
+        help="stdout と保存を compact JSON にし、保存は gzip・前回との差分で送って content_hash で healthcheck する"
+        "（API 側の対応が必要。既定: OBSERVER_COMPACT）",
+    )
+    parser.add_argument(
+        "--per-tenant",
+        action="store_true",
+        help="user_id ごとにレポートを作る（OBSERVER_TOKEN で全ユーザーを読むとき用。--save は各テナントの node_count で保存）",
+    )
+    parser.add_argument(
+        "--targets",
+        default=OBSERVER_TARGETS or None,
+        metavar="PATH",
+        help="観測先（デプロイ）の一覧 JSON。すべての観測先を同時に観測し、各観測先に保存する"
+        "（NEXT_BASE_URL / OBSERVER_TOKEN の代わり。既定: OBSERVER_TARGETS）",
+    )
+    parser.add_argument(
+        "--tenant-concurrency",
+        type=int,
+        default=TENANT_CONCURRENCY,
+        metavar="N",
+        help="--per-tenant で同時に処理するテナント数（既定: OBSERVER_TENANT_CONCURRENCY または 4）",
+    )
+    parser.add_argument(
+        "--tenant-timeout",
+        type=float,
+        default=TENANT_TIMEOUT_SECONDS,
+        metavar="SECONDS",
+        help="--per-tenant で 1 テナントにかけてよい時間。超えたテナントは失敗扱い（既定: 300）",
+    )
+    parser.add_argument(
+        "--tenant-workers",
+        type=int,
+        default=TENANT_WORKERS,
+        metavar="N",
+        help="--per-tenant のスコア計算に使うプロセス数（0 なら CPU 数。既定: OBSERVER_TENANT_WORKERS）",
+    )
+    args = parser.parse_args(argv)
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be >= 1")
+    if args.interval <= 0:
+        parser.error("--interval must be > 0")
+    if not 0 <= args.jitter < 1:
+        parser.error("--jitter must be in [0, 1)")
+    if args.per_tenant and args.cache_dir:
+        parser.error("--per-tenant cannot be combined with --cache-dir")
+    if args.targets and (args.per_tenant or args.daemon):
+        parser.error("--targets cannot be combined with --per-tenant or --daemon")
+    if args.watch and (not args.daemon or args.per_tenant):
+        parser.error("--watch requires --daemon and cannot be combined with --per-tenant")
+    if args.watch_listen and not args.watch:
+        parser.error("--watch-listen requires --watch")
+    if args.watch_listen:
+        from change_feed import is_loopback, parse_listen
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # observe() の内部で client を使うため、ここで再実装せず
-        # トップレベルの observe を呼ぶ（client は内部で生成される）
-        pass
+        try:
+            host, _ = parse_listen(args.watch_listen)
+        except ValueError:
+            parser.error(f"--watch-listen must be HOST:PORT or PORT: {args.watch_listen!r}")
+        if not is_loopback(host) and not args.watch_listen_public:
+            parser.error(
+                f"--watch-listen {args.watch_listen!r} is not a loopback address; "
+                "the listener has no authentication (pass --watch-listen-public to allow it)"
+            )
+    if args.debounce < 0:
+        parser.error("--debounce must be >= 0")
+    if args.deadline is not None and args.deadline <= 0:
+        parser.error("--deadline must be > 0")
+    if args.deadline and args.per_tenant:
+        parser.error("--deadline cannot be combined with --per-tenant (use --tenant-timeout)")
+    if args.record and (args.per_tenant or args.targets or args.watch):
+        parser.error("--record cannot be combined with --per-tenant, --targets or --watch")
+    if args.replay and (args.save or args.daemon or args.per_tenant or args.targets or args.record):
+        parser.error("--replay cannot be combined with --save, --daemon, --per-tenant, --targets or --record")
+    if args.tenant_concurrency < 1 or args.tenant_workers < 0 or args.tenant_timeout <= 0:
+        parser.error("--tenant-concurrency must be >= 1, --tenant-workers >= 0, --tenant-timeout > 0")
+    return args
 
-    report = await observe()
 
-    # 常に stdout に出力
-    print(json.dumps(report, ensure_ascii=False, indent=2))
-
-    # --save フラグがあれば API に保存し、Phase 3-2.1 で latest と突き合わせて healthcheck
-    if should_save:
-        # 31: payload.meta が欠落していないか確認（本番で meta が届かない原因切り分け用）
-        meta = report.get("meta") if isinstance(report.get("meta"), dict) else None
-        if not (meta and meta.get("observed_at")):
-            print(
-                "warning: report has no payload.meta.observed_at; API may backfill (31_Observer_Freshness)",
-                file=sys.stderr,
+class HealthcheckError(RuntimeError):
+    """保存後の latest 突き合わせ（Phase 3-2.1）または --strict の失敗。1 回実行なら exit 1。"""
+
+
+# --compact: (観測先の name, テナント（None は全体レポート）) ごとの保存済みレポート。--daemon / --per-tenant では
+# 同じプロセスの次の保存の差分の base にする。--cache-dir 指定時は node_cache.py にも残し、1 回実行でも使う。
+_saved_reports: dict[tuple[str, str | None], SavedReport] = {}
+
+
+def _saved_report(user_id: str | None, cache_dir: str | None) -> SavedReport | None:
+    key = (current_target().name, user_id)
+    saved = _saved_reports.get(key)
+    if saved is None and cache_dir:
+        from node_cache import NodeCache
+
+        cache = NodeCache(cache_dir)
+        try:
+            row = cache.saved_report(user_id)
+        finally:
+            cache.close()
+        if row is not None:
+            saved = _saved_reports[key] = SavedReport(*row)
+    return saved
+
+
+def _remember_saved(user_id: str | None, cache_dir: str | None, saved: SavedReport) -> None:
+    _saved_reports[(current_target().name, user_id)] = saved
+    if cache_dir:
+        from node_cache import NodeCache
+
+        cache = NodeCache(cache_dir)
+        try:
+            cache.store_saved_report(user_id, saved.report_id, saved.content_hash, saved.report)
+        finally:
+            cache.close()
+
+
+async def save_and_check(
+    client: HttpClient,
+    report: dict[str, Any],
+    strict_warnings: bool,
+    timings: Timings | None = None,
+    user_id: str | None = None,
+    compact: bool = False,
+    cache_dir: str | None = None,
+) -> dict[str, Any]:
+    """
+    --save: API に保存し、Phase 3-2.1 で latest と突き合わせて healthcheck する。
+    user_id 指定時はテナント別レポートとして保存し、そのテナントの latest と突き合わせる。
+    compact: 前回保存したレポートがあれば差分で送り、latest は payload を読まずに content_hash で突き合わせる
+             （内容ハッシュが一致すれば保存された payload は手元の report と同じなので、warnings などは手元から読む）。
+    戻り値: 保存 API の応答（report_id / created_at）。
+    """
+    timings = timings or Timings()
+    # 31: payload.meta が欠落していないか確認（本番で meta が届かない原因切り分け用）
+    meta = report.get("meta") if isinstance(report.get("meta"), dict) else None
+    if not (meta and meta.get("observed_at")):
+        print(
+            "warning: report has no payload.meta.observed_at; API may backfill (31_Observer_Freshness)",
+            file=sys.stderr,
+        )
+    node_count = report.get("node_count")
+    if node_count is None:
+        node_count = (
+            len(report.get("status_proposals", []))
+            + len(report.get("cooling_alerts", []))
+            + (1 if report.get("suggested_next") else 0)
+        )
+    import report_codec
+
+    digest = report_codec.content_hash(report) if compact else ""
+    base = _saved_report(user_id, cache_dir) if compact else None
+    with timings.span("save"):
+        result = await save_report(client, report, node_count, user_id, compact=compact, base=base, digest=digest or None)
+    print(
+        f"\n✓ Saved: report_id={result.get('report_id')} "
+        f"created_at={result.get('created_at')}",
+        file=sys.stderr,
+    )
+    # 本番スモーク: GET latest で report_id と summary（--compact は content_hash）が一致するか検証。
+    # 失敗なら HealthcheckError（exit 1 で Actions を赤にする）
+    with timings.span("latest"):
+        latest_data = await fetch_latest_report(client, user_id, hash_only=compact)
+    report_latest = latest_data.get("report")
+    saved_id = result.get("report_id")
+    if not report_latest:
+        raise HealthcheckError("healthcheck failed: latest returned no report")
+    if report_latest.get("report_id") != saved_id:
+        raise HealthcheckError(
+            f"healthcheck failed: report_id mismatch (saved={saved_id!r}, latest={report_latest.get('report_id')!r})"
+        )
+    if compact:
+        for source, got in (("saved", result.get("content_hash")), ("latest", report_latest.get("content_hash"))):
+            if got != digest:
+                raise HealthcheckError(
+                    f"healthcheck failed: content_hash mismatch ({source}={got!r}, expected={digest!r})"
+                )
+        payload_latest = report
+        _remember_saved(user_id, cache_dir, SavedReport(saved_id, digest, report))
+    else:
+        expected_summary = report.get("summary", "")
+        payload_latest = report_latest.get("payload") or {}
+        summary_latest = payload_latest.get("summary", "")
+        if summary_latest != expected_summary:
+            raise HealthcheckError(
+                f"healthcheck failed: summary mismatch (expected len={len(expected_summary)}, got len={len(summary_latest)})"
             )
-        node_count = report.get("node_count")
-        if node_count is None:
-            node_count = (
-                len(report.get("status_proposals", []))
-                + len(report.get("cooling_alerts", []))
-                + (1 if report.get("suggested_next") else 0)
+    # Phase 3-4.5: latest の payload.warnings を確認。1 件以上なら stderr に出す。
+    # --strict なら STRICT_EXEMPT_WARNINGS 以外が 1 件以上で HealthcheckError
+    warnings_latest = payload_latest.get("warnings") or []
+    if not isinstance(warnings_latest, list):
+        warnings_latest = []
+    if warnings_latest:
+        print("⚠ Observer report has warnings:", file=sys.stderr)
+        for i, w in enumerate(warnings_latest):
+            if isinstance(w, dict):
+                code = w.get("code", "?")
+                msg = w.get("message", "")
+                details = w.get("details")
+                exempt = "（--strict の対象外）" if code in STRICT_EXEMPT_WARNINGS else ""
+                print(f"  [{i+1}] {code}: {msg}{exempt}", file=sys.stderr)
+                if details is not None:
+                    print(f"      details: {json.dumps(details, ensure_ascii=False)}", file=sys.stderr)
+            else:
+                print(f"  [{i+1}] {w!r}", file=sys.stderr)
+        strict_failures = [
+            w for w in warnings_latest if not (isinstance(w, dict) and w.get("code") in STRICT_EXEMPT_WARNINGS)
+        ]
+        if strict_warnings and strict_failures:
+            raise HealthcheckError("healthcheck failed: --strict and payload has warnings (exit 1)")
+    # Phase 3-4.6: 本番運用テスト用の1行目印（Actions ログで合否判定しやすい）
+    latest_id = report_latest.get("report_id", "")
+    w_count = len(warnings_latest)
+    nc = payload_latest.get("node_count")
+    nc_str = str(nc) if nc is not None else "-"
+    sn = payload_latest.get("suggested_next")
+    rule_ver = "-"
+    if isinstance(sn, dict) and isinstance(sn.get("debug"), dict):
+        rule_ver = str(sn["debug"].get("rule_version", "-"))
+    tenant = f" user_id={user_id}" if user_id is not None else ""
+    print(
+        f"OP_TEST: saved={saved_id} latest={latest_id} warnings={w_count} node_count={nc_str} rule={rule_ver}{tenant}",
+        file=sys.stderr,
+    )
+    matched = "content_hash" if compact else "summary"
+    print(f"✓ healthcheck passed: report_id and {matched} match latest", file=sys.stderr)
+    return result
+
+
+# ─── テナント別観測（--per-tenant）────────────────────────────
+# OBSERVER_TOKEN（supabaseAdmin）の dashboard は全ユーザーの Node を返す。まとめて 1 本のレポートにすると
+# suggested_next / summary / node_count が全員分の混ざったものになるので、user_id ごとに分けて作る。
+# - 解析（Step 1）とレポートの組み立て（Step 3〜5）は CPU 処理なのでプロセスプールで行う。
+# - Preview と保存は共有クライアントで、テナントごとに独立したタスクとして進める。
+#   1 テナントの失敗・タイムアウトは結果に残すだけで、他のテナントの保存は止めない。
+
+class TenantFailures(RuntimeError):
+    """--per-tenant で失敗したテナントがある（他のテナントの保存は済んでいる）。1 回実行なら exit 1。"""
+
+
+def analyze_tenant(
+    nodes: list[ObservedNode],
+    now: datetime,
+    engine: str = "row",
+    links: list[tuple[str, str]] | None = None,
+) -> tuple[list[NodeAnalysis], dict[str, int]]:
+    """
+    1 テナント分の Step 1（プロセスプールで実行）。並びと戻り値は analyze_stream と同じ。
+    links 指定時（--tree）はそのテナントの親子リンクで apply_tree する。
+    """
+    buckets: dict[str, list[NodeAnalysis]] = {tray: [] for tray in TRAY_ORDER}
+    for a in analyze_nodes(nodes, now, engine):
+        buckets[tray_for(a.status)].append(a)
+    analyses = [a for tray in TRAY_ORDER for a in buckets[tray]]
+    if links is not None and analyses:
+        analyses = apply_tree(analyses, links)
+    return analyses, {tray: len(buckets[tray]) for tray in TRAY_ORDER}
+
+
+async def partition_by_tenant(
+    nodes: AsyncIterator[dict[str, Any]],
+) -> dict[str | None, list[ObservedNode]]:
+    """
+    dashboard の Node を user_id ごとに分ける（user_id の無い Node は None にまとめる）。
+    全テナントの Node を持ち続けるので、生の dict ではなく ObservedNode にして持つ。
+    """
+    tenants: dict[str | None, list[ObservedNode]] = {}
+    async for node in nodes:
+        tenants.setdefault(node.get("user_id"), []).append(ObservedNode.parse(node))
+    return tenants
+
+
+def partition_links(
+    tenants: dict[str | None, list[ObservedNode]],
+    links: list[tuple[str, str]],
+) -> dict[str | None, list[tuple[str, str]]]:
+    """親子リンクを親の Node のテナントごとに分ける（プロセスプールに全テナント分を送らない）。"""
+    tenant_of = {node.node_id: user_id for user_id, nodes in tenants.items() for node in nodes}
+    out: dict[str | None, list[tuple[str, str]]] = {user_id: [] for user_id in tenants}
+    for link in links:
+        if link[0] in tenant_of:  # 親が机の上にないリンクは捨てる
+            out[tenant_of[link[0]]].append(link)
+    return out
+
+
+async def _observe_tenant(
+    client: ResilientClient,
+    pool: ProcessPoolExecutor,
+    user_id: str | None,
+    nodes: list[ObservedNode],
+    now: datetime,
+    args: argparse.Namespace,
+    links: list[tuple[str, str]] | None = None,
+) -> dict[str, Any]:
+    """
+    1 テナント分の Step 1〜5（+ --save なら保存と healthcheck）。結果の 1 要素を返す。
+    client の接続プールは共有するが、リクエスト層（リトライ・ブレーカー・集計）はテナントごとに作る
+    （同時に進むほかのテナントのリトライ・失敗が、このテナントの meta.http と PREVIEW_DEGRADED に混ざらない）。
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    tenant_client = make_request_layer(client.client)
+    tenant_client.deadline = client.deadline
+    timings = Timings()
+    entry: dict[str, Any] = {"user_id": user_id, "status": "ok", "node_count": len(nodes)}
+    with timings.span("analyze"):
+        analyses, tray_counts = await loop.run_in_executor(pool, analyze_tenant, nodes, now, args.engine, links)
+    with timings.span("preview"):
+        previews, preview_stats, estimator_warning = await estimate_previews(
+            tenant_client,
+            args.estimator,
+            [(a.node_id, a.intent) for a in analyses],
+            [a.status for a in analyses],
+        )
+    with timings.span("report"):
+        report = await loop.run_in_executor(pool, build_report, analyses, previews, tray_counts, args.top_k)
+    if estimator_warning:
+        report["warnings"].append(estimator_warning)
+    http_stats = tenant_client.snapshot()
+    degraded_warning = preview_degraded_warning(preview_stats, http_stats)
+    if degraded_warning:
+        report["warnings"].append(degraded_warning)
+    report["meta"] = {
+        "observed_at": datetime.now(timezone.utc).isoformat(),
+        "freshness_minutes": 0,
+        "tenant": {"user_id": user_id},
+        "preview": preview_stats,
+        "http": http_stats,  # このテナントの Preview の分（dashboard の読み込みは observe_tenants の meta.http）
+        "timing": timings.summary(),
+    }
+    entry["report"] = report
+    if args.save:
+        saved = await save_and_check(tenant_client, report, args.strict, user_id=user_id, compact=args.compact)
+        entry["report_id"] = saved.get("report_id")
+    return entry
+
+
+async def observe_tenants(
+    client: ResilientClient,
+    args: argparse.Namespace,
+    timings: Timings | None = None,
+) -> dict[str, Any]:
+    """
+    --per-tenant: user_id ごとの ObserverReport を作る（--save なら各テナントの node_count で保存する）。
+    戻り値: {"tenants": [...], "node_count", "meta"}。tenants は user_id 順で、
+    要素は {user_id, status: ok / error / timeout, node_count, elapsed_ms, report?, report_id?, error?}。
+    """
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor
+
+    timings = timings or Timings()
+    client.reset_stats()
+    now = datetime.now(timezone.utc)
+    links: list[tuple[str, str]] | None = [] if args.tree else None
+    with timings.span("dashboard"):
+        tenants = await partition_by_tenant(iter_dashboard_nodes(client, links=links))
+    tenant_links = partition_links(tenants, links) if links is not None else {}
+
+    semaphore = asyncio.Semaphore(args.tenant_concurrency)
+    pool = ProcessPoolExecutor(
+        max_workers=args.tenant_workers or None, initializer=init_worker, initargs=worker_settings()
+    )
+
+    async def run_one(user_id: str | None, nodes: list[ObservedNode]) -> dict[str, Any]:
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                entry = await asyncio.wait_for(
+                    _observe_tenant(client, pool, user_id, nodes, now, args, tenant_links.get(user_id)),
+                    timeout=args.tenant_timeout,
+                )
+            except asyncio.TimeoutError:
+                entry = {
+                    "user_id": user_id,
+                    "status": "timeout",
+                    "node_count": len(nodes),
+                    "error": f"tenant did not finish within {args.tenant_timeout:g}s",
+                }
+            except Exception as e:
+                entry = {"user_id": user_id, "status": "error", "node_count": len(nodes), "error": str(e)}
+            entry["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            if entry["status"] != "ok":
+                print(f"✗ tenant {user_id}: {entry['error']}", file=sys.stderr)
+            return entry
+
+    order = sorted(tenants, key=lambda u: (u is None, u or ""))
+    try:
+        with timings.span("tenants"):
+            results = await asyncio.gather(*(run_one(u, tenants[u]) for u in order))
+    finally:
+        # タイムアウトしたテナントの計算が残っていても待たない
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return {
+        "tenants": results,
+        "node_count": sum(len(nodes) for nodes in tenants.values()),
+        "meta": {
+            "observed_at": datetime.now(timezone.utc).isoformat(),
+            "tenant_count": len(results),
+            "failed": sum(1 for r in results if r["status"] != "ok"),
+            "http": client.snapshot(),
+            "timing": timings.summary(),
+        },
+    }
+
+
+def metrics_record(report: dict[str, Any], timings: Timings, client: ResilientClient) -> dict[str, Any]:
+    """--metrics-out に書く 1 回分（保存・latest の時間と HTTP 集計も含む）。"""
+    meta = report.get("meta") or {}
+    preview = meta.get("preview") or {}
+    return {
+        "observed_at": meta.get("observed_at"),
+        "node_count": report.get("node_count"),
+        "warnings": len(report.get("warnings") or []),
+        "timing": timings.summary(),
+        "preview_latency_histogram_ms": preview.get("latency_histogram_ms") or {},
+        "preview_latency_sum_ms": sum((preview.get("latency_ms_by_node") or {}).values()),
+        "http": client.snapshot(),
+    }
+
+
+def archive_reports(
+    archive_dir: str,
+    entries: Iterable[tuple[dict[str, Any], str | None, str | None, float | None]],
+) -> None:
+    """--archive-dir: (report, user_id, report_id, duration_ms) をアーカイブに追記する（report_archive.py）。"""
+    from report_archive import ReportArchive
+
+    archive = ReportArchive(archive_dir)
+    try:
+        for report, user_id, report_id, duration_ms in entries:
+            archive.append(report, user_id, report_id, duration_ms)
+    finally:
+        archive.close()
+
+
+def _render(report: dict[str, Any], compact: bool) -> str:
+    """stdout 用。--compact なら 1 行（report_codec.dumps）、それ以外は indent=2。"""
+    if compact:
+        import report_codec
+
+        return report_codec.dumps(report).decode("utf-8")
+    return json.dumps(report, ensure_ascii=False, indent=2)
+
+
+def preview_budget(args: argparse.Namespace) -> float | None:
+    """
+    --deadline のうち observe に渡す秒数。--save なら保存と healthcheck の分
+    （DEADLINE_SAVE_RESERVE_SECONDS。--deadline の 1/4 まで）を残す。
+    """
+    if not args.deadline:
+        return None
+    if not args.save:
+        return args.deadline
+    return args.deadline - min(DEADLINE_SAVE_RESERVE_SECONDS, args.deadline / 4)
+
+
+def run_deadline(args: argparse.Namespace) -> float | None:
+    """
+    --deadline の観測 1 回分（observe・保存・healthcheck）の期限（time.monotonic()）。
+    ResilientClient.bounded に渡し、保存の Retry-After やリトライもこの時刻までに収める。
+    """
+    return time.monotonic() + args.deadline if args.deadline else None
+
+
+async def run_once(
+    client: ResilientClient,
+    args: argparse.Namespace,
+    timings: Timings | None = None,
+    state: DeskState | None = None,
+    changes: Iterable[str] | None = None,
+) -> dict[str, Any]:
+    """
+    観測 1 回分（observe → stdout → --save なら保存と healthcheck → --archive-dir → --metrics-out）。
+    timings: 各フェーズの所要時間の積算先（--daemon はサイクルごとに渡し、失敗時もログに出す）。
+    --targets では client を使わず、観測先ごとにクライアントを作る（_run_targets_once）。
+    state / changes: --watch。changes（変わった node_id）があれば observe_changes で差分だけ観測する
+    （できなければ全件観測）。全件観測は state を埋め直す。
+    """
+    timings = timings or Timings()
+    if args.per_tenant:
+        return await _run_tenants_once(client, args, timings)
+    if args.targets:
+        return await _run_targets_once(args, timings)
+    with client.bounded(run_deadline(args)):
+        return await _run_once(client, args, timings, state, changes)
+
+
+async def _run_once(
+    client: ResilientClient,
+    args: argparse.Namespace,
+    timings: Timings,
+    state: DeskState | None,
+    changes: Iterable[str] | None,
+) -> dict[str, Any]:
+    """run_once の本体（1 つの観測先。--deadline の期限は run_once が client に付ける）。"""
+    report = None
+    if state is not None and changes is not None:
+        try:
+            report = await observe_changes(client, state, changes, args.estimator, args.top_k, timings)
+        except IncrementalUnsupported as e:
+            print(f"watch: {e}; observing the whole desk", file=sys.stderr)
+    if report is None:
+        report = await observe(
+            estimator=args.estimator,
+            top_k=args.top_k,
+            cache_dir=args.cache_dir,
+            client=client,
+            timings=timings,
+            engine=args.engine,
+            tree=args.tree,
+            state=state,
+            deadline=preview_budget(args),
+            record_dir=args.record,
+        )
+
+    # 常に stdout に出力
+    print(_render(report, args.compact), flush=True)
+
+    await _save_and_archive(client, report, args, timings, args.cache_dir, args.archive_dir)
+    if args.metrics_out:
+        write_metrics(args.metrics_out, metrics_record(report, timings, client))
+    return report
+
+
+async def _save_and_archive(
+    client: ResilientClient,
+    report: dict[str, Any],
+    args: argparse.Namespace,
+    timings: Timings,
+    cache_dir: str | None,
+    archive_dir: str | None,
+) -> dict[str, Any]:
+    """
+    --save なら保存と healthcheck、--archive-dir ならアーカイブへの追記。戻り値は保存 API の応答（保存しなければ {}）。
+    healthcheck に失敗してもアーカイブには残す（report_id は保存できていればその値）。
+    """
+    saved: dict[str, Any] = {}
+    try:
+        if args.save:
+            saved = await save_and_check(client, report, args.strict, timings, compact=args.compact, cache_dir=cache_dir)
+    finally:
+        if archive_dir:
+            duration_ms = timings.elapsed_ms()
+            with timings.span("archive"):
+                archive_reports(archive_dir, [(report, None, saved.get("report_id"), duration_ms)])
+    return saved
+
+
+async def _run_tenants_once(
+    client: ResilientClient,
+    args: argparse.Namespace,
+    timings: Timings,
+) -> dict[str, Any]:
+    """run_once の --per-tenant 版。保存はテナントごとに observe_tenants の中で済ませる。"""
+    result = await observe_tenants(client, args, timings)
+    print(_render(result, args.compact), flush=True)
+    if args.archive_dir:
+        with timings.span("archive"):
+            archive_reports(
+                args.archive_dir,
+                [
+                    (t["report"], t["user_id"], t.get("report_id"), t["elapsed_ms"])
+                    for t in result["tenants"]
+                    if "report" in t
+                ],
             )
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            result = await save_report(client, report, node_count)
-            print(
-                f"\n✓ Saved: report_id={result.get('report_id')} "
-                f"created_at={result.get('created_at')}",
-                file=sys.stderr,
+    if args.metrics_out:
+        write_metrics(args.metrics_out, metrics_record(result, timings, client))
+    failed = [t for t in result["tenants"] if t["status"] != "ok"]
+    if failed:
+        names = ", ".join(f"{t['user_id']} ({t['status']})" for t in failed)
+        raise TenantFailures(f"{len(failed)}/{len(result['tenants'])} tenant(s) failed: {names}")
+    return result
+
+
+# ─── 複数の観測先（--targets）────────────────────────────────
+# 観測先（load_targets）ごとに独立したタスクで observe → 保存 → healthcheck を行い、結果を 1 つの要約にまとめる。
+# - 接続プール（make_client）・リトライ / サーキットブレーカー（make_request_layer）は観測先ごとに持つ。
+#   1 つのデプロイが落ちていても、他の観測先のブレーカーや接続には影響しない。
+# - 1 観測先の失敗・タイムアウトは要約に残すだけで、他の観測先の保存は止めない（最後に TargetFailures）。
+# - --cache-dir / --archive-dir は観測先ごとのサブディレクトリ（<dir>/<name>）を使う。
+
+class TargetFailures(RuntimeError):
+    """--targets で失敗した観測先がある（他の観測先の保存は済んでいる）。1 回実行なら exit 1。"""
+
+
+def _target_dir(directory: str | None, target: Target) -> str | None:
+    return os.path.join(directory, target.name) if directory else None
+
+
+async def _observe_target(target: Target, args: argparse.Namespace) -> dict[str, Any]:
+    """1 観測先の observe → --save なら保存と healthcheck → --archive-dir。要約の 1 要素を返す（例外はそのまま上げる）。"""
+    token = _target.set(target)
+    timings = Timings()
+    entry: dict[str, Any] = {"name": target.name, "base_url": target.base_url, "status": "ok"}
+    try:
+        async with make_client() as raw_client:
+            client = make_request_layer(raw_client)
+            client.deadline = run_deadline(args)  # この観測先だけのクライアントなので戻さない
+            report = await observe(
+                estimator=args.estimator,
+                top_k=args.top_k,
+                cache_dir=_target_dir(args.cache_dir, target),
+                client=client,
+                timings=timings,
+                engine=args.engine,
+                tree=args.tree,
+                deadline=preview_budget(args),
             )
-            # 本番スモーク: GET latest で report_id と summary が一致するか検証。失敗なら exit 1（Actions を赤にする）
-            latest_data = await fetch_latest_report(client)
-            report_latest = latest_data.get("report")
-            saved_id = result.get("report_id")
-            expected_summary = report.get("summary", "")
-            payload_latest = (report_latest or {}).get("payload") or {}
-            summary_latest = payload_latest.get("summary", "")
-            if not report_latest:
-                print("healthcheck failed: latest returned no report", file=sys.stderr)
-                sys.exit(1)
-            if report_latest.get("report_id") != saved_id:
-                print(
-                    f"healthcheck failed: report_id mismatch (saved={saved_id!r}, latest={report_latest.get('report_id')!r})",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-            if summary_latest != expected_summary:
-                print(
-                    f"healthcheck failed: summary mismatch (expected len={len(expected_summary)}, got len={len(summary_latest)})",
-                    file=sys.stderr,
-                )
-                sys.exit(1)
-            # Phase 3-4.5: latest の payload.warnings を確認。1 件以上なら stderr に出す。--strict なら exit(1)
-            warnings_latest = payload_latest.get("warnings") or []
-            if not isinstance(warnings_latest, list):
-                warnings_latest = []
-            if warnings_latest:
-                print("⚠ Observer report has warnings:", file=sys.stderr)
-                for i, w in enumerate(warnings_latest):
-                    if isinstance(w, dict):
-                        code = w.get("code", "?")
-                        msg = w.get("message", "")
-                        details = w.get("details")
-                        print(f"  [{i+1}] {code}: {msg}", file=sys.stderr)
-                        if details is not None:
-                            print(f"      details: {json.dumps(details, ensure_ascii=False)}", file=sys.stderr)
-                    else:
-                        print(f"  [{i+1}] {w!r}", file=sys.stderr)
-                if strict_warnings:
-                    print("healthcheck failed: --strict and payload has warnings (exit 1)", file=sys.stderr)
-                    sys.exit(1)
-            # Phase 3-4.6: 本番運用テスト用の1行目印（Actions ログで合否判定しやすい）
-            latest_id = report_latest.get("report_id", "")
-            w_count = len(warnings_latest)
-            nc = payload_latest.get("node_count")
-            nc_str = str(nc) if nc is not None else "-"
-            sn = payload_latest.get("suggested_next")
-            rule_ver = "-"
-            if isinstance(sn, dict) and isinstance(sn.get("debug"), dict):
-                rule_ver = str(sn["debug"].get("rule_version", "-"))
-            print(
-                f"OP_TEST: saved={saved_id} latest={latest_id} warnings={w_count} node_count={nc_str} rule={rule_ver}",
-                file=sys.stderr,
+            entry["node_count"] = report.get("node_count")
+            entry["warnings"] = len(report.get("warnings") or [])
+            entry["report"] = report
+            saved = await _save_and_archive(
+                client, report, args, timings, _target_dir(args.cache_dir, target), _target_dir(args.archive_dir, target)
             )
-            print("✓ healthcheck passed: report_id and summary match latest", file=sys.stderr)
+            if args.save:
+                entry["report_id"] = saved.get("report_id")
+            if args.metrics_out:
+                write_metrics(args.metrics_out, {"target": target.name, **metrics_record(report, timings, client)})
+    finally:
+        _target.reset(token)
+    return entry
+
+
+async def observe_targets(
+    targets: list[Target],
+    args: argparse.Namespace,
+    timings: Timings | None = None,
+) -> dict[str, Any]:
+    """
+    --targets: すべての観測先を同時に観測する（--save なら各観測先に保存して healthcheck する）。
+    戻り値: {"targets": [...], "node_count", "meta"}。targets は一覧ファイルの順で、要素は
+    {name, base_url, status: ok / error / timeout, node_count, warnings, elapsed_ms, report?, report_id?, error?}。
+    """
+    import asyncio
 
+    timings = timings or Timings()
 
-if __name__ == "__main__":
+    async def run_one(target: Target) -> dict[str, Any]:
+        timeout = target.timeout or TARGET_TIMEOUT_SECONDS
+        t0 = time.perf_counter()
+        try:
+            entry = await asyncio.wait_for(_observe_target(target, args), timeout=timeout)
+        except asyncio.TimeoutError:
+            entry = {
+                "name": target.name,
+                "base_url": target.base_url,
+                "status": "timeout",
+                "error": f"target did not finish within {timeout:g}s",
+            }
+        except Exception as e:
+            entry = {"name": target.name, "base_url": target.base_url, "status": "error", "error": str(e)}
+        entry["elapsed_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        if entry["status"] != "ok":
+            print(f"✗ target {target.name}: {entry['error']}", file=sys.stderr)
+        return entry
+
+    with timings.span("targets"):
+        results = await asyncio.gather(*(run_one(t) for t in targets))
+    return {
+        "targets": results,
+        "node_count": sum(r.get("node_count") or 0 for r in results),
+        "meta": {
+            "observed_at": datetime.now(timezone.utc).isoformat(),
+            "target_count": len(results),
+            "failed": sum(1 for r in results if r["status"] != "ok"),
+            "timing": timings.summary(),
+        },
+    }
+
+
+async def _run_targets_once(args: argparse.Namespace, timings: Timings) -> dict[str, Any]:
+    """run_once の --targets 版。stdout には観測先ごとの結果をまとめた 1 つの要約を出す。"""
+    result = await observe_targets(load_targets(args.targets), args, timings)
+    print(_render(result, args.compact), flush=True)
+    failed = [t for t in result["targets"] if t["status"] != "ok"]
+    if failed:
+        names = ", ".join(f"{t['name']} ({t['status']})" for t in failed)
+        raise TargetFailures(f"{len(failed)}/{len(result['targets'])} target(s) failed: {names}")
+    return result
+
+
+async def run_daemon(args: argparse.Namespace) -> None:
+    """
+    --daemon: 1 つのクライアント（接続プール）を保ったまま、interval 秒ごと（±jitter）に観測する。
+    SIGTERM / SIGINT を受けたら実行中のサイクルを終えてから止まる。
+    サイクルの失敗（接続・healthcheck・--strict）はログに残して次のサイクルへ進む。
+    --watch: 全件観測の合間に変更通知（change_feed.py）を待ち、debounce でまとめた Node だけを観測し直す
+    （差分のサイクルは次の全件観測の予定を動かさない）。全件観測の依頼（node_ids なし）ならすぐ全件観測する。
+    """
     import asyncio
+    import random
+
+    stop = asyncio.Event()
+    feed: ChangeFeed | None = None
+    if args.watch:
+        from change_feed import ChangeFeed
+
+        feed = ChangeFeed(args.debounce, max(args.debounce, WATCH_MAX_DELAY_SECONDS), WATCH_MAX_NODES)
+
+    def request_stop() -> None:
+        stop.set()
+        if feed is not None:
+            feed.close()
 
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, request_stop)
+        except NotImplementedError:  # Windows
+            pass
+
+    # 空き接続はサイクルの間も保つ（間隔 + 揺らぎの最大値より長く）
+    keepalive = args.interval * (1 + args.jitter) + 30
+    async with make_client(keepalive_expiry=keepalive) as raw_client:
+        # ブレーカーの状態はサイクルをまたいで持ち越す（落ちている Preview をサイクルごとに叩き直さない）
+        client = make_request_layer(raw_client)
+        state = DeskState() if feed is not None else None
+        watchers: list[asyncio.Task[None]] = []
+        server = None
+        if feed is not None:
+            # 依頼 API の読み出しは観測とは別の request layer で数える（meta.http に混ぜない）
+            watchers.append(asyncio.ensure_future(
+                poll_run_requests(make_request_layer(raw_client), feed, WATCH_POLL_SECONDS)
+            ))
+            if args.watch_listen:
+                from change_feed import parse_listen, serve
+
+                server = await serve(feed, *parse_listen(args.watch_listen), allow_remote=args.watch_listen_public)
+        cycle = 0
+        changes: frozenset[str] | None = None  # 次のサイクルで差分だけ観測する Node（None なら全件）
+        next_full = 0.0  # 次の全件観測の時刻（loop.time()）
+        try:
+            while not stop.is_set():
+                cycle += 1
+                status = "ok"
+                timings = Timings()
+                report: dict[str, Any] = {}
+                try:
+                    report = await run_once(client, args, timings, state, changes)
+                except Exception as e:
+                    status = "error"
+                    print(str(e), file=sys.stderr)
+                # 差分のサイクルが失敗したら、その通知は次の全件観測で拾う（予定は動かさない）
+                kind = "full" if changes is None or (report and "incremental" not in report["meta"]) else "incremental"
+                if kind == "full":
+                    delay = max(0.0, args.interval * (1 + random.uniform(-args.jitter, args.jitter)))
+                    next_full = loop.time() + delay
+                parts = [f"cycle={cycle}", f"status={status}"]
+                if feed is not None:
+                    parts += [f"kind={kind}", f"changed={len(changes) if changes is not None else '-'}"]
+                parts += [f"{name}_ms={ms:.1f}" for name, ms in timings.total_ms.items()]
+                parts += [
+                    f"total_ms={timings.elapsed_ms():.1f}",
+                    f"node_count={report.get('node_count', '-')}",
+                    f"warnings={len(report.get('warnings') or [])}",
+                    f"next_in_s={max(0.0, next_full - loop.time()):.1f}",
+                ]
+                print(f"DAEMON: {' '.join(parts)}", file=sys.stderr, flush=True)
+                changes = None
+                if feed is None:
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=max(0.0, next_full - loop.time()))
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                # 次の全件観測までに通知がまとまれば差分のサイクル（多すぎる・全件の依頼なら全件観測を早める）
+                batch = await feed.next_batch(timeout=max(0.0, next_full - loop.time()))
+                if batch is not None and not batch.full:
+                    changes = batch.node_ids
+        finally:
+            for task in watchers:
+                task.cancel()
+            if server is not None:
+                server.close()
+                await server.wait_closed()
+    print(f"DAEMON: stopped after {cycle} cycle(s)", file=sys.stderr)
+
+
+def replay(args: argparse.Namespace) -> dict[str, Any]:
+    """--replay: スナップショットからレポートを組み立てて stdout に出す（保存・アーカイブ・キャッシュは使わない）。"""
+    from snapshot import read_snapshot
+
+    report = replay_snapshot(read_snapshot(args.replay), args.estimator, args.top_k, args.engine, args.tree)
+    report["meta"]["replay"]["snapshot"] = args.replay
+    print(_render(report, args.compact), flush=True)
+    return report
+
+
+async def _run(args: argparse.Namespace) -> None:
+    if args.replay:
+        replay(args)
+        return
+    if args.daemon:
+        await run_daemon(args)
+        return
+    if args.targets:
+        await _run_targets_once(args, Timings())
+        return
+    async with make_client() as client:
+        await run_once(make_request_layer(client), args)
+
+
+async def main(args: argparse.Namespace | None = None) -> None:
+    args = args or parse_args()
+    if args.rules:
+        use_rules(args.rules)
+    if not args.profile:
+        await _run(args)
+        return
+    # --profile: 観測全体を cProfile で測り、pstats を保存して累積時間の上位を stderr に出す
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
     try:
-        asyncio.run(main())
+        await _run(args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"\nprofile: {args.profile}（python -m pstats {args.profile} で詳しく見られます）", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+
+
+def cli(argv: list[str] | None = None) -> None:
+    """
+    コマンドラインの入口（python3 main.py / zipapp の __main__.py）。
+    .env と設定を読んでから引数を解釈し（--help はここで終わる）、asyncio を読み込んで観測する。
+    失敗はメッセージを stderr に出して exit 1。
+    """
+    try:
+        configure(check_base_url=False)
+        args = parse_args(argv)
+        if not args.targets and not args.replay:
+            _check_actions_base_url(BASE_URL, "NEXT_BASE_URL")
+        import asyncio
+
+        asyncio.run(main(args))
     except Exception as e:
         print(str(e), file=sys.stderr)
         sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
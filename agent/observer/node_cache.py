@@ -0,0 +1,264 @@
+"""
+Observer のノード状態キャッシュ（--cache-dir）
+
+前回の観測で得た Node ごとの Preview 結果とスコア内訳を SQLite に残し、
+次回は「変わった Node」だけを Preview する。
+
+キー:
+  node_id + fingerprint（実効更新日時 / status / temperature）
+  どれかが変われば miss（再 Preview）。Node が机から消えたら行も消す。
+
+経過日数について:
+  intent には「最終更新から N 日経過」が入るが、estimate-status の推定はキーワード規則で
+  日数の数字には反応しない（src/lib/stateMachine.ts の INTENT_PATTERNS）。
+  そのため日数だけが変わった Node は hit とし、reason に埋め込まれた intent だけを今回の intent に
+  差し替える。stale / stuck / 冷却日数は毎回 updated_at から計算し直す（キャッシュしない）。
+
+dashboard の条件付き取得:
+  前回読んだページ（送った cursor・ETag・本文）を残し、次回は If-None-Match を付けて読む。
+  304 ならこのページは前回の本文を使う。全ページ 304 なら dashboard は変わっていない。
+  前回のレポート（meta を除く）と解析結果のダイジェストも残し、Observer の短絡に使う。
+
+保存済みレポート（--compact）:
+  最後に保存したレポート（meta を含む）と report_id・content_hash を残し、次回の保存を差分で送る。
+
+保存先: <cache_dir>/observer_cache.sqlite3（標準ライブラリの sqlite3 のみ使用）
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+CACHE_FILENAME = "observer_cache.sqlite3"
+# 保存形式や推定規則の前提が変わったら上げる（古い行はすべて miss になる）
+CACHE_SCHEMA_VERSION = "1"
+
+
+def node_fingerprint(last_updated: Any, status: Any, temperature: Any) -> str:
+    """
+    Preview 結果が変わりうる Node の属性をまとめたキー。
+    last_updated は 28 §2 の実効更新日時（updated_at else created_at）。
+    """
+    return json.dumps(
+        [CACHE_SCHEMA_VERSION, last_updated, status, temperature],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def _rerender_preview(preview: dict[str, Any], cached_intent: str, intent: str) -> dict[str, Any]:
+    """キャッシュした Preview の reason 内の intent を今回の intent に差し替える。"""
+    suggested = preview.get("suggested")
+    if not suggested or cached_intent == intent:
+        return preview
+    reason = suggested.get("reason", "")
+    return {
+        **preview,
+        "suggested": {**suggested, "reason": reason.replace(f"「{cached_intent}」", f"「{intent}」", 1)},
+    }
+
+
+class NodeCache:
+    """node_id 単位の Preview / スコアのキャッシュ。1 回の観測で open → lookup → store → close。"""
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path / CACHE_FILENAME
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS node_state (
+              node_id     TEXT PRIMARY KEY,
+              fingerprint TEXT NOT NULL,
+              intent      TEXT NOT NULL,
+              preview     TEXT NOT NULL,  -- estimate-status Preview 応答（JSON）
+              score       TEXT,           -- [total, breakdown, sort_ts]（候補外は NULL）
+              observed_at TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS dashboard_page (
+              page_index INTEGER PRIMARY KEY,
+              cursor     TEXT,            -- このページを読むときに送った cursor（1 ページ目は NULL）
+              etag       TEXT NOT NULL,
+              body       TEXT NOT NULL    -- 応答 JSON
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS last_report (
+              id          INTEGER PRIMARY KEY CHECK (id = 1),
+              digest      TEXT NOT NULL,  -- 解析結果のダイジェスト（Observer が計算）
+              observed_at TEXT NOT NULL,
+              report      TEXT NOT NULL   -- ObserverReport（meta を除く）
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS saved_report (
+              user_id      TEXT PRIMARY KEY,  -- 全体レポートは ''
+              report_id    TEXT NOT NULL,
+              content_hash TEXT NOT NULL,
+              report       TEXT NOT NULL      -- 保存した ObserverReport（meta を含む）
+            )
+            """
+        )
+        self.hits = 0
+        self.misses = 0
+        self._rows: dict[str, tuple[str, str, str]] | None = None
+        # 今回の観測で読んだページ: (cursor, etag, body, 304 だったか)
+        self._pages: list[tuple[str | None, str, dict[str, Any], bool]] = []
+
+    def lookup(
+        self,
+        node_id: str,
+        fingerprint: str,
+        intent: str,
+    ) -> dict[str, Any] | None:
+        """fingerprint が一致すれば前回の Preview（reason は今回の intent に差し替え済み）を返す。"""
+        if self._rows is None:
+            # 1 Node ずつ SELECT せず、最初の lookup で全行を 1 回読む
+            self._rows = {
+                row[0]: row[1:]
+                for row in self._conn.execute("SELECT node_id, fingerprint, intent, preview FROM node_state")
+            }
+        row = self._rows.get(node_id)
+        if row is None or row[0] != fingerprint:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _rerender_preview(json.loads(row[2]), row[1], intent)
+
+    def store(
+        self,
+        entries: list[tuple[str, str, str, dict[str, Any] | None, Any]],
+        observed_at: str,
+    ) -> None:
+        """
+        今回の観測結果で置き換える。entries: (node_id, fingerprint, intent, preview, score)。
+        preview が None（失敗）の Node は保存しない（次回もう一度 Preview する）。
+        今回の机に無い Node の行は削除する。
+        """
+        with self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (node_id TEXT PRIMARY KEY)")
+            self._conn.execute("DELETE FROM seen")
+            self._conn.executemany("INSERT OR IGNORE INTO seen VALUES (?)", ((e[0],) for e in entries))
+            self._conn.execute("DELETE FROM node_state WHERE node_id NOT IN (SELECT node_id FROM seen)")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO node_state VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        node_id,
+                        fingerprint,
+                        intent,
+                        json.dumps(preview, ensure_ascii=False, separators=(",", ":")),
+                        json.dumps(score, ensure_ascii=False, separators=(",", ":")) if score else None,
+                        observed_at,
+                    )
+                    for node_id, fingerprint, intent, preview, score in entries
+                    if preview is not None
+                ),
+            )
+
+    # ─── dashboard ページ（ETag）──────────────────────────────
+
+    def cached_page(self, index: int, cursor: str | None) -> tuple[str, str] | None:
+        """前回同じ位置・同じ cursor で読んだページがあれば (etag, body JSON) を返す。"""
+        row = self._conn.execute(
+            "SELECT cursor, etag, body FROM dashboard_page WHERE page_index = ?",
+            (index,),
+        ).fetchone()
+        if row is None or row[0] != cursor:
+            return None
+        return row[1], row[2]
+
+    def record_page(
+        self,
+        cursor: str | None,
+        etag: str | None,
+        body: dict[str, Any],
+        not_modified: bool,
+    ) -> None:
+        """今回読んだページを順に記録する（ETag が無い応答は次回の条件付き取得に使えないので残さない）。"""
+        self._pages.append((cursor, etag or "", body, not_modified and bool(etag)))
+
+    def dashboard_unchanged(self) -> bool:
+        """今回の全ページが 304 で、ページ数も前回と同じなら True。"""
+        if not self._pages or not all(p[3] for p in self._pages):
+            return False
+        (stored,) = self._conn.execute("SELECT COUNT(*) FROM dashboard_page").fetchone()
+        return stored == len(self._pages)
+
+    def page_stats(self) -> dict[str, int]:
+        return {"pages": len(self._pages), "not_modified": sum(1 for p in self._pages if p[3])}
+
+    def store_pages(self) -> None:
+        """今回読んだページで dashboard_page を置き換える。"""
+        with self._conn:
+            self._conn.execute("DELETE FROM dashboard_page")
+            self._conn.executemany(
+                "INSERT INTO dashboard_page VALUES (?, ?, ?, ?)",
+                (
+                    (i, cursor, etag, json.dumps(body, ensure_ascii=False, separators=(",", ":")))
+                    for i, (cursor, etag, body, _) in enumerate(self._pages)
+                    if etag
+                ),
+            )
+
+    # ─── 前回のレポート ───────────────────────────────────
+
+    def last_report(self, digest: str) -> tuple[dict[str, Any], str] | None:
+        """ダイジェストが一致すれば前回の (report, observed_at) を返す。"""
+        row = self._conn.execute(
+            "SELECT digest, observed_at, report FROM last_report WHERE id = 1"
+        ).fetchone()
+        if row is None or row[0] != digest:
+            return None
+        return json.loads(row[2]), row[1]
+
+    def store_report(self, digest: str, observed_at: str, report: dict[str, Any]) -> None:
+        body = {k: v for k, v in report.items() if k != "meta"}
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO last_report VALUES (1, ?, ?, ?)",
+                (digest, observed_at, json.dumps(body, ensure_ascii=False, separators=(",", ":"))),
+            )
+
+    # ─── 保存済みレポート（--compact の差分の base）───────────────────
+
+    def saved_report(self, user_id: str | None) -> tuple[str, str, dict[str, Any]] | None:
+        """(report_id, content_hash, report)。無ければ None。"""
+        row = self._conn.execute(
+            "SELECT report_id, content_hash, report FROM saved_report WHERE user_id = ?",
+            (user_id or "",),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def store_saved_report(self, user_id: str | None, report_id: str, content_hash: str, report: dict[str, Any]) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO saved_report VALUES (?, ?, ?, ?)",
+                (user_id or "", report_id, content_hash, json.dumps(report, ensure_ascii=False, separators=(",", ":"))),
+            )
+
+    def stats(self) -> dict[str, Any]:
+        """meta.cache 用。bytes は SQLite ファイルのサイズ。"""
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            size = 0
+        return {"hits": self.hits, "misses": self.misses, "bytes": size}
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,126 @@
+"""
+親子の集計（node_children。--no-tree で使わない）
+
+dashboard の node_children（parent_id → child_id）と各 Node の parent_id から親子の索引を 1 回だけ作り、
+子孫の集計（最も遅れている status・最低温度・更新なし / 冷却対象の件数）を 1 回の走査で求める。
+main.apply_tree がスコア（breakdown.children / subtree）と冷却アラートに使う。
+
+- 親子は src/lib/dashboardTree.ts と同じく node_children を優先し、parent_id で補う。
+  ただし子は最初に見つかったリンクの親 1 つにだけ数える（複数の親から辿れる Node を二重に数えない）。
+- 机の上にない子（DONE / CANCELLED / DORMANT など dashboard が返さない Node）は「片付いた子」として数える。
+- 走査は葉から親へ（子がすべて済んだ親から順に）進めるので O(Node 数 + リンク数)。再帰しない（深さの上限なし）。
+  最後まで順番が来ない Node は循環の上にある。循環の中ではお互いを集計に含めない（循環の外の子は含める）。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, NamedTuple
+
+_NO_RANK = 1 << 30       # 子孫がない（worst_status なし）
+_NO_TEMP = float("inf")  # 子孫がない（coldest なし）
+
+
+class TreeIndex(NamedTuple):
+    parent: list[int]            # Node の添字 → 親の添字（親なしは -1）
+    missing_children: list[int]  # Node の添字 → 机の上にない子の数
+
+
+class SubtreeStats(NamedTuple):
+    children: int             # 直接の子（机の上にない子も含む）
+    open_children: int        # 直接の子のうち進められるもの（stalled でなく机の上にある子）
+    worst_status: str | None  # 机の上の子孫で最も遅れている status（severity の先頭ほど遅れ）
+    descendants: int          # 机の上の子孫の数
+    stale_descendants: int    # そのうち更新なし（stale）の数
+    cooling_descendants: int  # そのうち冷却対象の数
+    coldest: int | None       # 子孫の最低温度（normalize_temperature 済み）
+    in_cycle: bool            # 循環の上にある（循環の中の Node は集計に含めていない）
+
+
+def build_index(node_ids: list[str], links: Iterable[tuple[Any, Any]]) -> TreeIndex:
+    """
+    links: (parent_id, child_id) の列。node_children を先に、parent_id の補完を後に並べる。
+    親が机の上にないリンクと自己参照は捨てる。
+    """
+    pos = {node_id: i for i, node_id in enumerate(node_ids)}
+    parent = [-1] * len(node_ids)
+    missing = [0] * len(node_ids)
+    for parent_id, child_id in links:
+        p = pos.get(parent_id)
+        if p is None or parent_id == child_id:
+            continue
+        c = pos.get(child_id)
+        if c is None:
+            missing[p] += 1
+        elif parent[c] < 0:
+            parent[c] = p
+    return TreeIndex(parent, missing)
+
+
+def subtree_stats(
+    index: TreeIndex,
+    statuses: list[Any],
+    temperatures: list[int],
+    stale: list[bool],
+    cooling: list[bool],
+    stalled_statuses: tuple[str, ...],
+    severity: tuple[str, ...],
+) -> tuple[list[SubtreeStats | None], list[int]]:
+    """
+    Node ごとの子孫の集計（子のない Node は None）と、循環の上にある Node の添字を返す。
+    statuses / temperatures / stale / cooling は Node の添字順（build_index の node_ids と同じ並び）。
+    """
+    parent = index.parent
+    n = len(parent)
+    rank_of = {s: r for r, s in enumerate(severity)}
+    rank = [rank_of.get(s, len(severity)) if type(s) is str else len(severity) for s in statuses]
+    is_open = [type(s) is not str or s not in stalled_statuses for s in statuses]
+
+    pending = [0] * n  # まだ済んでいない机の上の子の数
+    for p in parent:
+        if p >= 0:
+            pending[p] += 1
+    children = [k + m for k, m in zip(pending, index.missing_children)]
+    open_children = [0] * n
+    worst = [_NO_RANK] * n
+    coldest = [_NO_TEMP] * n
+    descendants = [0] * n
+    stale_d = [0] * n
+    cooling_d = [0] * n
+
+    # 葉から親へ。queue は走査しながら伸びる（子がすべて済んだ親を後ろに足す）
+    queue = [i for i in range(n) if pending[i] == 0]
+    for i in queue:
+        p = parent[i]
+        if p < 0:
+            continue
+        descendants[p] += descendants[i] + 1
+        stale_d[p] += stale_d[i] + stale[i]
+        cooling_d[p] += cooling_d[i] + cooling[i]
+        r = worst[i] if worst[i] < rank[i] else rank[i]
+        if r < worst[p]:
+            worst[p] = r
+        t = coldest[i] if coldest[i] < temperatures[i] else temperatures[i]
+        if t < coldest[p]:
+            coldest[p] = t
+        if is_open[i]:
+            open_children[p] += 1
+        pending[p] -= 1
+        if pending[p] == 0:
+            queue.append(p)
+
+    cycle = [i for i in range(n) if pending[i] > 0]
+    stats: list[SubtreeStats | None] = [None] * n
+    for i in range(n):
+        if children[i] == 0:
+            continue
+        stats[i] = SubtreeStats(
+            children[i],
+            open_children[i],
+            severity[worst[i]] if worst[i] < len(severity) else None,
+            descendants[i],
+            stale_d[i],
+            cooling_d[i],
+            coldest[i] if coldest[i] != _NO_TEMP else None,
+            pending[i] > 0,
+        )
+    return stats, cycle
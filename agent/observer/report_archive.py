@@ -0,0 +1,326 @@
+"""
+ObserverReport のアーカイブ（--archive-dir）と傾向の問い合わせ
+
+観測のたびに ObserverReport を 1 件ずつ SQLite に追記する（書き換え・削除はしない）。
+latest API は最新の 1 件しか返さないので、過去との比較はこのアーカイブで行う。
+
+追記するとき（append）に、問い合わせに使う値を先に求めて索引付きの列に入れておく。
+問い合わせは索引を引くだけで、保存したレポート本文（gzip）は読み直さない。
+  runs        1 観測 1 行。observed_at・所要時間・件数と、前回の run からの status_proposals の増減
+  node_events Node ごとの状態（cooling / proposal / suggested）。前回の run から続いていれば
+              since（続いている最初の observed_at）と streak（続いている run 数）を引き継ぐ
+
+問い合わせ（python3 agent/observer/report_archive.py --archive-dir DIR ...）:
+  cooling NODE_ID   その Node はいつから冷却アラートに出続けているか
+  churn --days 30   status_proposals の入れ替わり（出た / 消えた件数と、よく出入りする Node）
+  durations --days 30   観測 1 回の所要時間（p50 / p95 / max）
+  show RUN_ID       保存したレポート本文
+
+テナント別レポート（--per-tenant）は user_id ごとに別の系列として扱う（全体レポートは ''）。
+保存先: <archive_dir>/observer_archive.sqlite3（標準ライブラリの sqlite3 のみ使用）
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+ARCHIVE_FILENAME = "observer_archive.sqlite3"
+CHURN_TOP_NODES = 10  # churn に載せる「よく出入りする Node」の件数
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS runs (
+      run_id            INTEGER PRIMARY KEY,
+      user_id           TEXT NOT NULL,     -- 全体レポートは ''
+      observed_at       TEXT NOT NULL,     -- meta.observed_at（UTC の isoformat。文字列の順 = 時刻の順）
+      report_id         TEXT,              -- --save で保存したときの report_id
+      duration_ms       REAL,              -- 観測 1 回（保存・healthcheck を含む）の所要時間
+      node_count        INTEGER NOT NULL,
+      warnings          INTEGER NOT NULL,
+      cooling           INTEGER NOT NULL,  -- cooling_alerts の件数
+      proposals         INTEGER NOT NULL,  -- status_proposals の件数
+      proposals_added   INTEGER NOT NULL,  -- 前回の run になかった (node_id, suggested_status)
+      proposals_removed INTEGER NOT NULL,  -- 前回の run にあって今回ない (node_id, suggested_status)
+      suggested_node_id TEXT,
+      report            BLOB NOT NULL      -- ObserverReport（gzip した JSON）
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS runs_user_observed_at ON runs (user_id, observed_at)",
+    """
+    CREATE TABLE IF NOT EXISTS node_events (
+      run_id  INTEGER NOT NULL,
+      node_id TEXT NOT NULL,
+      kind    TEXT NOT NULL,     -- cooling / proposal / suggested
+      detail  TEXT,              -- proposal: suggested_status / cooling: message
+      since   TEXT NOT NULL,     -- この状態が続いている最初の run の observed_at
+      streak  INTEGER NOT NULL   -- この状態が続いている run 数（今回を含む）
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS node_events_node ON node_events (node_id, kind, run_id)",
+    "CREATE INDEX IF NOT EXISTS node_events_run ON node_events (run_id, kind)",
+)
+
+
+def _report_events(report: dict[str, Any]) -> list[tuple[str, str, str | None]]:
+    """レポートの (node_id, kind, detail)。同じ Node・kind は 1 件にまとめる。"""
+    events: dict[tuple[str, str], str | None] = {}
+    for alert in report.get("cooling_alerts") or ():
+        if isinstance(alert, dict) and isinstance(alert.get("node_id"), str):
+            events.setdefault((alert["node_id"], "cooling"), alert.get("message"))
+    for proposal in report.get("status_proposals") or ():
+        if isinstance(proposal, dict) and isinstance(proposal.get("node_id"), str):
+            events.setdefault((proposal["node_id"], "proposal"), proposal.get("suggested_status"))
+    suggested = report.get("suggested_next")
+    if isinstance(suggested, dict) and isinstance(suggested.get("node_id"), str):
+        events.setdefault((suggested["node_id"], "suggested"), None)
+    return [(node_id, kind, detail) for (node_id, kind), detail in events.items()]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """昇順リストの nearest-rank パーセンタイル。空なら 0（main._percentile と同じ）。"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))  # ceil
+    return sorted_values[int(rank) - 1]
+
+
+def _parse_time(ts: str) -> datetime:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+class ReportArchive:
+    """追記専用のレポートアーカイブ。1 回の観測（または問い合わせ）で open → append / 問い合わせ → close。"""
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.path = path / ARCHIVE_FILENAME
+        self._conn = sqlite3.connect(self.path)
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def append(
+        self,
+        report: dict[str, Any],
+        user_id: str | None = None,
+        report_id: str | None = None,
+        duration_ms: float | None = None,
+    ) -> int:
+        """report を 1 件追記して run_id を返す。observed_at は report.meta.observed_at（なければ現在時刻）。"""
+        meta = report.get("meta") if isinstance(report.get("meta"), dict) else {}
+        observed_at = meta.get("observed_at") or datetime.now(timezone.utc).isoformat()
+        tenant = user_id or ""
+        events = _report_events(report)
+        with self._conn:
+            prev = self._conn.execute(
+                "SELECT run_id FROM runs WHERE user_id = ? ORDER BY observed_at DESC, run_id DESC LIMIT 1",
+                (tenant,),
+            ).fetchone()
+            previous: dict[tuple[str, str], tuple[str | None, str, int]] = {}
+            if prev is not None:
+                previous = {
+                    (node_id, kind): (detail, since, streak)
+                    for node_id, kind, detail, since, streak in self._conn.execute(
+                        "SELECT node_id, kind, detail, since, streak FROM node_events WHERE run_id = ?",
+                        (prev[0],),
+                    )
+                }
+            proposals = {(node_id, detail) for node_id, kind, detail in events if kind == "proposal"}
+            before = {(node_id, v[0]) for (node_id, kind), v in previous.items() if kind == "proposal"}
+            suggested = report.get("suggested_next")
+            cur = self._conn.execute(
+                "INSERT INTO runs VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    tenant,
+                    observed_at,
+                    report_id,
+                    duration_ms,
+                    report.get("node_count") or 0,
+                    len(report.get("warnings") or ()),
+                    len(report.get("cooling_alerts") or ()),
+                    len(report.get("status_proposals") or ()),
+                    len(proposals - before),
+                    len(before - proposals),
+                    suggested.get("node_id") if isinstance(suggested, dict) else None,
+                    gzip.compress(json.dumps(report, ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+                ),
+            )
+            run_id = cur.lastrowid
+            rows = []
+            for node_id, kind, detail in events:
+                since, streak = observed_at, 1
+                last = previous.get((node_id, kind))
+                # proposal は提案先の status が変われば別の提案として数え直す
+                if last is not None and (kind != "proposal" or last[0] == detail):
+                    since, streak = last[1], last[2] + 1
+                rows.append((run_id, node_id, kind, detail, since, streak))
+            self._conn.executemany("INSERT INTO node_events VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return run_id
+
+    def _latest_run(self, user_id: str | None) -> tuple[int, str] | None:
+        return self._conn.execute(
+            "SELECT run_id, observed_at FROM runs WHERE user_id = ? ORDER BY observed_at DESC, run_id DESC LIMIT 1",
+            (user_id or "",),
+        ).fetchone()
+
+    def _window_start(self, user_id: str | None, days: float, now: datetime | None) -> str:
+        """直近 days 日の始まり（observed_at と比べる文字列）。now 省略時は最新の run の observed_at。"""
+        if now is None:
+            latest = self._latest_run(user_id)
+            now = _parse_time(latest[1]) if latest else datetime.now(timezone.utc)
+        return (now - timedelta(days=days)).isoformat()
+
+    def cooling(self, node_id: str, user_id: str | None = None) -> dict[str, Any]:
+        """
+        node_id が冷却アラートに出続けている期間。
+        cooling: 最新の run でも冷却対象か / since・runs: 続いている最初の observed_at と run 数
+        （最新の run で対象外なら、最後に対象だった連続の値と last_seen）。
+        """
+        latest = self._latest_run(user_id)
+        out: dict[str, Any] = {"node_id": node_id, "user_id": user_id, "cooling": False}
+        if latest is None:
+            return out
+        row = self._conn.execute(
+            """
+            SELECT e.run_id, e.since, e.streak, e.detail, r.observed_at
+            FROM node_events e JOIN runs r ON r.run_id = e.run_id
+            WHERE e.node_id = ? AND e.kind = 'cooling' AND r.user_id = ?
+            ORDER BY e.run_id DESC LIMIT 1
+            """,
+            (node_id, user_id or ""),
+        ).fetchone()
+        if row is None:
+            return out
+        run_id, since, streak, message, last_seen = row
+        out.update({
+            "cooling": run_id == latest[0],
+            "since": since,
+            "runs": streak,
+            "days": round((_parse_time(last_seen) - _parse_time(since)).total_seconds() / 86400, 2),
+            "last_seen": last_seen,
+            "message": message,
+        })
+        return out
+
+    def churn(self, days: float = 30, user_id: str | None = None, now: datetime | None = None) -> dict[str, Any]:
+        """直近 days 日の status_proposals の入れ替わり。top_nodes は新しく提案された回数の多い Node。"""
+        start = self._window_start(user_id, days, now)
+        runs, added, removed, avg, first_run = self._conn.execute(
+            """
+            SELECT COUNT(*), COALESCE(SUM(proposals_added), 0), COALESCE(SUM(proposals_removed), 0),
+                   AVG(proposals), MIN(run_id)
+            FROM runs WHERE user_id = ? AND observed_at >= ?
+            """,
+            (user_id or "", start),
+        ).fetchone()
+        top_nodes: list[dict[str, Any]] = []
+        if runs:
+            top_nodes = [
+                {"node_id": node_id, "proposed": count}
+                for node_id, count in self._conn.execute(
+                    """
+                    SELECT e.node_id, COUNT(*) FROM node_events e JOIN runs r ON r.run_id = e.run_id
+                    WHERE e.run_id >= ? AND e.kind = 'proposal' AND e.streak = 1
+                      AND r.user_id = ? AND r.observed_at >= ?
+                    GROUP BY e.node_id ORDER BY COUNT(*) DESC, e.node_id LIMIT ?
+                    """,
+                    (first_run, user_id or "", start, CHURN_TOP_NODES),
+                )
+            ]
+        return {
+            "user_id": user_id,
+            "since": start,
+            "runs": runs,
+            "added": added,
+            "removed": removed,
+            "churn_per_run": round((added + removed) / runs, 2) if runs else 0.0,
+            "avg_proposals": round(avg, 2) if avg is not None else 0.0,
+            "top_nodes": top_nodes,
+        }
+
+    def durations(self, days: float = 30, user_id: str | None = None, now: datetime | None = None) -> dict[str, Any]:
+        """直近 days 日の観測 1 回の所要時間（ms）。"""
+        start = self._window_start(user_id, days, now)
+        values = [
+            row[0]
+            for row in self._conn.execute(
+                """
+                SELECT duration_ms FROM runs
+                WHERE user_id = ? AND observed_at >= ? AND duration_ms IS NOT NULL
+                ORDER BY duration_ms
+                """,
+                (user_id or "", start),
+            )
+        ]
+        return {
+            "user_id": user_id,
+            "since": start,
+            "runs": len(values),
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p95_ms": round(_percentile(values, 95), 1),
+            "max_ms": round(values[-1], 1) if values else 0.0,
+        }
+
+    def report(self, run_id: int) -> dict[str, Any] | None:
+        row = self._conn.execute("SELECT report FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(gzip.decompress(row[0])) if row is not None else None
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Observer のレポートアーカイブに問い合わせる")
+    parser.add_argument(
+        "--archive-dir",
+        default=os.getenv("OBSERVER_ARCHIVE_DIR") or None,
+        metavar="DIR",
+        help="アーカイブの置き場所（main.py --archive-dir と同じ。既定: OBSERVER_ARCHIVE_DIR）",
+    )
+    parser.add_argument("--user-id", default=None, help="テナント別レポート（--per-tenant）の user_id。省略時は全体レポート")
+    sub = parser.add_subparsers(dest="query", required=True)
+    cooling = sub.add_parser("cooling", help="Node が冷却アラートに出続けている期間")
+    cooling.add_argument("node_id")
+    for name, help_text in (("churn", "status_proposals の入れ替わり"), ("durations", "観測 1 回の所要時間の p50 / p95 / max")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("--days", type=float, default=30, help="直近何日分か（最新の run から数える。既定: 30）")
+    show = sub.add_parser("show", help="保存したレポート本文")
+    show.add_argument("run_id", type=int)
+    args = parser.parse_args(argv)
+    if not args.archive_dir:
+        parser.error("--archive-dir (or OBSERVER_ARCHIVE_DIR) is required")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    archive = ReportArchive(args.archive_dir)
+    try:
+        if args.query == "cooling":
+            result = archive.cooling(args.node_id, args.user_id)
+        elif args.query == "churn":
+            result = archive.churn(args.days, args.user_id)
+        elif args.query == "durations":
+            result = archive.durations(args.days, args.user_id)
+        else:
+            result = archive.report(args.run_id)
+            if result is None:
+                print(f"run_id {args.run_id} not found", file=sys.stderr)
+                return 1
+    finally:
+        archive.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+ObserverReport の送受信形式（--compact）
+
+- dumps(): 区切りの空白なし・UTF-8 の JSON。orjson が入っていれば使う（pip install orjson。任意）。
+- content_hash(): canonical_json() の SHA-256。API（src/lib/observerReportCodec.ts）も同じ規則で計算し、
+  保存時に observer_reports.content_hash に残す。healthcheck は latest の payload を読み直さず、
+  この値と report_id だけを突き合わせる。
+- make_delta() / apply_delta(): 前回保存したレポートとの差分。status_proposals / cooling_alerts /
+  suggested_next_ranking（DELTA_SECTIONS）は、前回と同じ要素を [開始位置, 件数] の参照にして
+  変わった要素だけを送る。それ以外のキー（summary / warnings / meta など）はそのまま送る。
+
+canonical_json の規則（JavaScript の JSON.stringify と同じ文字列になるように決めている）:
+  - オブジェクトのキーは昇順、区切りの空白なし、非 ASCII はそのまま（UTF-8）
+  - 数値は Number.prototype.toString と同じ書き方（1.0 → 1、1e-07 → 1e-7、0.00001 → 0.00001）
+  - NaN / Infinity は null
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from decimal import Decimal
+from typing import Any
+
+# 差分で送るセクション（要素は Node ごとの dict。順序も含めて復元する）
+DELTA_SECTIONS = ("status_proposals", "cooling_alerts", "suggested_next_ranking")
+DELTA_FORMAT = 1
+
+_encode_str = json.encoder.encode_basestring  # ensure_ascii=False と同じエスケープ（C 実装）
+_MAX_SAFE_INTEGER = 2 ** 53  # これ以上の整数は JavaScript では double に丸まる
+
+
+def dumps(obj: Any) -> bytes:
+    """送信・stdout 用の compact JSON（UTF-8）。orjson があれば使う。"""
+    try:
+        import orjson
+    except ImportError:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return orjson.dumps(obj)
+
+
+def _js_number(x: float) -> str:
+    """float を JavaScript の Number.prototype.toString と同じ文字列にする。"""
+    if x != x or x in (float("inf"), float("-inf")):
+        return "null"
+    if x == int(x) and abs(x) < _MAX_SAFE_INTEGER:
+        return str(int(x))
+    # repr は最短で往復できる桁（JavaScript と同じ桁列）。書き方だけ ECMAScript の規則に合わせる
+    sign, digit_tuple, exponent = Decimal(repr(x)).as_tuple()
+    digits = "".join(map(str, digit_tuple)).rstrip("0")
+    k = len(digits)
+    n = int(exponent) + len(digit_tuple)  # 値 = 0.digits × 10^n
+    head = "-" if sign else ""
+    if k <= n <= 21:
+        return head + digits + "0" * (n - k)
+    if 0 < n <= 21:
+        return head + digits[:n] + "." + digits[n:]
+    if -6 < n <= 0:
+        return head + "0." + "0" * -n + digits
+    e = n - 1
+    mantissa = digits if k == 1 else digits[0] + "." + digits[1:]
+    return f"{head}{mantissa}e{'+' if e >= 0 else '-'}{abs(e)}"
+
+
+def _canonical(obj: Any, out: list[str]) -> None:
+    if isinstance(obj, str):
+        out.append(_encode_str(obj))
+    elif obj is None:
+        out.append("null")
+    elif obj is True:
+        out.append("true")
+    elif obj is False:
+        out.append("false")
+    elif isinstance(obj, int):
+        out.append(str(obj) if abs(obj) < _MAX_SAFE_INTEGER else _js_number(float(obj)))
+    elif isinstance(obj, float):
+        out.append(_js_number(obj))
+    elif isinstance(obj, dict):
+        out.append("{")
+        first = True
+        for key in sorted(obj):
+            if not first:
+                out.append(",")
+            first = False
+            out.append(_encode_str(key))
+            out.append(":")
+            _canonical(obj[key], out)
+        out.append("}")
+    elif isinstance(obj, (list, tuple)):
+        out.append("[")
+        for i, item in enumerate(obj):
+            if i:
+                out.append(",")
+            _canonical(item, out)
+        out.append("]")
+    else:
+        raise TypeError(f"not JSON serializable: {type(obj).__name__}")
+
+
+def canonical_json(obj: Any) -> str:
+    out: list[str] = []
+    _canonical(obj, out)
+    return "".join(out)
+
+
+def content_hash(obj: Any) -> str:
+    """レポートの内容ハッシュ（sha256 の 16 進）。API の contentHash() と一致する。"""
+    return hashlib.sha256(canonical_json(obj).encode("utf-8")).hexdigest()
+
+
+def _item_key(item: Any) -> str:
+    # 要素は Node ごとの dict なので node_id で引き、一致は == で確かめる（全要素を文字列にしない）
+    if isinstance(item, dict) and isinstance(item.get("node_id"), str):
+        return item["node_id"]
+    return json.dumps(item, ensure_ascii=False, sort_keys=True)
+
+
+def _section_ops(base: list[Any], items: list[Any]) -> list[Any]:
+    """
+    items を「base からの参照 [開始位置, 件数]」と「そのまま送る要素（dict）」の列にする。
+    要素が前回と少しでも違えば送り直す（部分的な差分は取らない）。
+    """
+    index: dict[str, int] = {}
+    for i, item in enumerate(base):
+        index.setdefault(_item_key(item), i)
+    ops: list[Any] = []
+    for item in items:
+        j = index.get(_item_key(item))
+        if j is not None and base[j] != item:
+            j = None
+        if j is None:
+            ops.append(item)
+        elif ops and isinstance(ops[-1], list) and ops[-1][0] + ops[-1][1] == j:
+            ops[-1][1] += 1
+        else:
+            ops.append([j, 1])
+    return ops
+
+
+def make_delta(base: dict[str, Any], report: dict[str, Any]) -> dict[str, Any]:
+    """
+    base（前回保存したレポート）から report を復元できる差分。
+    戻り値: {"format", "sections": {name: ops}, "set": {その他のキー: 値}, "unset": [消えたキー]}
+    """
+    sections: dict[str, list[Any]] = {}
+    rest: dict[str, Any] = {}
+    for key, value in report.items():
+        if key in DELTA_SECTIONS and isinstance(value, list) and isinstance(base.get(key), list):
+            sections[key] = _section_ops(base[key], value)
+        else:
+            rest[key] = value
+    return {
+        "format": DELTA_FORMAT,
+        "sections": sections,
+        "set": rest,
+        "unset": [key for key in base if key not in report],
+    }
+
+
+def apply_delta(base: dict[str, Any], delta: dict[str, Any]) -> dict[str, Any]:
+    """make_delta の逆。API 側（applyReportDelta）と同じ手順。"""
+    if delta.get("format") != DELTA_FORMAT:
+        raise ValueError(f"unsupported delta format: {delta.get('format')!r}")
+    report = {k: v for k, v in base.items() if k not in delta.get("unset", [])}
+    report.update(delta.get("set", {}))
+    for key, ops in delta.get("sections", {}).items():
+        source = base.get(key) or []
+        items: list[Any] = []
+        for op in ops:
+            if isinstance(op, list):
+                start, count = op
+                if start < 0 or start + count > len(source):
+                    raise ValueError(f"delta reference out of range: {key}[{start}:{start + count}]")
+                items.extend(source[start:start + count])
+            else:
+                items.append(op)
+        report[key] = items
+    return report
@@ -0,0 +1,317 @@
+"""
+Observer の HTTP リクエスト層（リトライ・サーキットブレーカー・ヘッジ）
+
+main.py の API 呼び出し（dashboard / Preview / 保存 / latest）はすべて ResilientClient を通す。
+httpx.AsyncClient と同じ get / post で呼べるので、呼び出し側は client を差し替えるだけでよい。
+
+- リトライ: 指数バックオフ + ジッタ（full jitter）。429 / 503 の Retry-After を優先する。
+  冪等な呼び出し（GET と Preview の POST）は接続エラー・タイムアウト・429 / 5xx でリトライする。
+  冪等でない呼び出し（レポート保存）は「サーバに届いていない」と分かる場合だけ（接続失敗・429）。
+- サーキットブレーカー: エンドポイントごとに、リトライ後も失敗した回数が連続 threshold 回に達したら
+  cooldown 秒は呼ばずに CircuitOpen を投げる。cooldown 後は 1 回だけ試し（half-open。その結果が出るまで
+  ほかの呼び出しは CircuitOpen）、成功すれば閉じ、失敗すれば開き直す。
+  4xx（429 を除く）はサーバが応答しているので失敗に数えない。
+- ヘッジ: hedge_after 秒たっても応答が無ければ同じリクエストをもう 1 本投げ、先に成功した方を使う。
+  先に返った方が 429 / 5xx（RETRYABLE_STATUS）や例外なら、もう 1 本を待つ。Preview（副作用なし）にだけ使う。
+- 期限（--deadline）: bounded(at) の間は、1 回の待ち時間（タイムアウト）を残り時間までに縮め、
+  待つと期限を過ぎるリトライ（Retry-After を含む）はせずに失敗として返す。期限後の呼び出しは DeadlineExceeded。
+- エンドポイントごとの件数・リトライ・失敗・レイテンシを snapshot() で返す（payload.meta.http）。
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Iterator
+from urllib.parse import urlparse
+
+# httpx・asyncio は呼び出し時に読む（main.py と同じく、import だけなら軽く済ませる）
+if TYPE_CHECKING:
+    import httpx
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+RETRY_AFTER_MAX_SECONDS = 60.0  # Retry-After がこれより長ければ打ち切ってこの秒数だけ待つ
+
+# パス中の Node ID を {id} にまとめ、エンドポイント単位で集計する
+_NODE_ID_SEGMENT = re.compile(r"^/api/nodes/(?!estimate-status/)[^/]+")
+# 副作用がなく、リトライ・ヘッジしてよい POST（Preview）
+PREVIEW_ENDPOINTS = frozenset({
+    "POST /api/nodes/{id}/estimate-status",
+    "POST /api/nodes/estimate-status/batch",
+})
+
+
+class CircuitOpen(RuntimeError):
+    """サーキットブレーカーが開いている間の呼び出し（リクエストは送っていない）。"""
+
+
+class DeadlineExceeded(RuntimeError):
+    """bounded(at) の期限を過ぎてからの呼び出し（リクエストは送っていない）。"""
+
+
+def endpoint_key(method: str, url: str) -> str:
+    path = _NODE_ID_SEGMENT.sub("/api/nodes/{id}", urlparse(url).path)
+    return f"{method} {path}"
+
+
+def retry_after_seconds(resp: httpx.Response) -> float | None:
+    """Retry-After（秒数 または HTTP 日付）を秒で返す。無い・読めなければ None。"""
+    raw = resp.headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime
+
+    try:
+        at = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return max(0.0, (at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self.opened = 0  # 開いた回数（集計用）
+        self.half_open_in_flight = False  # half-open の試しの 1 回が結果待ち（その間はほかを通さない）
+
+    def allow(self) -> bool:
+        if self.half_open_in_flight:
+            return False
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            # half-open: 次の 1 回だけを試す。成功すれば閉じ、失敗すればすぐ開き直す
+            self.opened_at = None
+            self.consecutive_failures = self.threshold - 1
+            self.half_open_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_in_flight = False
+
+    def record_failure(self) -> None:
+        self.half_open_in_flight = False
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.threshold and self.opened_at is None:
+            self.opened_at = time.monotonic()
+            self.opened += 1
+
+    def release(self) -> None:
+        """試しの 1 回が成功とも失敗とも記録されずに終わった（キャンセルなど）。次の呼び出しでまた試せるようにする。"""
+        if self.half_open_in_flight:
+            self.half_open_in_flight = False
+            self.opened_at = time.monotonic() - self.cooldown
+
+
+class EndpointStats:
+    def __init__(self) -> None:
+        self.requests = 0        # 呼び出し回数（リトライ・ヘッジを除く）
+        self.attempts = 0        # 実際に送ったリクエスト数
+        self.retries = 0
+        self.failures = 0        # リトライ後も失敗した回数
+        self.short_circuited = 0  # ブレーカーが開いていて送らなかった回数
+        self.hedged = 0
+        self.latencies: list[float] = []  # 呼び出し 1 回あたり（リトライ待ちを含む）ms
+
+    def snapshot(self, breaker: CircuitBreaker) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "hedged": self.hedged,
+            "circuit_opened": breaker.opened,
+            "latency_ms": {
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "max": ordered[-1] if ordered else 0.0,
+            },
+        }
+
+
+class ResilientClient:
+    """httpx.AsyncClient をくるみ、get / post にリトライ・ブレーカー・ヘッジを付ける。"""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        *,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+        hedge_after: float | None = None,
+    ) -> None:
+        self.client = client
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.hedge_after = hedge_after if hedge_after and hedge_after > 0 else None
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._stats: dict[str, EndpointStats] = {}
+        self.deadline: float | None = None  # time.monotonic() の期限（bounded）。None なら制限なし
+
+    @contextmanager
+    def bounded(self, at: float | None) -> Iterator[None]:
+        """この間の呼び出し（リトライ・バックオフを含む）を time.monotonic() の at までに収める。外側の期限より延ばさない。"""
+        previous = self.deadline
+        if at is not None:
+            self.deadline = at if previous is None else min(previous, at)
+        try:
+            yield
+        finally:
+            self.deadline = previous
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def reset_stats(self) -> None:
+        """集計だけを消す（ブレーカーの状態は残す）。--daemon ではサイクルごとに呼ぶ。"""
+        self._stats.clear()
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {key: stats.snapshot(self._breakers[key]) for key, stats in sorted(self._stats.items())}
+
+    def _backoff(self, attempt: int, resp: httpx.Response | None) -> float:
+        if resp is not None and resp.status_code in (429, 503):
+            after = retry_after_seconds(resp)
+            if after is not None:
+                return min(after, RETRY_AFTER_MAX_SECONDS)
+        import random
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _remaining(self) -> float | None:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        import asyncio
+
+        import httpx
+
+        key = endpoint_key(method, url)
+        stats = self._stats.setdefault(key, EndpointStats())
+        breaker = self._breakers.setdefault(key, CircuitBreaker(self.breaker_threshold, self.breaker_cooldown))
+        stats.requests += 1
+        remaining = self._remaining()
+        if remaining is not None and remaining <= 0:
+            stats.short_circuited += 1
+            raise DeadlineExceeded(f"deadline exceeded: {key}（--deadline の時間を使い切ったので呼びません）")
+        if not breaker.allow():
+            stats.short_circuited += 1
+            raise CircuitOpen(f"circuit open: {key}（連続 {breaker.consecutive_failures} 回失敗。{self.breaker_cooldown:.0f} 秒は呼びません）")
+        probing = breaker.half_open_in_flight  # この呼び出しが half-open の試しの 1 回
+
+        idempotent = method == "GET" or key in PREVIEW_ENDPOINTS
+        hedge = self.hedge_after is not None and key in PREVIEW_ENDPOINTS
+        t0 = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                resp: httpx.Response | None = None
+                remaining = self._remaining()
+                if remaining is not None:
+                    # 1 回の待ち時間を残り時間までに縮める（client の既定のタイムアウトより長くはしない）
+                    default = self.client.timeout.read if isinstance(self.client.timeout, httpx.Timeout) else None
+                    kwargs["timeout"] = max(0.001, remaining if default is None else min(default, remaining))
+                try:
+                    if hedge:
+                        resp = await self._hedged(stats, method, url, **kwargs)
+                    else:
+                        stats.attempts += 1
+                        resp = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    # 接続できなかった = サーバに届いていないので、冪等でなくてもリトライしてよい
+                    retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                    if not retryable or attempt >= self.max_retries or not self._can_wait(wait := self._backoff(attempt, None)):
+                        stats.failures += 1
+                        breaker.record_failure()
+                        raise
+                else:
+                    status = resp.status_code
+                    if status not in RETRYABLE_STATUS:
+                        breaker.record_success()
+                        return resp
+                    retryable = idempotent or status == 429
+                    if not retryable or attempt >= self.max_retries or not self._can_wait(wait := self._backoff(attempt, resp)):
+                        # 呼び出し側が _check_http_error で本文付きのエラーにする
+                        stats.failures += 1
+                        breaker.record_failure()
+                        return resp
+                stats.retries += 1
+                await asyncio.sleep(wait)
+                attempt += 1
+        finally:
+            if probing:
+                breaker.release()  # 成功・失敗を記録せずに終わった（キャンセル・期限切れなど）ときだけ効く
+            stats.latencies.append(round((time.perf_counter() - t0) * 1000, 1))
+
+    def _can_wait(self, seconds: float) -> bool:
+        """seconds 待ってからリトライしても期限（bounded）に間に合うか。"""
+        remaining = self._remaining()
+        return remaining is None or seconds < remaining
+
+    async def _hedged(self, stats: EndpointStats, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """
+        hedge_after 秒で応答が無ければ 2 本目を投げ、先に返った成功（RETRYABLE_STATUS でない応答）を使う。
+        どちらも成功しなければ、返った 429 / 5xx の応答（リトライの判断は request が行う）か、なければ例外。
+        """
+        import asyncio
+
+        stats.attempts += 1
+        tasks = [asyncio.ensure_future(self.client.request(method, url, **kwargs))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.hedge_after)
+            if not done:
+                stats.hedged += 1
+                stats.attempts += 1
+                tasks.append(asyncio.ensure_future(self.client.request(method, url, **kwargs)))
+            pending = set(tasks)
+            retryable: httpx.Response | None = None
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif task.result().status_code not in RETRYABLE_STATUS:
+                        return task.result()
+                    elif retryable is None:
+                        retryable = task.result()  # もう 1 本が成功するかもしれないので待つ
+            if retryable is not None:
+                return retryable
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
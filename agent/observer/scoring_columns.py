@@ -0,0 +1,246 @@
+"""
+列指向のスコアリング（--engine columnar）
+
+analyze_node() は Node ごとに dict を引き、status を if / elif で比べ、スコアの各項を 1 件ずつ求める。
+columnar では 1 チャンク分の Node を列（status コード・温度・実効更新日時）に読み込み、
+temp / stale / stuck と冷却判定を列ごとにまとめて計算する。
+NumPy が入っていれば使い（pip install numpy。任意）、なければ array と内包表記で同じ計算をする。
+
+- 結果は analyze_node() と同じでなければならない（bench_pipeline.py で 1 バイト単位で突き合わせる）。
+- 各項の判定（0 / 加点）と status コードは 1 つの整数（クラス）に詰めて返す。total・breakdown・冷却判定は
+  クラスごとに 1 回だけ求めた表（class_table）から引く（組み合わせは高々 32 × status 数）。
+  Python に戻す値を Node ごとに 2 つ（経過日数・クラス）にするため。
+- 入力は main.ObservedNode（日時はパース済み）。
+- 列に載らない値（数値でない temperature・タイムゾーンのない日時など）の Node はクラス FALLBACK にする。
+  呼び出し側（main.analyze_nodes_columnar）が analyze_node() で解析するので、
+  そうした Node の結果（例外も含む）は行単位と変わらない。
+- 実効更新日時は読み込み時に経過日数（(now - dt).days。行単位と同じ切り捨て）の列にする。
+  エポック秒の float から日数を出すと、日境界ちょうどの Node で 1 日ずれることがあるため。
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+if TYPE_CHECKING:
+    from main import ObservedNode
+
+_MAX_EXACT_INT = 2 ** 53  # これを超える整数の temperature は float 列に載せると丸まる
+
+# クラスのビット（下位 5 ビット）。上位は status コード
+_TEMP, _STALE, _STUCK, _COOL_TEMP, _COOL_DAYS = 1, 2, 4, 8, 16
+_STATUS_SHIFT = 5
+FALLBACK = -1  # 列に載らない Node（analyze_node で解析する）
+
+
+class ScoringRules(NamedTuple):
+    """スコアと冷却判定の閾値（main.py の定数から make_rules で作る）。status はコード 1.. で引く（0 はその他）。"""
+
+    codes: dict[str, int]          # status → コード
+    status_bonus: tuple[int, ...]  # コード → status_bonus
+    excluded: tuple[bool, ...]     # コード → suggested_next 候補から除外するか
+    in_progress_code: int
+    points: tuple[int, int, int]  # temp / stale / stuck の加点
+    temperature_low_threshold: int
+    stale_days: int
+    in_progress_stale_days: int
+    cooling_threshold: int
+    cooling_days: int
+
+
+class ScoreClass(NamedTuple):
+    total: int
+    breakdown: dict[str, int]  # {temp, stale, status_bonus, stuck}。同じクラスの Node で共有する（書き換えない）
+    candidate: bool  # suggested_next 候補か（SUGGESTED_NEXT_EXCLUDED_STATUSES 以外）
+    cool_temp: bool  # 温度で冷却対象
+    cool_days: bool  # 経過日数で冷却対象
+
+
+class NodeColumns(NamedTuple):
+    status: array        # 'b': status コード（0 = その他）
+    temperature: array   # 'd': 生の temperature。None は NaN
+    days: array          # 'q': 経過日数。日付なしは 0
+    has_date: array      # 'b': 実効更新日時があるか
+    effective_ts: list[str]  # 実効更新日時の isoformat()（日付なしは ""。ObservedNode.last_updated）
+    fallback: array      # 'b': 列に載らない Node なら 1
+
+
+class ColumnScores(NamedTuple):
+    days: list[int]     # 経過日数（実効更新日時のない Node では意味なし）
+    classes: list[int]  # class_table の添字。列に載らない Node は FALLBACK
+
+
+def make_rules(
+    status_bonus: dict[str, int],
+    excluded_statuses: tuple[str, ...],
+    *,
+    temperature_low_threshold: int,
+    stale_days: int,
+    in_progress_stale_days: int,
+    points: tuple[int, int, int] = (30, 25, 15),
+    cooling_threshold: int,
+    cooling_days: int,
+) -> ScoringRules:
+    statuses = sorted(set(status_bonus) | set(excluded_statuses) | {"IN_PROGRESS"})
+    codes = {s: i for i, s in enumerate(statuses, start=1)}
+    return ScoringRules(
+        codes,
+        (0, *(status_bonus.get(s, 0) for s in statuses)),
+        (False, *(s in excluded_statuses for s in statuses)),
+        codes["IN_PROGRESS"],
+        points,
+        temperature_low_threshold,
+        stale_days,
+        in_progress_stale_days,
+        cooling_threshold,
+        cooling_days,
+    )
+
+
+def class_table(rules: ScoringRules) -> list[ScoreClass]:
+    """クラス（下位 5 ビット = 各項の判定、上位 = status コード）→ ScoreClass。"""
+    table: list[ScoreClass] = []
+    temp_points, stale_points, stuck_points = rules.points
+    for code in range(len(rules.status_bonus)):
+        bonus = rules.status_bonus[code]
+        for bits in range(1 << _STATUS_SHIFT):
+            temp = temp_points if bits & _TEMP else 0
+            stale = stale_points if bits & _STALE else 0
+            stuck = stuck_points if bits & _STUCK else 0
+            table.append(ScoreClass(
+                temp + stale + bonus + stuck,
+                {"temp": temp, "stale": stale, "status_bonus": bonus, "stuck": stuck},
+                not rules.excluded[code],
+                bool(bits & _COOL_TEMP),
+                bool(bits & _COOL_DAYS),
+            ))
+    return table
+
+
+def load_columns(
+    nodes: list[ObservedNode],
+    now: datetime,
+    rules: ScoringRules,
+) -> NodeColumns:
+    """Node の列を作る。経過日数はここで求める（行単位と同じ (now - dt).days）。"""
+    codes = rules.codes
+    nan = math.nan
+    status: list[int] = []
+    temperature: list[float] = []
+    days: list[int] = []
+    effective_ts: list[str] = []
+    fallback: list[int] = []
+    for node in nodes:
+        try:
+            code = codes.get(node.status or "", 0)
+        except TypeError:  # dict / list などハッシュできない status
+            code = None
+        temp = node.temperature
+        if temp is None:
+            temp = nan
+        elif type(temp) is int or type(temp) is bool:
+            if not -_MAX_EXACT_INT <= temp <= _MAX_EXACT_INT:  # float 列に載せると丸まる
+                code = None
+        elif type(temp) is not float or math.isinf(temp):  # 文字列などは行単位で cooling の比較が TypeError
+            code = None
+        dt = node.effective
+        age = 0
+        ts = ""
+        if dt is not None and code is not None:
+            try:
+                age = (now - dt).days
+            except TypeError:  # タイムゾーンなし
+                code = None
+            else:
+                ts = node.last_updated
+        if code is None:
+            status.append(0)
+            temperature.append(nan)
+            days.append(0)
+            effective_ts.append("")
+            fallback.append(1)
+            continue
+        status.append(code)
+        temperature.append(temp)
+        days.append(age)
+        effective_ts.append(ts)
+        fallback.append(0)
+    return NodeColumns(
+        array("b", status),
+        array("d", temperature),
+        array("q", days),
+        array("b", [ts != "" for ts in effective_ts]),
+        effective_ts,
+        array("b", fallback),
+    )
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def score_columns(
+    cols: NodeColumns,
+    rules: ScoringRules,
+    use_numpy: bool | None = None,
+) -> ColumnScores:
+    """
+    列ごとに各項の判定と経過日数を求め、Node ごとのクラスにまとめる。
+    use_numpy: None なら NumPy があれば使う / False なら使わない / True なら必須（なければ RuntimeError）。
+    """
+    np = _numpy() if use_numpy is not False else None
+    if use_numpy and np is None:
+        raise RuntimeError("numpy is not installed")
+    if np is not None:
+        return _score_numpy(np, cols, rules)
+    return _score_python(cols, rules)
+
+
+def _score_numpy(np: Any, cols: NodeColumns, r: ScoringRules) -> ColumnScores:
+    status = np.frombuffer(cols.status, dtype=np.int8).astype(np.int64)
+    raw_temp = np.frombuffer(cols.temperature, dtype=np.float64)
+    has_date = np.frombuffer(cols.has_date, dtype=np.int8).astype(bool)
+    days = np.frombuffer(cols.days, dtype=np.int64)
+
+    # normalize_temperature: None（NaN）→ 50、数値は int() と同じ 0 方向への切り捨て
+    no_temp = np.isnan(raw_temp)
+    temp_val = np.where(no_temp, 50.0, np.trunc(np.where(no_temp, 0.0, raw_temp)))
+    temp = temp_val <= r.temperature_low_threshold
+    stale = ~has_date | (days >= r.stale_days)
+    stuck = (status == r.in_progress_code) & (~has_date | (days >= r.in_progress_stale_days))
+    with np.errstate(invalid="ignore"):
+        cool_temp = ~no_temp & (raw_temp < r.cooling_threshold)
+    cool_days = has_date & (days >= r.cooling_days)
+
+    classes = (
+        temp * _TEMP + stale * _STALE + stuck * _STUCK + cool_temp * _COOL_TEMP + cool_days * _COOL_DAYS
+        + (status << _STATUS_SHIFT)
+    )
+    classes[np.frombuffer(cols.fallback, dtype=np.int8).astype(bool)] = FALLBACK
+    return ColumnScores(cols.days.tolist(), classes.tolist())
+
+
+def _score_python(cols: NodeColumns, r: ScoringRules) -> ColumnScores:
+    days = cols.days.tolist()
+    low, stale_days, ip, ip_days = r.temperature_low_threshold, r.stale_days, r.in_progress_code, r.in_progress_stale_days
+    threshold, cooling_days = r.cooling_threshold, r.cooling_days
+    classes = [
+        FALLBACK if fb else (
+            # t != t は NaN（None）。normalize_temperature と同じく 50 として扱う
+            ((50 if t != t else int(t)) <= low) * _TEMP
+            + (not ok or d >= stale_days) * _STALE
+            + (c == ip and (not ok or d >= ip_days)) * _STUCK
+            + (t == t and t < threshold) * _COOL_TEMP
+            + (ok and d >= cooling_days) * _COOL_DAYS
+            + (c << _STATUS_SHIFT)
+        )
+        for c, t, ok, d, fb in zip(cols.status, cols.temperature, cols.has_date, days, cols.fallback)
+    ]
+    return ColumnScores(days, classes)
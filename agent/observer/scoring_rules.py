@@ -0,0 +1,225 @@
+"""
+suggested_next のスコアリングルール（--rules）
+
+28 §4 の加点（status ごとの加点・各項の点数・閾値）を版（version）ごとに JSON に書き、実行時に読む。
+ルールを変えるのにコードのデプロイは要らず、新しいルールは shadow として本番のデータで並べて評価できる。
+
+  {
+    "active": "3-4.0",                   # suggested_next を決める版
+    "shadow": ["3-6.0"],                 # 並べて採点するだけの版（debug.shadow に載る。省略可）
+    "versions": {
+      "3-4.0": {
+        "tree_version": "3-5.0",         # 親子の項（28 §4.1）を足したときの rule_version（省略時は "<版>+tree"）
+        "status_bonus": {"WAITING_EXTERNAL": 20, ...},
+        "excluded_statuses": ["DONE", "COOLING", "CANCELLED"],
+        "points": {"temp": 30, "stale": 25, "stuck": 15},
+        "temperature_low_threshold": 40, "stale_days": 7, "in_progress_stale_days": 3
+      },
+      "3-6.0": {"extends": "3-4.0", "stale_days": 5, "status_bonus": {"READY": 14}}
+    }
+  }
+
+- extends: 元の版を引き継ぎ、書いた項目だけ上書きする（status_bonus / points はキーごと）。
+- active の版は main.use_rules が main の定数に入れる（analyze_node / columnar / apply_tree はそのまま）。
+- shadow の版は compile_rules で「status → 版ごとの加点」「版ごとの閾値」の表にまとめ、
+  score_versions が全版の合計を 1 回で求める（build_report の 1 パスの中で使う）。
+  合計は status と、温度・経過日数が各版の閾値のどちら側にあるかだけで決まるので、
+  class_key で (温度, 経過日数) を閾値の範囲に丸めれば、同じキーの Node は同じ合計になる（キーは高々数百通り）。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, NamedTuple
+
+POINT_KEYS = ("temp", "stale", "stuck")
+_THRESHOLD_KEYS = ("temperature_low_threshold", "stale_days", "in_progress_stale_days")
+_KNOWN_KEYS = {"extends", "tree_version", "status_bonus", "excluded_statuses", "points", *_THRESHOLD_KEYS}
+
+
+class RuleConfigError(ValueError):
+    """--rules のファイルが読めない・版の指定が正しくない。"""
+
+
+class RuleSet(NamedTuple):
+    """1 つの版のルール（28 §4）。"""
+
+    version: str
+    tree_version: str
+    status_bonus: dict[str, int]
+    excluded_statuses: tuple[str, ...]
+    points: dict[str, int]  # {temp, stale, stuck}
+    temperature_low_threshold: int
+    stale_days: int
+    in_progress_stale_days: int
+
+
+class RuleConfig(NamedTuple):
+    active: RuleSet
+    shadows: tuple[RuleSet, ...]
+
+
+class RuleTable(NamedTuple):
+    """
+    複数の版を 1 回で採点する表（compile_rules）。各タプルは版の順。
+    bonus / candidate は status ごとの引き表で、表にない status は other_bonus / other_candidate を使う。
+    """
+
+    versions: tuple[str, ...]
+    bonus: dict[str, tuple[int, ...]]
+    other_bonus: tuple[int, ...]
+    candidate: dict[str, tuple[bool, ...]]
+    other_candidate: tuple[bool, ...]
+    temp_points: tuple[int, ...]
+    stale_points: tuple[int, ...]
+    stuck_points: tuple[int, ...]
+    temperature_low_threshold: tuple[int, ...]
+    stale_days: tuple[int, ...]
+    in_progress_stale_days: tuple[int, ...]
+    temperature_bounds: tuple[int, int]  # class_key: 温度をこの範囲に丸める
+    days_bounds: tuple[int, int]         # class_key: 経過日数をこの範囲に丸める
+
+
+def _int(value: Any, where: str) -> int:
+    if type(value) is not int:
+        raise RuleConfigError(f"{where} must be an integer, got {value!r}")
+    return value
+
+
+def _resolve(versions: dict[str, Any], name: str, seen: tuple[str, ...] = ()) -> dict[str, Any]:
+    """extends を辿って 1 つの版の設定（dict）にする。"""
+    if name in seen:
+        raise RuleConfigError(f"extends cycle: {' -> '.join((*seen, name))}")
+    raw = versions.get(name)
+    if not isinstance(raw, dict):
+        raise RuleConfigError(f"unknown rule version: {name!r}")
+    unknown = set(raw) - _KNOWN_KEYS
+    if unknown:
+        raise RuleConfigError(f"version {name!r}: unknown keys {sorted(unknown)}")
+    base = _resolve(versions, raw["extends"], (*seen, name)) if "extends" in raw else {}
+    merged = {**base, **{k: v for k, v in raw.items() if k not in ("extends", "tree_version")}}
+    for key in ("status_bonus", "points"):
+        if key in raw:
+            if not isinstance(raw[key], dict):
+                raise RuleConfigError(f"version {name!r}: {key} must be an object")
+            merged[key] = {**base.get(key, {}), **raw[key]}
+    merged["tree_version"] = raw.get("tree_version")
+    return merged
+
+
+def _build(versions: dict[str, Any], name: str) -> RuleSet:
+    raw = _resolve(versions, name)
+    where = f"version {name!r}"
+    missing = [k for k in ("status_bonus", "excluded_statuses", "points", *_THRESHOLD_KEYS) if k not in raw]
+    if missing:
+        raise RuleConfigError(f"{where}: missing {', '.join(missing)}")
+    excluded = raw["excluded_statuses"]
+    if not isinstance(excluded, list) or not all(isinstance(s, str) for s in excluded):
+        raise RuleConfigError(f"{where}: excluded_statuses must be a list of strings")
+    points = raw["points"]
+    if set(points) != set(POINT_KEYS):
+        raise RuleConfigError(f"{where}: points must have exactly {', '.join(POINT_KEYS)}")
+    return RuleSet(
+        name,
+        raw["tree_version"] or f"{name}+tree",
+        {status: _int(v, f"{where}: status_bonus.{status}") for status, v in raw["status_bonus"].items()},
+        tuple(excluded),
+        {key: _int(points[key], f"{where}: points.{key}") for key in POINT_KEYS},
+        *(_int(raw[key], f"{where}: {key}") for key in _THRESHOLD_KEYS),
+    )
+
+
+def parse_rules(data: Any, source: str = "rules") -> RuleConfig:
+    """JSON を読んだ値から RuleConfig を作る。正しくなければ RuleConfigError。"""
+    if not isinstance(data, dict) or not isinstance(data.get("versions"), dict):
+        raise RuleConfigError(f"{source}: expected {{\"active\": ..., \"versions\": {{...}}}}")
+    versions = data["versions"]
+    active = data.get("active")
+    if not isinstance(active, str):
+        raise RuleConfigError(f"{source}: active must be a version name")
+    shadow = data.get("shadow") or []
+    if not isinstance(shadow, list) or not all(isinstance(v, str) for v in shadow):
+        raise RuleConfigError(f"{source}: shadow must be a list of version names")
+    try:
+        return RuleConfig(
+            _build(versions, active),
+            tuple(_build(versions, name) for name in dict.fromkeys(shadow) if name != active),
+        )
+    except RuleConfigError as e:
+        raise RuleConfigError(f"{source}: {e}") from None
+
+
+def load_rules(path: str, shadow: list[str] | None = None) -> RuleConfig:
+    """
+    --rules のファイルを読む。メッセージは ConfigError と同じく "Error: " で始める（cli が exit 1 で出す）。
+    shadow: 指定時はファイルの shadow の代わりにこの版を並べる（snapshot.py sweep --versions）。
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RuleConfigError(f"Error: cannot read rules file {path}: {e}") from None
+    try:
+        return parse_rules(data if shadow is None or not isinstance(data, dict) else {**data, "shadow": shadow}, path)
+    except RuleConfigError as e:
+        raise RuleConfigError(f"Error: {e}") from None
+
+
+def compile_rules(rules: Iterable[RuleSet]) -> RuleTable:
+    """版の並びを 1 つの表にする（status → 版ごとの加点・候補か、版ごとの点数と閾値）。"""
+    rules = tuple(rules)
+    statuses = sorted({s for r in rules for s in (*r.status_bonus, *r.excluded_statuses)})
+    lows = [r.temperature_low_threshold for r in rules]
+    days = [d for r in rules for d in (r.stale_days, r.in_progress_stale_days)]
+    return RuleTable(
+        tuple(r.version for r in rules),
+        {s: tuple(r.status_bonus.get(s, 0) for r in rules) for s in statuses},
+        (0,) * len(rules),
+        {s: tuple(s not in r.excluded_statuses for r in rules) for s in statuses},
+        (True,) * len(rules),
+        tuple(r.points["temp"] for r in rules),
+        tuple(r.points["stale"] for r in rules),
+        tuple(r.points["stuck"] for r in rules),
+        tuple(r.temperature_low_threshold for r in rules),
+        tuple(r.stale_days for r in rules),
+        tuple(r.in_progress_stale_days for r in rules),
+        (min(lows), max(lows) + 1),
+        (min(days) - 1, max(days)),
+    )
+
+
+def class_key(table: RuleTable, temperature: int, days: int | None) -> tuple[int, int | None]:
+    """
+    (温度, 経過日数) を、どの版の閾値をまたがない範囲で丸めた値。score_versions の結果は丸める前と同じ。
+    最も低い閾値以下の温度はすべて同じ側・最も高い閾値を超える温度もすべて同じ側にあるため（経過日数も同じ）。
+    """
+    low, high = table.temperature_bounds
+    temperature = low if temperature < low else high if temperature > high else temperature
+    if days is not None:
+        first, last = table.days_bounds
+        days = first if days < first else last if days > last else days
+    return temperature, days
+
+
+def score_versions(table: RuleTable, status: str, temperature: int, days: int | None) -> list[int | None]:
+    """
+    1 Node の版ごとの合計（28 §4。候補でない版は None）。
+    temperature は normalize_temperature 済み。days は経過日数（日付なしは None = stale / stuck 扱い）。
+    """
+    bonus = table.bonus.get(status, table.other_bonus)
+    candidate = table.candidate.get(status, table.other_candidate)
+    in_progress = status == "IN_PROGRESS"
+    out: list[int | None] = []
+    for i, ok in enumerate(candidate):
+        if not ok:
+            out.append(None)
+            continue
+        total = bonus[i]
+        if temperature <= table.temperature_low_threshold[i]:
+            total += table.temp_points[i]
+        if days is None or days >= table.stale_days[i]:
+            total += table.stale_points[i]
+        if in_progress and (days is None or days >= table.in_progress_stale_days[i]):
+            total += table.stuck_points[i]
+        out.append(total)
+    return out
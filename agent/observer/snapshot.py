@@ -0,0 +1,363 @@
+"""
+観測のスナップショット（--record / --replay）と、しきい値のスイープ
+
+--record DIR を付けた観測は、dashboard の Node（Observer が読む列だけ）・親子リンク・Preview の結果を、
+その観測の now と一緒に 1 ファイルに残す（<DIR>/snapshot-<now>.json.gz。now はマイクロ秒まで）。
+--replay FILE はそのファイルから、ネットワークなしでレポートを組み立て直す（main.replay_snapshot）。
+now は記録したときの値なので、経過日数・intent・スコアは記録したときと同じになる。
+
+形式（gzip した 1 行の JSON）:
+  {"format": 1, "now": "<isoformat>", "meta": {"target", "estimator", "tree", "node_count"},
+   "columns": ["id", "title", "status", "temperature", "updated_at", "created_at"],
+   "nodes": [[...], ...],                # dashboard の受信順（trays への並べ替えは組み立て直すときに行う）
+   "links": [[parent, child], ...],      # node_children と parent_id（--no-tree の観測でも残す）。nodes の位置、
+                                         # 机の上にない子は -1（node_tree は数えるだけ）。親が机の上にないリンクは残さない
+   "previews": [[intent, suggested] | null, ...]}  # nodes と同じ並び。Preview が取れなかった Node は null
+node_id をリンクと Preview で繰り返さないので、gzip 後で 1 Node あたり 30 バイトほど（合成データの 20k Node で約 0.6MB）。
+
+スイープ（python3 agent/observer/snapshot.py sweep SNAPSHOT...）:
+  冷却のしきい値（COOLING_THRESHOLD / COOLING_DAYS）・28 §4 のしきい値・--rules の版の組み合わせ（グリッド）ごとに
+  スナップショットからレポートを組み立て直し、冷却アラートの件数と、suggested_next が基準（今の設定）から
+  変わったスナップショットの数を表にする。
+  スナップショットごとにプロセスプールへ渡し、1 つのプロセスがそのスナップショットのグリッド全体を受け持つ
+  （ファイルを読んで Node をパースするのは 1 回だけ）。Preview は記録した結果を使うので status_proposals は変わらない。
+
+実行:
+  python3 agent/observer/main.py --record .observer-snapshots
+  python3 agent/observer/main.py --replay .observer-snapshots/snapshot-20260301T000000000000Z.json.gz --top-k 5
+  python3 agent/observer/snapshot.py sweep .observer-snapshots --cooling-threshold 30,40 --cooling-days 5,7,14
+  python3 agent/observer/snapshot.py show .observer-snapshots/snapshot-20260301T000000000000Z.json.gz
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import product, repeat
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, NamedTuple
+
+if TYPE_CHECKING:
+    from scoring_rules import RuleSet
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_COLUMNS = ("id", "title", "status", "temperature", "updated_at", "created_at")
+SNAPSHOT_GZIP_LEVEL = 6  # 9 にしても数 % しか縮まない
+SNAPSHOT_SUFFIX = ".json.gz"
+
+
+class Snapshot(NamedTuple):
+    now: datetime
+    nodes: list[list[Any]]                            # SNAPSHOT_COLUMNS の順の値
+    links: list[tuple[str, str]]                      # (parent_id, child_id)
+    previews: dict[str, tuple[str, dict[str, Any] | None]]  # node_id → (intent, suggested)
+    meta: dict[str, Any]
+
+
+class SnapshotRecorder:
+    """--record: 1 回の観測の間に main._observe が Node・リンク・Preview をためる。"""
+
+    def __init__(self) -> None:
+        self.now: datetime | None = None
+        self.nodes: list[list[Any]] = []
+        self.links: list[tuple[str, str]] = []
+        self.previews: dict[str, tuple[str, dict[str, Any] | None]] = {}
+
+    def snapshot(self, meta: dict[str, Any]) -> Snapshot:
+        if self.now is None:
+            raise RuntimeError("snapshot: nothing recorded")
+        return Snapshot(self.now, self.nodes, self.links, self.previews, {**meta, "node_count": len(self.nodes)})
+
+
+def write_snapshot(directory: str, snapshot: Snapshot) -> str:
+    """<directory>/snapshot-<now>.json.gz に書く（同じ now のファイルがあれば上書き）。書いたパスを返す。"""
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    target = path / f"snapshot-{snapshot.now:%Y%m%dT%H%M%S%f}Z{SNAPSHOT_SUFFIX}"
+    pos = {row[0]: i for i, row in enumerate(snapshot.nodes)}
+    body = {
+        "format": SNAPSHOT_FORMAT,
+        "now": snapshot.now.isoformat(),
+        "meta": snapshot.meta,
+        "columns": SNAPSHOT_COLUMNS,
+        "nodes": snapshot.nodes,
+        "links": [
+            [pos[parent_id], pos.get(child_id, -1)]
+            for parent_id, child_id in snapshot.links
+            if parent_id in pos and parent_id != child_id
+        ],
+        "previews": [snapshot.previews.get(row[0]) for row in snapshot.nodes],
+    }
+    raw = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # 途中で落ちても壊れたファイルを残さない（スイープが読むので）
+    tmp = target.with_name(target.name + ".tmp")
+    tmp.write_bytes(gzip.compress(raw, SNAPSHOT_GZIP_LEVEL))
+    os.replace(tmp, target)
+    return str(target)
+
+
+def read_snapshot(path: str) -> Snapshot:
+    """write_snapshot のファイルを読む。形式が違えば ValueError。"""
+    with open(path, "rb") as f:
+        body = json.loads(gzip.decompress(f.read()))
+    if not isinstance(body, dict) or body.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path}: not an observer snapshot (format {SNAPSHOT_FORMAT})")
+    if tuple(body.get("columns") or ()) != SNAPSHOT_COLUMNS:
+        raise ValueError(f"{path}: unexpected columns {body.get('columns')!r}")
+    nodes = body["nodes"]
+    node_ids = [row[0] for row in nodes]
+    return Snapshot(
+        datetime.fromisoformat(body["now"]),
+        nodes,
+        [(node_ids[p], node_ids[c] if c >= 0 else "") for p, c in body["links"]],  # "" = 机の上にない子
+        {node_id: (p[0], p[1]) for node_id, p in zip(node_ids, body["previews"]) if p is not None},
+        body.get("meta") or {},
+    )
+
+
+def snapshot_paths(paths: Iterable[str]) -> list[str]:
+    """引数のファイルと、ディレクトリの中の snapshot-*.json.gz（名前順 = now の順）。"""
+    out: list[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            out.extend(str(f) for f in sorted(Path(p).glob(f"snapshot-*{SNAPSHOT_SUFFIX}")))
+        else:
+            out.append(p)
+    return out
+
+
+# ─── スイープ ────────────────────────────────────────────────
+
+class SweepPoint(NamedTuple):
+    """グリッドの 1 点。rules は 28 §4 の値（main.apply_rule_set）。"""
+
+    rules: RuleSet
+    cooling_threshold: int
+    cooling_days: int
+
+
+class PointResult(NamedTuple):
+    """1 スナップショット × 1 点の結果（基準との比較つき）。"""
+
+    alerts: int              # cooling_alerts の件数
+    alerts_added: int        # 基準になく、この点で出た冷却アラート
+    alerts_removed: int      # 基準にあって、この点で消えた冷却アラート
+    suggested_changed: bool  # suggested_next の Node が基準と違う
+
+
+def sweep_snapshot(
+    path: str,
+    baseline: SweepPoint,
+    points: list[SweepPoint],
+    engine: str,
+    tree: bool,
+) -> list[PointResult]:
+    """
+    1 スナップショット分（プロセスプールで実行）。基準と各点でレポートを組み立て直し、points と同じ順の結果を返す。
+    main の設定（module 変数）を点ごとに書き換えるので、呼び出し元のプロセスでは使わない。
+    """
+    import main as observer
+
+    snapshot = read_snapshot(path)
+    nodes = observer.snapshot_nodes(snapshot)
+
+    def evaluate(point: SweepPoint) -> tuple[set[str], str | None]:
+        observer.apply_rule_set(point.rules)
+        observer.use_cooling(point.cooling_threshold, point.cooling_days)
+        report = observer.replay_snapshot(snapshot, engine=engine, tree=tree, nodes=nodes)
+        suggested = report.get("suggested_next") or {}
+        return {a["node_id"] for a in report["cooling_alerts"]}, suggested.get("node_id")
+
+    base_alerts, base_next = evaluate(baseline)
+    out: list[PointResult] = []
+    for point in points:
+        alerts, suggested = evaluate(point)
+        out.append(PointResult(len(alerts), len(alerts - base_alerts), len(base_alerts - alerts), suggested != base_next))
+    return out
+
+
+def _int_list(value: str) -> list[int]:
+    try:
+        return [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated integers: {value!r}") from None
+
+
+def sweep_points(
+    versions: list[RuleSet],
+    cooling_threshold: list[int],
+    cooling_days: list[int],
+    stale_days: list[int] | None = None,
+    temperature_low: list[int] | None = None,
+) -> list[SweepPoint]:
+    """グリッドの全点（版 × 冷却の温度 × 冷却の日数 × stale_days × temperature_low_threshold）。None の軸は版の値のまま。"""
+    points: list[SweepPoint] = []
+    for rules, threshold, days in product(versions, cooling_threshold, cooling_days):
+        for stale, low in product(stale_days or [rules.stale_days], temperature_low or [rules.temperature_low_threshold]):
+            points.append(SweepPoint(rules._replace(stale_days=stale, temperature_low_threshold=low), threshold, days))
+    return points
+
+
+def sweep(
+    paths: list[str],
+    baseline: SweepPoint,
+    points: list[SweepPoint],
+    engine: str = "row",
+    tree: bool = True,
+    workers: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    全スナップショット × 全点を評価し、点ごとの集計（points の順）を返す。
+    workers: プロセス数（None なら CPU 数。1 ならプロセスプールを使わずこのプロセスで順に評価する）。
+    """
+    if workers == 1:
+        per_snapshot = [sweep_snapshot(p, baseline, points, engine, tree) for p in paths]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            per_snapshot = list(pool.map(sweep_snapshot, paths, repeat(baseline), repeat(points), repeat(engine), repeat(tree)))
+    rows: list[dict[str, Any]] = []
+    for i, point in enumerate(points):
+        results = [r[i] for r in per_snapshot]
+        alerts = sum(r.alerts for r in results)
+        rows.append({
+            "rule_version": point.rules.version,
+            "cooling_threshold": point.cooling_threshold,
+            "cooling_days": point.cooling_days,
+            "stale_days": point.rules.stale_days,
+            "temperature_low_threshold": point.rules.temperature_low_threshold,
+            "baseline": point == baseline,
+            "snapshots": len(results),
+            "alerts": alerts,
+            "alerts_per_snapshot": round(alerts / len(results), 1) if results else 0.0,
+            "alerts_added": sum(r.alerts_added for r in results),
+            "alerts_removed": sum(r.alerts_removed for r in results),
+            "suggested_changed": sum(1 for r in results if r.suggested_changed),
+        })
+    return rows
+
+
+_TABLE_COLUMNS = (
+    ("rule_version", "rules"),
+    ("cooling_threshold", "cool_temp"),
+    ("cooling_days", "cool_days"),
+    ("stale_days", "stale"),
+    ("temperature_low_threshold", "low_temp"),
+    ("alerts", "alerts"),
+    ("alerts_per_snapshot", "per_snap"),
+    ("alerts_added", "+alerts"),
+    ("alerts_removed", "-alerts"),
+    ("suggested_changed", "next_changed"),
+)
+
+
+def render_table(rows: list[dict[str, Any]]) -> str:
+    """sweep の結果を固定幅の表にする（基準の点には * を付ける）。"""
+    header = [title for _, title in _TABLE_COLUMNS]
+    body = [
+        [("*" if row["baseline"] and key == "rule_version" else "") + str(row[key]) for key, _ in _TABLE_COLUMNS]
+        for row in rows
+    ]
+    widths = [max(len(cell) for cell in column) for column in zip(header, *body)]
+    return "\n".join(
+        "  ".join(cell.rjust(width) if i else cell.ljust(width) for i, (cell, width) in enumerate(zip(line, widths)))
+        for line in (header, *body)
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Observer のスナップショット（--record）を調べる・しきい値をスイープする")
+    sub = parser.add_subparsers(dest="command", required=True)
+    show = sub.add_parser("show", help="スナップショットの now・件数・サイズ")
+    show.add_argument("snapshots", nargs="+", metavar="SNAPSHOT", help="ファイルか、snapshot-*.json.gz のあるディレクトリ")
+    run = sub.add_parser("sweep", help="しきい値とルールの組み合わせごとの冷却アラート数と suggested_next の変化")
+    run.add_argument("snapshots", nargs="+", metavar="SNAPSHOT", help="ファイルか、snapshot-*.json.gz のあるディレクトリ")
+    run.add_argument("--cooling-threshold", type=_int_list, metavar="N,...", help="COOLING_THRESHOLD の候補（既定: 今の値）")
+    run.add_argument("--cooling-days", type=_int_list, metavar="N,...", help="COOLING_DAYS の候補（既定: 今の値）")
+    run.add_argument("--stale-days", type=_int_list, metavar="N,...", help="28 §4 の stale の日数の候補（既定: 版の値）")
+    run.add_argument("--temperature-low", type=_int_list, metavar="N,...", help="28 §4 の temp の温度の候補（既定: 版の値）")
+    run.add_argument(
+        "--rules",
+        default=os.getenv("OBSERVER_RULES") or None,
+        metavar="PATH",
+        help="スコアリングルールの JSON（main.py --rules と同じ。基準は active の版。既定: OBSERVER_RULES）",
+    )
+    run.add_argument("--versions", default=None, metavar="V,...", help="--rules のうち比べる版（既定: active と shadow）")
+    run.add_argument("--engine", choices=("row", "columnar"), default="row", help="Step 1 の解析方法（結果は同じ）")
+    run.add_argument("--tree", action=argparse.BooleanOptionalAction, default=True, help="親子の項を使う（既定: 使う）")
+    run.add_argument("--workers", type=int, default=0, metavar="N", help="プロセス数（0 なら CPU 数。1 ならプールを使わない）")
+    run.add_argument("--json", action="store_true", help="表ではなく JSON で出す")
+    args = parser.parse_args(argv)
+    if args.command == "sweep" and args.workers < 0:
+        parser.error("--workers must be >= 0")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    paths = snapshot_paths(args.snapshots)
+    if not paths:
+        print("no snapshots", file=sys.stderr)
+        return 1
+    if args.command == "show":
+        for p in paths:
+            s = read_snapshot(p)
+            print(json.dumps({
+                "path": p,
+                "now": s.now.isoformat(),
+                "nodes": len(s.nodes),
+                "links": len(s.links),
+                "previews": len(s.previews),
+                "size_kb": round(os.path.getsize(p) / 1024, 1),
+                "meta": s.meta,
+            }, ensure_ascii=False))
+        return 0
+
+    # 基準は今の設定（.env の COOLING_* と、--rules の active の版か組み込みのルール）
+    import main as observer
+    from scoring_rules import RuleConfigError, load_rules
+
+    observer.configure(check_base_url=False)
+    try:
+        if args.rules:
+            names = [v.strip() for v in args.versions.split(",") if v.strip()] if args.versions else None
+            config = load_rules(args.rules, shadow=names)
+            known = {r.version: r for r in (config.active, *config.shadows)}
+            versions = [known[name] for name in names] if names else list(known.values())
+            base_rules = config.active
+        else:
+            if args.versions:
+                raise RuleConfigError("Error: --versions requires --rules")
+            base_rules = observer.current_rules()
+            versions = [base_rules]
+    except RuleConfigError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    baseline = SweepPoint(base_rules, observer.COOLING_THRESHOLD, observer.COOLING_DAYS)
+    points = sweep_points(
+        versions,
+        args.cooling_threshold or [baseline.cooling_threshold],
+        args.cooling_days or [baseline.cooling_days],
+        args.stale_days,
+        args.temperature_low,
+    )
+    t0 = time.perf_counter()
+    rows = sweep(paths, baseline, points, args.engine, args.tree, args.workers or None)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps(rows, ensure_ascii=False, indent=2) if args.json else render_table(rows))
+    print(
+        f"sweep: {len(paths)} snapshot(s) x {len(points)} point(s) in {elapsed:.1f}s",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
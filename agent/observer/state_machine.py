@@ -0,0 +1,246 @@
+"""
+State Machine（Python 版）— Observer のローカル推定用
+
+src/lib/stateMachine.ts の INTENT_PATTERNS / TRANSITIONS / STATUS_LABELS と
+estimateStatusFromIntent() を移植したもの。SSOT は TS 側であり、本モジュールは
+Observer が estimate-status Preview を HTTP なしで再現するためだけに使う。
+
+Based on:
+  05_State_Machine.md        — 全15状態の定義・遷移ルール
+  17_Skill_EstimateStatus.md — Preview の応答形
+  src/lib/stateMachine.ts    — 移植元（変更時はこちらも合わせる）
+
+パリティ確認:
+  src/lib/stateMachine.fixtures.json を TS（stateMachine.test.ts）と本モジュールの両方で検証する。
+    python3 agent/observer/state_machine.py            # fixture と照合（不一致なら exit 1）
+  CI（.github/workflows/observer_tests.yml）はこれと tests/test_state_machine.py を実行する。
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any
+
+# ─── 全15状態 (05_State_Machine.md §2) ──────────────────────
+
+ALL_STATUSES: tuple[str, ...] = (
+    # A. 入口（発生〜整理）
+    "CAPTURED",
+    "CLARIFYING",
+    "READY",
+    # B. 進行（実作業）
+    "IN_PROGRESS",
+    "DELEGATED",
+    "WAITING_EXTERNAL",
+    "SCHEDULED",
+    # C. 停滞（止まっている理由がある）
+    "BLOCKED",
+    "NEEDS_DECISION",
+    "NEEDS_REVIEW",
+    # D. 冷却・再燃
+    "COOLING",
+    "DORMANT",
+    "REACTIVATED",
+    # E. 終了
+    "DONE",
+    "CANCELLED",
+)
+
+# ─── 日本語ラベル ───────────────────────────────────────────
+
+STATUS_LABELS: dict[str, str] = {
+    "CAPTURED": "捕捉",
+    "CLARIFYING": "言語化中",
+    "READY": "着手可能",
+    "IN_PROGRESS": "実施中",
+    "DELEGATED": "委任中",
+    "WAITING_EXTERNAL": "外部待ち",
+    "SCHEDULED": "予約済み",
+    "BLOCKED": "障害あり",
+    "NEEDS_DECISION": "意思決定待ち",
+    "NEEDS_REVIEW": "見直し待ち",
+    "COOLING": "冷却中",
+    "DORMANT": "休眠",
+    "REACTIVATED": "再浮上",
+    "DONE": "完了",
+    "CANCELLED": "中止",
+}
+
+# ─── 遷移ルール (05_State_Machine.md §3) ────────────────────
+
+TRANSITIONS: dict[str, tuple[str, ...]] = {
+    # A. 入口
+    "CAPTURED": (
+        "CLARIFYING", "READY",
+        "DELEGATED", "WAITING_EXTERNAL", "SCHEDULED",
+        "COOLING", "CANCELLED",
+    ),
+    "CLARIFYING": (
+        "READY", "CAPTURED", "NEEDS_DECISION",
+        "DELEGATED", "WAITING_EXTERNAL", "SCHEDULED",
+        "COOLING", "CANCELLED",
+    ),
+    "READY": (
+        "IN_PROGRESS", "SCHEDULED",
+        "DELEGATED", "WAITING_EXTERNAL", "BLOCKED",
+        "COOLING", "CANCELLED",
+    ),
+    # B. 進行
+    "IN_PROGRESS": (
+        "DONE", "NEEDS_REVIEW", "NEEDS_DECISION", "BLOCKED",
+        "DELEGATED", "WAITING_EXTERNAL",
+        "COOLING", "CANCELLED",
+    ),
+    "DELEGATED": (
+        "READY", "IN_PROGRESS", "DONE",
+        "WAITING_EXTERNAL",
+        "COOLING", "CANCELLED",
+    ),
+    "WAITING_EXTERNAL": (
+        "READY", "IN_PROGRESS", "BLOCKED",
+        "COOLING", "CANCELLED",
+    ),
+    "SCHEDULED": (
+        "READY", "IN_PROGRESS",
+        "COOLING", "CANCELLED",
+    ),
+    # C. 停滞
+    "BLOCKED": (
+        "READY", "IN_PROGRESS", "NEEDS_DECISION",
+        "COOLING", "CANCELLED",
+    ),
+    "NEEDS_DECISION": (
+        "READY", "IN_PROGRESS", "BLOCKED", "DELEGATED",
+        "COOLING", "CANCELLED",
+    ),
+    "NEEDS_REVIEW": (
+        "DONE", "IN_PROGRESS", "READY",
+        "COOLING", "CANCELLED",
+    ),
+    # D. 冷却・再燃
+    "COOLING": ("DORMANT", "REACTIVATED", "CANCELLED"),
+    "DORMANT": ("REACTIVATED", "CANCELLED"),
+    "REACTIVATED": ("READY", "IN_PROGRESS", "CLARIFYING", "COOLING", "CANCELLED"),
+    # E. 終了（再浮上のみ許可）
+    "DONE": ("REACTIVATED",),
+    "CANCELLED": ("REACTIVATED",),
+}
+
+
+def is_valid_status(s: Any) -> bool:
+    return isinstance(s, str) and s in STATUS_LABELS
+
+
+def get_valid_transitions(from_status: str) -> tuple[str, ...]:
+    base = TRANSITIONS.get(from_status, ())
+    # Phase12-A: 非終了状態では「完了」を常に選択可能に
+    if from_status not in ("DONE", "CANCELLED") and "DONE" not in base:
+        return base + ("DONE",)
+    return base
+
+
+# ─── intent → status 候補の推定 ─────────────────────────────
+# TS の /.../i と同じ並び・同じ語彙。先にマッチしたものが優先。
+
+INTENT_PATTERNS: tuple[tuple[re.Pattern[str], tuple[str, ...]], ...] = (
+    # 完了系 (DONE)
+    (re.compile(r"完了|終わった|done|できた|完成|片付い", re.I), ("DONE",)),
+    # 外部待ち系 (WAITING_EXTERNAL)
+    (re.compile(r"待ち|待って|返信|返事|承認|連絡|回答", re.I), ("WAITING_EXTERNAL",)),
+    # ブロック系 (BLOCKED)
+    (re.compile(r"できない|足りない|障害|止まっ|詰まっ|進めない", re.I), ("BLOCKED",)),
+    # 判断系 (NEEDS_DECISION)
+    (re.compile(r"判断|決め|どうする|迷っ|選択|決断", re.I), ("NEEDS_DECISION",)),
+    # レビュー系 (NEEDS_REVIEW)
+    (re.compile(r"確認|レビュー|見直し|チェック|精査", re.I), ("NEEDS_REVIEW",)),
+    # 委任系 (DELEGATED)
+    (re.compile(r"依頼|任せ|お願い|頼ん|委任|delegate", re.I), ("DELEGATED",)),
+    # 着手・進行系 (IN_PROGRESS)
+    (re.compile(r"始め|やる|着手|開始|進め|取り掛か|やってる", re.I), ("IN_PROGRESS",)),
+    # 準備完了系 (READY)
+    (re.compile(r"準備|ready|いつでも|動ける|あとはやるだけ", re.I), ("READY",)),
+    # 整理・言語化系 (CLARIFYING)
+    (re.compile(r"整理|言語化|まとめ|考え中|検討|何をする", re.I), ("CLARIFYING",)),
+    # 予約系 (SCHEDULED)
+    (re.compile(r"予定|スケジュール|会議で|日程", re.I), ("SCHEDULED",)),
+    # 中止系 (CANCELLED)
+    (re.compile(r"やめ|不要|中止|cancel|やらない|取り下げ", re.I), ("CANCELLED",)),
+    # 再浮上系 (REACTIVATED)
+    (re.compile(r"再開|復活|もう一度|戻す|reactivate", re.I), ("REACTIVATED",)),
+)
+
+
+def estimate_status_from_intent(current_status: str, intent: str) -> tuple[str | None, str]:
+    """
+    estimateStatusFromIntent() の移植。
+    戻り値: (suggested, reason)。推定不能なら suggested は None。
+    """
+    valid_next = get_valid_transitions(current_status)
+    for pattern, statuses in INTENT_PATTERNS:
+        if pattern.search(intent):
+            reachable = [s for s in statuses if s in valid_next]
+            if reachable:
+                return (
+                    reachable[0],
+                    f"「{intent}」の内容から「{STATUS_LABELS[reachable[0]]}」と推定しました",
+                )
+    return None, "キーワードから状態を推定できませんでした"
+
+
+def preview_local(current_status: str, intent: str) -> dict[str, Any]:
+    """
+    POST /api/nodes/{id}/estimate-status（Preview）の応答をローカルで再現する。
+    current_status が State Machine に無い場合は ValueError（API の 500 に相当）。
+    """
+    if not is_valid_status(current_status):
+        raise ValueError(f'current status "{current_status}" is not recognised by State Machine')
+    intent = intent.strip()
+    if intent:
+        suggested, reason = estimate_status_from_intent(current_status, intent)
+    else:
+        suggested, reason = None, "入力がありません"
+    return {
+        "ok": True,
+        "applied": False,
+        "current_status": current_status,
+        "current_label": STATUS_LABELS[current_status],
+        "suggested": (
+            {"status": suggested, "label": STATUS_LABELS[suggested], "reason": reason}
+            if suggested
+            else None
+        ),
+        "candidates": [
+            {"status": s, "label": STATUS_LABELS[s]} for s in get_valid_transitions(current_status)
+        ],
+    }
+
+
+# ─── パリティ確認（TS と共有する fixture）───────────────────
+
+FIXTURE_PATH = Path(__file__).resolve().parents[2] / "src" / "lib" / "stateMachine.fixtures.json"
+
+
+def check_fixtures(path: Path = FIXTURE_PATH) -> list[str]:
+    """fixture の各ケースを照合し、不一致の説明リストを返す（空なら一致）。"""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    errors: list[str] = []
+    for case in data["estimate"]:
+        got, reason = estimate_status_from_intent(case["current_status"], case["intent"])
+        if got != case["suggested"] or reason != case["reason"]:
+            errors.append(f"estimate {case['current_status']} {case['intent']!r}: got {got!r}, want {case['suggested']!r}")
+    for from_status, expected in data["valid_transitions"].items():
+        got_list = list(get_valid_transitions(from_status))
+        if got_list != expected:
+            errors.append(f"valid_transitions {from_status}: got {got_list}, want {expected}")
+    return errors
+
+
+if __name__ == "__main__":
+    errs = check_fixtures(Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURE_PATH)
+    for e in errs:
+        print(e, file=sys.stderr)
+    print(f"state_machine parity: {'NG' if errs else 'OK'} ({len(errs)} mismatch)")
+    sys.exit(1 if errs else 0)
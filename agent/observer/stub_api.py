@@ -0,0 +1,366 @@
+"""
+Observer ベンチマーク用のスタブ API（Next.js + Supabase の代わり。標準ライブラリのみ）
+
+Observer が呼ぶ API だけを、合成 Node でそれらしく返す。本番デプロイも DB も要らない。
+
+  GET  /api/dashboard?limit=N&cursor=...     ページモード（limit なしなら旧形式の trays）
+  POST /api/nodes/{id}/estimate-status       Preview（state_machine.preview_local）
+  POST /api/nodes/estimate-status/batch      Preview の一括版
+  POST /api/observer/reports                 保存（メモリに置くだけ。gzip 本文・差分・content_hash も API と同じ）
+  GET  /api/observer/reports/latest          最後に保存したレポート（?user_id= でテナント別、?view=hash）
+  GET  /__stub/stats                         エンドポイントごとの受信数と送受信バイト数
+  POST /__stub/reset                         受信数をゼロに戻す
+
+- Node i は (seed, i) だけから毎回作る（全件をメモリに持たない）。日時は起動時刻から
+  「日数 + 12 時間」ずらす（実行中に日付の境界をまたいでも経過日数が変わらないように）。
+- ページは Node の番号順（本番の updated_at 降順とは違うが、Observer は順序に依存しない）。
+- --latency-ms: 各応答の前に待つ（0.5〜1.5 倍でばらつかせる）。
+- --error-rate: dashboard と Preview の応答をこの割合で 503（Retry-After: 0）にする。
+  保存（冪等でない）には入れない。
+
+実行:
+  python3 agent/observer/stub_api.py --nodes 10000 --port 8765
+  NEXT_BASE_URL=http://127.0.0.1:8765 OBSERVER_TOKEN=stub python3 agent/observer/main.py --save
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+from report_codec import apply_delta, content_hash
+from state_machine import preview_local
+
+TRAYS = ("in_progress", "needs_decision", "waiting_external", "cooling", "other_active")
+STATUSES_BY_TRAY: dict[str, tuple[str, ...]] = {
+    "in_progress": ("IN_PROGRESS",),
+    "needs_decision": ("NEEDS_DECISION",),
+    "waiting_external": ("WAITING_EXTERNAL",),
+    "cooling": ("COOLING",),
+    "other_active": (
+        "CAPTURED", "CLARIFYING", "READY", "DELEGATED", "SCHEDULED", "BLOCKED", "NEEDS_REVIEW", "REACTIVATED",
+    ),
+}
+DEFAULT_TRAY_WEIGHTS = "in_progress=15,needs_decision=10,waiting_external=10,cooling=15,other_active=50"
+DASHBOARD_MAX_LIMIT = 500  # dashboard API のページ上限と同じ
+
+_NODE_PATH = re.compile(r"^/api/nodes/(\d{8})-[0-9a-f-]+/estimate-status$")
+
+
+def parse_tray_weights(spec: str) -> dict[str, float]:
+    """"in_progress=20,cooling=5,..." → tray ごとの重み。書かれていない tray は 0。"""
+    weights = dict.fromkeys(TRAYS, 0.0)
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, value = part.partition("=")
+        if name not in weights:
+            raise ValueError(f"unknown tray: {name}（{', '.join(TRAYS)}）")
+        weights[name] = float(value)
+    if sum(weights.values()) <= 0:
+        raise ValueError("tray weights must not all be zero")
+    return weights
+
+
+class SyntheticDesk:
+    """n 件の合成 Node。node(i) は (seed, i) から決まる。"""
+
+    def __init__(self, n: int, tray_weights: dict[str, float], seed: int = 42, users: int = 1) -> None:
+        self.n = n
+        self.seed = seed
+        self.users = max(1, users)
+        self.now = datetime.now(timezone.utc)
+        self._trays = list(tray_weights)
+        self._weights = [tray_weights[t] for t in self._trays]
+
+    def node_id(self, i: int) -> str:
+        return f"{i:08d}-0000-4000-8000-{(i * 2654435761 + self.seed) % (1 << 48):012x}"
+
+    def node(self, i: int) -> dict[str, Any]:
+        rng = random.Random(self.seed * 1_000_003 + i)
+        tray = rng.choices(self._trays, self._weights)[0]
+        status = rng.choice(STATUSES_BY_TRAY[tray])
+        created = self.now - timedelta(days=rng.randint(5, 120), hours=12)
+        updated = self.now - timedelta(days=rng.randint(0, 30), hours=12)
+        r = rng.random()
+        return {
+            "id": self.node_id(i),
+            "title": f"合成ノード {i}",
+            "status": status,
+            "temperature": None if r < 0.1 else rng.randint(0, 100),
+            "updated_at": None if r > 0.95 else updated.isoformat().replace("+00:00", "Z"),
+            "created_at": None if r > 0.98 else created.isoformat().replace("+00:00", "Z"),
+            "user_id": f"00000000-0000-4000-9000-{i % self.users:012d}",
+            "context": "…" * rng.randint(0, 40),
+            "last_memo": None,
+            "last_memo_at": None,
+        }
+
+    def page(self, limit: int, cursor: str | None) -> dict[str, Any]:
+        start = int(cursor) if cursor else 0
+        end = min(self.n, start + limit)
+        body: dict[str, Any] = {
+            "ok": True,
+            "nodes": [self.node(i) for i in range(start, end)],
+            "next_cursor": str(end) if end < self.n else None,
+        }
+        if start == 0:
+            body["node_children"] = []
+        return body
+
+    def trays(self) -> dict[str, Any]:
+        trays: dict[str, list[dict[str, Any]]] = {t: [] for t in TRAYS}
+        for i in range(self.n):
+            node = self.node(i)
+            tray = next(t for t, statuses in STATUSES_BY_TRAY.items() if node["status"] in statuses)
+            trays[tray].append(node)
+        return {"ok": True, "trays": trays, "node_children": []}
+
+    def index_of(self, node_id: str) -> int | None:
+        try:
+            i = int(node_id[:8])
+        except ValueError:
+            return None
+        return i if 0 <= i < self.n and self.node_id(i) == node_id else None
+
+
+def _preview(desk: SyntheticDesk, node_id: str, intent: str) -> tuple[int, dict[str, Any]]:
+    i = desk.index_of(node_id)
+    if i is None:
+        return 404, {"ok": False, "error": "node not found"}
+    try:
+        return 200, preview_local(desk.node(i)["status"], intent)
+    except ValueError as e:
+        return 500, {"ok": False, "error": str(e)}
+
+
+class StubState:
+    def __init__(self, desk: SyntheticDesk, latency_ms: float, error_rate: float, seed: int) -> None:
+        self.desk = desk
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests: dict[str, int] = {}
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.saved = 0
+        self.latest: dict[str | None, dict[str, Any]] = {}  # user_id（None は全体レポート）→ 最後の保存
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def inject(self, can_fail: bool = True) -> bool:
+        """レイテンシを入れ、エラーにするなら True（can_fail=False ならレイテンシだけ）。"""
+        with self.lock:
+            delay = self.latency_ms * self.rng.uniform(0.5, 1.5) / 1000
+            fail = can_fail and self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+
+def make_handler(state: StubState) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive（Observer は接続を使い回す）
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+        def _send(self, status: int, body: dict[str, Any] | None, headers: dict[str, str] | None = None) -> None:
+            raw = b"" if body is None else json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(raw)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(raw)
+            with state.lock:
+                state.bytes_out += len(raw)
+
+        def _json_body(self) -> Any:
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            with state.lock:
+                state.bytes_in += len(raw)
+            if (self.headers.get("Content-Encoding") or "").lower() == "gzip":
+                raw = gzip.decompress(raw)
+            return json.loads(raw or b"{}")
+
+        def _unavailable(self) -> None:
+            self._send(503, {"ok": False, "error": "injected failure"}, {"Retry-After": "0"})
+
+        def do_GET(self) -> None:  # noqa: N802
+            url = urlparse(self.path)
+            if url.path == "/__stub/stats":
+                with state.lock:
+                    body = {
+                        "ok": True,
+                        "requests": dict(sorted(state.requests.items())),
+                        "total": sum(state.requests.values()),
+                        "errors": state.errors,
+                        "bytes_out": state.bytes_out,
+                        "bytes_in": state.bytes_in,
+                    }
+                self._send(200, body)
+                return
+            if url.path == "/api/dashboard":
+                state.count("GET /api/dashboard")
+                if state.inject():
+                    self._unavailable()
+                    return
+                query = parse_qs(url.query)
+                if "limit" not in query:
+                    self._send(200, state.desk.trays())
+                    return
+                limit = max(1, min(DASHBOARD_MAX_LIMIT, int(query["limit"][0])))
+                self._send(200, state.desk.page(limit, (query.get("cursor") or [None])[0]))
+                return
+            if url.path == "/api/observer/reports/latest":
+                state.count("GET /api/observer/reports/latest")
+                state.inject(can_fail=False)
+                query = parse_qs(url.query)
+                user_id = (query.get("user_id") or [None])[0]
+                with state.lock:
+                    latest = state.latest.get(user_id)
+                if latest is not None and (query.get("view") or [None])[0] == "hash":
+                    latest = {k: latest[k] for k in ("report_id", "created_at", "node_count", "user_id", "content_hash")}
+                self._send(200, {"ok": True, "report": latest})
+                return
+            self._send(404, {"ok": False, "error": "not found"})
+
+        def do_POST(self) -> None:  # noqa: N802
+            path = urlparse(self.path).path
+            if path == "/__stub/reset":
+                with state.lock:
+                    state.requests.clear()
+                    state.errors = 0
+                    state.bytes_out = 0
+                    state.bytes_in = 0
+                self._send(200, {"ok": True})
+                return
+            if path == "/api/nodes/estimate-status/batch":
+                state.count("POST /api/nodes/estimate-status/batch")
+                body = self._json_body()
+                if state.inject():
+                    self._unavailable()
+                    return
+                results = []
+                for item in body.get("items") or []:
+                    status, preview = _preview(state.desk, item.get("node_id", ""), item.get("intent", ""))
+                    if status == 200:
+                        results.append({"node_id": item["node_id"], **preview})
+                    else:
+                        results.append({"node_id": item.get("node_id"), "ok": False, "status": status, "error": preview["error"]})
+                self._send(200, {"ok": True, "results": results})
+                return
+            m = _NODE_PATH.match(path)
+            if m:
+                state.count("POST /api/nodes/{id}/estimate-status")
+                body = self._json_body()
+                if state.inject():
+                    self._unavailable()
+                    return
+                node_id = path.split("/")[3]
+                self._send(*_preview(state.desk, node_id, body.get("intent", "")))
+                return
+            if path == "/api/observer/reports":
+                state.count("POST /api/observer/reports")
+                body = self._json_body()
+                state.inject(can_fail=False)
+                payload = body.get("payload")
+                if body.get("delta") is not None:
+                    # 差分の base はそのテナントの最後の保存だけ受け付ける（スタブは古い行を持たない）
+                    with state.lock:
+                        base = state.latest.get(body.get("user_id"))
+                    expected = body.get("base") or {}
+                    if (
+                        base is None
+                        or base["report_id"] != expected.get("report_id")
+                        or base["content_hash"] != expected.get("content_hash")
+                    ):
+                        self._send(409, {"ok": False, "code": "DELTA_BASE_MISMATCH", "error": "base report mismatch"})
+                        return
+                    payload = apply_delta(base["payload"], body["delta"])
+                digest = content_hash(payload)
+                if body.get("content_hash") not in (None, digest):
+                    self._send(409, {"ok": False, "code": "CONTENT_HASH_MISMATCH", "error": "content_hash mismatch"})
+                    return
+                with state.lock:
+                    state.saved += 1
+                    report_id = f"00000000-0000-4000-8000-{state.saved:012d}"
+                    created_at = datetime.now(timezone.utc).isoformat()
+                    row = {
+                        "report_id": report_id,
+                        "created_at": created_at,
+                        "generated_by": body.get("generated_by"),
+                        "payload": payload,
+                        "node_count": body.get("node_count"),
+                        "source": "stub",
+                        "received_at": created_at,
+                        "user_id": body.get("user_id"),
+                        "content_hash": digest,
+                    }
+                    state.latest[body.get("user_id")] = row
+                self._send(200, {"ok": True, "report_id": report_id, "created_at": created_at, "content_hash": digest})
+                return
+            self._send(404, {"ok": False, "error": "not found"})
+
+    return Handler
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 既定の 5 だと Preview の並列接続（PREVIEW_CONCURRENCY=8）で SYN があふれ、1 秒の再送待ちが入る
+    request_queue_size = 128
+
+
+def serve(args: argparse.Namespace) -> None:
+    desk = SyntheticDesk(args.nodes, parse_tray_weights(args.trays), seed=args.seed, users=args.users)
+    state = StubState(desk, args.latency_ms, args.error_rate, args.seed)
+    server = _StubServer((args.host, args.port), make_handler(state))
+    host, port = server.server_address[:2]
+    # 1 行目に URL を出す（bench_e2e.py はこれを読んで接続先にする）
+    print(f"http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Observer ベンチマーク用のスタブ API")
+    parser.add_argument("--nodes", type=int, default=1000, help="机の上の Node 数（既定: 1000）")
+    parser.add_argument("--trays", default=DEFAULT_TRAY_WEIGHTS, help=f"tray ごとの重み（既定: {DEFAULT_TRAY_WEIGHTS}）")
+    parser.add_argument("--users", type=int, default=1, help="Node を割り振る user_id の数（既定: 1）")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="各応答の前に待つ ms（0.5〜1.5 倍でばらつく）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="dashboard / Preview を 503 にする割合（0〜1）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 なら空いているポート")
+    args = parser.parse_args(argv)
+    if not 0 <= args.error_rate < 1:
+        parser.error("--error-rate must be in [0, 1)")
+    try:
+        parse_tray_weights(args.trays)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+if __name__ == "__main__":
+    serve(parse_args())
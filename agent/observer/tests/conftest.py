@@ -0,0 +1,13 @@
+"""
+Observer の単体テスト（pytest）。
+
+  python3 -m pytest agent/observer/tests
+
+Observer のモジュールは agent/observer 直下にあり（パッケージではない）、main.py と同じく
+モジュール名で import するので、ここで agent/observer を sys.path に入れる。
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
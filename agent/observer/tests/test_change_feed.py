@@ -0,0 +1,113 @@
+"""change_feed.py: 通知のまとめ方（ChangeFeed.next_batch）と --watch-listen の bind 先。"""
+
+import asyncio
+
+import pytest
+
+from change_feed import ChangeFeed, is_loopback, parse_listen
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_notifications_are_coalesced():
+    async def go():
+        feed = ChangeFeed(quiet=0.02, max_delay=1.0, max_nodes=10)
+        feed.add(["a"])
+        feed.add(["b", "a"])
+        feed.add(["c", "", None])
+        assert feed.pending() == 3
+        return feed, await feed.next_batch(timeout=1.0)
+
+    feed, batch = _run(go())
+
+    assert batch.node_ids == frozenset({"a", "b", "c"})
+    assert not batch.full
+    assert batch.notifications == 3
+    assert feed.pending() == 0
+
+
+def test_quiet_period_restarts_on_each_notification():
+    async def go():
+        feed = ChangeFeed(quiet=0.1, max_delay=5.0, max_nodes=10)
+        feed.add(["a"])
+        task = asyncio.ensure_future(feed.next_batch())
+        for node_id in ("b", "c"):
+            await asyncio.sleep(0.05)  # quiet より短い間隔で届く
+            feed.add([node_id])
+        return await task
+
+    batch = _run(go())
+
+    assert batch.node_ids == frozenset({"a", "b", "c"})
+    assert batch.notifications == 3
+    assert batch.waited_ms >= 150
+
+
+def test_max_delay_bounds_a_steady_stream():
+    async def go():
+        feed = ChangeFeed(quiet=0.1, max_delay=0.2, max_nodes=100)
+        stop = False
+
+        async def produce():
+            i = 0
+            while not stop:
+                feed.add([f"n{i}"])
+                i += 1
+                await asyncio.sleep(0.02)
+
+        producer = asyncio.ensure_future(produce())
+        await asyncio.sleep(0)
+        first = await feed.next_batch()
+        stop = True
+        await producer
+        return first
+
+    batch = _run(go())
+
+    # quiet 秒の空きは来ないが max_delay で確定する
+    assert 200 <= batch.waited_ms < 1000
+    assert 5 <= batch.notifications == len(batch.node_ids)
+
+
+@pytest.mark.parametrize(
+    ("notifications", "max_nodes"),
+    [
+        ([["a"], []], 10),  # node_ids なし = 全件観測の依頼
+        ([["a", "b"], ["c"]], 2),  # max_nodes を超えた
+    ],
+)
+def test_batch_becomes_full(notifications, max_nodes):
+    async def go():
+        feed = ChangeFeed(quiet=0.01, max_delay=1.0, max_nodes=max_nodes)
+        for node_ids in notifications:
+            feed.add(node_ids)
+        return await feed.next_batch()
+
+    batch = _run(go())
+
+    assert batch.full
+    assert batch.notifications == len(notifications)
+
+
+def test_next_batch_returns_none_on_timeout_and_close():
+    async def go():
+        feed = ChangeFeed(quiet=0.01, max_delay=1.0, max_nodes=10)
+        idle = await feed.next_batch(timeout=0.01)
+        feed.add(["a"])
+        task = asyncio.ensure_future(feed.next_batch())
+        await asyncio.sleep(0)
+        feed.close()
+        return idle, await task
+
+    assert _run(go()) == (None, None)
+
+
+def test_listen_defaults_to_loopback():
+    assert parse_listen("8765") == ("127.0.0.1", 8765)
+    assert parse_listen("[::1]:8765") == ("::1", 8765)
+    assert all(is_loopback(host) for host in ("127.0.0.1", "127.0.0.2", "::1", "localhost"))
+    assert not any(is_loopback(host) for host in ("0.0.0.0", "::", "192.168.1.1", "example.com"))
+    with pytest.raises(ValueError):
+        parse_listen("127.0.0.1:0")
@@ -0,0 +1,94 @@
+"""node_tree.py: 親子の索引（build_index）と子孫の集計（subtree_stats）。循環・深い木を含む。"""
+
+from node_tree import SubtreeStats, build_index, subtree_stats
+
+SEVERITY = ("BLOCKED", "WAITING_EXTERNAL", "IN_PROGRESS", "READY")
+STALLED = ("BLOCKED",)
+
+
+def _stats(node_ids, links, statuses, temperatures=None, stale=None, cooling=None):
+    n = len(node_ids)
+    return subtree_stats(
+        build_index(node_ids, links),
+        statuses,
+        temperatures or [50] * n,
+        stale or [False] * n,
+        cooling or [False] * n,
+        STALLED,
+        SEVERITY,
+    )
+
+
+def test_build_index_keeps_first_parent_and_counts_missing_children():
+    index = build_index(
+        ["a", "b", "c"],
+        [("a", "b"), ("c", "b"), ("b", "b"), ("a", "gone"), ("outside", "c")],
+    )
+
+    assert index.parent == [-1, 0, -1]  # b の親は最初のリンクの a。自己参照と机の外の親は捨てる
+    assert index.missing_children == [1, 0, 0]
+
+
+def test_subtree_stats_aggregates_descendants():
+    # a ─ b ─ c、a ─ d（BLOCKED）、a ─ 机の上にない子
+    stats, cycle = _stats(
+        ["a", "b", "c", "d"],
+        [("a", "b"), ("b", "c"), ("a", "d"), ("a", "gone")],
+        ["READY", "IN_PROGRESS", "WAITING_EXTERNAL", "BLOCKED"],
+        temperatures=[80, 60, 10, 40],
+        stale=[False, False, True, False],
+        cooling=[False, False, True, True],
+    )
+
+    assert cycle == []
+    assert stats[0] == SubtreeStats(
+        children=3,
+        open_children=1,
+        worst_status="BLOCKED",
+        descendants=3,
+        stale_descendants=1,
+        cooling_descendants=2,
+        coldest=10,
+        in_cycle=False,
+    )
+    assert stats[1] == SubtreeStats(1, 1, "WAITING_EXTERNAL", 1, 1, 1, 10, False)
+    assert stats[2] is None and stats[3] is None
+
+
+def test_cycle_members_do_not_count_each_other():
+    # x ⇄ y の循環。z は x の子（循環の外）、w は y の子
+    stats, cycle = _stats(
+        ["x", "y", "z", "w"],
+        [("x", "y"), ("y", "x"), ("x", "z"), ("y", "w")],
+        ["READY", "READY", "BLOCKED", "IN_PROGRESS"],
+        temperatures=[50, 50, 5, 30],
+    )
+
+    assert cycle == [0, 1]
+    assert stats[0] == SubtreeStats(2, 0, "BLOCKED", 1, 0, 0, 5, True)  # y は循環の中、z は BLOCKED
+    assert stats[1] == SubtreeStats(2, 1, "IN_PROGRESS", 1, 0, 0, 30, True)
+    assert stats[2] is None and stats[3] is None
+
+
+def test_first_link_decides_whether_a_cycle_forms():
+    # r → x ⇄ y：x の親は最初のリンクの r なので、y → x は捨てられて循環にならない
+    stats, cycle = _stats(["r", "x", "y"], [("r", "x"), ("x", "y"), ("y", "x")], ["READY"] * 3)
+
+    assert cycle == []
+    assert stats[0].descendants == 2
+    assert not stats[0].in_cycle
+
+    stats, cycle = _stats(["r", "x", "y"], [("x", "y"), ("y", "x"), ("r", "x")], ["READY"] * 3)
+
+    assert cycle == [1, 2]
+    assert stats[0] is None  # r → x のリンクは x に先に親（y）がいるので使われない
+
+
+def test_deep_chain_without_recursion_limit():
+    n = 50_000
+    node_ids = [f"n{i}" for i in range(n)]
+    stats, cycle = _stats(node_ids, [(node_ids[i], node_ids[i + 1]) for i in range(n - 1)], ["READY"] * n)
+
+    assert cycle == []
+    assert stats[0].descendants == n - 1
+    assert stats[-1] is None
@@ -0,0 +1,76 @@
+"""--per-tenant: テナントごとのレポートの meta.http / PREVIEW_DEGRADED にほかのテナントの呼び出しが混ざらないこと。"""
+
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+
+import main
+from state_machine import preview_local
+
+NODES = [
+    {"id": f"{user}-{i}", "title": f"{user} {i}", "status": status, "temperature": 50,
+     "updated_at": "2026-02-20T00:00:00Z", "user_id": user}
+    for user in ("u0", "u1")
+    for i, status in enumerate(("READY", "IN_PROGRESS", "WAITING_EXTERNAL"))
+]
+FAILING_USER = "u0"  # このテナントの Preview は 503 を返し続ける
+
+
+async def _api(request):
+    if request.url.path == "/api/dashboard":
+        return httpx.Response(200, json={"ok": True, "nodes": NODES, "next_cursor": None, "node_children": []})
+    m = re.fullmatch(r"/api/nodes/([^/]+)/estimate-status", request.url.path)
+    if m:
+        if m.group(1).startswith(FAILING_USER):
+            return httpx.Response(503, json={"ok": False, "error": "unavailable"})
+        node = next(n for n in NODES if n["id"] == m.group(1))
+        return httpx.Response(200, json=preview_local(node["status"], json.loads(request.content)["intent"]))
+    return httpx.Response(404, json={"ok": False, "error": "not found"})
+
+
+@pytest.fixture(autouse=True)
+def _settings(monkeypatch):
+    monkeypatch.setattr(main, "PREVIEW_BATCH_SIZE", 0)  # Node ごとの Preview
+    monkeypatch.setattr(main, "HTTP_MAX_RETRIES", 1)
+    monkeypatch.setattr(main, "HTTP_BACKOFF_BASE_SECONDS", 0.001)
+
+
+def _observe():
+    async def go():
+        args = main.parse_args(["--per-tenant", "--tenant-workers", "1", "--no-tree"])
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_api)) as raw:
+            return await main.observe_tenants(main.make_request_layer(raw), args)
+
+    return asyncio.run(go())
+
+
+def _preview_endpoint(meta):
+    return meta["http"]["POST /api/nodes/{id}/estimate-status"]
+
+
+def test_tenant_http_stats_are_isolated():
+    result = _observe()
+    reports = {t["user_id"]: t["report"] for t in result["tenants"]}
+
+    failing, healthy = reports["u0"], reports["u1"]
+    assert [w["code"] for w in failing["warnings"]] == ["PREVIEW_DEGRADED"]
+    assert healthy["warnings"] == []
+    assert _preview_endpoint(failing["meta"])["failures"] == 3
+    assert _preview_endpoint(failing["meta"])["retries"] == 3
+    assert _preview_endpoint(healthy["meta"])["failures"] == 0
+    assert _preview_endpoint(healthy["meta"])["retries"] == 0
+    # トップの meta.http は dashboard の読み込みだけ
+    assert list(result["meta"]["http"]) == ["GET /api/dashboard"]
+
+
+def test_tenant_meta_has_http_and_timing():
+    result = _observe()
+
+    for tenant in result["tenants"]:
+        meta = tenant["report"]["meta"]
+        assert meta["tenant"] == {"user_id": tenant["user_id"]}
+        assert {"analyze", "preview", "report"} <= set(meta["timing"]["spans_ms"])
+        assert _preview_endpoint(meta)["requests"] == 3
@@ -0,0 +1,108 @@
+"""report_codec.py: canonical JSON（API の contentHash と同じ規則）と差分（make_delta / apply_delta）。"""
+
+import hashlib
+import json
+
+import pytest
+
+from report_codec import DELTA_FORMAT, apply_delta, canonical_json, content_hash, dumps, make_delta
+
+
+def _item(node_id, **fields):
+    return {"node_id": node_id, "title": f"T {node_id}", **fields}
+
+
+BASE = {
+    "summary": "前回",
+    "status_proposals": [_item("a", suggested="READY"), _item("b", suggested="BLOCKED"), _item("c")],
+    "cooling_alerts": [_item("d", temperature=20)],
+    "suggested_next_ranking": [_item("a", score=3), _item("b", score=2), _item("c", score=1)],
+    "warnings": [],
+    "meta": {"observed_at": "2026-03-01T00:00:00+00:00"},
+}
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        (1.0, "1"),
+        (-0.5, "-0.5"),
+        (1e-07, "1e-7"),
+        (0.00001, "0.00001"),
+        (0.1 + 0.2, "0.30000000000000004"),
+        (1e21, "1e+21"),
+        (1.5e300, "1.5e+300"),
+        (123456789012345680000.0, "123456789012345680000"),
+        (2 ** 53, "9007199254740992"),
+        (float("nan"), "null"),
+        (float("inf"), "null"),
+    ],
+)
+def test_canonical_numbers_match_javascript(value, expected):
+    assert canonical_json(value) == expected
+
+
+def test_canonical_json_sorts_keys_without_spaces():
+    obj = {"b": [1, 2.5, None, True], "a": {"y": "日本語", "x": False}, "c": "\"\n"}
+    assert canonical_json(obj) == '{"a":{"x":false,"y":"日本語"},"b":[1,2.5,null,true],"c":"\\"\\n"}'
+    assert canonical_json(obj) == canonical_json(dict(reversed(list(obj.items()))))
+
+
+def test_canonical_json_rejects_non_json():
+    with pytest.raises(TypeError):
+        canonical_json({"a": {1, 2}})
+
+
+def test_content_hash_is_sha256_of_canonical_json():
+    assert content_hash(BASE) == hashlib.sha256(canonical_json(BASE).encode("utf-8")).hexdigest()
+    assert content_hash(BASE) == content_hash(json.loads(dumps(BASE)))
+
+
+def test_unchanged_sections_are_sent_as_references():
+    delta = make_delta(BASE, BASE)
+
+    assert delta["format"] == DELTA_FORMAT
+    assert delta["sections"] == {
+        "status_proposals": [[0, 3]],
+        "cooling_alerts": [[0, 1]],
+        "suggested_next_ranking": [[0, 3]],
+    }
+    assert delta["unset"] == []
+    assert apply_delta(BASE, delta) == BASE
+
+
+def test_delta_round_trip():
+    report = {
+        "summary": "今回",
+        "status_proposals": [_item("a", suggested="READY"), _item("c"), _item("e")],  # b が消え e が増えた
+        "cooling_alerts": [_item("d", temperature=10)],  # 中身が変わった
+        "suggested_next_ranking": [_item("c", score=1), _item("a", score=3), _item("b", score=2)],  # 並べ替え
+        "warnings": [{"code": "PREVIEW_DEGRADED"}],
+        "extra": 1,
+    }
+
+    delta = make_delta(BASE, report)
+
+    assert delta["sections"]["status_proposals"] == [[0, 1], [2, 1], _item("e")]
+    assert delta["sections"]["cooling_alerts"] == [_item("d", temperature=10)]
+    assert delta["sections"]["suggested_next_ranking"] == [[2, 1], [0, 2]]
+    assert delta["unset"] == ["meta"]
+    # 送るのは JSON なので、往復させたものから復元できること
+    assert apply_delta(BASE, json.loads(dumps(delta))) == report
+
+
+def test_delta_sends_sections_missing_from_base():
+    base = {"summary": "前回"}
+    report = {"summary": "前回", "suggested_next_ranking": [_item("a", score=1)]}
+
+    delta = make_delta(base, report)
+
+    assert delta["sections"] == {}
+    assert apply_delta(base, delta) == report
+
+
+def test_apply_delta_rejects_bad_input():
+    with pytest.raises(ValueError):
+        apply_delta(BASE, {"format": DELTA_FORMAT + 1})
+    with pytest.raises(ValueError):
+        apply_delta(BASE, {"format": DELTA_FORMAT, "sections": {"cooling_alerts": [[0, 2]]}})
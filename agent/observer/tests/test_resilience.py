@@ -0,0 +1,59 @@
+"""resilience.py: ヘッジ（先に返った 429 / 5xx でもう 1 本を取り消さない）。"""
+
+import asyncio
+
+import httpx
+
+from resilience import ResilientClient
+
+PREVIEW_URL = "http://observer.test/api/nodes/n1/estimate-status"
+
+
+def _preview(responses):
+    """responses[i] = (秒, status)。i 本目の呼び出しは 秒 待ってから status を返す。"""
+
+    async def handler(request):
+        delay, status = responses[min(len(calls), len(responses) - 1)]
+        calls.append(status)
+        await asyncio.sleep(delay)
+        return httpx.Response(status, json={"ok": status == 200})
+
+    calls = []
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as raw:
+            client = ResilientClient(raw, max_retries=0, hedge_after=0.05)
+            resp = await client.post(PREVIEW_URL, json={"intent": "x"})
+            return resp.status_code, client.snapshot()
+
+    status, stats = asyncio.run(go())
+    return status, calls, stats
+
+
+def _endpoint(stats):
+    (entry,) = stats.values()
+    return entry
+
+
+def test_hedge_waits_for_the_slow_success():
+    # 1 本目は遅いが成功、ヘッジの 2 本目はすぐ 503
+    status, calls, stats = _preview([(0.3, 200), (0.0, 503)])
+
+    assert status == 200
+    assert calls == [200, 503]
+    assert _endpoint(stats)["hedged"] == 1
+    assert _endpoint(stats)["failures"] == 0
+
+
+def test_hedge_returns_retryable_response_when_both_fail():
+    status, calls, stats = _preview([(0.2, 502), (0.0, 503)])
+
+    assert status in (502, 503)
+    assert len(calls) == 2
+    assert _endpoint(stats)["failures"] == 1
+
+
+def test_hedge_uses_first_success():
+    status, calls, _ = _preview([(0.3, 503), (0.0, 200)])
+
+    assert status == 200
@@ -0,0 +1,114 @@
+"""scoring_columns.py（--engine columnar）: 解析結果が analyze_node / compute_suggested_next_score と同じであること。"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import main
+
+NOW = datetime(2026, 3, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+STATUSES = (
+    "IN_PROGRESS", "READY", "WAITING_EXTERNAL", "CLARIFYING", "NEEDS_DECISION", "BLOCKED", "COOLING",
+    "DORMANT", "DONE", "CANCELLED", "UNKNOWN_STATUS", "", None,
+)
+TEMPERATURES = (None, 0, 20, 39, 40, 41, 50, 70, 100, -5, 39.9, 40.0, 40.5, True, False, 2 ** 60)
+
+
+def _ts(delta):
+    return (NOW - delta).isoformat().replace("+00:00", "Z")
+
+
+def _dates():
+    # 日境界ちょうど・その前後（経過日数の切り捨て）と、書き方の違う日時
+    out = [None, "", "2026-02-20T00:00:00+09:00", "2025-12-01T00:00:00.000Z", "not a date"]
+    for days in (0, 2, 3, 6, 7, 13, 14, 30, 400):
+        for skew in (timedelta(0), timedelta(microseconds=1), timedelta(microseconds=-1)):
+            out.append(_ts(timedelta(days=days) + skew))
+    return out
+
+
+def _nodes(count=2000, seed=16):
+    rng = random.Random(seed)
+    dates = _dates()
+    nodes = []
+    for i in range(count):
+        node = {"id": f"n{i}", "title": f"T{i}", "status": rng.choice(STATUSES), "temperature": rng.choice(TEMPERATURES)}
+        if rng.random() < 0.9:
+            node["updated_at"] = rng.choice(dates)
+        if rng.random() < 0.5:
+            node["created_at"] = rng.choice(dates)
+        nodes.append(node)
+    return nodes
+
+
+def _row(nodes):
+    return [main.analyze_node(node, NOW) for node in nodes]
+
+
+@pytest.fixture(params=[False, True], ids=["array", "numpy"])
+def use_numpy(request):
+    if request.param:
+        pytest.importorskip("numpy")
+    return request.param
+
+
+def test_matches_row_engine(use_numpy):
+    nodes = _nodes()
+
+    assert main.analyze_nodes_columnar(nodes, NOW, use_numpy) == _row(nodes)
+
+
+def test_score_matches_compute_suggested_next_score(use_numpy):
+    nodes = _nodes()
+    checked = 0
+    for node, a in zip(nodes, main.analyze_nodes_columnar(nodes, NOW, use_numpy)):
+        if a.score is None:
+            continue
+        assert a.score == main.compute_suggested_next_score(node, NOW)
+        checked += 1
+    assert checked > 1000
+
+
+def test_matches_row_engine_with_other_rules(monkeypatch, use_numpy):
+    # --rules（use_rules）は main の定数を書き換える。columnar も同じ定数から表を作る
+    monkeypatch.setattr(main, "SUGGESTED_NEXT_STATUS_BONUS", {"READY": 40, "BLOCKED": -10, "DORMANT": 5})
+    monkeypatch.setattr(main, "SUGGESTED_NEXT_EXCLUDED_STATUSES", ("DONE", "READY"))
+    monkeypatch.setattr(main, "TEMPERATURE_LOW_THRESHOLD", 20)
+    monkeypatch.setattr(main, "STALE_DAYS_FOR_SUGGESTED", 14)
+    monkeypatch.setattr(main, "IN_PROGRESS_STALE_DAYS", 1)
+    monkeypatch.setattr(main, "TEMP_POINTS", 7)
+    monkeypatch.setattr(main, "COOLING_THRESHOLD", 50)
+    monkeypatch.setattr(main, "COOLING_DAYS", 3)
+    monkeypatch.setattr(main, "_BREAKDOWNS", {})
+    nodes = _nodes(seed=23)
+
+    assert main.analyze_nodes_columnar(nodes, NOW, use_numpy) == _row(nodes)
+
+
+@pytest.mark.parametrize(
+    "node",
+    [
+        {"id": "s", "title": "S", "status": "READY", "temperature": "30", "updated_at": _ts(timedelta(days=1))},
+        {"id": "n", "title": "N", "status": "READY", "temperature": 30, "updated_at": "2026-02-01"},  # タイムゾーンなし
+        {"id": "d", "title": "D", "status": ["READY"], "temperature": 30},
+        {"id": "i", "title": "I", "status": 3, "temperature": 30},
+    ],
+    ids=["string-temperature", "naive-datetime", "unhashable-status", "int-status"],
+)
+def test_nodes_off_the_columns_behave_like_row(node, use_numpy):
+    # 列に載らない Node は analyze_node で解析する（例外も同じ）
+    try:
+        expected = _row([node])
+    except Exception as e:
+        with pytest.raises(type(e)):
+            main.analyze_nodes_columnar([node], NOW, use_numpy)
+    else:
+        assert main.analyze_nodes_columnar([node], NOW, use_numpy) == expected
+
+
+def test_analyze_nodes_chunks(monkeypatch):
+    monkeypatch.setattr(main, "COLUMNAR_CHUNK_SIZE", 7)
+    nodes = _nodes(count=100)
+
+    assert main.analyze_nodes(nodes, NOW, "columnar") == main.analyze_nodes(nodes, NOW, "row")
@@ -0,0 +1,117 @@
+"""snapshot.py: スナップショットの読み書きと、--replay が記録したときと同じレポートを組み立てること。"""
+
+import asyncio
+import gzip
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+import main
+from snapshot import Snapshot, read_snapshot, write_snapshot
+
+NODES = [
+    {"id": "n0", "title": "進行中", "status": "IN_PROGRESS", "temperature": 70, "updated_at": "2026-02-20T00:00:00Z"},
+    {"id": "n1", "title": "着手待ち", "status": "READY", "temperature": 30, "updated_at": "2026-02-27T00:00:00Z"},
+    {"id": "n2", "title": "返事待ち", "status": "WAITING_EXTERNAL", "temperature": 55, "updated_at": "2026-01-01T00:00:00Z"},
+    {"id": "n3", "title": "冷却中", "status": "COOLING", "temperature": 20, "updated_at": "2025-12-01T00:00:00Z"},
+    {"id": "n4", "title": "未整理", "status": "CLARIFYING", "temperature": None, "updated_at": None},
+    {"id": "n5", "title": "判断待ち", "status": "NEEDS_DECISION", "temperature": 50, "updated_at": "2026-02-28T00:00:00Z",
+     "parent_id": "n0"},
+    {"id": "n6", "title": "止まっている", "status": "BLOCKED", "temperature": 35, "updated_at": "2026-02-26T12:00:00Z"},
+]
+NODE_CHILDREN = [
+    {"parent_id": "n0", "child_id": "n6"},
+    {"parent_id": "n2", "child_id": "done-child"},  # 机の上にない子
+]
+PAGE_SIZE = 3
+
+
+def _dashboard(request: httpx.Request) -> httpx.Response:
+    assert request.url.path == "/api/dashboard"
+    start = int(request.url.params.get("cursor") or 0)
+    end = start + int(request.url.params["limit"])
+    body = {
+        "ok": True,
+        "nodes": [{**node, "created_at": "2025-11-01T00:00:00Z"} for node in NODES[start:end]],
+        "next_cursor": str(end) if end < len(NODES) else None,
+    }
+    if start == 0:
+        body["node_children"] = NODE_CHILDREN
+    return httpx.Response(200, json=body)
+
+
+def _without_meta(report):
+    return {key: value for key, value in report.items() if key != "meta"}
+
+
+def _record(directory, tree):
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_dashboard)) as client:
+            return await main.observe(estimator="local", top_k=5, client=client, tree=tree, record_dir=str(directory))
+
+    return asyncio.run(go())
+
+
+@pytest.fixture(autouse=True)
+def _page_size(monkeypatch):
+    monkeypatch.setattr(main, "DASHBOARD_PAGE_SIZE", PAGE_SIZE)  # 複数ページを辿る
+
+
+@pytest.mark.parametrize("tree", [True, False])
+@pytest.mark.parametrize("estimator", ["remote", "local"])
+def test_replay_reproduces_recorded_report(tmp_path, tree, estimator):
+    live = _record(tmp_path, tree)
+    snapshot = read_snapshot(live["meta"]["snapshot"])
+
+    replayed = main.replay_snapshot(snapshot, estimator=estimator, top_k=5, tree=tree)
+
+    assert live["suggested_next_ranking"] and live["cooling_alerts"]
+    assert _without_meta(replayed) == _without_meta(live)
+    assert replayed["meta"]["observed_at"] == snapshot.now.isoformat()
+    assert replayed["meta"]["replay"]["recorded"] == {
+        "target": "default",
+        "estimator": "local",
+        "tree": tree,
+        "node_count": len(NODES),
+    }
+
+
+def test_snapshot_round_trip(tmp_path):
+    live = _record(tmp_path, tree=True)
+    path = live["meta"]["snapshot"]
+    snapshot = read_snapshot(path)
+
+    assert [row[0] for row in snapshot.nodes] == [node["id"] for node in NODES]  # dashboard の受信順
+    assert ("n0", "n5") in snapshot.links and ("n2", "") in snapshot.links  # "" = 机の上にない子
+    assert set(snapshot.previews) == {node["id"] for node in NODES}
+
+    again = read_snapshot(write_snapshot(str(tmp_path / "copy"), snapshot))
+
+    assert again == snapshot
+    assert main.replay_snapshot(again, top_k=5) == main.replay_snapshot(snapshot, top_k=5)
+
+
+def test_write_snapshot_drops_links_from_off_desk_parents(tmp_path):
+    now = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    snapshot = Snapshot(
+        now,
+        [["a", "A", "READY", 50, None, None], ["b", "B", "READY", 40, None, None]],
+        [("a", "b"), ("a", "gone"), ("outside", "b"), ("b", "b")],
+        {"a": ("proceed", None)},
+        {"target": "default"},
+    )
+
+    path = write_snapshot(str(tmp_path), snapshot)
+    again = read_snapshot(path)
+
+    assert path.endswith("snapshot-20260301T000000000000Z.json.gz")
+    assert again == snapshot._replace(links=[("a", "b"), ("a", "")])
+
+
+def test_read_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / "other.json.gz"
+    path.write_bytes(gzip.compress(b'{"format": 0}'))
+
+    with pytest.raises(ValueError):
+        read_snapshot(str(path))
@@ -0,0 +1,22 @@
+"""state_machine.py と src/lib/stateMachine.ts のパリティ（共有 fixture: stateMachine.fixtures.json）。"""
+
+import json
+
+from state_machine import FIXTURE_PATH, check_fixtures
+
+
+def test_fixture_parity():
+    assert check_fixtures() == []
+
+
+def test_mismatch_is_reported(tmp_path):
+    data = json.loads(FIXTURE_PATH.read_text(encoding="utf-8"))
+    case = data["estimate"][0]
+    case["suggested"] = "NOT_A_STATUS"
+    path = tmp_path / "fixtures.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    errors = check_fixtures(path)
+
+    assert len(errors) == 1
+    assert errors[0].startswith(f"estimate {case['current_status']} ")
@@ -0,0 +1,51 @@
+/**
+ * dashboard の ETag / If-None-Match 判定の単体テスト。
+ */
+
+import { describe, it, expect } from "vitest";
+import { bodyEtag, etagMatches, jsonWithEtag } from "./etag";
+
+describe("bodyEtag", () => {
+  it("同じ本文なら同じ ETag、違えば別の ETag", () => {
+    const a = { ok: true, nodes: [{ id: "n1", status: "READY" }] };
+    expect(bodyEtag(a)).toBe(bodyEtag({ ok: true, nodes: [{ id: "n1", status: "READY" }] }));
+    expect(bodyEtag(a)).not.toBe(bodyEtag({ ok: true, nodes: [{ id: "n1", status: "DONE" }] }));
+    expect(bodyEtag(a)).toMatch(/^W\/"[A-Za-z0-9_-]+"$/);
+  });
+});
+
+describe("etagMatches", () => {
+  const etag = 'W/"abc"';
+
+  it("ヘッダなしは不一致", () => {
+    expect(etagMatches(null, etag)).toBe(false);
+  });
+
+  it("弱い比較・リスト・* に対応", () => {
+    expect(etagMatches('W/"abc"', etag)).toBe(true);
+    expect(etagMatches('"abc"', etag)).toBe(true);
+    expect(etagMatches('"x", W/"abc"', etag)).toBe(true);
+    expect(etagMatches("*", etag)).toBe(true);
+    expect(etagMatches('W/"abd"', etag)).toBe(false);
+  });
+});
+
+describe("jsonWithEtag", () => {
+  const body = { ok: true, trays: {} };
+
+  it("一致しなければ 200 と ETag", async () => {
+    const res = jsonWithEtag(new Request("http://localhost/api/dashboard"), body);
+    expect(res.status).toBe(200);
+    expect(res.headers.get("etag")).toBe(bodyEtag(body));
+    expect(await res.json()).toEqual(body);
+  });
+
+  it("一致すれば 304", () => {
+    const req = new Request("http://localhost/api/dashboard", {
+      headers: { "If-None-Match": bodyEtag(body) },
+    });
+    const res = jsonWithEtag(req, body);
+    expect(res.status).toBe(304);
+    expect(res.headers.get("etag")).toBe(bodyEtag(body));
+  });
+});
@@ -0,0 +1,33 @@
+/**
+ * GET /api/dashboard の条件付きリクエスト（ETag / If-None-Match）
+ *
+ * ETag は応答 JSON の SHA-1（弱い ETag）。DB は毎回読むが、机が変わっていなければ
+ * 304 で本文を返さない（Observer の定期実行は多くが「変化なし」のため）。
+ * ページモードではページごとに ETag が付く。
+ */
+
+import { createHash } from "crypto";
+import { NextResponse } from "next/server";
+
+export function bodyEtag(body: unknown): string {
+  const digest = createHash("sha1").update(JSON.stringify(body)).digest("base64url");
+  return `W/"${digest}"`;
+}
+
+/** If-None-Match（カンマ区切り・* ・W/ 付き）が etag に一致するか。比較は弱い比較。 */
+export function etagMatches(ifNoneMatch: string | null, etag: string): boolean {
+  if (!ifNoneMatch) return false;
+  const opaque = (t: string) => t.trim().replace(/^W\//, "");
+  const target = opaque(etag);
+  return ifNoneMatch.split(",").some((t) => t.trim() === "*" || opaque(t) === target);
+}
+
+/** body を JSON で返す。If-None-Match が一致すれば 304（本文なし）。 */
+export function jsonWithEtag(request: Request, body: unknown): NextResponse {
+  const etag = bodyEtag(body);
+  const headers = { ETag: etag, "Cache-Control": "private, no-cache" };
+  if (etagMatches(request.headers.get("if-none-match"), etag)) {
+    return new NextResponse(null, { status: 304, headers });
+  }
+  return NextResponse.json(body, { headers });
+}
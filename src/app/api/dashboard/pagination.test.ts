@@ -0,0 +1,92 @@
+/**
+ * dashboard ページ読みの cursor / パラメータ解釈の単体テスト。
+ */
+
+import { describe, it, expect } from "vitest";
+import {
+  DEFAULT_PAGE_SIZE,
+  MAX_IDS,
+  MAX_PAGE_SIZE,
+  cursorFilter,
+  decodeCursor,
+  encodeCursor,
+  parseIdsParam,
+  parsePageParams,
+} from "./pagination";
+
+describe("encodeCursor / decodeCursor", () => {
+  it("往復で元に戻る", () => {
+    const c = { updated_at: "2026-02-09T10:00:00.123+00:00", id: "550e8400-e29b-41d4-a716-446655440001" };
+    expect(decodeCursor(encodeCursor(c))).toEqual(c);
+  });
+
+  it("updated_at が null の cursor も往復で元に戻る", () => {
+    const c = { updated_at: null, id: "550e8400-e29b-41d4-a716-446655440001" };
+    expect(decodeCursor(encodeCursor(c))).toEqual(c);
+  });
+
+  it("壊れた値は null", () => {
+    expect(decodeCursor("not-a-cursor")).toBeNull();
+    expect(decodeCursor(Buffer.from('["only-one"]').toString("base64url"))).toBeNull();
+  });
+});
+
+describe("parsePageParams", () => {
+  it("limit も cursor も無ければ null（trays 形式）", () => {
+    expect(parsePageParams(new URLSearchParams(""))).toBeNull();
+  });
+
+  it("limit のみなら 1 ページ目", () => {
+    expect(parsePageParams(new URLSearchParams("limit=100"))).toEqual({ limit: 100, cursor: null });
+  });
+
+  it("limit は上限で丸める", () => {
+    expect(parsePageParams(new URLSearchParams("limit=100000"))).toEqual({ limit: MAX_PAGE_SIZE, cursor: null });
+  });
+
+  it("cursor のみなら既定のページサイズ", () => {
+    const cursor = encodeCursor({ updated_at: "2026-02-09T10:00:00Z", id: "a" });
+    expect(parsePageParams(new URLSearchParams({ cursor }))).toEqual({
+      limit: DEFAULT_PAGE_SIZE,
+      cursor: { updated_at: "2026-02-09T10:00:00Z", id: "a" },
+    });
+  });
+
+  it("不正な limit / cursor は invalid", () => {
+    expect(parsePageParams(new URLSearchParams("limit=0"))).toBe("invalid");
+    expect(parsePageParams(new URLSearchParams("limit=abc"))).toBe("invalid");
+    expect(parsePageParams(new URLSearchParams("cursor=%%%"))).toBe("invalid");
+  });
+});
+
+describe("parseIdsParam", () => {
+  const a = "550e8400-e29b-41d4-a716-446655440001";
+  const b = "550e8400-e29b-41d4-a716-446655440002";
+
+  it("ids が無ければ null", () => {
+    expect(parseIdsParam(new URLSearchParams("limit=10"))).toBeNull();
+  });
+
+  it("カンマ区切りを読み、重複を除く", () => {
+    expect(parseIdsParam(new URLSearchParams({ ids: `${a}, ${b},${a}` }))).toEqual([a, b]);
+  });
+
+  it("空・UUID でない値・上限超は invalid", () => {
+    expect(parseIdsParam(new URLSearchParams("ids="))).toBe("invalid");
+    expect(parseIdsParam(new URLSearchParams({ ids: `${a},x` }))).toBe("invalid");
+    const many = Array.from({ length: MAX_IDS + 1 }, (_, i) => `550e8400-e29b-41d4-a716-${String(i).padStart(12, "0")}`);
+    expect(parseIdsParam(new URLSearchParams({ ids: many.join(",") }))).toBe("invalid");
+  });
+});
+
+describe("cursorFilter", () => {
+  it("updated_at 降順・id 降順で次の行を選ぶ（updated_at が NULL の行は最後）", () => {
+    expect(cursorFilter({ updated_at: "2026-02-09T10:00:00+00:00", id: "b" })).toBe(
+      'updated_at.lt."2026-02-09T10:00:00+00:00",and(updated_at.eq."2026-02-09T10:00:00+00:00",id.lt."b"),updated_at.is.null'
+    );
+  });
+
+  it("updated_at が null の cursor は NULL の行だけを id 降順で続ける", () => {
+    expect(cursorFilter({ updated_at: null, id: "b" })).toBe('and(updated_at.is.null,id.lt."b")');
+  });
+});
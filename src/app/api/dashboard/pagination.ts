@@ -0,0 +1,89 @@
+/**
+ * GET /api/dashboard のページ読み（Observer 用）。単体テスト用に分離。
+ *
+ * ?limit=N（と ?cursor=...）が付いたときだけページモードになる。
+ * 並びは updated_at 降順（NULL は最後）→ id 降順（キーセット方式）。cursor は最後の行の (updated_at, id)。
+ * updated_at が NULL の行は updated_at のある行をすべて返したあとに id 降順で返す（cursor の updated_at も null）。
+ * ページモードには 50 件の上限がない（ページを辿れば全件読める）。
+ *
+ * 読んでいる途中に更新された Node は updated_at が先頭側へ動くので、まだ読んでいなければその走査では返らない
+ * （読み終えた Node が更新されても二重には返らない）。取りこぼした Node は更新で ETag が変わるので、
+ * Observer の次の観測（--watch なら更新の通知）で読まれる。
+ *
+ * ?ids=a,b,...（Observer の差分観測 main.py --watch）: 指定した Node だけをページモードと同じ形で返す。
+ */
+
+export const DEFAULT_PAGE_SIZE = 200;
+export const MAX_PAGE_SIZE = 500;
+/** ?ids= で 1 回に指定できる Node 数（URL の長さを抑える） */
+export const MAX_IDS = 100;
+
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+export type PageCursor = { updated_at: string | null; id: string };
+
+export type PageParams = { limit: number; cursor: PageCursor | null };
+
+export function encodeCursor(c: PageCursor): string {
+  return Buffer.from(JSON.stringify([c.updated_at, c.id]), "utf8").toString("base64url");
+}
+
+export function decodeCursor(raw: string): PageCursor | null {
+  try {
+    const parsed = JSON.parse(Buffer.from(raw, "base64url").toString("utf8"));
+    if (
+      Array.isArray(parsed) &&
+      parsed.length === 2 &&
+      ((typeof parsed[0] === "string" && parsed[0]) || parsed[0] === null) &&
+      typeof parsed[1] === "string" &&
+      parsed[1]
+    ) {
+      return { updated_at: parsed[0], id: parsed[1] };
+    }
+  } catch {
+    // 壊れた cursor は null（400 にする）
+  }
+  return null;
+}
+
+/**
+ * URLSearchParams からページ指定を読む。
+ * limit も cursor も無ければ null（従来の trays 形式）。cursor が壊れていれば "invalid"。
+ */
+export function parsePageParams(params: URLSearchParams): PageParams | null | "invalid" {
+  const rawLimit = params.get("limit");
+  const rawCursor = params.get("cursor");
+  if (rawLimit === null && rawCursor === null) return null;
+
+  let limit = DEFAULT_PAGE_SIZE;
+  if (rawLimit !== null) {
+    const n = Number(rawLimit);
+    if (!Number.isInteger(n) || n < 1) return "invalid";
+    limit = Math.min(n, MAX_PAGE_SIZE);
+  }
+  if (rawCursor === null || rawCursor === "") return { limit, cursor: null };
+  const cursor = decodeCursor(rawCursor);
+  return cursor ? { limit, cursor } : "invalid";
+}
+
+/**
+ * ?ids=a,b,... を読む。無ければ null。空・UUID でない値・MAX_IDS 超なら "invalid"。重複は除く（順序は保つ）。
+ */
+export function parseIdsParam(params: URLSearchParams): string[] | null | "invalid" {
+  const raw = params.get("ids");
+  if (raw === null) return null;
+  const ids = [...new Set(raw.split(",").map((s) => s.trim()).filter((s) => s !== ""))];
+  if (ids.length === 0 || ids.length > MAX_IDS || !ids.every((id) => UUID_RE.test(id))) return "invalid";
+  return ids;
+}
+
+/**
+ * cursor より後ろ（updated_at 降順・NULL は最後・id 降順で次）の行を選ぶ PostgREST の or フィルタ。
+ * 値はダブルクォートで囲む（タイムスタンプの ":" や "+" を区切りと誤認させない）。
+ */
+export function cursorFilter(c: PageCursor): string {
+  const id = JSON.stringify(c.id);
+  if (c.updated_at === null) return `and(updated_at.is.null,id.lt.${id})`;
+  const u = JSON.stringify(c.updated_at);
+  return `updated_at.lt.${u},and(updated_at.eq.${u},id.lt.${id}),updated_at.is.null`;
+}
@@ -7,6 +7,16 @@
  * Observer (Python) 用: Authorization: Bearer OBSERVER_TOKEN が一致すれば、
  * セッションなしで supabaseAdmin により全ユーザー分のデータを返す。
  *
+ * ページモード（?limit=N&cursor=...）: trays ではなく nodes をキーセット方式で返す。
+ *   { ok, nodes, next_cursor, node_children? }（node_children は 1 ページ目のみ）
+ *   50 件の上限はなく、next_cursor が null になるまで辿れば全件読める（Observer 用）。
+ *
+ * 差分観測（?ids=a,b,...。Observer の main.py --watch 用）: 指定した Node のうち机の上にあるものだけを
+ *   { ok, nodes, next_cursor: null, node_children } で返す。node_children は child_id が ids に含まれる行
+ *   （机の上にない子の行も含む）。返らなかった id は机から消えた Node。
+ *
+ * 条件付きリクエスト: 応答には ETag が付き、If-None-Match が一致すれば 304（etag.ts）。
+ *
  * Based on:
  *   09_API_Contract.md §9 — GET /dashboard/active
  *   05_State_Machine.md   — 状態定義（15種）
@@ -21,6 +31,15 @@ import { NextRequest, NextResponse } from "next/server";
 import { getSupabaseAndUser } from "@/lib/supabase/server";
 import { supabaseAdmin } from "@/lib/supabase";
 import { ACTIVE_STATUSES } from "@/lib/stateMachine";
+import { jsonWithEtag } from "./etag";
+import {
+  MAX_IDS,
+  type PageParams,
+  cursorFilter,
+  encodeCursor,
+  parseIdsParam,
+  parsePageParams,
+} from "./pagination";
 
 function isObserverToken(request: NextRequest): boolean {
   const expected = process.env.OBSERVER_TOKEN;
@@ -30,6 +49,112 @@ function isObserverToken(request: NextRequest): boolean {
   return token === expected;
 }
 
+type DbClient = { from: (table: string) => ReturnType<typeof supabaseAdmin.from> };
+
+/** Node ごとに最新の history の reason を last_memo / last_memo_at として付ける（rows の Node 分だけ引く）。 */
+async function withLastMemo(client: DbClient, rows: Record<string, unknown>[]) {
+  const ids = rows.map((n) => n.id as string);
+  const lastMemoByNodeId: Record<string, string> = {};
+  const lastMemoAtByNodeId: Record<string, string> = {};
+  if (ids.length > 0) {
+    const historyRes = await client
+      .from("node_status_history")
+      .select("node_id, reason, consumed_at")
+      .in("node_id", ids)
+      .order("consumed_at", { ascending: false, nullsFirst: false });
+    for (const row of historyRes.data ?? []) {
+      const id = row.node_id as string;
+      if (id in lastMemoByNodeId) continue;
+      const reason = typeof row.reason === "string" ? row.reason.trim() : "";
+      if (reason) {
+        lastMemoByNodeId[id] = reason;
+        const at = row.consumed_at;
+        lastMemoAtByNodeId[id] = typeof at === "string" ? at : "";
+      }
+    }
+  }
+  return rows.map((n) => ({
+    ...n,
+    last_memo: lastMemoByNodeId[n.id as string] ?? null,
+    last_memo_at: lastMemoAtByNodeId[n.id as string] ?? null,
+  }));
+}
+
+/**
+ * 差分観測: ids のうち机の上にある Node と、child_id が ids に含まれる node_children を返す。
+ */
+async function fetchDashboardNodes(client: DbClient, ids: string[]) {
+  const [nodesRes, childrenRes] = await Promise.all([
+    client.from("nodes").select("*").in("id", ids).in("status", [...ACTIVE_STATUSES]),
+    client.from("node_children").select("parent_id, child_id, created_at").in("child_id", ids),
+  ]);
+  if (nodesRes.error) throw nodesRes.error;
+  const nodes = await withLastMemo(client, (nodesRes.data ?? []) as Record<string, unknown>[]);
+  return {
+    ok: true,
+    nodes,
+    next_cursor: null,
+    node_children:
+      childrenRes.error == null && Array.isArray(childrenRes.data)
+        ? childrenRes.data.map((r) => ({
+            parent_id: r.parent_id as string,
+            child_id: r.child_id as string,
+            created_at: r.created_at as string,
+          }))
+        : [],
+  };
+}
+
+/**
+ * ページモード: nodes を updated_at 降順（NULL は最後）・id 降順で limit 件返す。
+ * limit + 1 件読んで次ページの有無を判定する。last_memo はこのページの Node 分だけ引く。
+ * 走査中に更新された Node の扱いは pagination.ts を参照。
+ */
+async function fetchDashboardPage(client: DbClient, page: PageParams) {
+  let query = client
+    .from("nodes")
+    .select("*")
+    .in("status", [...ACTIVE_STATUSES])
+    .order("updated_at", { ascending: false, nullsFirst: false })
+    .order("id", { ascending: false })
+    .limit(page.limit + 1);
+  if (page.cursor) query = query.or(cursorFilter(page.cursor));
+
+  const { data, error } = await query;
+  if (error) throw error;
+
+  const rows = (data ?? []) as Record<string, unknown>[];
+  const hasMore = rows.length > page.limit;
+  const pageRows = hasMore ? rows.slice(0, page.limit) : rows;
+  const nodes = await withLastMemo(client, pageRows);
+
+  const last = pageRows[pageRows.length - 1];
+  const nextCursor =
+    hasMore && last
+      ? encodeCursor({
+          updated_at: last.updated_at == null ? null : String(last.updated_at),
+          id: String(last.id),
+        })
+      : null;
+
+  const body: Record<string, unknown> = { ok: true, nodes, next_cursor: nextCursor };
+  if (!page.cursor) {
+    // ツリー情報は 1 ページ目にだけ載せる
+    const childrenRes = await client
+      .from("node_children")
+      .select("parent_id, child_id, created_at");
+    body.node_children =
+      childrenRes.error == null && Array.isArray(childrenRes.data)
+        ? childrenRes.data.map((r) => ({
+            parent_id: r.parent_id as string,
+            child_id: r.child_id as string,
+            created_at: r.created_at as string,
+          }))
+        : [];
+  }
+  return body;
+}
+
 async function fetchDashboardWithAdmin() {
   // 3クエリを並列実行（history は nodes 取得後にフィルタしていたが、
   // limit500 + consumed_at DESC で先に取得し、メモリ内でフィルタする方が速い）
@@ -111,17 +236,37 @@ async function fetchDashboardWithAdmin() {
     }
   }
 
-  return NextResponse.json({
+  return {
     ok: true,
     trays,
     node_children: nodeChildren,
-  });
+  };
 }
 
 export async function GET(request: NextRequest) {
+  const page = parsePageParams(request.nextUrl.searchParams);
+  if (page === "invalid") {
+    return NextResponse.json(
+      { ok: false, error: "invalid limit or cursor" },
+      { status: 400 }
+    );
+  }
+  const ids = parseIdsParam(request.nextUrl.searchParams);
+  if (ids === "invalid") {
+    return NextResponse.json(
+      { ok: false, error: `ids must be 1 to ${MAX_IDS} comma-separated UUIDs` },
+      { status: 400 }
+    );
+  }
+
   if (isObserverToken(request)) {
     try {
-      return await fetchDashboardWithAdmin();
+      const body = ids
+        ? await fetchDashboardNodes(supabaseAdmin, ids)
+        : page
+          ? await fetchDashboardPage(supabaseAdmin, page)
+          : await fetchDashboardWithAdmin();
+      return jsonWithEtag(request, body);
     } catch (e: unknown) {
       const message = e instanceof Error ? e.message : "unknown error";
       return NextResponse.json(
@@ -136,6 +281,9 @@ export async function GET(request: NextRequest) {
     return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
   }
   try {
+    if (ids) return jsonWithEtag(request, await fetchDashboardNodes(supabase, ids));
+    if (page) return jsonWithEtag(request, await fetchDashboardPage(supabase, page));
+
     // 3クエリを並列実行（RLS がユーザーの nodes に自動フィルタするので nodeId IN 不要）
     const [nodesRes, childrenRes, historyRes] = await Promise.all([
       supabase
@@ -215,7 +363,7 @@ export async function GET(request: NextRequest) {
       }
     }
 
-    return NextResponse.json({
+    return jsonWithEtag(request, {
       ok: true,
       trays,
       node_children: nodeChildren,
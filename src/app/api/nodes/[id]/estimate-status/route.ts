@@ -34,9 +34,9 @@ import {
   isValidStatus,
   isValidTransition,
   getValidTransitions,
-  estimateStatusFromIntent,
   STATUS_LABELS,
 } from "@/lib/stateMachine";
+import { buildPreview } from "@/lib/estimatePreview";
 
 // ─── source のバリデーションと禁止リスト ────────────────────
 // 18_Skill_Governance.md §3.1 / §3.3
@@ -288,29 +288,7 @@ export async function POST(
     //    DB への副作用なし。候補を返すだけ。
     // ──────────────────────────────────────────────
     if (confirmStatus === undefined || confirmStatus === null) {
-      const estimation = intent
-        ? estimateStatusFromIntent(currentStatus, intent)
-        : { suggested: null, reason: "入力がありません" };
-
-      const candidates = getValidTransitions(currentStatus).map((s) => ({
-        status: s,
-        label: STATUS_LABELS[s],
-      }));
-
-      return NextResponse.json({
-        ok: true,
-        applied: false,
-        current_status: currentStatus,
-        current_label: STATUS_LABELS[currentStatus],
-        suggested: estimation.suggested
-          ? {
-              status: estimation.suggested,
-              label: STATUS_LABELS[estimation.suggested],
-              reason: estimation.reason,
-            }
-          : null,
-        candidates,
-      });
+      return NextResponse.json(buildPreview(currentStatus, intent));
     }
 
     // ──────────────────────────────────────────────
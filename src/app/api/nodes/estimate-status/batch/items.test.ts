@@ -0,0 +1,39 @@
+/**
+ * estimate-status batch の入力解釈の単体テスト。
+ */
+
+import { describe, it, expect } from "vitest";
+import { MAX_BATCH_ITEMS, parseBatchItems } from "./items";
+
+const ID1 = "550e8400-e29b-41d4-a716-446655440001";
+const ID2 = "550e8400-e29b-41d4-a716-446655440002";
+
+describe("parseBatchItems", () => {
+  it("items が無い・空・上限超過は全体エラー（文字列）", () => {
+    expect(typeof parseBatchItems(null)).toBe("string");
+    expect(typeof parseBatchItems({})).toBe("string");
+    expect(typeof parseBatchItems({ items: [] })).toBe("string");
+    const many = Array.from({ length: MAX_BATCH_ITEMS + 1 }, () => ({ node_id: ID1, intent: "" }));
+    expect(typeof parseBatchItems({ items: many })).toBe("string");
+  });
+
+  it("順序を保ち、intent は trim する", () => {
+    expect(
+      parseBatchItems({ items: [{ node_id: ID2, intent: "  返信待ち " }, { node_id: ID1 }] })
+    ).toEqual([
+      { ok: true, node_id: ID2, intent: "返信待ち" },
+      { ok: true, node_id: ID1, intent: "" },
+    ]);
+  });
+
+  it("不正な要素はその要素だけエラー", () => {
+    const out = parseBatchItems({
+      items: [{ node_id: "nope", intent: "x" }, { node_id: ID1, intent: "x", confirm_status: "DONE" }, { node_id: ID2 }],
+    });
+    expect(out).toEqual([
+      { ok: false, node_id: "nope", error: "node_id must be a valid UUID" },
+      { ok: false, node_id: ID1, error: "confirm_status is not allowed in batch (preview only)" },
+      { ok: true, node_id: ID2, intent: "" },
+    ]);
+  });
+});
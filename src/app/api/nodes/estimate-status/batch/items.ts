@@ -0,0 +1,40 @@
+/**
+ * POST /api/nodes/estimate-status/batch の入力解釈
+ *
+ * body: { items: [{ node_id, intent }] }（1〜MAX_BATCH_ITEMS 件）
+ * 要素ごとの不正（node_id 不正など）は全体を 400 にせず、その要素だけエラーにする。
+ */
+
+export const MAX_BATCH_ITEMS = 200;
+
+const UUID_RE =
+  /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+export type BatchItem =
+  | { ok: true; node_id: string; intent: string }
+  | { ok: false; node_id: unknown; error: string };
+
+/** body を要素の配列に。items が配列でない・空・上限超過なら文字列（400 のエラー文）。 */
+export function parseBatchItems(body: unknown): BatchItem[] | string {
+  if (!body || typeof body !== "object") return "invalid JSON";
+  const items = (body as { items?: unknown }).items;
+  if (!Array.isArray(items) || items.length === 0) {
+    return "items must be a non-empty array";
+  }
+  if (items.length > MAX_BATCH_ITEMS) {
+    return `too many items: ${items.length} (max ${MAX_BATCH_ITEMS})`;
+  }
+  return items.map((raw): BatchItem => {
+    const item = raw && typeof raw === "object" ? (raw as Record<string, unknown>) : {};
+    const nodeId = item.node_id;
+    if (typeof nodeId !== "string" || !UUID_RE.test(nodeId)) {
+      return { ok: false, node_id: nodeId ?? null, error: "node_id must be a valid UUID" };
+    }
+    if ("confirm_status" in item) {
+      // batch は Preview 専用。Apply は単体 API と Confirmation を通す（18 §3.3）
+      return { ok: false, node_id: nodeId, error: "confirm_status is not allowed in batch (preview only)" };
+    }
+    const intent = typeof item.intent === "string" ? item.intent.trim() : "";
+    return { ok: true, node_id: nodeId, intent };
+  });
+}
@@ -0,0 +1,98 @@
+/**
+ * POST /api/nodes/estimate-status/batch
+ *
+ * estimate-status の Preview を複数 Node 分まとめて返す（Observer の Step 2 用）。
+ * 単体 API を N 回呼ぶと認証と nodes 取得が N 回走るため、1 リクエスト・1 クエリにまとめる。
+ *
+ * body:     { items: [{ node_id, intent }] }（最大 MAX_BATCH_ITEMS 件）
+ * response: { ok: true, results: [...] }（items と同じ順序）
+ *   成功: { node_id, ok: true, applied: false, current_status, current_label, suggested, candidates }
+ *         （単体 Preview と同じ形 + node_id）
+ *   失敗: { node_id, ok: false, status, error }（その要素だけ。status は単体 API なら返した HTTP status）
+ *
+ * Preview 専用。confirm_status を含む要素はエラーにする（Apply は単体 API と Confirmation を通す）。
+ *
+ * 認証: セッション（RLS で自分の Node のみ）または Authorization: Bearer OBSERVER_TOKEN（全ユーザー分）。
+ *
+ * Based on:
+ *   09_API_Contract.md §7         — estimate-status の Preview
+ *   17_Skill_EstimateStatus.md    — Preview の応答形
+ *   25_Boundary_NextJS_PythonAgent.md — Observer は HTTP で Skill を呼ぶ
+ */
+
+import { NextRequest, NextResponse } from "next/server";
+import { getSupabaseAndUser } from "@/lib/supabase/server";
+import { supabaseAdmin } from "@/lib/supabase";
+import { isValidStatus } from "@/lib/stateMachine";
+import { buildPreview } from "@/lib/estimatePreview";
+import { parseBatchItems } from "./items";
+
+function isObserverToken(request: NextRequest): boolean {
+  const expected = process.env.OBSERVER_TOKEN;
+  if (!expected) return false;
+  const auth = request.headers.get("authorization");
+  const token = auth?.startsWith("Bearer ") ? auth.slice(7) : null;
+  return token === expected;
+}
+
+type DbClient = { from: (table: string) => ReturnType<typeof supabaseAdmin.from> };
+
+async function previewBatch(client: DbClient, body: unknown) {
+  const items = parseBatchItems(body);
+  if (typeof items === "string") {
+    return NextResponse.json({ ok: false, error: items }, { status: 400 });
+  }
+
+  const ids = [...new Set(items.flatMap((it) => (it.ok ? [it.node_id] : [])))];
+  const statusById = new Map<string, unknown>();
+  if (ids.length > 0) {
+    const { data, error } = await client.from("nodes").select("id, status").in("id", ids);
+    if (error) throw error;
+    for (const row of data ?? []) statusById.set(row.id as string, row.status);
+  }
+
+  const results = items.map((it) => {
+    if (!it.ok) {
+      return { node_id: it.node_id, ok: false, status: 400, error: it.error };
+    }
+    if (!statusById.has(it.node_id)) {
+      return { node_id: it.node_id, ok: false, status: 404, error: "node not found" };
+    }
+    const currentStatus = statusById.get(it.node_id);
+    if (!isValidStatus(currentStatus)) {
+      return {
+        node_id: it.node_id,
+        ok: false,
+        status: 500,
+        error: `current status "${currentStatus}" is not recognised by State Machine`,
+      };
+    }
+    return { node_id: it.node_id, ...buildPreview(currentStatus, it.intent) };
+  });
+
+  return NextResponse.json({ ok: true, results });
+}
+
+export async function POST(request: NextRequest) {
+  const body = await request.json().catch(() => null);
+
+  if (isObserverToken(request)) {
+    try {
+      return await previewBatch(supabaseAdmin, body);
+    } catch (e: unknown) {
+      const message = e instanceof Error ? e.message : "unknown error";
+      return NextResponse.json({ ok: false, error: message }, { status: 500 });
+    }
+  }
+
+  const { supabase, user } = await getSupabaseAndUser();
+  if (!user) {
+    return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+  }
+  try {
+    return await previewBatch(supabase, body);
+  } catch (e: unknown) {
+    const message = e instanceof Error ? e.message : "unknown error";
+    return NextResponse.json({ ok: false, error: message }, { status: 500 });
+  }
+}
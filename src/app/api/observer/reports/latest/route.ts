@@ -4,6 +4,13 @@
  * 最新の ObserverReport を 1 件返す。
  * 認証: Bearer OBSERVER_TOKEN（CI/本番スモーク用）またはセッション（ダッシュボード用）。
  *
+ * テナント別レポート（observer_reports.user_id。main.py --per-tenant）:
+ *   Bearer: ?user_id=<uuid> ならそのテナントの最新、なければ全体レポート（user_id IS NULL）の最新。
+ *   セッション: 自分のテナント別レポートがあればその最新、なければ全体レポートの最新。
+ *
+ * ?view=hash（Bearer のみ。main.py --compact の healthcheck 用）:
+ *   payload を返さず report_id / created_at / node_count / user_id / content_hash だけを返す。
+ *
  * Based on:
  *   19_SubAgent_Observer.md §4.2 — ObserverReport 型
  *   19 §6 — 人間 UI との関係
@@ -14,10 +21,19 @@ import { getSupabaseAndUser } from "@/lib/supabase/server";
 import { supabaseAdmin } from "@/lib/supabase";
 import { getBearerToken } from "../route";
 
-async function fetchLatestReport(supabase: { from: (table: string) => ReturnType<typeof supabaseAdmin.from> }) {
-  const { data, error } = await supabase
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const FULL_COLUMNS = "report_id, created_at, generated_by, payload, node_count, source, received_at, user_id, content_hash";
+const HASH_COLUMNS = "report_id, created_at, node_count, user_id, content_hash";
+
+async function fetchLatestReport(
+  supabase: { from: (table: string) => ReturnType<typeof supabaseAdmin.from> },
+  userId: string | null = null,
+  columns: string = FULL_COLUMNS
+) {
+  const query = supabase
     .from("observer_reports")
-    .select("report_id, created_at, generated_by, payload, node_count, source, received_at")
+    .select(columns);
+  const { data, error } = await (userId ? query.eq("user_id", userId) : query.is("user_id", null))
     .order("created_at", { ascending: false })
     .limit(1)
     .single();
@@ -48,8 +64,13 @@ export async function GET(req: NextRequest) {
     token === expectedToken;
 
   if (bearerValid) {
+    const userId = req.nextUrl.searchParams.get("user_id");
+    if (userId && !UUID_RE.test(userId)) {
+      return NextResponse.json({ ok: false, error: "user_id must be a UUID" }, { status: 400 });
+    }
+    const columns = req.nextUrl.searchParams.get("view") === "hash" ? HASH_COLUMNS : FULL_COLUMNS;
     try {
-      return await fetchLatestReport(supabaseAdmin);
+      return await fetchLatestReport(supabaseAdmin, userId, columns);
     } catch (e: unknown) {
       const message = e instanceof Error ? e.message : "unknown error";
       return NextResponse.json(
@@ -64,7 +85,12 @@ export async function GET(req: NextRequest) {
     return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
   }
   try {
-    return await fetchLatestReport(supabase);
+    const own = await supabase
+      .from("observer_reports")
+      .select("report_id")
+      .eq("user_id", user.id)
+      .limit(1);
+    return await fetchLatestReport(supabase, own.data && own.data.length > 0 ? user.id : null);
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : "unknown error";
     return NextResponse.json(
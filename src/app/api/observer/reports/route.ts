@@ -16,17 +16,27 @@
  *     payload: ObserverReport (JSON),
  *     generated_by?: string,
  *     source_commit?: string,
- *     node_count?: number
+ *     node_count?: number,
+ *     user_id?: string,     // テナント別レポート（main.py --per-tenant）。省略時は全体レポート
+ *     content_hash?: string // 送り手が計算した内容ハッシュ。保存するレポートと違えば 409（保存しない）
  *   }
+ *   main.py --compact:
+ *     Content-Encoding: gzip の本文を受け付ける。
+ *     payload の代わりに delta + base: { report_id, content_hash } で、前回保存したレポートとの差分を送れる
+ *     （src/lib/observerReportCodec.ts）。base が同じテナントの保存済みレポートでない・内容が違えば
+ *     409 code=DELTA_BASE_MISMATCH（送り手は payload 全体で送り直す）。
  *
  * Response:
- *   { ok: true, report_id: string, created_at: string }
+ *   { ok: true, report_id: string, created_at: string, content_hash: string }
  */
 
+import { gunzipSync } from "node:zlib";
 import { NextRequest, NextResponse } from "next/server";
 import { supabaseAdmin } from "@/lib/supabase";
+import { applyReportDelta, contentHash, type ReportDelta } from "@/lib/observerReportCodec";
 
 const OBSERVER_SOURCE = "observer_python";
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
 
 export function getBearerToken(req: NextRequest): string | null {
   const auth = req.headers.get("authorization");
@@ -36,6 +46,23 @@ export function getBearerToken(req: NextRequest): string | null {
   return trimmed.slice(7).trim() || null;
 }
 
+/** JSON 本文を読む（Content-Encoding: gzip なら展開する）。読めなければ null。 */
+async function readJsonBody(req: NextRequest) {
+  if ((req.headers.get("content-encoding") ?? "").toLowerCase() !== "gzip") {
+    return req.json().catch(() => null);
+  }
+  try {
+    const raw = gunzipSync(Buffer.from(await req.arrayBuffer()));
+    return JSON.parse(raw.toString("utf8"));
+  } catch {
+    return null;
+  }
+}
+
+function conflict(code: string, error: string) {
+  return NextResponse.json({ ok: false, code, error }, { status: 409 });
+}
+
 export async function POST(req: NextRequest) {
   try {
     const expectedToken = process.env.OBSERVER_TOKEN;
@@ -54,7 +81,7 @@ export async function POST(req: NextRequest) {
       );
     }
 
-    const body = await req.json().catch(() => null);
+    const body = await readJsonBody(req);
     if (!body || typeof body !== "object") {
       return NextResponse.json(
         { ok: false, error: "invalid JSON" },
@@ -62,7 +89,50 @@ export async function POST(req: NextRequest) {
       );
     }
 
-    const payload = body.payload;
+    if (body.user_id != null && (typeof body.user_id !== "string" || !UUID_RE.test(body.user_id))) {
+      return NextResponse.json(
+        { ok: false, error: "user_id must be a UUID" },
+        { status: 400 }
+      );
+    }
+    const userId: string | null = body.user_id ?? null;
+
+    let payload = body.payload;
+    if (body.delta && typeof body.delta === "object") {
+      const baseId = body.base?.report_id;
+      if (typeof baseId !== "string" || !UUID_RE.test(baseId)) {
+        return NextResponse.json(
+          { ok: false, error: "base.report_id must be a UUID" },
+          { status: 400 }
+        );
+      }
+      const { data: baseRow, error: baseError } = await supabaseAdmin
+        .from("observer_reports")
+        .select("payload, content_hash, user_id")
+        .eq("report_id", baseId)
+        .maybeSingle();
+      if (baseError) {
+        return NextResponse.json(
+          { ok: false, error: baseError.message },
+          { status: 500 }
+        );
+      }
+      if (!baseRow || (baseRow.user_id ?? null) !== userId) {
+        return conflict("DELTA_BASE_MISMATCH", "base report not found");
+      }
+      const baseHash = baseRow.content_hash ?? contentHash(baseRow.payload);
+      if (baseHash !== body.base?.content_hash) {
+        return conflict("DELTA_BASE_MISMATCH", "base report content differs");
+      }
+      try {
+        payload = applyReportDelta(baseRow.payload, body.delta as ReportDelta);
+      } catch (e: unknown) {
+        return NextResponse.json(
+          { ok: false, error: e instanceof Error ? e.message : "invalid delta" },
+          { status: 400 }
+        );
+      }
+    }
     if (!payload || typeof payload !== "object") {
       return NextResponse.json(
         { ok: false, error: "payload (ObserverReport JSON) is required" },
@@ -94,6 +164,10 @@ export async function POST(req: NextRequest) {
         : null;
     const nodeCount =
       typeof body.node_count === "number" ? body.node_count : 0;
+    const hash = contentHash(payloadToStore);
+    if (typeof body.content_hash === "string" && body.content_hash !== hash) {
+      return conflict("CONTENT_HASH_MISMATCH", "content_hash does not match the reconstructed payload");
+    }
 
     const { data, error } = await supabaseAdmin
       .from("observer_reports")
@@ -104,6 +178,8 @@ export async function POST(req: NextRequest) {
         node_count: nodeCount,
         source: OBSERVER_SOURCE,
         received_at: receivedAt,
+        user_id: userId,
+        content_hash: hash,
       })
       .select("report_id, created_at")
       .single();
@@ -119,6 +195,7 @@ export async function POST(req: NextRequest) {
       ok: true,
       report_id: data.report_id,
       created_at: data.created_at,
+      content_hash: hash,
     });
   } catch (e: unknown) {
     const message = e instanceof Error ? e.message : "unknown error";
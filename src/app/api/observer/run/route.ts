@@ -1,29 +1,138 @@
 /**
- * POST /api/observer/run
+ * /api/observer/run — Observer の差分観測の依頼（main.py --daemon --watch）
  *
- * Observer 実行の「トリガー入口」（将来用）。
+ * Observer は外部（Python CLI / cron / 常駐）で動作し、結果を POST /api/observer/reports に送信する。
+ * このエンドポイントは「Node が変わった」という通知を observer_run_requests に積み、
+ * 常駐している Observer がそれを読んで、変わった Node（と親）だけを観測し直してレポートを保存する。
  *
- * 現時点では Observer は外部（Python CLI / cron）で動作し、
- * 結果を POST /api/observer/reports に送信する。
- * この /run エンドポイントは将来の実行トリガー用に予約する。
+ * POST（依頼を積む）: Bearer OBSERVER_TOKEN またはセッション
+ *   Request:  { node_ids?: string[] }   // 省略・空なら全件観測の依頼（Observer token のみ）
+ *   Response: 202 { ok: true, request_id: number, node_count: number }
+ *   セッションからの依頼は自分の Node（nodes.user_id = user.id）だけを積み、1 つもなければ 404。
+ *   全件観測は全テナント分の Preview になるので、セッションからは依頼できない（403。全件観測は --interval ごとに行われる）。
  *
- * 想定される将来の利用:
- *   - Vercel Cron Job からの呼び出し
- *   - ダッシュボードの「今すぐ観測」ボタン
- *   - MCP ツールからの呼び出し
+ * GET（Observer が読む）: Bearer OBSERVER_TOKEN のみ
+ *   ?after=<id>&limit=N → { ok: true, requests: [{ id, node_ids, created_at }], cursor }（id 昇順）
+ *   after なし → { ok: true, requests: [], cursor: 最新の id }（起動時に過去の依頼を読み飛ばす）
+ *   after あり → id が after 以下（読み終えた）で RUN_REQUEST_RETENTION_HOURS より古い行を消す（保持期間）
  *
- * 現在の運用フロー:
- *   1. 外部で python agent/observer/main.py を実行
- *   2. 出力された ObserverReport を POST /api/observer/reports に送信
- *   3. ダッシュボードが GET /api/observer/reports/latest で取得・表示
+ * 入力の解釈は src/lib/observerRunQueue.ts。
  */
 
-import { NextResponse } from "next/server";
+import { NextRequest, NextResponse } from "next/server";
+import { getSupabaseAndUser } from "@/lib/supabase/server";
+import { supabaseAdmin } from "@/lib/supabase";
+import { ownedNodeIds, parsePollParams, parseRunRequestBody, retentionCutoff } from "@/lib/observerRunQueue";
+import { getBearerToken } from "../reports/route";
 
-export async function POST() {
-  return NextResponse.json({
-    ok: false,
-    error: "Not implemented. Observer runs externally and POSTs results to /api/observer/reports. See docs/26_Agent_Observer_MVP.md §3.",
-    hint: "Run: python agent/observer/main.py | curl -X POST /api/observer/reports -d @-",
-  }, { status: 501 });
+function isObserverToken(req: NextRequest): boolean {
+  const token = getBearerToken(req);
+  const expected = process.env.OBSERVER_TOKEN;
+  return !!token && !!expected && expected.length >= 16 && token === expected;
+}
+
+export async function POST(req: NextRequest) {
+  let session: Awaited<ReturnType<typeof getSupabaseAndUser>> | null = null;
+  if (!isObserverToken(req)) {
+    session = await getSupabaseAndUser();
+    if (!session.user) {
+      return NextResponse.json({ ok: false, error: "unauthorized" }, { status: 401 });
+    }
+  }
+
+  const text = await req.text();
+  let body: unknown = null;
+  if (text.trim()) {
+    try {
+      body = JSON.parse(text);
+    } catch {
+      return NextResponse.json({ ok: false, error: "invalid JSON" }, { status: 400 });
+    }
+  }
+  const parsed = parseRunRequestBody(body);
+  if ("error" in parsed) {
+    return NextResponse.json({ ok: false, error: parsed.error }, { status: 400 });
+  }
+
+  let nodeIds = parsed.nodeIds;
+  let requestedBy: string | null = null;
+  if (session?.user) {
+    if (nodeIds.length === 0) {
+      return NextResponse.json(
+        { ok: false, error: "full runs require the observer token; pass node_ids" },
+        { status: 403 }
+      );
+    }
+    // セッションの client（RLS）と user_id の両方で自分の Node に絞る
+    const { data: owned, error: ownedError } = await session.supabase
+      .from("nodes")
+      .select("id")
+      .eq("user_id", session.user.id)
+      .in("id", nodeIds);
+    if (ownedError) {
+      return NextResponse.json({ ok: false, error: ownedError.message }, { status: 500 });
+    }
+    nodeIds = ownedNodeIds(nodeIds, (owned ?? []).map((row) => row.id as string));
+    if (nodeIds.length === 0) {
+      return NextResponse.json({ ok: false, error: "node not found" }, { status: 404 });
+    }
+    requestedBy = session.user.id;
+  }
+
+  const { data, error } = await supabaseAdmin
+    .from("observer_run_requests")
+    .insert({ node_ids: nodeIds, requested_by: requestedBy })
+    .select("id")
+    .single();
+  if (error) {
+    return NextResponse.json({ ok: false, error: error.message }, { status: 500 });
+  }
+  return NextResponse.json(
+    { ok: true, request_id: data.id, node_count: nodeIds.length },
+    { status: 202 }
+  );
+}
+
+export async function GET(req: NextRequest) {
+  if (!isObserverToken(req)) {
+    return NextResponse.json({ ok: false, error: "unauthorized" }, { status: 401 });
+  }
+  const poll = parsePollParams(req.nextUrl.searchParams);
+  if (poll === "invalid") {
+    return NextResponse.json({ ok: false, error: "invalid after or limit" }, { status: 400 });
+  }
+
+  try {
+    if (poll.after === null) {
+      const { data, error } = await supabaseAdmin
+        .from("observer_run_requests")
+        .select("id")
+        .order("id", { ascending: false })
+        .limit(1);
+      if (error) throw error;
+      return NextResponse.json({ ok: true, requests: [], cursor: data?.[0]?.id ?? 0 });
+    }
+    const { data, error } = await supabaseAdmin
+      .from("observer_run_requests")
+      .select("id, node_ids, created_at")
+      .gt("id", poll.after)
+      .order("id", { ascending: true })
+      .limit(poll.limit);
+    if (error) throw error;
+    // 保持期間: 読み終えた古い行を消す。失敗しても読み出しは返す（次の GET でまた消す）
+    await supabaseAdmin
+      .from("observer_run_requests")
+      .delete()
+      .lte("id", poll.after)
+      .lt("created_at", retentionCutoff(new Date()));
+    const requests = data ?? [];
+    return NextResponse.json({
+      ok: true,
+      requests,
+      cursor: requests.length > 0 ? requests[requests.length - 1].id : poll.after,
+    });
+  } catch (e: unknown) {
+    const message = e instanceof Error ? e.message : "unknown error";
+    return NextResponse.json({ ok: false, error: message }, { status: 500 });
+  }
 }
@@ -0,0 +1,40 @@
+/**
+ * estimate-status Preview の応答本文（09_API_Contract.md §7 / 17_Skill_EstimateStatus.md）
+ *
+ * 単体 POST /api/nodes/{id}/estimate-status と
+ * 一括 POST /api/nodes/estimate-status/batch で同じ形を返すために共有する。
+ * DB への副作用なし。
+ */
+
+import {
+  type Status,
+  estimateStatusFromIntent,
+  getValidTransitions,
+  STATUS_LABELS,
+} from "@/lib/stateMachine";
+
+export function buildPreview(currentStatus: Status, intent: string) {
+  const estimation = intent
+    ? estimateStatusFromIntent(currentStatus, intent)
+    : { suggested: null, reason: "入力がありません" };
+
+  const candidates = getValidTransitions(currentStatus).map((s) => ({
+    status: s,
+    label: STATUS_LABELS[s],
+  }));
+
+  return {
+    ok: true as const,
+    applied: false as const,
+    current_status: currentStatus,
+    current_label: STATUS_LABELS[currentStatus],
+    suggested: estimation.suggested
+      ? {
+          status: estimation.suggested,
+          label: STATUS_LABELS[estimation.suggested],
+          reason: estimation.reason,
+        }
+      : null,
+    candidates,
+  };
+}
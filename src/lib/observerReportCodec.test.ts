@@ -0,0 +1,71 @@
+/**
+ * observerReportCodec: Python 側（agent/observer/report_codec.py）と同じハッシュ・差分になることの回帰防止。
+ */
+
+import { describe, it, expect } from "vitest";
+import { applyReportDelta, canonicalJson, contentHash } from "./observerReportCodec";
+
+// report_codec.content_hash() で求めた値（Python 側の数値・文字列の書き方を変えたらここも変わる）
+const FIXTURE = {
+  summary: '観測: 3 件\n"引用"',
+  node_count: 3,
+  meta: { timing: { total_ms: 12.0, spans_ms: { preview: 0.00001, save: 1.5e-7, x: 123.456 } } },
+  status_proposals: [
+    { node_id: "a", score: 1.0 },
+    { node_id: "b", flag: true, z: null },
+  ],
+  warnings: [],
+};
+const FIXTURE_HASH = "8e11b6e002c216085cdbf85645e73ea8465474822b72666963954fecbb9b9795";
+
+describe("canonicalJson / contentHash", () => {
+  it("キーを昇順に並べ、空白を入れない", () => {
+    expect(canonicalJson({ b: 1, a: [1, { d: null, c: "x" }] })).toBe('{"a":[1,{"c":"x","d":null}],"b":1}');
+  });
+
+  it("Python の content_hash と一致する", () => {
+    expect(contentHash(FIXTURE)).toBe(FIXTURE_HASH);
+  });
+
+  it("キーの順序に依存しない", () => {
+    const reordered = {
+      warnings: [],
+      status_proposals: FIXTURE.status_proposals,
+      node_count: 3,
+      meta: FIXTURE.meta,
+      summary: FIXTURE.summary,
+    };
+    expect(contentHash(reordered)).toBe(FIXTURE_HASH);
+  });
+});
+
+describe("applyReportDelta", () => {
+  const base = {
+    summary: "old",
+    gone: 1,
+    status_proposals: [{ node_id: "a" }, { node_id: "b" }, { node_id: "c" }],
+  };
+
+  it("参照・新しい要素・set / unset から復元する", () => {
+    const report = applyReportDelta(base, {
+      format: 1,
+      sections: { status_proposals: [[1, 2], { node_id: "d" }, [0, 1]] },
+      set: { summary: "new" },
+      unset: ["gone"],
+    });
+    expect(report).toEqual({
+      summary: "new",
+      status_proposals: [{ node_id: "b" }, { node_id: "c" }, { node_id: "d" }, { node_id: "a" }],
+    });
+  });
+
+  it("base の範囲外を指す参照は Error", () => {
+    expect(() =>
+      applyReportDelta(base, { format: 1, sections: { status_proposals: [[2, 2]] } })
+    ).toThrow(/out of range/);
+  });
+
+  it("未知の format は Error", () => {
+    expect(() => applyReportDelta(base, { format: 2 })).toThrow(/unsupported/);
+  });
+});
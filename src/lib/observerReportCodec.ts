@@ -0,0 +1,74 @@
+/**
+ * ObserverReport の内容ハッシュと差分（main.py --compact。agent/observer/report_codec.py と対）
+ *
+ * contentHash: canonicalJson の SHA-256（16 進）。Python 側の content_hash() と同じ値になる。
+ *   キーは昇順・区切りの空白なし。数値と文字列は JSON.stringify の書き方（Python 側がこれに合わせる）。
+ * applyReportDelta: 前回保存したレポート（base）に差分を当てて全体を復元する。
+ *   DELTA_SECTIONS の各配列は「[開始位置, 件数] = base の同じセクションからの参照」と
+ *   「そのまま入る要素（object）」の列。それ以外のキーは set / unset で置き換える。
+ */
+
+import { createHash } from "node:crypto";
+
+export const DELTA_SECTIONS = ["status_proposals", "cooling_alerts", "suggested_next_ranking"] as const;
+export const DELTA_FORMAT = 1;
+
+export interface ReportDelta {
+  format: number;
+  sections?: Record<string, Array<[number, number] | Record<string, unknown>>>;
+  set?: Record<string, unknown>;
+  unset?: string[];
+}
+
+export function canonicalJson(value: unknown): string {
+  if (value === null || typeof value !== "object") {
+    return JSON.stringify(value) ?? "null";
+  }
+  if (Array.isArray(value)) {
+    return `[${value.map((v) => (v === undefined ? "null" : canonicalJson(v))).join(",")}]`;
+  }
+  const obj = value as Record<string, unknown>;
+  const parts: string[] = [];
+  for (const key of Object.keys(obj).sort()) {
+    if (obj[key] === undefined) continue;
+    parts.push(`${JSON.stringify(key)}:${canonicalJson(obj[key])}`);
+  }
+  return `{${parts.join(",")}}`;
+}
+
+export function contentHash(value: unknown): string {
+  return createHash("sha256").update(canonicalJson(value), "utf8").digest("hex");
+}
+
+/** 差分の形が不正（参照が base の範囲外・未知の format）なら Error。 */
+export function applyReportDelta(
+  base: Record<string, unknown>,
+  delta: ReportDelta
+): Record<string, unknown> {
+  if (delta.format !== DELTA_FORMAT) {
+    throw new Error(`unsupported delta format: ${String(delta.format)}`);
+  }
+  const unset = new Set(delta.unset ?? []);
+  const report: Record<string, unknown> = {};
+  for (const [key, value] of Object.entries(base)) {
+    if (!unset.has(key)) report[key] = value;
+  }
+  Object.assign(report, delta.set ?? {});
+  for (const [key, ops] of Object.entries(delta.sections ?? {})) {
+    const source = Array.isArray(base[key]) ? (base[key] as unknown[]) : [];
+    const items: unknown[] = [];
+    for (const op of ops) {
+      if (Array.isArray(op)) {
+        const [start, count] = op;
+        if (!Number.isInteger(start) || !Number.isInteger(count) || start < 0 || start + count > source.length) {
+          throw new Error(`delta reference out of range: ${key}[${start}:${start + count}]`);
+        }
+        for (let i = start; i < start + count; i++) items.push(source[i]);
+      } else {
+        items.push(op);
+      }
+    }
+    report[key] = items;
+  }
+  return report;
+}
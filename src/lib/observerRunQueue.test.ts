@@ -0,0 +1,66 @@
+/**
+ * observerRunQueue: /api/observer/run の入力の解釈。
+ */
+
+import { describe, it, expect } from "vitest";
+import {
+  DEFAULT_POLL_LIMIT,
+  MAX_POLL_LIMIT,
+  MAX_RUN_NODE_IDS,
+  ownedNodeIds,
+  parsePollParams,
+  parseRunRequestBody,
+  retentionCutoff,
+} from "./observerRunQueue";
+
+const A = "550e8400-e29b-41d4-a716-446655440001";
+const B = "550e8400-e29b-41d4-a716-446655440002";
+
+describe("parseRunRequestBody", () => {
+  it("node_ids が無ければ全件観測の依頼（空配列）", () => {
+    expect(parseRunRequestBody({})).toEqual({ nodeIds: [] });
+    expect(parseRunRequestBody(null)).toEqual({ nodeIds: [] });
+  });
+
+  it("重複を除く", () => {
+    expect(parseRunRequestBody({ node_ids: [A, B, A] })).toEqual({ nodeIds: [A, B] });
+  });
+
+  it("UUID でない値・上限超・配列でない本文はエラー", () => {
+    expect(parseRunRequestBody({ node_ids: [A, "x"] })).toHaveProperty("error");
+    expect(parseRunRequestBody({ node_ids: A })).toHaveProperty("error");
+    expect(parseRunRequestBody([A])).toHaveProperty("error");
+    const many = Array.from({ length: MAX_RUN_NODE_IDS + 1 }, (_, i) => `550e8400-e29b-41d4-a716-${String(i).padStart(12, "0")}`);
+    expect(parseRunRequestBody({ node_ids: many })).toHaveProperty("error");
+  });
+});
+
+describe("ownedNodeIds", () => {
+  it("自分の Node だけを依頼の順で残す", () => {
+    expect(ownedNodeIds([B, A], [A, B])).toEqual([B, A]);
+    expect(ownedNodeIds([A, B], [B])).toEqual([B]);
+    expect(ownedNodeIds([A], [])).toEqual([]);
+  });
+});
+
+describe("retentionCutoff", () => {
+  it("now から hours 時間前の ISO 文字列", () => {
+    expect(retentionCutoff(new Date("2026-02-25T12:00:00.000Z"), 24)).toBe("2026-02-24T12:00:00.000Z");
+  });
+});
+
+describe("parsePollParams", () => {
+  it("after が無ければ null（最新 id だけを返す）", () => {
+    expect(parsePollParams(new URLSearchParams(""))).toEqual({ after: null, limit: DEFAULT_POLL_LIMIT });
+  });
+
+  it("after と limit を読み、limit は上限で丸める", () => {
+    expect(parsePollParams(new URLSearchParams("after=42&limit=100000"))).toEqual({ after: 42, limit: MAX_POLL_LIMIT });
+  });
+
+  it("不正な after / limit は invalid", () => {
+    expect(parsePollParams(new URLSearchParams("after=-1"))).toBe("invalid");
+    expect(parsePollParams(new URLSearchParams("after=abc"))).toBe("invalid");
+    expect(parsePollParams(new URLSearchParams("limit=0"))).toBe("invalid");
+  });
+});
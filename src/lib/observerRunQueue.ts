@@ -0,0 +1,67 @@
+/**
+ * POST / GET /api/observer/run（Observer の差分観測の依頼）の入力の解釈。単体テスト用に分離。
+ *
+ * POST: { node_ids?: string[] } — 変わった Node の id。省略・空なら全件観測の依頼（Observer token のみ）。
+ *       セッションからの依頼は自分の Node だけを積む（ownedNodeIds）。
+ * GET:  ?after=<id>&limit=N — Observer（main.py --watch）が after より後の依頼を id 昇順に読む。
+ *       after が無ければ依頼は返さず、今の最新 id を cursor として返す（それ以前の依頼は読まない）。
+ *       after 以下（読み終えた）で RUN_REQUEST_RETENTION_HOURS より古い行はこのとき消す。
+ */
+
+export const MAX_RUN_NODE_IDS = 500;
+export const DEFAULT_POLL_LIMIT = 100;
+export const MAX_POLL_LIMIT = 500;
+/** 読み終えた依頼を残しておく時間。Observer が複数あっても、これより遅れて読むものはない前提 */
+export const RUN_REQUEST_RETENTION_HOURS = 24;
+
+const UUID_RE = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+export type RunRequestBody = { nodeIds: string[] } | { error: string };
+
+/** POST の本文を読む。node_ids は重複を除く（順序は保つ）。 */
+export function parseRunRequestBody(body: unknown): RunRequestBody {
+  if (body == null) return { nodeIds: [] };
+  if (typeof body !== "object" || Array.isArray(body)) return { error: "body must be a JSON object" };
+  const raw = (body as { node_ids?: unknown }).node_ids;
+  if (raw == null) return { nodeIds: [] };
+  if (!Array.isArray(raw) || !raw.every((id) => typeof id === "string" && UUID_RE.test(id))) {
+    return { error: "node_ids must be an array of UUIDs" };
+  }
+  const nodeIds = [...new Set(raw as string[])];
+  if (nodeIds.length > MAX_RUN_NODE_IDS) {
+    return { error: `node_ids must have at most ${MAX_RUN_NODE_IDS} items` };
+  }
+  return { nodeIds };
+}
+
+/** 依頼された node_ids のうち owned（ユーザーの Node）に含まれるものを、依頼の順で返す。 */
+export function ownedNodeIds(requested: string[], owned: Iterable<string>): string[] {
+  const set = new Set(owned);
+  return requested.filter((id) => set.has(id));
+}
+
+/** これより古い（created_at が小さい）読み終えた依頼は消してよい。 */
+export function retentionCutoff(now: Date, hours: number = RUN_REQUEST_RETENTION_HOURS): string {
+  return new Date(now.getTime() - hours * 3600_000).toISOString();
+}
+
+export type PollParams = { after: number | null; limit: number };
+
+/** GET の ?after / ?limit を読む。不正なら "invalid"。 */
+export function parsePollParams(params: URLSearchParams): PollParams | "invalid" {
+  const rawAfter = params.get("after");
+  const rawLimit = params.get("limit");
+  let after: number | null = null;
+  if (rawAfter !== null && rawAfter !== "") {
+    const n = Number(rawAfter);
+    if (!Number.isSafeInteger(n) || n < 0) return "invalid";
+    after = n;
+  }
+  let limit = DEFAULT_POLL_LIMIT;
+  if (rawLimit !== null) {
+    const n = Number(rawLimit);
+    if (!Number.isInteger(n) || n < 1) return "invalid";
+    limit = Math.min(n, MAX_POLL_LIMIT);
+  }
+  return { after, limit };
+}
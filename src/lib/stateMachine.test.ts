@@ -0,0 +1,34 @@
+/**
+ * stateMachine: Python Observer（agent/observer/state_machine.py）とのパリティ確認。
+ * fixture は両言語で共有する。TS 側を変えたら fixture を再生成し、Python 側も合わせること。
+ */
+
+import { describe, it, expect } from "vitest";
+import fixtures from "./stateMachine.fixtures.json";
+import {
+  ALL_STATUSES,
+  type Status,
+  estimateStatusFromIntent,
+  getValidTransitions,
+} from "./stateMachine";
+
+describe("estimateStatusFromIntent（Python 版と共有する fixture）", () => {
+  it.each(fixtures.estimate)(
+    "$current_status / $intent",
+    ({ current_status, intent, suggested, reason }) => {
+      const out = estimateStatusFromIntent(current_status as Status, intent);
+      expect(out.suggested).toBe(suggested);
+      expect(out.reason).toBe(reason);
+    }
+  );
+});
+
+describe("getValidTransitions（Python 版と共有する fixture）", () => {
+  it("全 15 状態の遷移先が fixture と一致する", () => {
+    for (const s of ALL_STATUSES) {
+      expect([...getValidTransitions(s)]).toEqual(
+        (fixtures.valid_transitions as Record<string, string[]>)[s]
+      );
+    }
+  });
+});
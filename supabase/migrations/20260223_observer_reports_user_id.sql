@@ -0,0 +1,22 @@
+-- Observer のテナント別レポート（main.py --per-tenant）
+--
+-- OBSERVER_TOKEN（supabaseAdmin）で観測すると dashboard は全ユーザーの Node を返す。
+-- --per-tenant では user_id ごとにレポートを作って保存するので、observer_reports に所有者を持たせる。
+-- user_id IS NULL の行は従来どおりの全体レポート。
+
+ALTER TABLE public.observer_reports
+  ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE;
+
+COMMENT ON COLUMN public.observer_reports.user_id IS 'テナント別レポートの所有者。NULL は全体レポート。';
+
+-- latest をテナントごとに引く（GET /api/observer/reports/latest?user_id=...）
+CREATE INDEX IF NOT EXISTS idx_observer_reports_user_created
+  ON public.observer_reports (user_id, created_at DESC);
+
+-- 読み取り: 全体レポート + 自分のテナント別レポート（他人のものは見えない）。書き込みは従来どおり service_role のみ
+DROP POLICY IF EXISTS observer_reports_select_authenticated ON public.observer_reports;
+CREATE POLICY observer_reports_select_authenticated ON public.observer_reports FOR SELECT
+  USING (
+    (SELECT auth.uid()) IS NOT NULL
+    AND (user_id IS NULL OR user_id = (SELECT auth.uid()))
+  );
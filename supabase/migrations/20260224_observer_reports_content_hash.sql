@@ -0,0 +1,10 @@
+-- ObserverReport の内容ハッシュ（main.py --compact）
+--
+-- POST /api/observer/reports が保存する payload の contentHash（src/lib/observerReportCodec.ts）。
+-- Observer は保存後の healthcheck で latest の payload を読み直さず、report_id とこの値だけを突き合わせる。
+-- 差分アップロードの base の照合にも使う。この列より前の行は NULL（必要になったときに payload から計算する）。
+
+ALTER TABLE public.observer_reports
+  ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+COMMENT ON COLUMN public.observer_reports.content_hash IS 'payload の SHA-256（キー昇順の canonical JSON）。NULL はこの列の追加前の行。';
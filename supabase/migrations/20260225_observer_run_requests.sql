@@ -0,0 +1,18 @@
+-- Observer の差分観測の依頼（POST /api/observer/run → main.py --daemon --watch）
+--
+-- Node が変わったときに node_ids を 1 行ずつ積み、常駐している Observer が GET /api/observer/run?after=<id> で
+-- id の昇順に読み出して、変わった Node だけを観測し直す。node_ids が空の行は全件観測の依頼。
+-- 読み書きは service_role（supabaseAdmin）のみ。読み終えた行（id <= after）で 24 時間より古いものは GET が消す。
+
+CREATE TABLE IF NOT EXISTS public.observer_run_requests (
+  id BIGSERIAL PRIMARY KEY,
+  node_ids UUID[] NOT NULL DEFAULT '{}',
+  requested_by UUID REFERENCES auth.users(id) ON DELETE SET NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+COMMENT ON TABLE public.observer_run_requests IS 'Observer の差分観測の依頼。node_ids が空なら全件観測。';
+COMMENT ON COLUMN public.observer_run_requests.requested_by IS 'セッションから依頼したユーザー。Observer token からの依頼は NULL。';
+
+ALTER TABLE public.observer_run_requests ENABLE ROW LEVEL SECURITY;
+-- ポリシーなし: anon / authenticated からは読み書きできない（API が supabaseAdmin で扱う）